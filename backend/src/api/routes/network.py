@@ -24,6 +24,7 @@ from models.port_analysis import PortAnalysis
 from models.switch import Switch
 from services.network_data_collector import network_data_collector
 from services.network_scheduler import network_scheduler
+from services.lookup_result_cache import queue_invalidation
 from services.port_analysis_service import port_analysis_service
 from services.port_lookup_policy_service import (
     build_lookup_eligible_clause,
@@ -307,6 +308,18 @@ async def update_port_lookup_policy(
     port.lookup_policy_override = lookup_policy_override
     port.lookup_policy_note = (request.lookup_policy_note or "").strip() or None
     port.lookup_policy_updated_at = datetime.now(timezone.utc)
+    # Lookup policy feeds IP location scoring; let the incremental refresh pick the switch up
+    switch.l2_changed_at = port.lookup_policy_updated_at
+
+    port_macs = await db.execute(
+        select(MACTable.mac_address).distinct().where(
+            and_(
+                MACTable.switch_id == switch_id,
+                MACTable.port_name == port_name
+            )
+        )
+    )
+    queue_invalidation(db, switch_ids=[switch_id], macs=port_macs.scalars().all())
 
     await db.commit()
     await db.refresh(port)
@@ -111,6 +111,18 @@ async def get_collection_stats(
     duration_result = await db.execute(duration_stmt)
     avg_duration = duration_result.scalar()
 
+    # Outputs short-circuited because they matched the last stored output
+    unchanged_stmt = select(
+        func.coalesce(func.sum(CollectionJob.unchanged_outputs), 0),
+        func.count(func.distinct(CollectionJob.switch_id))
+    ).where(
+        and_(
+            CollectionJob.created_at >= since,
+            CollectionJob.unchanged_outputs > 0
+        )
+    )
+    unchanged_outputs, unchanged_switches = (await db.execute(unchanged_stmt)).one()
+
     return {
         "window_hours": hours,
         "status_counts": status_counts,
@@ -119,7 +131,9 @@ async def get_collection_stats(
             status_counts.get('success', 0) /
             sum(status_counts.values()) * 100
             if sum(status_counts.values()) > 0 else 0
-        )
+        ),
+        "unchanged_outputs": int(unchanged_outputs or 0),
+        "unchanged_switches": int(unchanged_switches or 0),
     }
 
 
@@ -19,6 +19,12 @@ from pydantic import BaseModel
 router = APIRouter(prefix="/command-templates", tags=["command-templates"])
 
 
+def _invalidate_template_caches() -> None:
+    """Make the next collection pick up edited templates immediately."""
+    from services.network_data_collector import network_data_collector
+    network_data_collector.invalidate_command_templates_cache()
+
+
 class ParserInfo(BaseModel):
     """Parser information"""
     type: str
@@ -272,6 +278,7 @@ async def create_command_template(
         db.add(new_template)
         await db.commit()
         await db.refresh(new_template)
+        _invalidate_template_caches()
 
         logger.info(f"Created command template: {template.vendor} {template.model_pattern}")
         return new_template
@@ -389,6 +396,7 @@ async def update_command_template(
     try:
         await db.commit()
         await db.refresh(template)
+        _invalidate_template_caches()
         logger.info(f"Updated command template: {template.vendor} {template.model_pattern}")
         return template
 
@@ -427,6 +435,7 @@ async def delete_command_template(
     try:
         await db.delete(template)
         await db.commit()
+        _invalidate_template_caches()
         logger.info(f"Deleted command template: {template.vendor} {template.model_pattern}")
 
     except Exception as e:
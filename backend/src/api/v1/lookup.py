@@ -1,8 +1,22 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import json
+
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from api.deps import get_db
-from schemas.lookup import IPLookupRequest, IPLookupResponse, IPLookupResult
+from core.config import settings
+from core.database import AsyncSessionLocal
+from schemas.lookup import IPLookupRequest, IPLookupResponse, IPLookupResult, IPBatchLookupRequest
 from services.ip_lookup import ip_lookup_service
+from services.lookup_topology_index import lookup_topology_index
+from services.lookup_result_cache import lookup_result_cache
+from services.lookup_write_buffer import lookup_write_buffer
+from services.lookup_single_flight import lookup_single_flight
+from services.reverse_lookup import reverse_lookup_service
+from services.port_analysis_service import port_analysis_service
+from services.mac_utils import normalize_mac_address
 from utils.logger import logger
 
 router = APIRouter(prefix="/lookup", tags=["lookup"])
@@ -19,6 +33,9 @@ async def lookup_ip_address(
     Fast query from database cache (~100ms).
     Returns data from the last collection cycle.
     Data window is configurable via IP_LOOKUP_CACHE_HOURS (default: 24 hours).
+    mode=hybrid re-verifies old or stale cached answers on that one switch within
+    IP_LOOKUP_HYBRID_BUDGET_SECONDS; mode=realtime is the same as /ip/live.
+    Concurrent requests for the same IP and mode share one lookup.
 
     This endpoint:
     1. Queries cached ARP/MAC tables from the database
@@ -28,7 +45,7 @@ async def lookup_ip_address(
         logger.info(f"Received IP lookup request for {request.ip_address}")
 
         # Perform the lookup
-        result = await ip_lookup_service.lookup_ip(db, str(request.ip_address))
+        result = await ip_lookup_service.lookup(db, str(request.ip_address), request.mode)
 
         # Convert to response format
         if result['found']:
@@ -52,3 +69,136 @@ async def lookup_ip_address(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to lookup IP address: {str(e)}"
         )
+
+
+@router.post("/ip/live", response_model=IPLookupResponse)
+async def lookup_ip_address_live(
+    request: IPLookupRequest,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Lookup an IP address by querying switches directly over SSH/CLI
+
+    Asks the switches most likely to know the IP and MAC first (subnet gateways,
+    last known location, switches carrying the VLAN) and the rest of the fleet
+    only when they miss. Slower than cache lookup but reflects the network now.
+    """
+    logger.info(f"Received live IP lookup request for {request.ip_address}")
+    result = await ip_lookup_service.lookup(db, str(request.ip_address), "realtime")
+    return IPLookupResponse(
+        success=result['found'],
+        result=IPLookupResult(**result),
+        error=None if result['found'] else result.get('message', 'IP address not found')
+    )
+
+
+@router.post("/ip/batch")
+async def lookup_ip_batch(request: IPBatchLookupRequest):
+    """
+    Lookup many IP addresses and/or CIDR networks from the database cache
+
+    Resolves IPs with set-based queries (one ARP, one MAC/port policy and one
+    same-switch MAC query per chunk) and streams one IPLookupResult per line
+    as NDJSON. Every single IP gets a line; networks only yield addresses that
+    have an ARP entry. Query history is written in one bulk insert at the end
+    unless record_history is false.
+    """
+    try:
+        ips, networks, address_count = ip_lookup_service.parse_batch_targets(request.targets)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    if address_count > settings.IP_LOOKUP_BATCH_MAX_ADDRESSES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=(
+                f"Batch covers {address_count} addresses, "
+                f"limit is {settings.IP_LOOKUP_BATCH_MAX_ADDRESSES}"
+            )
+        )
+
+    logger.info(f"Received batch IP lookup for {len(ips)} IPs and {len(networks)} networks")
+
+    async def result_stream():
+        async with AsyncSessionLocal() as db:
+            try:
+                async for result in ip_lookup_service.lookup_ips_batch(
+                    db, ips, networks, record_history=request.record_history
+                ):
+                    yield json.dumps(result, default=str, ensure_ascii=False) + "\n"
+            except Exception as e:
+                logger.error(f"Error during batch IP lookup: {str(e)}", exc_info=True)
+                yield json.dumps({'error': f"Batch lookup failed: {str(e)}"}, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(result_stream(), media_type="application/x-ndjson")
+
+
+@router.get("/port/{switch_id}")
+async def reverse_lookup_port(
+    switch_id: int,
+    port_name: str = Query(..., description="Switch port, e.g. Gi1/0/17"),
+    db: AsyncSession = Depends(get_db)
+):
+    """Everything on a switch port: MACs, the IPs ARP maps them to and their IPAM hostnames"""
+    port_name = port_analysis_service.normalize_port_name(port_name)
+    if not port_name:
+        raise HTTPException(status_code=400, detail="port_name is required")
+    return await reverse_lookup_service.lookup_port(db, switch_id, port_name)
+
+
+@router.get("/mac/{mac_address}")
+async def reverse_lookup_mac(mac_address: str, db: AsyncSession = Depends(get_db)):
+    """IPs a MAC address maps to (ARP, IPAM, past lookups) and the ports it was located on"""
+    try:
+        mac_address = normalize_mac_address(mac_address)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return await reverse_lookup_service.lookup_mac(db, mac_address)
+
+
+@router.get("/hostname/{hostname}")
+async def reverse_lookup_hostname(
+    hostname: str,
+    match: str = Query("exact", pattern="^(exact|prefix)$"),
+    limit: int = Query(100, ge=1, le=1000),
+    db: AsyncSession = Depends(get_db)
+):
+    """IPAM addresses matching a hostname, DNS name or sysName (case-insensitive) and their switch port"""
+    if not hostname.strip():
+        raise HTTPException(status_code=400, detail="hostname is required")
+    return await reverse_lookup_service.lookup_hostname(db, hostname, prefix=match == "prefix", limit=limit)
+
+
+@router.get("/vlan/{vlan_id}")
+async def reverse_lookup_vlan(
+    vlan_id: int,
+    switch_id: Optional[int] = None,
+    limit: int = Query(1000, ge=1, le=10000),
+    db: AsyncSession = Depends(get_db)
+):
+    """Endpoints (MAC, IPs, hostnames) seen in a VLAN on lookup-eligible ports"""
+    return await reverse_lookup_service.lookup_vlan(db, vlan_id, switch_id=switch_id, limit=limit)
+
+
+@router.get("/index/status")
+async def get_lookup_index_status():
+    """Status of the in-process lookup topology index (size, last build, hit/fallback counts)"""
+    return lookup_topology_index.get_status()
+
+
+@router.get("/cache/status")
+async def get_lookup_cache_status():
+    """Status of the Redis lookup result cache (hit rates for this process and the whole cluster)"""
+    return await lookup_result_cache.get_status()
+
+
+@router.get("/write-buffer/status")
+async def get_lookup_write_buffer_status():
+    """Status of the lookup history / MAC cache write-behind buffer (pending, flushed and dropped rows)"""
+    return lookup_write_buffer.get_status()
+
+
+@router.get("/single-flight/status")
+async def get_lookup_single_flight_status():
+    """In-flight lookup coalescing counters (this process)"""
+    return lookup_single_flight.get_status()
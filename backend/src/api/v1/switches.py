@@ -873,28 +873,13 @@ async def collect_switch_arp_table(
                 'entries': []
             }
 
-        # Store in database
+        # Store in database the way worker collections do, so lookup caches and
+        # incremental IP location matching see the rewrite
         now = datetime.now(timezone.utc)
-        
-        # Delete old entries for this switch
-        await db.execute(
-            ARPTable.__table__.delete().where(ARPTable.switch_id == switch_id)
-        )
-
-        # Insert new entries
-        for entry in arp_entries:
-            arp_record = ARPTable(
-                switch_id=switch_id,
-                ip_address=entry['ip_address'],
-                mac_address=entry['mac_address'],
-                vlan_id=entry.get('vlan_id'),
-                interface=entry.get('interface'),
-                age_seconds=entry.get('age_seconds'),
-                collected_at=now,
-                first_seen=now,
-                last_seen=now
-            )
-            db.add(arp_record)
+        await network_data_collector._store_arp_entries_bulk(db, switch_id, arp_entries, now)
+        # No output hash was captured here: the next worker collection must parse
+        switch.last_arp_output_hash = None
+        switch.l2_changed_at = now
 
         await db.commit()
 
@@ -991,27 +976,13 @@ async def collect_switch_mac_table(
                 'entries': []
             }
 
-        # Store in database
+        # Store in database the way worker collections do, so lookup caches and
+        # incremental IP location matching see the rewrite
         now = datetime.now(timezone.utc)
-        
-        # Delete old entries for this switch
-        await db.execute(
-            MACTable.__table__.delete().where(MACTable.switch_id == switch_id)
-        )
-
-        # Insert new entries
-        for entry in mac_entries:
-            mac_record = MACTable(
-                switch_id=switch_id,
-                mac_address=entry['mac_address'],
-                port_name=entry['port_name'],
-                vlan_id=entry.get('vlan_id'),
-                is_dynamic=entry.get('is_dynamic', 1),
-                collected_at=now,
-                first_seen=now,
-                last_seen=now
-            )
-            db.add(mac_record)
+        await network_data_collector._store_mac_entries_bulk(db, switch_id, mac_entries, now)
+        # No output hash was captured here: the next worker collection must parse
+        switch.last_mac_output_hash = None
+        switch.l2_changed_at = now
 
         await db.commit()
 
@@ -41,6 +41,8 @@ class Settings(BaseSettings):
     REDIS_PASSWORD: str = ""
     REDIS_CACHE_TTL: int = 300
     REDIS_ENABLED: bool = True
+    REDIS_SOCKET_TIMEOUT_SECONDS: float = 0.5
+    REDIS_RETRY_SECONDS: int = 30  # Bypass Redis this long after an error
 
     @property
     def REDIS_URL(self) -> str:
@@ -59,6 +61,30 @@ class Settings(BaseSettings):
     ALARM_RETENTION_DAYS: int = 30
     COLLECTION_JOB_RETENTION_DAYS: int = 30
     COLLECTION_JOB_CLEANUP_BATCH_SIZE: int = 10000
+    ARP_MAC_RETENTION_DAYS: int = 7
+    # arp_table / mac_table / ip_scan_history are daily range partitions after
+    # migration 021: retention drops whole partitions, premake keeps N days ahead.
+    PARTITION_PREMAKE_DAYS: int = 7
+    PARTITION_RETENTION_DETACH_ONLY: bool = False  # Detach expired partitions instead of dropping them
+    # Worker jobs skip parse/store/port analysis when a switch's ARP/MAC output
+    # is identical to the last stored one and only refresh timestamps.
+    COLLECTION_SKIP_UNCHANGED_OUTPUT: bool = True
+    # Unchanged rows are re-stamped (last_seen, the partition key) only once they
+    # are this old; keep it below the shortest lookup window (1 hour).
+    COLLECTION_UNCHANGED_RESTAMP_MINUTES: int = 30
+    # Score IP locations with the NumPy engine when numpy is installed
+    IP_LOCATION_VECTORIZED: bool = True
+    # Periodic IP location refresh; incremental runs only re-score IPs that
+    # depend on switches whose ARP/MAC data or port policy changed.
+    IP_LOCATION_REFRESH_INTERVAL_MINUTES: int = 10
+    IP_LOCATION_INCREMENTAL: bool = True
+
+    # Raw CLI output archive (opt-in): keeps compressed ARP/MAC command output
+    # so tables can be rebuilt offline after a parser fix.
+    RAW_OUTPUT_ARCHIVE_ENABLED: bool = False
+    RAW_OUTPUT_ARCHIVE_COMPRESSION: str = "gzip"  # gzip or zstd (needs the zstandard package)
+    RAW_OUTPUT_ARCHIVE_RETENTION_DAYS: int = 14
+    RAW_OUTPUT_ARCHIVE_MAX_PER_SWITCH: int = 50  # Captures kept per switch and command type
 
     # IPAM Settings
     IPAM_OFFLINE_THRESHOLD_HOURS: int = 6  # Hours without response before marking as offline
@@ -84,6 +110,33 @@ class Settings(BaseSettings):
         le=168,  # Maximum 7 days (aligned with data retention period)
         description="IP Lookup cache mode query window in hours"
     )
+    # Batch lookup (/lookup/ip/batch): max addresses per request (IPs plus CIDR sizes)
+    # and IPs resolved per set-based query round
+    IP_LOOKUP_BATCH_MAX_ADDRESSES: int = 65536
+    IP_LOOKUP_BATCH_CHUNK_SIZE: int = 5000
+    # Live switch queries: give up waiting after this many seconds and return partial results
+    IP_LOOKUP_LIVE_DEADLINE_SECONDS: float = 15.0
+    # Live lookups ask at most this many candidate switches per stage before querying the fleet
+    IP_LOOKUP_LIVE_MAX_CANDIDATES: int = 16
+    # Hybrid lookups re-verify cached answers older than this (or on stale switches) on the switch itself,
+    # spending at most IP_LOOKUP_HYBRID_BUDGET_SECONDS per lookup
+    IP_LOOKUP_HYBRID_MAX_AGE_SECONDS: int = 900
+    IP_LOOKUP_HYBRID_BUDGET_SECONDS: float = 3.0
+    # In-process topology index for cache mode lookups (see lookup_topology_index)
+    LOOKUP_TOPOLOGY_INDEX_ENABLED: bool = False
+    LOOKUP_TOPOLOGY_INDEX_REFRESH_SECONDS: int = 30
+    # Write-behind buffer for lookup query history and MAC cache rows (see lookup_write_buffer)
+    LOOKUP_WRITE_BUFFER_ENABLED: bool = True
+    LOOKUP_WRITE_BUFFER_FLUSH_SECONDS: float = 1.0
+    LOOKUP_WRITE_BUFFER_BATCH_SIZE: int = 500  # Flush early once this many rows are pending
+    LOOKUP_WRITE_BUFFER_MAX_ROWS: int = 20000
+    LOOKUP_WRITE_BUFFER_OVERFLOW: str = "drop_oldest"  # drop_oldest, drop_newest or write_through
+    # Concurrent identical lookups share one computation (see lookup_single_flight); with
+    # LOOKUP_SINGLE_FLIGHT_REDIS also across API processes through Redis locks
+    LOOKUP_SINGLE_FLIGHT_ENABLED: bool = True
+    LOOKUP_SINGLE_FLIGHT_REDIS: bool = False
+    LOOKUP_SINGLE_FLIGHT_LOCK_SECONDS: int = 60
+    LOOKUP_SINGLE_FLIGHT_WAIT_SECONDS: float = 30.0
 
     # OS Detection Settings
     OS_DETECTION_PREFER_SNMP: bool = True  # Prefer SNMP over Nmap when both available
@@ -94,6 +147,40 @@ class Settings(BaseSettings):
     IP_LOOKUP_WORKERS: int = 50
     DISCOVERY_WORKERS: int = 20
     IPAM_SCAN_WORKERS: int = 20
+    # IPAM sweep pings: "auto" uses the asyncio ICMP echo engine when ICMP sockets can be opened
+    # (falls back to the ping command otherwise), "subprocess" always forks ping
+    IPAM_SCAN_ICMP_ENGINE: str = "auto"
+    IPAM_SCAN_ICMP_MAX_OUTSTANDING: int = 2048  # Echo requests in flight at once
+    # Ping sweep pacing (see ping_sweep): echo requests per second overall and per destination /24 (/64),
+    # 0 = unpaced; non-responders are probed again IPAM_SWEEP_RETRIES times at the end of the sweep
+    IPAM_SWEEP_PPS: int = 2000
+    IPAM_SWEEP_SUBNET_PPS: int = 200
+    IPAM_SWEEP_RETRIES: int = 1
+    # Re-read the local neighbour (ARP/NDP) table for a missing MAC at most this often (see neighbor_table)
+    IPAM_NEIGHBOR_REFRESH_SECONDS: float = 0.5
+
+    # Collector Cluster Mode
+    COLLECTOR_CLUSTER_ENABLED: bool = False
+    COLLECTOR_NODE_ID: str = ""  # Defaults to "<hostname>-<pid>"
+    COLLECTOR_SITE: str = ""  # Optional site affinity label for this node
+    COLLECTOR_HEARTBEAT_SECONDS: int = Field(
+        default=15,
+        ge=1,
+        le=600,
+        description="Interval between collector node heartbeats and lease renewals"
+    )
+    COLLECTOR_NODE_TIMEOUT_SECONDS: int = Field(
+        default=60,
+        ge=5,
+        le=3600,
+        description="Heartbeat age after which a collector node is considered dead"
+    )
+    COLLECTOR_LEASE_SECONDS: int = Field(
+        default=90,
+        ge=5,
+        le=3600,
+        description="Validity of a switch lease; renewed on every heartbeat"
+    )
 
     # Batch Processing
     COLLECTION_BATCH_SIZE: int = 5
@@ -108,6 +195,10 @@ class Settings(BaseSettings):
     CONNECTION_TIMEOUT: int = 30
     COLLECTION_JOB_TIMEOUT: int = 300
 
+    # Telnet and Dell Force10 sessions learn their prompt once and read until it
+    # reappears; timing-based reads remain the fallback.
+    CLI_PROMPT_DRIVEN_READS: bool = True
+
     # Port Analysis Thresholds
     PORT_SINGLE_MAC_CONFIDENCE: int = 95
     PORT_TRUNK_THRESHOLD: int = 10
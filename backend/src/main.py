@@ -4,6 +4,9 @@ from core.config import settings
 from api.v1 import switches, lookup, history, discovery, ipam, command_templates, alarms, collection, snmp_profiles, settings as settings_module
 from api.routes import snmp_config, network
 from services.status_checker import switch_status_checker
+from services.lookup_topology_index import lookup_topology_index
+from services.lookup_result_cache import lookup_result_cache
+from services.lookup_write_buffer import lookup_write_buffer
 from services.network_scheduler import network_scheduler
 from services.collection_worker import worker_pool
 from utils.logger import logger
@@ -64,6 +67,12 @@ async def startup_event():
     switch_status_checker.start()
     logger.info("Background switch status checker started")
 
+    # Start lookup topology index refresher (no-op unless enabled)
+    lookup_topology_index.start()
+
+    # Start lookup history / MAC cache write buffer (no-op unless enabled)
+    lookup_write_buffer.start()
+
     # Start network data scheduler using the configured interval.
     network_scheduler.start(interval_minutes=settings.COLLECTION_INTERVAL_MINUTES)
     logger.info("Network data scheduler started")
@@ -82,6 +91,15 @@ async def shutdown_event():
     switch_status_checker.stop()
     logger.info("Background switch status checker stopped")
 
+    # Stop lookup topology index refresher
+    lookup_topology_index.stop()
+
+    # Flush pending lookup history / MAC cache rows
+    await lookup_write_buffer.stop()
+
+    # Close the lookup result cache connection pool
+    await lookup_result_cache.close()
+
     # Stop network data scheduler
     network_scheduler.stop()
     logger.info("Network data scheduler stopped")
@@ -9,6 +9,9 @@ from contextlib import asynccontextmanager
 from api.v1 import switches, lookup, history, alarms, snmp_profiles, command_templates, settings as settings_module
 from api.routes import snmp_config
 from services.status_checker import switch_status_checker
+from services.lookup_topology_index import lookup_topology_index
+from services.lookup_result_cache import lookup_result_cache
+from services.lookup_write_buffer import lookup_write_buffer
 from core.config import settings
 
 
@@ -25,12 +28,25 @@ async def lifespan(app: FastAPI):
     else:
         print("ℹ️ Status checker disabled by configuration")
 
+    # Start lookup topology index refresher
+    if settings.LOOKUP_TOPOLOGY_INDEX_ENABLED:
+        lookup_topology_index.start()
+        print("✅ Lookup topology index refresher started")
+
+    # Start lookup history / MAC cache write buffer
+    if settings.LOOKUP_WRITE_BUFFER_ENABLED:
+        lookup_write_buffer.start()
+        print("✅ Lookup write buffer started")
+
     yield
 
     # Shutdown
     print("🛑 Stopping Core API Service...")
     if settings.FEATURE_STATUS_CHECKER:
         switch_status_checker.stop()
+    lookup_topology_index.stop()
+    await lookup_write_buffer.stop()
+    await lookup_result_cache.close()
 
 
 app = FastAPI(
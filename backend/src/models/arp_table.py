@@ -9,7 +9,7 @@ class ARPTable(Base):
 
     __tablename__ = "arp_table"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True, autoincrement=True, index=True)
     switch_id = Column(Integer, ForeignKey("switches.id", ondelete="CASCADE"), nullable=False, index=True)
     ip_address = Column(INET, nullable=False, index=True)
     mac_address = Column(MACADDR, nullable=False, index=True)
@@ -20,13 +20,16 @@ class ARPTable(Base):
     # Timestamps
     collected_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
     first_seen = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
-    last_seen = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+    # Range partition key (daily partitions, see services/partition_manager.py)
+    last_seen = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False, primary_key=True)
 
     # Composite indexes for better query performance
     __table_args__ = (
         Index('idx_arp_ip_mac', 'ip_address', 'mac_address'),
         Index('idx_arp_switch_ip', 'switch_id', 'ip_address'),
+        Index('idx_arp_mac_ip', 'mac_address', 'ip_address', 'last_seen'),  # Reverse lookup MAC -> IPs
         Index('idx_arp_collected', 'collected_at'),
+        {'postgresql_partition_by': 'RANGE (last_seen)'},
     )
 
     def __repr__(self):
@@ -54,6 +54,7 @@ class CollectionJob(Base):
     # Execution details
     collection_method = Column(String(10))  # 'snmp' or 'cli' - which method was used
     entries_collected = Column(Integer, default=0)  # Number of MAC/ARP/Optical entries
+    unchanged_outputs = Column(Integer, default=0)  # ARP/MAC outputs identical to the last stored ones
     error_message = Column(Text)  # Error details if failed
     retry_count = Column(Integer, default=0)  # How many times retried
 
@@ -0,0 +1,45 @@
+"""
+Collector Cluster Models
+
+Registry of collector service instances (heartbeats) and the time-bounded
+switch leases that decide which instance collects which switch.
+"""
+
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
+from sqlalchemy.sql import func
+from core.database import Base
+
+
+class CollectorNode(Base):
+    """A running collector instance that takes part in cluster mode"""
+
+    __tablename__ = 'collector_nodes'
+
+    node_id = Column(String(40), primary_key=True)
+    hostname = Column(String(255), nullable=True)
+    site = Column(String(50), nullable=True, index=True)  # Optional site affinity label
+    worker_count = Column(Integer, default=0, nullable=False)
+    status = Column(String(20), default='active', nullable=False)  # active, stopped
+    started_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    last_heartbeat_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
+
+    def __repr__(self):
+        return f"<CollectorNode {self.node_id} site={self.site} status={self.status}>"
+
+
+class SwitchLease(Base):
+    """Time-bounded ownership of a switch by one collector node"""
+
+    __tablename__ = 'switch_leases'
+
+    switch_id = Column(Integer, ForeignKey('switches.id', ondelete='CASCADE'), primary_key=True)
+    node_id = Column(String(40), nullable=False)
+    acquired_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    lease_expires_at = Column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (
+        Index('idx_switch_leases_node_expires', 'node_id', 'lease_expires_at'),
+    )
+
+    def __repr__(self):
+        return f"<SwitchLease switch={self.switch_id} node={self.node_id} expires={self.lease_expires_at}>"
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey, Enum as SQLEnum
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey, Index, Enum as SQLEnum
 from sqlalchemy.dialects.postgresql import INET, MACADDR
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
@@ -145,6 +145,22 @@ class IPAddress(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
 
+    # Case-insensitive exact/prefix hostname reverse lookup
+    __table_args__ = (
+        Index(
+            'idx_ip_addresses_hostname_lower', func.lower(hostname).label('hostname_lower'),
+            postgresql_ops={'hostname_lower': 'text_pattern_ops'}
+        ),
+        Index(
+            'idx_ip_addresses_dns_name_lower', func.lower(dns_name).label('dns_name_lower'),
+            postgresql_ops={'dns_name_lower': 'text_pattern_ops'}
+        ),
+        Index(
+            'idx_ip_addresses_system_name_lower', func.lower(system_name).label('system_name_lower'),
+            postgresql_ops={'system_name_lower': 'text_pattern_ops'}
+        ),
+    )
+
     # Relationships
     subnet = relationship("IPSubnet", back_populates="ip_addresses")
     switch = relationship("Switch")
@@ -158,8 +174,9 @@ class IPScanHistory(Base):
     """IP scan history for tracking changes"""
 
     __tablename__ = "ip_scan_history"
+    __table_args__ = {'postgresql_partition_by': 'RANGE (scanned_at)'}
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True, autoincrement=True, index=True)
     ip_address_id = Column(Integer, ForeignKey("ip_addresses.id", ondelete="CASCADE"), nullable=False, index=True)
 
     # 扫描结果
@@ -183,7 +200,8 @@ class IPScanHistory(Base):
     switch_changed = Column(Boolean, default=False, nullable=False)
     port_changed = Column(Boolean, default=False, nullable=False)
 
-    scanned_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
+    # Range partition key (daily partitions, see services/partition_manager.py)
+    scanned_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True, primary_key=True)
 
     # Relationships
     ip_address = relationship("IPAddress", back_populates="scan_history")
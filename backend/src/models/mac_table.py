@@ -9,7 +9,7 @@ class MACTable(Base):
 
     __tablename__ = "mac_table"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True, autoincrement=True, index=True)
     switch_id = Column(Integer, ForeignKey("switches.id", ondelete="CASCADE"), nullable=False, index=True)
     mac_address = Column(MACADDR, nullable=False, index=True)
     port_name = Column(String(50), nullable=False, index=True)
@@ -19,13 +19,16 @@ class MACTable(Base):
     # Timestamps
     collected_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
     first_seen = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
-    last_seen = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+    # Range partition key (daily partitions, see services/partition_manager.py)
+    last_seen = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False, primary_key=True)
 
     # Composite indexes
     __table_args__ = (
         Index('idx_mac_switch_port', 'switch_id', 'port_name'),
         Index('idx_mac_address_switch', 'mac_address', 'switch_id'),
+        Index('idx_mac_vlan_switch_port', 'vlan_id', 'switch_id', 'port_name'),  # Reverse lookup VLAN -> endpoints
         Index('idx_mac_collected', 'collected_at'),
+        {'postgresql_partition_by': 'RANGE (last_seen)'},
     )
 
     def __repr__(self):
@@ -0,0 +1,49 @@
+"""
+Raw Output Archive Models
+
+Compressed raw CLI output, deduplicated by content hash, plus one capture row
+per collected command so ARP/MAC tables can be rebuilt without re-polling.
+"""
+
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, LargeBinary, Index
+from sqlalchemy.sql import func
+from core.database import Base
+
+
+class RawOutputBlob(Base):
+    """Compressed command output, stored once per distinct content"""
+
+    __tablename__ = 'raw_output_blobs'
+
+    content_hash = Column(String(64), primary_key=True)  # sha256 of the raw output
+    encoding = Column(String(10), nullable=False)  # 'gzip' or 'zstd'
+    data = Column(LargeBinary, nullable=False)
+    size_bytes = Column(Integer, nullable=False)
+    compressed_bytes = Column(Integer, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    def __repr__(self):
+        return f"<RawOutputBlob {self.content_hash[:12]} {self.encoding} {self.compressed_bytes}B>"
+
+
+class RawOutputCapture(Base):
+    """One archived command run against one switch"""
+
+    __tablename__ = 'raw_output_captures'
+
+    id = Column(Integer, primary_key=True, index=True)
+    switch_id = Column(Integer, ForeignKey("switches.id", ondelete="CASCADE"), nullable=False)
+    command_type = Column(String(10), nullable=False)  # 'arp' or 'mac'
+    command = Column(String(255), nullable=False)
+    parser_type = Column(String(50), nullable=True)
+    device_type = Column(String(50), nullable=True)
+    content_hash = Column(String(64), ForeignKey("raw_output_blobs.content_hash"), nullable=False, index=True)
+    entries_parsed = Column(Integer, nullable=False, default=0)
+    collected_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
+    __table_args__ = (
+        Index('idx_raw_output_captures_switch_type_time', 'switch_id', 'command_type', 'collected_at'),
+    )
+
+    def __repr__(self):
+        return f"<RawOutputCapture switch={self.switch_id} {self.command_type} {self.collected_at}>"
@@ -23,6 +23,7 @@ class Switch(Base):
     password_encrypted = Column(Text, nullable=True)
     enable_password_encrypted = Column(Text, nullable=True)
     connection_timeout = Column(Integer, default=30, nullable=True)
+    collector_site = Column(String(50), nullable=True, index=True)  # Cluster mode site affinity
 
     enabled = Column(Boolean, default=True, nullable=False, index=True)
 
@@ -47,6 +48,9 @@ class Switch(Base):
     auto_collect_mac = Column(Boolean, default=True, nullable=False)  # Auto collect MAC table
     last_arp_collection_at = Column(DateTime(timezone=True), nullable=True)  # Last ARP collection time
     last_mac_collection_at = Column(DateTime(timezone=True), nullable=True)  # Last MAC collection time
+    last_arp_output_hash = Column(String(64), nullable=True)  # Hash of the last stored ARP output
+    last_mac_output_hash = Column(String(64), nullable=True)  # Hash of the last stored MAC output
+    l2_changed_at = Column(DateTime(timezone=True), nullable=True, index=True)  # Last ARP/MAC/port policy change
     last_optical_collection_at = Column(DateTime(timezone=True), nullable=True, index=True)
     last_optical_success_at = Column(DateTime(timezone=True), nullable=True, index=True)
     last_collection_status = Column(String(50), nullable=True)  # success, failed, partial
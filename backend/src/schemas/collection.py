@@ -3,7 +3,7 @@ Collection Job Schemas
 """
 
 from pydantic import BaseModel, Field
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Any
 from datetime import datetime
 from models.collection_job import JobType, JobStatus
 
@@ -28,6 +28,7 @@ class CollectionJobResponse(BaseModel):
     duration_seconds: Optional[float]
     collection_method: Optional[str]
     entries_collected: int
+    unchanged_outputs: Optional[int] = 0
     error_message: Optional[str]
     retry_count: int
     batch_id: Optional[str]
@@ -43,6 +44,7 @@ class WorkerStatus(BaseModel):
     jobs_processed: int
     jobs_succeeded: int
     jobs_failed: int
+    jobs_unchanged: int = 0
     current_job_id: Optional[int]
 
 
@@ -53,6 +55,7 @@ class WorkerPoolStatusResponse(BaseModel):
     active_workers: int
     pending_jobs: int
     running_jobs: int
+    cluster: Optional[Dict[str, Any]] = None
     workers: List[WorkerStatus]
 
 
@@ -62,3 +65,5 @@ class CollectionStatsResponse(BaseModel):
     status_counts: Dict[str, int]
     avg_duration_seconds: float
     success_rate: float
+    unchanged_outputs: int = 0  # ARP/MAC outputs skipped because they matched the stored ones
+    unchanged_switches: int = 0  # Switches with at least one skipped output
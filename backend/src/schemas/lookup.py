@@ -1,11 +1,21 @@
 from pydantic import BaseModel, Field, IPvAnyAddress
-from typing import Optional
+from typing import List, Literal, Optional
 from datetime import datetime
 
 
 class IPLookupRequest(BaseModel):
     """Schema for IP lookup request"""
     ip_address: IPvAnyAddress = Field(..., description="Target IP address to lookup")
+    mode: Literal["cache", "hybrid", "realtime"] = Field(
+        "cache",
+        description="cache: database only; hybrid: cache, re-verifying old/stale answers on the switch; realtime: live switch queries"
+    )
+
+
+class IPBatchLookupRequest(BaseModel):
+    """Schema for batch IP lookup request"""
+    targets: List[str] = Field(..., min_length=1, description="IP addresses and/or CIDR networks to lookup")
+    record_history: bool = Field(True, description="Record query history and MAC cache entries in bulk")
 
 
 class IPLookupResult(BaseModel):
@@ -19,11 +29,15 @@ class IPLookupResult(BaseModel):
     port_name: Optional[str] = None
     vlan_id: Optional[int] = None
     query_time_ms: int
-    query_mode: Optional[str] = None  # 'cache', 'realtime', 'auto_fallback'
+    query_mode: Optional[str] = None  # 'cache', 'hybrid', 'realtime'
     data_age_seconds: Optional[int] = None  # Only for cache mode - how old is the data
     last_seen: Optional[str] = None  # Only for cache mode - when was the data last collected
     message: Optional[str] = None
     freshness: Optional[dict] = None
+    data_source: Optional[str] = None  # Cache mode only - 'redis', 'index' or 'database'
+    switches_queried: Optional[int] = None  # Realtime only - switches asked over SSH/CLI
+    lookup_stage: Optional[str] = None  # Realtime only - 'targeted' (candidates answered) or 'fleet'
+    verification: Optional[dict] = None  # Hybrid only - live re-verification outcome
 
 
 class IPLookupResponse(BaseModel):
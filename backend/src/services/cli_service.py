@@ -8,14 +8,23 @@ Implements self-learning command cache to optimize command selection.
 """
 
 from typing import Dict, List, Optional
+import hashlib
 import re
+from weakref import WeakKeyDictionary
 from netmiko import ConnectHandler
 from netmiko.ssh_dispatcher import CLASS_MAPPER
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, insert, update
 from utils.logger import logger
 from core.security import decrypt_password
-from fnmatch import fnmatch
+from core.config import settings
+from services.command_template_index import template_index_cache
+
+
+# Changes whenever this module (and with it any parser) changes, so unchanged-output
+# short-circuits never keep data parsed by an older parser.
+with open(__file__, 'rb') as _module_file:
+    PARSER_FINGERPRINT = hashlib.sha256(_module_file.read()).hexdigest()[:16]
 
 
 class CLIService:
@@ -44,6 +53,9 @@ class CLIService:
     }
 
     def __init__(self):
+        self._builtin_templates: Optional[List[Dict]] = None
+        # connection -> verified prompt for sessions that read until the prompt
+        self._session_prompts: "WeakKeyDictionary[ConnectHandler, str]" = WeakKeyDictionary()
         logger.info("CLI service initialized")
 
     def normalize_cli_transport(self, transport: Optional[str]) -> str:
@@ -143,9 +155,13 @@ class CLIService:
         if not commands:
             return
 
+        prompt = self._session_prompts.get(connection)
         for command in commands:
             try:
-                connection.send_command_timing(command, delay_factor=2, max_loops=50)
+                if prompt:
+                    self._send_command_until_prompt(connection, command, prompt, read_timeout=20)
+                else:
+                    connection.send_command_timing(command, delay_factor=2, max_loops=50)
                 logger.debug(f"Disabled paging on {host} using '{command}'")
                 return
             except Exception as paging_error:
@@ -168,6 +184,20 @@ class CLIService:
     ) -> str:
         """Execute a CLI command with prompt-safe fallback handling."""
         if self._should_use_timing_commands(device_type, transport):
+            prompt = self._session_prompts.get(connection)
+            if prompt:
+                try:
+                    return self._send_command_until_prompt(connection, command, prompt, read_timeout)
+                except Exception as prompt_error:
+                    # One miss is enough: the rest of this session uses timing reads.
+                    self._session_prompts.pop(connection, None)
+                    logger.debug(
+                        f"Prompt-driven read failed, switching session to timing reads: {str(prompt_error)[:100]}"
+                    )
+                    try:
+                        connection.clear_buffer()
+                    except Exception:
+                        pass
             return connection.send_command_timing(
                 command,
                 delay_factor=delay_factor,
@@ -184,6 +214,83 @@ class CLIService:
                 max_loops=max_loops,
             )
 
+    def _send_command_until_prompt(
+        self,
+        connection: ConnectHandler,
+        command: str,
+        prompt: str,
+        read_timeout: float
+    ) -> str:
+        """
+        Send a command and read until the learned prompt starts a new line.
+
+        The echo check is deliberately loose: Force10 sometimes drops the first
+        character of the echoed command, which breaks netmiko's cmd_verify.
+        """
+        connection.write_channel(command + connection.RETURN)
+        output = connection.read_until_pattern(
+            pattern=rf"[\r\n]{re.escape(prompt)}\s*$",
+            read_timeout=read_timeout,
+        )
+        lines = connection.normalize_linefeeds(output).split('\n')
+        if lines and command.strip()[1:] in lines[0]:
+            lines = lines[1:]
+        if lines and lines[-1].strip().endswith(prompt):
+            lines = lines[:-1]
+        return '\n'.join(lines)
+
+    def _enter_enable_until_prompt(
+        self,
+        connection: ConnectHandler,
+        enable_secret: Optional[str],
+        host: str
+    ) -> bool:
+        """Enter enable mode by waiting for the password prompt and '#' rather than fixed delays."""
+        try:
+            if connection.find_prompt().rstrip().endswith('#'):
+                logger.debug(f"Already in enable mode on {host}")
+                return True
+
+            connection.write_channel('enable' + connection.RETURN)
+            output = connection.read_until_pattern(pattern=r'assword|#\s*$', read_timeout=15, re_flags=re.I)
+            if 'assword' in output.lower():
+                connection.write_channel((enable_secret or '') + connection.RETURN)
+                connection.read_until_pattern(pattern=r'[>#]\s*$', read_timeout=15)
+
+            if connection.find_prompt().rstrip().endswith('#'):
+                logger.debug(f"✅ Entered enable mode on {host}")
+                return True
+        except Exception as enable_error:
+            logger.debug(f"Prompt-driven enable failed on {host}: {str(enable_error)[:100]}")
+
+        try:
+            connection.clear_buffer()
+        except Exception:
+            pass
+        return False
+
+    def _learn_session_prompt(self, connection: ConnectHandler, host: str) -> Optional[str]:
+        """
+        Learn the device prompt and confirm it is stable before trusting it.
+
+        Sessions with a verified prompt read each command until the prompt
+        reappears instead of waiting out timing delays.
+        """
+        try:
+            first = connection.find_prompt(delay_factor=1).strip()
+            second = connection.find_prompt(delay_factor=1).strip()
+        except Exception as prompt_error:
+            logger.debug(f"Could not learn prompt on {host}: {str(prompt_error)[:100]}")
+            return None
+
+        if not first or first != second:
+            logger.debug(f"Prompt on {host} is not stable ({first!r} vs {second!r}), keeping timing reads")
+            return None
+
+        self._session_prompts[connection] = first
+        logger.debug(f"Using prompt-driven reads on {host} with prompt {first!r}")
+        return first
+
     def _create_cli_connection(
         self,
         host: str,
@@ -242,37 +349,53 @@ class CLIService:
                 f"using driver {netmiko_device_type}"
             )
             connection = ConnectHandler(**device)
+            if netmiko_device_type == 'generic_telnet':
+                # Netmiko's generic_telnet driver skips login entirely; run the
+                # standard username/password exchange and pick up the prompt.
+                connection.std_login()
+                connection.set_base_prompt()
             logger.info(f"✅ {normalized_transport.upper()} connection established to {host}")
+            prompt_driven = (
+                settings.CLI_PROMPT_DRIVEN_READS and
+                self._should_use_timing_commands(device_type, normalized_transport)
+            )
 
             # Enable privileged mode for devices that require it
             if base_device_type in self.ENABLE_MODE_DEVICE_TYPES:
                 try:
-                    # For Dell Force10, use send_command_timing throughout to avoid prompt issues
                     if base_device_type == 'dell_force10':
-                        # Check current prompt
-                        prompt_output = connection.send_command_timing('', delay_factor=1)
-
-                        if '#' not in prompt_output:
-                            # Not in enable mode, enter it
-                            logger.debug(f"Entering enable mode on Dell Force10 {host}")
-                            if enable_secret:
-                                connection.send_command_timing('enable', delay_factor=2)
-                                connection.send_command_timing(enable_secret, delay_factor=2)
-                                logger.debug(f"✅ Sent enable credentials to {host}")
-                            else:
-                                connection.send_command_timing('enable', delay_factor=2)
-                                logger.debug(f"✅ Sent enable command to {host}")
+                        if prompt_driven:
+                            # Paging is disabled below once the prompt is learned.
+                            in_enable_mode = self._enter_enable_until_prompt(connection, enable_secret, host)
                         else:
-                            logger.debug(f"Already in enable mode on {host}")
+                            in_enable_mode = False
+
+                        # Otherwise use send_command_timing throughout to avoid prompt issues
+                        if not in_enable_mode:
+                            # Check current prompt
+                            prompt_output = connection.send_command_timing('', delay_factor=1)
+
+                            if '#' not in prompt_output:
+                                # Not in enable mode, enter it
+                                logger.debug(f"Entering enable mode on Dell Force10 {host}")
+                                if enable_secret:
+                                    connection.send_command_timing('enable', delay_factor=2)
+                                    connection.send_command_timing(enable_secret, delay_factor=2)
+                                    logger.debug(f"✅ Sent enable credentials to {host}")
+                                else:
+                                    connection.send_command_timing('enable', delay_factor=2)
+                                    logger.debug(f"✅ Sent enable command to {host}")
+                            else:
+                                logger.debug(f"Already in enable mode on {host}")
 
-                        # Disable paging so long MAC/ARP tables are not truncated at '--More--'.
-                        try:
-                            connection.send_command_timing('terminal length 0', delay_factor=2)
-                            logger.debug(f"Disabled pagination on Dell Force10 {host}")
-                        except Exception as paging_error:
-                            logger.warning(
-                                f"Failed to disable pagination on Dell Force10 {host}: {str(paging_error)[:100]}"
-                            )
+                            # Disable paging so long MAC/ARP tables are not truncated at '--More--'.
+                            try:
+                                connection.send_command_timing('terminal length 0', delay_factor=2)
+                                logger.debug(f"Disabled pagination on Dell Force10 {host}")
+                            except Exception as paging_error:
+                                logger.warning(
+                                    f"Failed to disable pagination on Dell Force10 {host}: {str(paging_error)[:100]}"
+                                )
 
                     # For Cisco, use standard method
                     else:
@@ -297,6 +420,9 @@ class CLIService:
                 except Exception as e:
                     logger.warning(f"Enable mode attempt on {host} had issues (continuing anyway): {str(e)[:100]}")
 
+            if prompt_driven:
+                self._learn_session_prompt(connection, host)
+
             try:
                 self._disable_paging(connection, base_device_type, host)
             except Exception as paging_error:
@@ -1610,7 +1736,8 @@ class CLIService:
         self,
         switch_ip: str,
         switch_config: Dict,
-        templates: Optional[List[Dict]] = None
+        templates: Optional[List[Dict]] = None,
+        output_capture: Optional[Dict] = None
     ) -> List[Dict]:
         """
         Collect MAC address table via SSH CLI using database templates or built-in fallbacks
@@ -1619,6 +1746,8 @@ class CLIService:
             switch_ip: IP address of the switch
             switch_config: Dictionary with SSH credentials and vendor info
             templates: Optional list of command templates from database
+            output_capture: Optional dict that receives the raw output of the
+                last command run (command, parser_type, device_type, output)
 
         Returns:
             List of MAC entries: [{mac, port_name, vlan, is_dynamic}, ...]
@@ -1690,6 +1819,10 @@ class CLIService:
                     max_loops=200,
                 )
 
+                if self._record_output_capture(output_capture, command, parser_type, device_type, output):
+                    logger.info(f"MAC output from {switch_ip} unchanged since last collection, skipping parse")
+                    return []
+
                 # Debug: Log command output for troubleshooting
                 logger.debug(f"MAC command output from {switch_ip} ({len(output)} chars):\n{output[:500]}")
 
@@ -1731,6 +1864,11 @@ class CLIService:
                                 max_loops=200,
                             )
 
+                            if self._record_output_capture(
+                                output_capture, fallback_cmd, fallback_parser_type or parser_type, device_type, output
+                            ):
+                                return []
+
                             # Try specified parser or use main parser
                             fallback_parser = self._get_parser(fallback_parser_type, 'mac') if fallback_parser_type else parser
                             if fallback_parser:
@@ -1763,6 +1901,60 @@ class CLIService:
                 except:
                     pass
 
+    def output_content_hash(self, command: str, parser_type: Optional[str], output: str) -> str:
+        """
+        Hash command output after normalising line endings and blank lines.
+
+        Command, parser type and the parser code fingerprint are part of the
+        hash, so a template or parser change never matches an older hash.
+        """
+        lines = (line.rstrip() for line in (output or '').replace('\r\n', '\n').replace('\r', '\n').split('\n'))
+        normalized = '\n'.join(line for line in lines if line)
+        digest = hashlib.sha256(f"{PARSER_FINGERPRINT}\n{command}\n{parser_type}\n".encode())
+        digest.update(normalized.encode('utf-8', errors='replace'))
+        return digest.hexdigest()
+
+    def _record_output_capture(
+        self,
+        output_capture: Optional[Dict],
+        command: str,
+        parser_type: Optional[str],
+        device_type: Optional[str],
+        output: str
+    ) -> bool:
+        """
+        Hand the raw output of the latest command to the caller, if it asked for it.
+
+        Returns:
+            True when the caller passed a 'previous_hash' and this output matches
+            it, i.e. parsing can be skipped.
+        """
+        if output_capture is None:
+            return False
+        content_hash = self.output_content_hash(command, parser_type, output)
+        output_capture.update({
+            'command': command,
+            'parser_type': parser_type,
+            'device_type': device_type,
+            'output': output,
+            'content_hash': content_hash,
+        })
+        if output_capture.get('previous_hash') and output_capture['previous_hash'] == content_hash:
+            output_capture['unchanged'] = True
+            return True
+        return False
+
+    def parse_captured_output(self, output_capture: Dict, data_type: str) -> List[Dict]:
+        """
+        Parse the output held in an output_capture with the parser it was captured for.
+
+        Used when an unchanged output was not parsed but its stored rows are gone.
+        """
+        parser = self._get_parser(output_capture.get('parser_type'), data_type)
+        if not parser or not output_capture.get('output'):
+            return []
+        return parser(output_capture['output'])
+
     def _match_from_template_list(
         self,
         vendor: str,
@@ -1781,45 +1973,11 @@ class CLIService:
 
         Returns:
             Matching template dict or None
-        """
-        vendor_lower = vendor.lower()
-        model_lower = model.lower()
-        name_lower = name.lower()
-
-        # Sort by priority (descending)
-        sorted_templates = sorted(template_list, key=lambda t: t.get('priority', 100), reverse=True)
-
-        for template in sorted_templates:
-            if not template.get('enabled', True):
-                continue
 
-            # Check vendor match
-            if template['vendor'].lower() != vendor_lower:
-                continue
-
-            # Check model pattern match
-            model_pattern = template['model_pattern'].lower()
-            if '*' in model_pattern or '?' in model_pattern:
-                if not fnmatch(model_lower, model_pattern) and not fnmatch(name_lower, model_pattern):
-                    continue
-            else:
-                if model_pattern not in model_lower and model_pattern not in name_lower:
-                    continue
-
-            # Check name pattern if specified
-            name_pattern = template.get('name_pattern')
-            if name_pattern:
-                name_pattern_lower = name_pattern.lower()
-                if '*' in name_pattern_lower or '?' in name_pattern_lower:
-                    if not fnmatch(name_lower, name_pattern_lower):
-                        continue
-                else:
-                    if name_pattern_lower not in name_lower:
-                        continue
-
-            return template
-
-        return None
+        Matching goes through a compiled, memoised index (see
+        services.command_template_index) rebuilt only when the list changes.
+        """
+        return template_index_cache.match(vendor, model, name, template_list)
 
     def _find_matching_template(
         self,
@@ -1893,6 +2051,15 @@ class CLIService:
         Returns:
             List of built-in template dicts
         """
+        if self._builtin_templates is None:
+            self._builtin_templates = self._load_builtin_templates()
+        return self._builtin_templates
+
+    def invalidate_template_index(self) -> None:
+        """Drop compiled template indexes after templates are edited."""
+        template_index_cache.invalidate()
+
+    def _load_builtin_templates(self) -> List[Dict]:
         # Import optimized templates from collection_strategy
         try:
             from config.collection_strategy import OPTIMIZED_CLI_TEMPLATES
@@ -1959,7 +2126,8 @@ class CLIService:
         self,
         switch_ip: str,
         switch_config: Dict,
-        templates: Optional[List[Dict]] = None
+        templates: Optional[List[Dict]] = None,
+        output_capture: Optional[Dict] = None
     ) -> List[Dict]:
         """
         Collect ARP table via SSH CLI using database templates or built-in fallbacks
@@ -1968,6 +2136,8 @@ class CLIService:
             switch_ip: IP address of the switch
             switch_config: Dictionary with SSH credentials and vendor info
             templates: Optional list of command templates from database
+            output_capture: Optional dict that receives the raw output of the
+                last command run (command, parser_type, device_type, output)
 
         Returns:
             List of ARP entries: [{ip_address, mac_address, vlan_id, interface}, ...]
@@ -2049,6 +2219,10 @@ class CLIService:
                     max_loops=200,
                 )
 
+                if self._record_output_capture(output_capture, command, parser_type, device_type, output):
+                    logger.info(f"ARP output from {switch_ip} unchanged since last collection, skipping parse")
+                    return []
+
                 arp_entries = parser(output)
 
                 # Debug: Log first 1000 chars of output if parsing returns 0 results for Dell Force10
@@ -2090,6 +2264,11 @@ class CLIService:
                                 max_loops=200,
                             )
 
+                            if self._record_output_capture(
+                                output_capture, fallback_cmd, fallback_parser_type or parser_type, device_type, output
+                            ):
+                                return []
+
                             # Try specified parser or use main parser
                             fallback_parser = self._get_parser(fallback_parser_type, 'arp') if fallback_parser_type else parser
                             if fallback_parser:
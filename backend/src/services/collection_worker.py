@@ -18,6 +18,7 @@ from models.collection_job import CollectionJob, JobType, JobStatus
 from services.network_data_collector import NetworkDataCollector
 from utils.logger import logger
 from services.alarm_service import alarm_service
+from services.collector_cluster import collector_cluster
 from models.alarm import AlarmSeverity, AlarmSourceType
 
 
@@ -32,6 +33,7 @@ class CollectionWorker:
         self.jobs_processed = 0
         self.jobs_succeeded = 0
         self.jobs_failed = 0
+        self.jobs_unchanged = 0  # Jobs where at least one ARP/MAC output was unchanged
 
     @staticmethod
     def _enum_value(value: Any) -> str:
@@ -72,9 +74,15 @@ class CollectionWorker:
         """Get next pending job from queue with row-level locking"""
         try:
             # Use FOR UPDATE SKIP LOCKED for lock-free queue semantics
+            stmt = select(CollectionJob).where(CollectionJob.status == 'pending')
+
+            # In cluster mode only claim jobs for switches leased to this node
+            lease_clause = collector_cluster.owned_job_clause()
+            if lease_clause is not None:
+                stmt = stmt.where(lease_clause)
+
             stmt = (
-                select(CollectionJob)
-                .where(CollectionJob.status == 'pending')
+                stmt
                 .order_by(CollectionJob.priority.desc(), CollectionJob.created_at.asc())
                 .limit(1)
                 .with_for_update(skip_locked=True)
@@ -120,28 +128,32 @@ class CollectionWorker:
             await db.commit()
 
             # Execute collection based on job type
+            # Unchanged ARP/MAC outputs return no entries; the kept row counts land here.
+            mac_stats: Dict[str, int] = {}
+            arp_stats: Dict[str, int] = {}
+
             if job.job_type == JobType.MAC:
-                entries = await self.collector.collect_mac_single_switch(db, switch)
-                job.entries_collected = len(entries) if entries else 0
+                entries = await self.collector.collect_mac_single_switch(db, switch, job_stats=mac_stats)
+                job.entries_collected = (len(entries) if entries else 0) + mac_stats.get('unchanged_entries', 0)
 
             elif job.job_type == JobType.ARP:
-                entries = await self.collector.collect_arp_single_switch(db, switch)
-                job.entries_collected = len(entries) if entries else 0
+                entries = await self.collector.collect_arp_single_switch(db, switch, job_stats=arp_stats)
+                job.entries_collected = (len(entries) if entries else 0) + arp_stats.get('unchanged_entries', 0)
 
             elif job.job_type == JobType.OPTICAL:
                 entries = await self.collector.collect_optical_single_switch(db, switch)
                 job.entries_collected = len(entries) if entries else 0
 
             elif job.job_type == JobType.ALL:
-                mac_entries = await self.collector.collect_mac_single_switch(db, switch)
+                mac_entries = await self.collector.collect_mac_single_switch(db, switch, job_stats=mac_stats)
                 await db.commit()
                 mac_result_message = switch.last_collection_message
-                arp_entries = await self.collector.collect_arp_single_switch(db, switch)
+                arp_entries = await self.collector.collect_arp_single_switch(db, switch, job_stats=arp_stats)
                 await db.commit()
                 arp_result_message = switch.last_collection_message
                 optical_entries = await self.collector.collect_optical_single_switch(db, switch)
-                mac_count = len(mac_entries) if mac_entries else 0
-                arp_count = len(arp_entries) if arp_entries else 0
+                mac_count = (len(mac_entries) if mac_entries else 0) + mac_stats.get('unchanged_entries', 0)
+                arp_count = (len(arp_entries) if arp_entries else 0) + arp_stats.get('unchanged_entries', 0)
                 optical_count = len(optical_entries) if optical_entries else 0
                 job.entries_collected = (
                     mac_count +
@@ -175,6 +187,12 @@ class CollectionWorker:
                 switch.last_collection_status = 'success'
                 switch.last_collection_message = combined_result_message
 
+            job.unchanged_outputs = (
+                mac_stats.get('unchanged_outputs', 0) + arp_stats.get('unchanged_outputs', 0)
+            )
+            if job.unchanged_outputs:
+                self.jobs_unchanged += 1
+
             # Mark job as successful
             job.status = 'success'
             job.completed_at = datetime.utcnow()
@@ -316,12 +334,17 @@ class CollectionWorkerPool:
         # Import here to avoid circular dependency
         from core.database import AsyncSessionLocal
 
-        async with AsyncSessionLocal() as session:
-            await self._reclaim_stale_running_jobs(session)
+        if collector_cluster.enabled:
+            # Peers may be running jobs right now; the cluster leader requeues
+            # only jobs whose node stopped heartbeating.
+            await collector_cluster.start(worker_count=self.max_workers)
+        else:
+            async with AsyncSessionLocal() as session:
+                await self._reclaim_stale_running_jobs(session)
 
         # Create workers
         for i in range(self.max_workers):
-            worker_id = f"worker-{i+1}"
+            worker_id = collector_cluster.worker_id_for(i + 1)
             worker = CollectionWorker(worker_id, self.collector)
             self.workers.append(worker)
 
@@ -375,6 +398,7 @@ class CollectionWorkerPool:
 
         self.workers.clear()
         self.worker_tasks.clear()
+        await collector_cluster.stop()
         logger.info("Worker pool stopped")
 
     async def create_jobs(self, db: AsyncSession, switches: List[Switch],
@@ -479,6 +503,7 @@ class CollectionWorkerPool:
             "active_workers": len([w for w in self.workers if w.is_running]),
             "pending_jobs": pending_jobs,
             "running_jobs": running_jobs,
+            "cluster": collector_cluster.get_status(),
             "workers": [
                 {
                     "worker_id": w.worker_id,
@@ -486,6 +511,7 @@ class CollectionWorkerPool:
                     "jobs_processed": w.jobs_processed,
                     "jobs_succeeded": w.jobs_succeeded,
                     "jobs_failed": w.jobs_failed,
+                    "jobs_unchanged": w.jobs_unchanged,
                     "current_job_id": w.current_job.id if w.current_job else None
                 }
                 for w in self.workers
@@ -0,0 +1,383 @@
+"""
+Collector Cluster Service
+
+Lets several collector instances share the switch fleet. Each node registers
+itself in PostgreSQL and heartbeats periodically. Switches are assigned with
+rendezvous (highest-random-weight) hashing, restricted to nodes of the same
+site when a switch carries a collector_site label, and ownership is recorded
+as time-bounded leases. Leases are renewed on every heartbeat; when a node
+stops heartbeating its leases expire (or are dropped by the leader) and the
+switches move to the surviving nodes on their next cycle.
+
+Cluster mode is disabled by default; a single instance then behaves exactly
+as before (it owns every switch and is always the scheduling leader).
+"""
+
+import asyncio
+import hashlib
+import os
+import socket
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import select, update, delete, and_, or_, not_, case
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.config import settings
+from models.collection_job import CollectionJob, JobStatus
+from models.collector_node import CollectorNode, SwitchLease
+from models.switch import Switch
+from utils.logger import logger
+
+
+def _default_node_id() -> str:
+    """Build a node id that is unique per running process."""
+    return f"{socket.gethostname()}-{os.getpid()}"[:40]
+
+
+class CollectorClusterService:
+    """Heartbeat registry, switch leases and leader election for collectors"""
+
+    WORKER_ID_SEPARATOR = ":"
+
+    def __init__(self):
+        self.enabled = settings.COLLECTOR_CLUSTER_ENABLED
+        self.node_id = (settings.COLLECTOR_NODE_ID or _default_node_id())[:40]
+        self.site = settings.COLLECTOR_SITE or None
+        self.heartbeat_seconds = settings.COLLECTOR_HEARTBEAT_SECONDS
+        self.node_timeout_seconds = settings.COLLECTOR_NODE_TIMEOUT_SECONDS
+        self.lease_seconds = settings.COLLECTOR_LEASE_SECONDS
+
+        self.owned_switch_ids: Set[int] = set()
+        self.live_node_ids: List[str] = []
+        self.leader_node_id: Optional[str] = None
+        self.last_cycle_at: Optional[datetime] = None
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self._worker_count = 0
+
+    # ------------------------------------------------------------------
+    # Assignment
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _hash_weight(node_id: str, switch_id: int) -> int:
+        """Stable per (node, switch) weight for rendezvous hashing."""
+        digest = hashlib.sha1(f"{node_id}|{switch_id}".encode("utf-8")).digest()
+        return int.from_bytes(digest[:8], "big")
+
+    @classmethod
+    def assign_switches(
+        cls,
+        switches: Iterable[Tuple[int, Optional[str]]],
+        nodes: Sequence[Tuple[str, Optional[str]]],
+    ) -> Dict[int, str]:
+        """
+        Map switch ids to node ids.
+
+        Args:
+            switches: (switch_id, collector_site) pairs
+            nodes: (node_id, site) pairs for live nodes
+
+        Returns:
+            Dict of switch_id -> node_id. Switches with a site label prefer
+            nodes of that site and fall back to the whole cluster when no
+            node serves the site. Adding or removing a node only moves the
+            switches that hashed to it.
+        """
+        if not nodes:
+            return {}
+
+        all_node_ids = [node_id for node_id, _ in nodes]
+        nodes_by_site: Dict[str, List[str]] = {}
+        for node_id, site in nodes:
+            if site:
+                nodes_by_site.setdefault(site.lower(), []).append(node_id)
+
+        assignment: Dict[int, str] = {}
+        for switch_id, switch_site in switches:
+            candidates = all_node_ids
+            if switch_site:
+                candidates = nodes_by_site.get(switch_site.lower()) or all_node_ids
+            assignment[switch_id] = max(
+                candidates,
+                key=lambda node_id: cls._hash_weight(node_id, switch_id)
+            )
+        return assignment
+
+    # ------------------------------------------------------------------
+    # Node helpers used by the worker pool and scheduler
+    # ------------------------------------------------------------------
+
+    def worker_id_for(self, index: int) -> str:
+        """Worker ids are node-qualified in cluster mode so orphans can be traced."""
+        base = f"worker-{index}"
+        if not self.enabled:
+            return base
+        return f"{self.node_id}{self.WORKER_ID_SEPARATOR}{base}"[:50]
+
+    def is_leader(self) -> bool:
+        """Only the leader creates scheduled jobs; single-instance mode always leads."""
+        if not self.enabled:
+            return True
+        return self.leader_node_id == self.node_id
+
+    def owns_switch(self, switch_id: int) -> bool:
+        if not self.enabled:
+            return True
+        return switch_id in self.owned_switch_ids
+
+    def owned_job_clause(self):
+        """
+        Extra WHERE clause restricting job claims to switches leased by this node.
+
+        Returns None when cluster mode is disabled.
+        """
+        if not self.enabled:
+            return None
+        leased_switch_ids = select(SwitchLease.switch_id).where(
+            SwitchLease.node_id == self.node_id,
+            SwitchLease.lease_expires_at > datetime.now(timezone.utc)
+        )
+        return CollectionJob.switch_id.in_(leased_switch_ids)
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    async def start(self, worker_count: int = 0) -> None:
+        """Register this node, take an initial set of leases and start heartbeating."""
+        if not self.enabled:
+            return
+        if self._heartbeat_task and not self._heartbeat_task.done():
+            return
+
+        self._worker_count = worker_count
+        from core.database import AsyncSessionLocal
+
+        async with AsyncSessionLocal() as session:
+            await self.run_cycle(session)
+
+        self._heartbeat_task = asyncio.create_task(self._heartbeat_loop())
+        logger.info(
+            f"🛰️ Collector cluster node {self.node_id} started "
+            f"(site={self.site or '-'}, owned={len(self.owned_switch_ids)}, leader={self.leader_node_id})"
+        )
+
+    async def stop(self) -> None:
+        """Stop heartbeating and hand leases back so peers rebalance immediately."""
+        if not self.enabled:
+            return
+
+        if self._heartbeat_task:
+            self._heartbeat_task.cancel()
+            await asyncio.gather(self._heartbeat_task, return_exceptions=True)
+            self._heartbeat_task = None
+
+        from core.database import AsyncSessionLocal
+
+        try:
+            async with AsyncSessionLocal() as session:
+                await session.execute(
+                    delete(SwitchLease).where(SwitchLease.node_id == self.node_id)
+                )
+                await session.execute(
+                    update(CollectorNode)
+                    .where(CollectorNode.node_id == self.node_id)
+                    .values(status='stopped')
+                )
+                await session.commit()
+        except Exception as e:
+            logger.error(f"Failed to release collector leases for {self.node_id}: {e}")
+
+        self.owned_switch_ids = set()
+        logger.info(f"Collector cluster node {self.node_id} stopped")
+
+    async def _heartbeat_loop(self) -> None:
+        from core.database import AsyncSessionLocal
+
+        while True:
+            try:
+                await asyncio.sleep(self.heartbeat_seconds)
+                async with AsyncSessionLocal() as session:
+                    await self.run_cycle(session)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Collector cluster heartbeat failed: {e}", exc_info=True)
+
+    # ------------------------------------------------------------------
+    # Heartbeat / rebalance cycle
+    # ------------------------------------------------------------------
+
+    async def run_cycle(self, db: AsyncSession) -> Dict[str, int]:
+        """Heartbeat, elect the leader, rebalance and renew this node's leases."""
+        now = datetime.now(timezone.utc)
+
+        await self._heartbeat(db, now)
+
+        live_cutoff = now - timedelta(seconds=self.node_timeout_seconds)
+        node_rows = (await db.execute(
+            select(CollectorNode.node_id, CollectorNode.site).where(
+                CollectorNode.status == 'active',
+                CollectorNode.last_heartbeat_at >= live_cutoff
+            )
+        )).all()
+        nodes = sorted((row.node_id, row.site) for row in node_rows)
+        self.live_node_ids = [node_id for node_id, _ in nodes]
+        self.leader_node_id = self.live_node_ids[0] if self.live_node_ids else None
+
+        orphaned_leases = 0
+        requeued_jobs = 0
+        if self.is_leader():
+            orphaned_leases, requeued_jobs = await self._release_orphans(db, now)
+
+        switch_rows = (await db.execute(
+            select(Switch.id, Switch.collector_site).where(Switch.enabled == True)
+        )).all()
+        assignment = self.assign_switches(
+            ((row.id, row.collector_site) for row in switch_rows),
+            nodes
+        )
+        wanted = [switch_id for switch_id, node_id in assignment.items() if node_id == self.node_id]
+
+        released = await self._release_unwanted_leases(db, wanted)
+        await self._acquire_leases(db, wanted, now)
+        await db.commit()
+
+        owned_result = await db.execute(
+            select(SwitchLease.switch_id).where(
+                SwitchLease.node_id == self.node_id,
+                SwitchLease.lease_expires_at > now
+            )
+        )
+        self.owned_switch_ids = set(owned_result.scalars().all())
+        await db.commit()
+        self.last_cycle_at = now
+
+        if orphaned_leases or requeued_jobs or released:
+            logger.info(
+                f"Collector cluster rebalance on {self.node_id}: owned={len(self.owned_switch_ids)}, "
+                f"released={released}, orphaned_leases_dropped={orphaned_leases}, "
+                f"jobs_requeued={requeued_jobs}"
+            )
+
+        return {
+            'live_nodes': len(self.live_node_ids),
+            'owned_switches': len(self.owned_switch_ids),
+            'wanted_switches': len(wanted),
+            'released_leases': released,
+            'orphaned_leases': orphaned_leases,
+            'requeued_jobs': requeued_jobs,
+        }
+
+    async def _heartbeat(self, db: AsyncSession, now: datetime) -> None:
+        stmt = insert(CollectorNode).values(
+            node_id=self.node_id,
+            hostname=socket.gethostname(),
+            site=self.site,
+            worker_count=self._worker_count,
+            status='active',
+            started_at=now,
+            last_heartbeat_at=now,
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[CollectorNode.node_id],
+            set_={
+                'site': stmt.excluded.site,
+                'worker_count': stmt.excluded.worker_count,
+                'status': 'active',
+                'last_heartbeat_at': stmt.excluded.last_heartbeat_at,
+            }
+        )
+        await db.execute(stmt)
+
+    async def _release_orphans(self, db: AsyncSession, now: datetime) -> Tuple[int, int]:
+        """Drop leases held by dead nodes and requeue jobs their workers left running."""
+        lease_result = await db.execute(
+            delete(SwitchLease)
+            .where(
+                or_(
+                    SwitchLease.lease_expires_at <= now,
+                    SwitchLease.node_id.not_in(self.live_node_ids)
+                )
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+        live_prefixes = [
+            CollectionJob.worker_id.like(f"{node_id}{self.WORKER_ID_SEPARATOR}%")
+            for node_id in self.live_node_ids
+        ]
+        job_result = await db.execute(
+            update(CollectionJob)
+            .where(
+                CollectionJob.status == JobStatus.RUNNING,
+                or_(
+                    CollectionJob.worker_id.is_(None),
+                    not_(or_(*live_prefixes))
+                )
+            )
+            .values(status=JobStatus.PENDING, worker_id=None, started_at=None)
+            .execution_options(synchronize_session=False)
+        )
+        return lease_result.rowcount or 0, job_result.rowcount or 0
+
+    async def _release_unwanted_leases(self, db: AsyncSession, wanted: List[int]) -> int:
+        conditions = [SwitchLease.node_id == self.node_id]
+        if wanted:
+            conditions.append(SwitchLease.switch_id.not_in(wanted))
+        result = await db.execute(
+            delete(SwitchLease)
+            .where(and_(*conditions))
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount or 0
+
+    async def _acquire_leases(self, db: AsyncSession, wanted: List[int], now: datetime) -> None:
+        """Take or renew leases; never steal a lease another node still holds."""
+        if not wanted:
+            return
+
+        expires_at = now + timedelta(seconds=self.lease_seconds)
+        stmt = insert(SwitchLease).values([
+            {
+                'switch_id': switch_id,
+                'node_id': self.node_id,
+                'acquired_at': now,
+                'lease_expires_at': expires_at,
+            }
+            for switch_id in wanted
+        ])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[SwitchLease.switch_id],
+            set_={
+                'node_id': stmt.excluded.node_id,
+                'acquired_at': case(
+                    (SwitchLease.node_id == self.node_id, SwitchLease.acquired_at),
+                    else_=stmt.excluded.acquired_at
+                ),
+                'lease_expires_at': stmt.excluded.lease_expires_at,
+            },
+            where=or_(
+                SwitchLease.node_id == self.node_id,
+                SwitchLease.lease_expires_at <= now
+            )
+        )
+        await db.execute(stmt)
+
+    def get_status(self) -> Dict[str, object]:
+        return {
+            'enabled': self.enabled,
+            'node_id': self.node_id,
+            'site': self.site,
+            'is_leader': self.is_leader(),
+            'leader_node_id': self.leader_node_id if self.enabled else self.node_id,
+            'live_nodes': self.live_node_ids if self.enabled else [self.node_id],
+            'owned_switches': len(self.owned_switch_ids) if self.enabled else None,
+            'last_cycle_at': self.last_cycle_at.isoformat() if self.last_cycle_at else None,
+        }
+
+
+# Singleton instance
+collector_cluster = CollectorClusterService()
@@ -0,0 +1,123 @@
+"""
+Compiled matching index for CLI command templates
+
+Templates are grouped by vendor, pre-sorted by priority and their wildcard
+patterns compiled to regexes once. Results are memoised per
+(vendor, model, name), so repeated lookups for the same switch cost a dict hit.
+"""
+
+import re
+import threading
+from collections import OrderedDict
+from fnmatch import translate
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+def _compile_pattern(pattern: str) -> Callable[[str], bool]:
+    """Wildcard patterns use fnmatch semantics, plain strings match as substrings."""
+    pattern = pattern.lower()
+    if '*' in pattern or '?' in pattern:
+        return re.compile(translate(pattern)).match
+    return lambda value: pattern in value
+
+
+def template_fingerprint(templates: List[Dict]) -> Tuple:
+    """Identity of a template list as far as matching is concerned."""
+    return tuple(
+        (
+            t.get('id'),
+            t.get('vendor'),
+            t.get('model_pattern'),
+            t.get('name_pattern'),
+            t.get('priority', 100),
+            t.get('enabled', True),
+        )
+        for t in templates
+    )
+
+
+class TemplateMatchIndex:
+    """Pre-compiled, memoising matcher over one template list"""
+
+    MAX_MEMO_ENTRIES = 8192
+
+    def __init__(self, templates: List[Dict]):
+        # vendor -> [(position, model_matcher, name_matcher or None)] by priority desc
+        self._by_vendor: Dict[str, List[Tuple[int, Callable, Optional[Callable]]]] = {}
+        ordered = sorted(
+            enumerate(templates),
+            key=lambda item: item[1].get('priority', 100),
+            reverse=True
+        )
+        for position, template in ordered:
+            if not template.get('enabled', True):
+                continue
+            name_pattern = template.get('name_pattern')
+            self._by_vendor.setdefault(template['vendor'].lower(), []).append((
+                position,
+                _compile_pattern(template['model_pattern']),
+                _compile_pattern(name_pattern) if name_pattern else None,
+            ))
+        self._memo: Dict[Tuple[str, str, str], Optional[int]] = {}
+
+    def match_position(self, vendor: str, model: str, name: str) -> Optional[int]:
+        """Return the list position of the best matching template, or None."""
+        key = (vendor.lower(), model.lower(), name.lower())
+        try:
+            return self._memo[key]
+        except KeyError:
+            pass
+
+        vendor_lower, model_lower, name_lower = key
+        position = None
+        for candidate, model_matcher, name_matcher in self._by_vendor.get(vendor_lower, ()):
+            if not model_matcher(model_lower) and not model_matcher(name_lower):
+                continue
+            if name_matcher is not None and not name_matcher(name_lower):
+                continue
+            position = candidate
+            break
+
+        if len(self._memo) >= self.MAX_MEMO_ENTRIES:
+            self._memo.clear()
+        self._memo[key] = position
+        return position
+
+
+class TemplateIndexCache:
+    """Small LRU of compiled indexes keyed by template list fingerprint"""
+
+    MAX_INDEXES = 8
+
+    def __init__(self):
+        self._indexes: "OrderedDict[Tuple, TemplateMatchIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def match(self, vendor: str, model: str, name: str, templates: List[Dict]) -> Optional[Dict]:
+        if not templates:
+            return None
+        index = self.get_index(templates)
+        position = index.match_position(vendor or '', model or '', name or '')
+        return templates[position] if position is not None else None
+
+    def get_index(self, templates: List[Dict]) -> TemplateMatchIndex:
+        fingerprint = template_fingerprint(templates)
+        with self._lock:
+            index = self._indexes.get(fingerprint)
+            if index is not None:
+                self._indexes.move_to_end(fingerprint)
+                return index
+
+        index = TemplateMatchIndex(templates)
+        with self._lock:
+            self._indexes[fingerprint] = index
+            while len(self._indexes) > self.MAX_INDEXES:
+                self._indexes.popitem(last=False)
+        return index
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._indexes.clear()
+
+
+template_index_cache = TemplateIndexCache()
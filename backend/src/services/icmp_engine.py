@@ -0,0 +1,239 @@
+"""
+ICMP Echo Engine
+
+Asyncio ICMP echo (ping) for IPAM sweeps. Instead of forking /usr/bin/ping per
+address, one socket per address family carries every outstanding probe: echo
+requests are sent with a per-probe sequence number and replies are matched
+back to their probe by sequence number (and identifier on raw sockets) and
+source address, so thousands of probes can be in flight at once
+(IPAM_SCAN_ICMP_MAX_OUTSTANDING).
+
+Sockets:
+
+* unprivileged datagram ICMP sockets (SOCK_DGRAM/IPPROTO_ICMP, allowed when the
+  process group is inside net.ipv4.ping_group_range); the kernel owns the
+  identifier and only delivers replies to our own probes
+* raw ICMP sockets when the process has CAP_NET_RAW; replies of every process
+  arrive, so the identifier is checked
+
+When neither can be opened the engine reports itself unavailable and
+IPScanService keeps using the ping subprocess.
+"""
+
+import asyncio
+import ipaddress
+import os
+import socket
+import struct
+import time
+from typing import Dict, Optional, Tuple
+
+from core.config import settings
+from utils.logger import logger
+
+
+ICMP_ECHO_REQUEST = 8
+ICMP_ECHO_REPLY = 0
+ICMPV6_ECHO_REQUEST = 128
+ICMPV6_ECHO_REPLY = 129
+RECEIVE_BUFFER_BYTES = 4 * 1024 * 1024
+PAYLOAD = b'iptrack-icmp-echo'
+
+
+def icmp_checksum(data: bytes) -> int:
+    """RFC 1071 internet checksum."""
+    if len(data) % 2:
+        data += b'\x00'
+    total = sum(struct.unpack(f'!{len(data) // 2}H', data))
+    total = (total >> 16) + (total & 0xFFFF)
+    total += total >> 16
+    return ~total & 0xFFFF
+
+
+def build_echo_request(identifier: int, sequence: int, version: int = 4) -> bytes:
+    """Echo request packet; the ICMPv6 checksum is left to the kernel (it covers a pseudo header)."""
+    icmp_type = ICMP_ECHO_REQUEST if version == 4 else ICMPV6_ECHO_REQUEST
+    header = struct.pack('!BBHHH', icmp_type, 0, 0, identifier, sequence)
+    if version == 6:
+        return header + PAYLOAD
+    checksum = icmp_checksum(header + PAYLOAD)
+    return struct.pack('!BBHHH', icmp_type, 0, checksum, identifier, sequence) + PAYLOAD
+
+
+def parse_echo_reply(data: bytes, version: int = 4, raw: bool = False) -> Optional[Tuple[int, int]]:
+    """(identifier, sequence) of an echo reply, or None for any other packet."""
+    if version == 4 and raw:
+        # IPv4 raw sockets deliver the IP header too
+        if not data:
+            return None
+        data = data[(data[0] & 0x0F) * 4:]
+    if len(data) < 8:
+        return None
+    icmp_type, code, _, identifier, sequence = struct.unpack('!BBHHH', data[:8])
+    expected = ICMP_ECHO_REPLY if version == 4 else ICMPV6_ECHO_REPLY
+    if icmp_type != expected or code != 0:
+        return None
+    return identifier, sequence
+
+
+class _EchoSocket:
+    """One ICMP socket multiplexing every outstanding probe of an address family"""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, version: int):
+        self.loop = loop
+        self.version = version
+        family = socket.AF_INET if version == 4 else socket.AF_INET6
+        proto = socket.IPPROTO_ICMP if version == 4 else socket.IPPROTO_ICMPV6
+        try:
+            self.sock = socket.socket(family, socket.SOCK_DGRAM, proto)
+            self.raw = False
+        except OSError:
+            self.sock = socket.socket(family, socket.SOCK_RAW, proto)
+            self.raw = True
+        self.sock.setblocking(False)
+        try:
+            self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, RECEIVE_BUFFER_BYTES)
+        except OSError:
+            pass
+        # Datagram sockets: the kernel rewrites the identifier to the socket's "port"
+        self.identifier = os.getpid() & 0xFFFF if self.raw else 0
+        self._sequence = 0
+        self.pending: Dict[int, Tuple[str, float, asyncio.Future]] = {}
+        loop.add_reader(self.sock.fileno(), self._on_readable)
+
+    def close(self):
+        if not self.loop.is_closed():
+            self.loop.remove_reader(self.sock.fileno())
+        self.sock.close()
+        for _, _, future in self.pending.values():
+            if not future.done():
+                future.cancel()
+        self.pending.clear()
+
+    def _next_sequence(self) -> int:
+        for _ in range(0x10000):
+            self._sequence = (self._sequence + 1) & 0xFFFF
+            if self._sequence not in self.pending:
+                return self._sequence
+        raise RuntimeError("No free ICMP sequence numbers")
+
+    def _on_readable(self):
+        while True:
+            try:
+                data, address = self.sock.recvfrom(2048)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError as e:
+                logger.debug(f"ICMP receive error: {str(e)}")
+                return
+
+            reply = parse_echo_reply(data, self.version, self.raw)
+            if reply is None:
+                continue
+            identifier, sequence = reply
+            if self.raw and identifier != self.identifier:
+                continue
+            probe = self.pending.get(sequence)
+            if probe is None:
+                continue
+            target, sent_at, future = probe
+            if ipaddress.ip_address(address[0].split('%')[0]).compressed != target:
+                continue
+            del self.pending[sequence]
+            if not future.done():
+                future.set_result(time.monotonic() - sent_at)
+
+    async def ping(self, target: str, timeout: float) -> Optional[float]:
+        """Round trip time in seconds, or None when no reply arrived in time."""
+        sequence = self._next_sequence()
+        packet = build_echo_request(self.identifier, sequence, self.version)
+        future = self.loop.create_future()
+        self.pending[sequence] = (target, time.monotonic(), future)
+        try:
+            await self.loop.sock_sendto(self.sock, packet, (target, 0))
+            return await asyncio.wait_for(future, timeout=timeout)
+        except asyncio.TimeoutError:
+            return None
+        except OSError as e:
+            # Unreachable network, no route, ... : the host does not answer
+            logger.debug(f"ICMP echo to {target} failed: {str(e)}")
+            return None
+        finally:
+            probe = self.pending.get(sequence)
+            if probe is not None and probe[2] is future:
+                del self.pending[sequence]
+
+
+class IcmpEchoEngine:
+    """Async ping over shared ICMP sockets, bounded to IPAM_SCAN_ICMP_MAX_OUTSTANDING probes"""
+
+    def __init__(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._sockets: Dict[int, Optional[_EchoSocket]] = {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.sent = 0
+        self.replies = 0
+
+    @property
+    def enabled(self) -> bool:
+        return settings.IPAM_SCAN_ICMP_ENGINE == 'auto'
+
+    def _bind_loop(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        self.close()
+        self._loop = loop
+        self._semaphore = asyncio.Semaphore(settings.IPAM_SCAN_ICMP_MAX_OUTSTANDING)
+
+    def _socket(self, version: int) -> Optional[_EchoSocket]:
+        self._bind_loop()
+        if version not in self._sockets:
+            try:
+                self._sockets[version] = _EchoSocket(self._loop, version)
+                kind = 'raw' if self._sockets[version].raw else 'datagram'
+                logger.info(f"ICMP echo engine using a {kind} socket for IPv{version}")
+            except OSError as e:
+                self._sockets[version] = None
+                logger.warning(
+                    f"ICMP echo engine unavailable for IPv{version} ({str(e)}), falling back to the ping command"
+                )
+        return self._sockets[version]
+
+    def available(self, ip: str) -> bool:
+        """Whether ping() can probe this address here (call from the event loop)."""
+        if not self.enabled:
+            return False
+        try:
+            version = ipaddress.ip_address(ip).version
+        except ValueError:
+            return False
+        return self._socket(version) is not None
+
+    async def ping(self, ip: str, timeout: float) -> Tuple[bool, Optional[int]]:
+        """
+        Send one echo request and wait up to timeout seconds for the reply.
+
+        Returns:
+            (is_reachable, response_time_ms), like IPScanService._ping_ip
+        """
+        address = ipaddress.ip_address(ip)
+        echo_socket = self._socket(address.version)
+        async with self._semaphore:
+            self.sent += 1
+            rtt = await echo_socket.ping(address.compressed, timeout)
+        if rtt is None:
+            return (False, None)
+        self.replies += 1
+        return (True, int(rtt * 1000))
+
+    def close(self):
+        for echo_socket in self._sockets.values():
+            if echo_socket is not None:
+                echo_socket.close()
+        self._sockets = {}
+        self._loop = None
+
+
+# Global instance
+icmp_echo_engine = IcmpEchoEngine()
@@ -10,10 +10,12 @@ Implements confidence scoring to handle conflicts when a MAC appears
 on multiple switches.
 """
 
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 from datetime import datetime
+from core.config import settings
 from utils.logger import logger
 from services.port_lookup_policy_service import resolve_lookup_policy
+from services.ip_location_vector_engine import NUMPY_AVAILABLE, vectorized_ip_location_engine
 
 
 class IPLocationEngine:
@@ -111,6 +113,21 @@ class IPLocationEngine:
             if r['ip_address'] == ip_address
         ]
 
+        return self._select_best_location(
+            ip_address,
+            ip_mac_mappings,
+            lambda mac: [r for r in mac_records if r['mac_address'] == mac],
+            port_analysis
+        )
+
+    def _select_best_location(
+        self,
+        ip_address: str,
+        ip_mac_mappings: List[Dict],
+        find_mac_locations: Callable[[str], List[Dict]],
+        port_analysis: Dict[Tuple[int, str], Dict]
+    ) -> Optional[Dict]:
+        """Score the MAC table locations of an IP's primary MAC and return the best one."""
         if not ip_mac_mappings:
             logger.debug(f"No ARP entry found for {ip_address}")
             return None
@@ -127,10 +144,7 @@ class IPLocationEngine:
         primary_mac = ip_mac_mappings[0]['mac_address']
 
         # Step 2: Find all ports where this MAC appears
-        mac_locations = [
-            r for r in mac_records
-            if r['mac_address'] == primary_mac
-        ]
+        mac_locations = find_mac_locations(primary_mac)
 
         if not mac_locations:
             logger.debug(f"MAC {primary_mac} for IP {ip_address} not found in MAC tables")
@@ -240,8 +254,18 @@ class IPLocationEngine:
         Returns:
             List of IP location matches
         """
-        # Get unique IPs
-        unique_ips = list(set([r['ip_address'] for r in arp_records]))
+        if settings.IP_LOCATION_VECTORIZED and NUMPY_AVAILABLE:
+            return vectorized_ip_location_engine.match_all_ips(arp_records, mac_records, port_analysis)
+
+        # Index both tables once instead of scanning them for every IP
+        arp_by_ip: Dict[str, List[Dict]] = {}
+        for record in arp_records:
+            arp_by_ip.setdefault(record['ip_address'], []).append(record)
+        mac_by_address: Dict[str, List[Dict]] = {}
+        for record in mac_records:
+            mac_by_address.setdefault(record['mac_address'], []).append(record)
+
+        unique_ips = list(arp_by_ip)
 
         logger.info(f"Matching {len(unique_ips)} unique IPs to switch ports")
 
@@ -250,10 +274,10 @@ class IPLocationEngine:
         high_confidence_count = 0
 
         for ip in unique_ips:
-            match = self.match_ip_to_location(
+            match = self._select_best_location(
                 ip,
-                arp_records,
-                mac_records,
+                arp_by_ip[ip],
+                lambda mac: mac_by_address.get(mac, []),
                 port_analysis
             )
 
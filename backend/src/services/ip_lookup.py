@@ -1,7 +1,8 @@
-from typing import Optional, Dict, List, Tuple
+from typing import Optional, Dict, List, Tuple, AsyncIterator, Awaitable, Callable
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, cast, and_, or_, desc
-from sqlalchemy.dialects.postgresql import MACADDR, INET
+from sqlalchemy import select, cast, and_, or_, desc, tuple_, bindparam, true, String, DateTime
+from sqlalchemy.orm import aliased
+from sqlalchemy.dialects.postgresql import INET, insert
 from models.switch import Switch
 from models.arp_table import ARPTable
 from models.mac_table import MACTable
@@ -10,15 +11,109 @@ from models.query_history import QueryHistory
 from models.mac_cache import MACAddressCache
 from services.port_lookup_policy_service import build_lookup_eligible_clause
 from services.data_freshness_service import build_lookup_result_freshness
+from services.lookup_topology_index import lookup_topology_index, resolve_from_snapshot, TopologySnapshot
+from services.lookup_result_cache import lookup_result_cache
+from services.lookup_write_buffer import lookup_write_buffer, write_lookup_rows
+from services.lookup_candidates import lookup_candidate_selector
+from services.lookup_single_flight import lookup_single_flight, flight_key
+from services.port_analysis_service import port_analysis_service
+from services.mac_utils import normalize_mac_address
 from services.switch_manager import switch_manager, SwitchConnectionError
 from core.config import settings
 from utils.logger import logger
 import time
 import asyncio
+import ipaddress
 from datetime import datetime, timedelta, timezone
 from concurrent.futures import ThreadPoolExecutor
 
 
+def _build_resolve_statement():
+    """
+    The whole cache mode decision tree as one statement:
+
+    1. newest ARP entry for the IP inside the cache window (with its switch)
+    2. LATERAL: newest MAC table entry for that MAC on a lookup-eligible port
+       on any switch (the physical location, with its switch)
+    3. LATERAL, only when 2 found nothing: newest MAC table entry for the MAC
+       on the ARP switch, regardless of lookup policy
+
+    The statement is built once with bind parameters, so SQLAlchemy reuses its
+    compiled form and asyncpg its per-connection prepared statement.
+    """
+    target_ip = cast(bindparam('target_ip', type_=String), INET)
+    cutoff = bindparam('cutoff', type_=DateTime(timezone=True))
+
+    arp = (
+        select(
+            ARPTable.switch_id,
+            ARPTable.mac_address,
+            ARPTable.interface,
+            ARPTable.vlan_id,
+            ARPTable.last_seen,
+        )
+        .where(and_(ARPTable.ip_address == target_ip, ARPTable.last_seen > cutoff))
+        .order_by(desc(ARPTable.last_seen))
+        .limit(1)
+        .subquery('arp')
+    )
+    eligible_mac = (
+        select(MACTable.switch_id, MACTable.port_name, MACTable.vlan_id, MACTable.last_seen)
+        .outerjoin(
+            PortAnalysis,
+            and_(
+                PortAnalysis.switch_id == MACTable.switch_id,
+                PortAnalysis.port_name == MACTable.port_name
+            )
+        )
+        .where(and_(MACTable.mac_address == arp.c.mac_address, MACTable.last_seen > cutoff))
+        .where(build_lookup_eligible_clause(PortAnalysis))
+        .order_by(desc(MACTable.last_seen))
+        .limit(1)
+        .lateral('eligible_mac')
+    )
+    same_switch_mac = (
+        select(MACTable.port_name, MACTable.vlan_id, MACTable.last_seen)
+        .where(
+            and_(
+                MACTable.mac_address == arp.c.mac_address,
+                MACTable.switch_id == arp.c.switch_id,
+                MACTable.last_seen > cutoff
+            )
+        )
+        .order_by(desc(MACTable.last_seen))
+        .limit(1)
+        .lateral('same_switch_mac')
+    )
+    arp_switch = aliased(Switch, name='arp_switch')
+    mac_switch = aliased(Switch, name='mac_switch')
+
+    return (
+        select(
+            arp.c.mac_address,
+            arp.c.interface.label('arp_interface'),
+            arp.c.vlan_id.label('arp_vlan_id'),
+            arp.c.last_seen.label('arp_last_seen'),
+            arp_switch,
+            mac_switch,
+            eligible_mac.c.port_name.label('eligible_port_name'),
+            eligible_mac.c.vlan_id.label('eligible_vlan_id'),
+            eligible_mac.c.last_seen.label('eligible_last_seen'),
+            same_switch_mac.c.port_name.label('same_switch_port_name'),
+            same_switch_mac.c.vlan_id.label('same_switch_vlan_id'),
+            same_switch_mac.c.last_seen.label('same_switch_last_seen'),
+        )
+        .select_from(arp)
+        .join(arp_switch, arp_switch.id == arp.c.switch_id)
+        .outerjoin(eligible_mac, true())
+        .outerjoin(mac_switch, mac_switch.id == eligible_mac.c.switch_id)
+        .outerjoin(same_switch_mac, eligible_mac.c.switch_id.is_(None))
+    )
+
+
+_RESOLVE_STATEMENT = _build_resolve_statement()
+
+
 class IPLookupService:
     """Service for looking up IP addresses on network switches"""
 
@@ -84,45 +179,272 @@ class IPLookupService:
             logger.error(f"Unexpected error querying switch {switch.name}: {str(e)}")
             return ([], None)
 
-    async def _query_arp_concurrent(self, switches: List[Switch], target_ip: str) -> Tuple[Optional[Dict], Optional[Switch]]:
-        """Query ARP tables on all switches concurrently, return arp_data dict and switch"""
-        loop = asyncio.get_event_loop()
+    async def _fan_out(
+        self,
+        query_single: Callable,
+        switches: List[Switch],
+        target: str,
+        is_hit: Callable[[Tuple], bool],
+        is_authoritative: Callable[[Tuple], bool],
+        deadline_seconds: Optional[float],
+        miss: Tuple
+    ) -> Tuple:
+        """
+        Run query_single(switch, target) for every switch in the thread pool and
+        return the first authoritative result as soon as it arrives.
 
-        # Create tasks for all switches
-        tasks = [
-            loop.run_in_executor(self.executor, self._query_arp_single, switch, target_ip)
+        Queries still running are abandoned (queued ones are cancelled, threads
+        already talking to a switch finish in the background). When the deadline
+        passes first, the first non-authoritative hit seen so far is returned, or
+        miss when there is none.
+        """
+        loop = asyncio.get_running_loop()
+        futures = [
+            loop.run_in_executor(self.executor, query_single, switch, target)
             for switch in switches
         ]
+        partial = None
+        answered = 0
+        try:
+            for next_result in asyncio.as_completed(futures, timeout=deadline_seconds):
+                try:
+                    result = await next_result
+                except asyncio.TimeoutError:
+                    raise
+                except Exception as e:
+                    logger.error(f"Switch query for {target} failed: {str(e)}")
+                    continue
+                answered += 1
+                if not is_hit(result):
+                    continue
+                if is_authoritative(result):
+                    return result
+                if partial is None:
+                    partial = result
+        except asyncio.TimeoutError:
+            logger.warning(
+                f"Switch queries for {target} hit the {deadline_seconds}s deadline with "
+                f"{answered}/{len(futures)} switches answered; returning partial result"
+            )
+        finally:
+            for future in futures:
+                future.cancel()
 
-        # Wait for all queries to complete
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        return partial if partial is not None else miss
 
-        # Find the first successful result
-        for result in results:
-            if isinstance(result, tuple) and result[0] is not None:
-                return result
+    async def _query_arp_concurrent(
+        self,
+        switches: List[Switch],
+        target_ip: str,
+        deadline_seconds: Optional[float] = None
+    ) -> Tuple[Optional[Dict], Optional[Switch]]:
+        """
+        Query ARP tables on all switches concurrently, return arp_data dict and switch.
 
-        return (None, None)
+        Returns on the first switch that knows the IP; gives up after deadline_seconds
+        (IP_LOOKUP_LIVE_DEADLINE_SECONDS by default).
+        """
+        if deadline_seconds is None:
+            deadline_seconds = settings.IP_LOOKUP_LIVE_DEADLINE_SECONDS
+        return await self._fan_out(
+            self._query_arp_single, switches, target_ip,
+            is_hit=lambda result: result[0] is not None,
+            is_authoritative=lambda result: True,
+            deadline_seconds=deadline_seconds,
+            miss=(None, None)
+        )
 
-    async def _query_mac_concurrent(self, switches: List[Switch], mac_address: str) -> Tuple[List, Optional[Switch]]:
-        """Query MAC tables on all switches concurrently"""
-        loop = asyncio.get_event_loop()
+    async def _query_mac_concurrent(
+        self,
+        switches: List[Switch],
+        mac_address: str,
+        deadline_seconds: Optional[float] = None,
+        is_authoritative: Optional[Callable[[List, Switch], bool]] = None
+    ) -> Tuple[List, Optional[Switch]]:
+        """
+        Query MAC tables on all switches concurrently.
 
-        # Create tasks for all switches
-        tasks = [
-            loop.run_in_executor(self.executor, self._query_mac_single, switch, mac_address)
-            for switch in switches
-        ]
+        Returns on the first switch whose entries satisfy is_authoritative(entries, switch)
+        (any entry by default, e.g. pass a check for an access port to skip uplinks).
+        Hits that are not authoritative are kept and returned if the deadline passes.
+        """
+        if deadline_seconds is None:
+            deadline_seconds = settings.IP_LOOKUP_LIVE_DEADLINE_SECONDS
+        return await self._fan_out(
+            self._query_mac_single, switches, mac_address,
+            is_hit=lambda result: bool(result[0]),
+            is_authoritative=(lambda result: is_authoritative(*result)) if is_authoritative else (lambda result: True),
+            deadline_seconds=deadline_seconds,
+            miss=([], None)
+        )
+
+    async def _resolve_from_db(self, db: AsyncSession, target_ip: str, cache_hours: float) -> Dict:
+        """
+        Resolve an IP from the ARP/MAC tables in one round trip (see _RESOLVE_STATEMENT).
+
+        Returns the same resolution dict as lookup_topology_index.resolve:
+        'status' is 'no_arp', 'arp_only' (MAC known, no MAC table port) or
+        'found' (port_name set).
+        """
+        now = datetime.now(timezone.utc)
+        result = await db.execute(
+            _RESOLVE_STATEMENT,
+            {'target_ip': target_ip, 'cutoff': now - timedelta(hours=cache_hours)}
+        )
+        row = result.first()
+        if not row:
+            return {'status': 'no_arp'}
 
-        # Wait for all queries to complete
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        mac_address = str(row.mac_address)
+        logger.info(f"Found MAC {mac_address} for IP {target_ip} in cache (last seen: {row.arp_last_seen})")
 
-        # Find the first successful result
-        for result in results:
-            if isinstance(result, tuple) and result[0]:
-                return result
+        resolution = {
+            'mac_address': mac_address,
+            'switch': row.arp_switch,
+            # ARP interface is a fallback only (may be L3 interface like irb99, vlan99)
+            'arp_interface': row.arp_interface,
+            'vlan_id': row.arp_vlan_id,
+            'last_seen': row.arp_last_seen,
+            'data_age_seconds': int((now - row.arp_last_seen).total_seconds()),
+            'port_source': None,
+            'arp_switch_id': row.arp_switch.id,
+        }
 
-        return ([], None)
+        if row.mac_switch is not None:
+            # IMPORTANT: Use the switch from MAC table (physical location), not from ARP (gateway)
+            # This handles L2/L3 topology where ARP is on gateway but MAC is on access switch
+            resolution['switch'] = row.mac_switch
+            resolution['port_source'] = 'mac_table'
+            port_name, mac_vlan_id, mac_last_seen = row.eligible_port_name, row.eligible_vlan_id, row.eligible_last_seen
+        elif row.same_switch_port_name is not None:
+            resolution['port_source'] = 'same_switch_mac'
+            port_name, mac_vlan_id, mac_last_seen = (
+                row.same_switch_port_name, row.same_switch_vlan_id, row.same_switch_last_seen
+            )
+        else:
+            resolution['status'] = 'arp_only'
+            return resolution
+
+        # Update data age to MAC table entry if it's older
+        resolution.update({
+            'status': 'found',
+            'port_name': port_name,
+            'vlan_id': mac_vlan_id or resolution['vlan_id'],
+            'data_age_seconds': max(resolution['data_age_seconds'], int((now - mac_last_seen).total_seconds())),
+        })
+        return resolution
+
+    def _build_lookup_result(
+        self,
+        target_ip: str,
+        resolution: Dict,
+        cache_hours: float,
+        data_source: str
+    ) -> Tuple[Dict, Dict, Optional[Dict]]:
+        """
+        Turn a resolution into the cache mode lookup result.
+
+        Returns:
+            (result without query_time_ms, QueryHistory fields, MAC cache entry or None)
+        """
+        history = {
+            'target_ip': target_ip, 'found_mac': None, 'switch_id': None, 'switch_name': None,
+            'port_name': None, 'vlan_id': None, 'query_status': 'not_found', 'error_message': None,
+        }
+
+        if resolution['status'] == 'no_arp':
+            history['error_message'] = "No ARP entry found in cached data"
+            return {
+                'found': False,
+                'target_ip': target_ip,
+                'message': f'No ARP entry found in cached data (last {int(cache_hours)} hours)',
+                'query_mode': 'cache',
+                'data_source': data_source
+            }, history, None
+
+        mac_address = resolution['mac_address']
+        data_age_seconds = resolution['data_age_seconds']
+        arp_interface = resolution['arp_interface']
+
+        if resolution['status'] == 'found':
+            port_name = resolution['port_name']
+        elif arp_interface and self._is_usable_arp_interface(arp_interface):
+            # Fallback to ARP interface only when it looks like a real port.
+            port_name = arp_interface
+        else:
+            history['found_mac'] = mac_address
+            history['error_message'] = "MAC address found but port information not available"
+            return {
+                'found': False,
+                'target_ip': target_ip,
+                'mac_address': mac_address,
+                'message': 'MAC address found but port information not available',
+                'query_mode': 'cache',
+                'data_age_seconds': data_age_seconds,
+                'data_source': data_source
+            }, history, None
+
+        switch = resolution['switch']
+        vlan_id = resolution['vlan_id']
+        history.update({
+            'found_mac': mac_address,
+            'switch_id': switch.id,
+            'switch_name': switch.name,
+            'port_name': port_name,
+            'vlan_id': vlan_id,
+            'query_status': 'success',
+        })
+        cache_entry = {
+            'mac_address': mac_address,
+            'switch_id': switch.id,
+            'port_name': port_name,
+            'vlan_id': vlan_id or 1,
+        }
+        freshness = build_lookup_result_freshness(
+            switch,
+            data_age_seconds=data_age_seconds,
+            last_seen_at=resolution['last_seen']
+        )
+
+        return {
+            'found': True,
+            'target_ip': target_ip,
+            'mac_address': mac_address,
+            'switch_id': switch.id,
+            'switch_name': switch.name,
+            'switch_ip': str(switch.ip_address),
+            'port_name': port_name,
+            'vlan_id': vlan_id or 1,
+            'query_mode': 'cache',
+            'data_age_seconds': data_age_seconds,
+            'last_seen': resolution['last_seen'].isoformat(),
+            'message': f'Device located from cached data (data age: {data_age_seconds}s)',
+            'freshness': freshness,
+            'data_source': data_source
+        }, history, cache_entry
+
+    async def _serve_cached_result(self, db: AsyncSession, target_ip: str, cached: Dict, start_time: float) -> Dict:
+        """Answer from a Redis cached lookup result, ageing it by the time it spent in the cache."""
+        result = cached['result']
+        history = cached['history']
+        age_in_cache = max(int(time.time() - cached['cached_at']), 0)
+        if result.get('data_age_seconds') is not None:
+            result['data_age_seconds'] += age_in_cache
+            if result['found']:
+                result['message'] = f"Device located from cached data (data age: {result['data_age_seconds']}s)"
+        if result.get('freshness'):
+            result['freshness']['data_age_seconds'] = result['data_age_seconds']
+        result['data_source'] = 'redis'
+
+        query_time_ms = int((time.time() - start_time) * 1000)
+        await self._log_query(
+            db, target_ip, history['found_mac'], history['switch_id'], history['switch_name'],
+            history['port_name'], history['vlan_id'],
+            history['query_status'], history['error_message'], query_time_ms
+        )
+        result['query_time_ms'] = query_time_ms
+        logger.info(f"Served lookup for {target_ip} from Redis cache (found={result['found']})")
+        return result
 
     async def lookup_ip(self, db: AsyncSession, target_ip: str) -> Dict[str, any]:
         """
@@ -131,6 +453,8 @@ class IPLookupService:
 
         Returns detailed information about where the device is connected based on cached data
         Data from the last collection cycle. Query window is DYNAMICALLY configurable via database settings.
+        Results are served from the shared Redis cache when present; otherwise, when the lookup
+        topology index is enabled and built, the ARP/MAC tables are not read at all.
         """
         start_time = time.time()
         logger.info(f"Starting fast IP lookup from cache for {target_ip}")
@@ -143,181 +467,66 @@ class IPLookupService:
                 db, 'ip_lookup_cache_hours', env_settings.IP_LOOKUP_CACHE_HOURS
             )
 
-            # Step 1: Query ARP table for the target IP
-            # Get the most recent entry within configurable time window
-            arp_query = (
-                select(ARPTable, Switch)
-                .join(Switch, ARPTable.switch_id == Switch.id)
-                .where(
-                    and_(
-                        cast(ARPTable.ip_address, INET) == cast(target_ip, INET),
-                        ARPTable.last_seen > datetime.now(timezone.utc) - timedelta(hours=cache_hours)
-                    )
-                )
-                .order_by(desc(ARPTable.last_seen))
-                .limit(1)
-            )
+            cached = await lookup_result_cache.get(target_ip)
+            if cached:
+                return await self._serve_cached_result(db, target_ip, cached, start_time)
 
-            result = await db.execute(arp_query)
-            row = result.first()
+            # Results are re-cached only if nothing they depend on was invalidated
+            # after the rows were read (the index snapshot may predate this lookup)
+            cache_generation = lookup_topology_index.cache_generation
+            resolution = lookup_topology_index.resolve(target_ip, cache_hours)
+            data_source = 'index'
+            if resolution is None:
+                cache_generation = await lookup_result_cache.generation()
+                resolution = await self._resolve_from_db(db, target_ip, cache_hours)
+                data_source = 'database'
 
-            if not row:
-                logger.info(f"No ARP entry found for IP {target_ip} in cache")
-                await self._log_query(
-                    db, target_ip, None, None, None, None, None,
-                    "not_found", "No ARP entry found in cached data",
-                    int((time.time() - start_time) * 1000)
-                )
-                return {
-                    'found': False,
-                    'target_ip': target_ip,
-                    'message': f'No ARP entry found in cached data (last {int(cache_hours)} hours)',
-                    'query_time_ms': int((time.time() - start_time) * 1000),
-                    'query_mode': 'cache'
-                }
-
-            arp_entry, switch = row
-            mac_address = str(arp_entry.mac_address)
-
-            logger.info(f"Found MAC {mac_address} for IP {target_ip} in cache (last seen: {arp_entry.last_seen})")
-
-            # Store ARP interface as fallback (may be L3 interface like irb99, vlan99)
-            arp_interface = arp_entry.interface
-            vlan_id = arp_entry.vlan_id
-            data_age_seconds = int((datetime.now(timezone.utc) - arp_entry.last_seen).total_seconds())
-
-            # Step 2: Always query MAC table first to get physical port
-            # (ARP interface is often L3 interface like IRB, not physical port)
-            logger.info(f"Checking MAC table for physical port of MAC {mac_address}")
-
-            mac_query = (
-                select(MACTable)
-                .outerjoin(
-                    PortAnalysis,
-                    and_(
-                        PortAnalysis.switch_id == MACTable.switch_id,
-                        PortAnalysis.port_name == MACTable.port_name
-                    )
-                )
-                .where(
-                    and_(
-                        cast(MACTable.mac_address, MACADDR) == cast(mac_address, MACADDR),
-                        # MACTable.switch_id == switch.id,  # REMOVED: Allow finding MAC on any switch
-                        MACTable.last_seen > datetime.now(timezone.utc) - timedelta(hours=cache_hours)
+            if resolution['status'] == 'found':
+                switch = resolution['switch']
+                if resolution['port_source'] == 'mac_table':
+                    logger.info(f"Found physical port {resolution['port_name']} in MAC table on switch {switch.name} (ID: {switch.id})")
+                else:
+                    logger.info(
+                        f"Found same-switch MAC port {resolution['port_name']} for {target_ip} on "
+                        f"{switch.name} after lookup-policy filtering excluded other candidates"
                     )
-                )
-                .where(build_lookup_eligible_clause(PortAnalysis))
 
-                .order_by(desc(MACTable.last_seen))
-                .limit(1)
+            result, history, cache_entry = self._build_lookup_result(
+                target_ip, resolution, cache_hours, data_source
             )
 
-            mac_result = await db.execute(mac_query)
-            mac_entry = mac_result.scalar_one_or_none()
-
-            if mac_entry:
-                # Found physical port in MAC table
-                # IMPORTANT: Use the switch from MAC table (physical location), not from ARP (gateway)
-                # This handles L2/L3 topology where ARP is on gateway but MAC is on access switch
-                port_name = mac_entry.port_name
-                vlan_id = mac_entry.vlan_id or vlan_id
-                
-                # Get the actual switch where MAC was found (physical connection)
-                actual_switch_result = await db.execute(
-                    select(Switch).where(Switch.id == mac_entry.switch_id)
-                )
-                actual_switch = actual_switch_result.scalar_one_or_none()
-                if actual_switch:
-                    switch = actual_switch  # Override with physical switch location
-                
-                # Update data age to MAC table entry if it's newer
-                mac_age_seconds = int((datetime.now(timezone.utc) - mac_entry.last_seen).total_seconds())
-                data_age_seconds = max(data_age_seconds, mac_age_seconds)
-                logger.info(f"Found physical port {port_name} in MAC table on switch {switch.name} (ID: {switch.id})")
-            else:
-                same_switch_mac_result = await db.execute(
-                    select(MACTable)
-                    .where(
-                        and_(
-                            cast(MACTable.mac_address, MACADDR) == cast(mac_address, MACADDR),
-                            MACTable.switch_id == switch.id,
-                            MACTable.last_seen > datetime.now(timezone.utc) - timedelta(hours=cache_hours)
-                        )
-                    )
-                    .order_by(desc(MACTable.last_seen))
-                    .limit(1)
-                )
-                same_switch_mac_entry = same_switch_mac_result.scalar_one_or_none()
-
-                if same_switch_mac_entry:
-                    port_name = same_switch_mac_entry.port_name
-                    vlan_id = same_switch_mac_entry.vlan_id or vlan_id
-                    mac_age_seconds = int((datetime.now(timezone.utc) - same_switch_mac_entry.last_seen).total_seconds())
-                    data_age_seconds = max(data_age_seconds, mac_age_seconds)
-                    logger.info(
-                        f"Found same-switch MAC port {port_name} for {target_ip} on "
-                        f"{switch.name} after lookup-policy filtering excluded other candidates"
-                    )
-                elif arp_interface and self._is_usable_arp_interface(arp_interface):
-                    # Fallback to ARP interface only when it looks like a real port.
-                    port_name = arp_interface
-                    logger.info(f"Using ARP interface {port_name} (MAC table entry not found)")
-                else:
-                    # No port info at all
-                    logger.info(f"No port information found for {mac_address}")
-                    await self._log_query(
-                        db, target_ip, mac_address, None, None, None, None,
-                        "not_found", "MAC address found but port information not available",
-                        int((time.time() - start_time) * 1000)
-                    )
-                    return {
-                        'found': False,
-                        'target_ip': target_ip,
-                        'mac_address': mac_address,
-                        'message': 'MAC address found but port information not available',
-                        'query_time_ms': int((time.time() - start_time) * 1000),
-                        'query_mode': 'cache',
-                        'data_age_seconds': data_age_seconds
-                    }
+            await lookup_result_cache.set(
+                target_ip,
+                {'result': result, 'history': history, 'cached_at': time.time()},
+                switch_ids=(resolution.get('arp_switch_id'), result.get('switch_id')),
+                mac_address=resolution.get('mac_address'),
+                generation=cache_generation
+            )
 
             # Step 3: Update MAC cache
-            if port_name:
+            if cache_entry:
                 await self._update_mac_cache(
-                    db, mac_address, target_ip, switch.id,
-                    port_name, vlan_id or 1
+                    db, cache_entry['mac_address'], target_ip, cache_entry['switch_id'],
+                    cache_entry['port_name'], cache_entry['vlan_id']
                 )
 
-            # Step 4: Log successful query
+            # Step 4: Log query
             query_time_ms = int((time.time() - start_time) * 1000)
             await self._log_query(
-                db, target_ip, mac_address, switch.id, switch.name,
-                port_name, vlan_id,
-                "success", None, query_time_ms
-            )
-
-            logger.info(f"Successfully located IP {target_ip} on switch {switch.name} port {port_name} (from cache, {data_age_seconds}s old)")
-            freshness = build_lookup_result_freshness(
-                switch,
-                data_age_seconds=data_age_seconds,
-                last_seen_at=arp_entry.last_seen
+                db, target_ip, history['found_mac'], history['switch_id'], history['switch_name'],
+                history['port_name'], history['vlan_id'],
+                history['query_status'], history['error_message'], query_time_ms
             )
+            result['query_time_ms'] = query_time_ms
 
-            return {
-                'found': True,
-                'target_ip': target_ip,
-                'mac_address': mac_address,
-                'switch_id': switch.id,
-                'switch_name': switch.name,
-                'switch_ip': str(switch.ip_address),
-                'port_name': port_name,
-                'vlan_id': vlan_id or 1,
-                'query_time_ms': query_time_ms,
-                'query_mode': 'cache',
-                'data_age_seconds': data_age_seconds,
-                'last_seen': arp_entry.last_seen.isoformat(),
-                'message': f'Device located from cached data (data age: {data_age_seconds}s)',
-                'freshness': freshness
-            }
+            if result['found']:
+                logger.info(
+                    f"Successfully located IP {target_ip} on switch {result['switch_name']} port {result['port_name']} "
+                    f"(from {data_source}, {result['data_age_seconds']}s old)"
+                )
+            else:
+                logger.info(f"{history['error_message']} for IP {target_ip}")
+            return result
 
         except Exception as e:
             logger.error(f"Unexpected error during cache lookup: {str(e)}", exc_info=True)
@@ -334,25 +543,532 @@ class IPLookupService:
                 'query_mode': 'cache'
             }
 
+    async def _query_targeted(
+        self,
+        query_concurrent: Callable,
+        switches_by_id: Dict[int, Switch],
+        candidate_ids: List[int],
+        target: str,
+        is_match: Callable[[Tuple], bool],
+        before_stage: Optional[Callable[[List[Switch]], Awaitable]] = None,
+        **query_kwargs
+    ) -> Tuple[Tuple, int, Optional[str]]:
+        """
+        Ask the candidate switches first and the rest of the fleet only when they miss.
+
+        before_stage(switches) is awaited before each stage queries its switches,
+        e.g. to load the data is_match needs for just those switches.
+
+        Returns:
+            (result, switches_queried, stage) where stage is 'targeted', 'fleet' or None on a miss
+        """
+        candidates = [switches_by_id[switch_id] for switch_id in candidate_ids if switch_id in switches_by_id]
+        queried = 0
+        if candidates:
+            if before_stage:
+                await before_stage(candidates)
+            result = await query_concurrent(candidates, target, **query_kwargs)
+            queried += len(candidates)
+            if is_match(result):
+                return result, queried, 'targeted'
+            logger.info(f"Live lookup for {target}: {len(candidates)} candidate switches missed, querying the fleet")
+
+        candidate_ids = {switch.id for switch in candidates}
+        rest = [switch for switch in switches_by_id.values() if switch.id not in candidate_ids]
+        if rest:
+            if before_stage:
+                await before_stage(rest)
+            result = await query_concurrent(rest, target, **query_kwargs)
+            queried += len(rest)
+            if is_match(result):
+                return result, queried, 'fleet'
+        return (None, None), queried, None
+
+    @staticmethod
+    def _as_vlan(value) -> Optional[int]:
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return None
+
+    async def lookup_ip_live(self, db: AsyncSession, target_ip: str) -> Dict[str, any]:
+        """
+        Realtime IP lookup by querying switches directly via SSH/CLI.
+
+        Only the switches lookup_candidate_selector ranks as likely (subnet gateways
+        for ARP; last known location, current MAC table holders and VLAN carriers for
+        the MAC) are asked first; the rest of the fleet is queried only when they miss.
+        MAC table hits on ports excluded by the lookup policy (trunks, uplinks, manual
+        excludes) do not count as a location.
+        """
+        start_time = time.time()
+        logger.info(f"Starting live IP lookup for {target_ip}")
+        switches_queried = 0
+        mac_address = None
+
+        async def not_found(status: str, message: str) -> Dict:
+            query_time_ms = int((time.time() - start_time) * 1000)
+            await self._log_query(
+                db, target_ip, mac_address, None, None, None, None, status, message, query_time_ms
+            )
+            logger.info(f"{message} for IP {target_ip} ({switches_queried} switches queried)")
+            return {
+                'found': False,
+                'target_ip': target_ip,
+                'mac_address': mac_address,
+                'message': message,
+                'query_time_ms': query_time_ms,
+                'query_mode': 'realtime',
+                'switches_queried': switches_queried,
+            }
+
+        try:
+            result = await db.execute(
+                select(Switch)
+                .where(Switch.enabled == True)
+                .order_by(Switch.id.asc())
+            )
+            switches_by_id = {switch.id: switch for switch in result.scalars().all()}
+            if not switches_by_id:
+                return await not_found("error", "No enabled switches configured")
+
+            # Step 1: ARP on the subnet's gateways, then the fleet
+            arp_candidates = await lookup_candidate_selector.arp_candidates(db, target_ip)
+            (arp_data, arp_switch), queried, arp_stage = await self._query_targeted(
+                self._query_arp_concurrent, switches_by_id, arp_candidates, target_ip,
+                is_match=lambda result: result[0] is not None
+            )
+            switches_queried += queried
+            if arp_stage is None:
+                return await not_found("not_found", "No ARP entry found for this IP address")
+
+            raw_mac = arp_data['mac']
+            try:
+                mac_address = normalize_mac_address(raw_mac)
+            except ValueError:
+                mac_address = raw_mac
+
+            # Lookup policy exclusions of the switches about to be asked, not the whole fleet
+            excluded_ports = await lookup_candidate_selector.excluded_ports(db, switch_id=arp_switch.id)
+
+            async def load_exclusions(switches: List[Switch]):
+                excluded_ports.update(await lookup_candidate_selector.excluded_ports(
+                    db, switch_ids=[switch.id for switch in switches if switch.id != arp_switch.id]
+                ))
+
+            def eligible_entries(entries: List[Dict], switch: Switch) -> List[Dict]:
+                return [
+                    entry for entry in entries or []
+                    if entry.get('port') and (
+                        switch.id, port_analysis_service.normalize_port_name(entry['port'])
+                    ) not in excluded_ports
+                ]
+
+            # Step 2: port straight from ARP output (some platforms include it), else MAC tables
+            arp_port_entries = eligible_entries([{'port': arp_data.get('port'), 'vlan': arp_data.get('vlan')}], arp_switch)
+            if arp_port_entries:
+                port_switch, entry, stages = arp_switch, arp_port_entries[0], {arp_stage}
+            else:
+                mac_candidates = await lookup_candidate_selector.mac_candidates(
+                    db, mac_address, self._as_vlan(arp_data.get('vlan')), arp_switch.id
+                )
+                (entries, port_switch), queried, mac_stage = await self._query_targeted(
+                    self._query_mac_concurrent, switches_by_id, mac_candidates, raw_mac,
+                    is_match=lambda result: result[1] is not None and bool(eligible_entries(*result)),
+                    before_stage=load_exclusions,
+                    is_authoritative=lambda entries, switch: bool(eligible_entries(entries, switch))
+                )
+                switches_queried += queried
+                if mac_stage is None:
+                    return await not_found("not_found", "MAC address not found on any lookup-eligible switch port")
+                entry, stages = eligible_entries(entries, port_switch)[0], {arp_stage, mac_stage}
+
+            port_name = port_analysis_service.normalize_port_name(entry['port'])
+            vlan_id = self._as_vlan(entry.get('vlan')) or self._as_vlan(arp_data.get('vlan'))
+            lookup_stage = 'fleet' if 'fleet' in stages else 'targeted'
+
+            await self._update_mac_cache(db, mac_address, target_ip, port_switch.id, port_name, vlan_id)
+            query_time_ms = int((time.time() - start_time) * 1000)
+            await self._log_query(
+                db, target_ip, mac_address, port_switch.id, port_switch.name, port_name, vlan_id,
+                "success", None, query_time_ms
+            )
+            logger.info(
+                f"Live lookup located IP {target_ip} on switch {port_switch.name} port {port_name} "
+                f"({switches_queried}/{len(switches_by_id)} switches queried, {lookup_stage})"
+            )
+            return {
+                'found': True,
+                'target_ip': target_ip,
+                'mac_address': mac_address,
+                'switch_id': port_switch.id,
+                'switch_name': port_switch.name,
+                'switch_ip': str(port_switch.ip_address),
+                'port_name': port_name,
+                'vlan_id': vlan_id,
+                'query_time_ms': query_time_ms,
+                'query_mode': 'realtime',
+                'message': f'Device located by live switch query ({switches_queried} switches queried)',
+                'switches_queried': switches_queried,
+                'lookup_stage': lookup_stage,
+            }
+
+        except Exception as e:
+            logger.error(f"Unexpected error during live lookup: {str(e)}", exc_info=True)
+            return await not_found("error", f"Live lookup error: {str(e)}")
+
+    @staticmethod
+    def _verification_reason(result: Dict) -> Optional[str]:
+        """Why a cached answer needs live re-verification, or None when it can be served as is."""
+        freshness = result.get('freshness') or {}
+        if freshness.get('status') == 'stale':
+            return freshness.get('reason') or 'stale'
+        if (result.get('data_age_seconds') or 0) > settings.IP_LOOKUP_HYBRID_MAX_AGE_SECONDS:
+            return 'data_age'
+        return None
+
+    async def _verify_port_live(self, db: AsyncSession, result: Dict, budget_seconds: float) -> Dict:
+        """
+        Ask only the cached switch where the MAC is now, within budget_seconds.
+
+        Returns:
+            Verification dict; status is 'confirmed', 'moved' (port updated in result),
+            'not_found', 'timeout' or 'error'
+        """
+        started = time.time()
+        verification = {'status': 'error', 'switch_id': result['switch_id'], 'cached_port': result['port_name']}
+        switch = await db.get(Switch, result['switch_id'])
+        if switch is None:
+            return {**verification, 'message': 'Switch no longer exists'}
+
+        # switch_manager directly, not _query_mac_single: a failed query must not read as 'not_found'
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self.executor, switch_manager.query_mac_table, switch, result['mac_address'])
+        try:
+            entries = await asyncio.wait_for(future, timeout=budget_seconds) or []
+        except asyncio.TimeoutError:
+            verification['status'] = 'timeout'
+            verification['message'] = f'Switch did not answer within {budget_seconds}s'
+            return verification
+        except SwitchConnectionError as e:
+            logger.warning(f"Hybrid verification of {result['target_ip']} on {switch.name} failed: {str(e)}")
+            verification['message'] = f'Switch query failed: {str(e)}'
+            return verification
+        except Exception as e:
+            logger.error(f"Unexpected error verifying {result['target_ip']} on {switch.name}: {str(e)}")
+            verification['message'] = f'Switch query failed: {str(e)}'
+            return verification
+        finally:
+            verification['verify_time_ms'] = int((time.time() - started) * 1000)
+
+        # (port, vlan) of every live MAC entry
+        live_entries = [
+            (port_analysis_service.normalize_port_name(entry['port']), self._as_vlan(entry.get('vlan')))
+            for entry in entries if entry.get('port')
+        ]
+        cached_port = port_analysis_service.normalize_port_name(result['port_name'])
+        if any(port == cached_port for port, _ in live_entries):
+            verification['status'] = 'confirmed'
+            return verification
+
+        excluded_ports = await lookup_candidate_selector.excluded_ports(db, switch_id=switch.id)
+        eligible = [(port, vlan) for port, vlan in live_entries if (switch.id, port) not in excluded_ports]
+        # Neither outcome may be served from the Redis entry again
+        await lookup_result_cache.invalidate(ips=[result['target_ip']])
+        if not eligible:
+            verification['status'] = 'not_found'
+            verification['message'] = 'MAC is no longer on a lookup-eligible port of this switch'
+            return verification
+
+        live_port, live_vlan = eligible[0]
+        verification.update({'status': 'moved', 'live_port': live_port})
+        result['port_name'] = live_port
+        result['vlan_id'] = live_vlan or result.get('vlan_id')
+        await self._update_mac_cache(
+            db, result['mac_address'], result['target_ip'], switch.id, live_port, result['vlan_id']
+        )
+        return verification
+
+    async def lookup_ip_hybrid(self, db: AsyncSession, target_ip: str) -> Dict[str, any]:
+        """
+        Cache lookup that re-verifies doubtful answers on the switch itself.
+
+        The cached answer is served as is unless it is older than
+        IP_LOOKUP_HYBRID_MAX_AGE_SECONDS or its freshness marks the switch stale; then
+        only the cached switch is asked (one MAC table query, no fleet fan-out) within
+        IP_LOOKUP_HYBRID_BUDGET_SECONDS. A confirmed answer is returned as fresh, a moved
+        MAC updates the port, a MAC gone from the switch's eligible ports marks the
+        cached answer stale, and a timeout serves the cached answer marked unverified.
+        """
+        start_time = time.time()
+        result = await self.lookup_ip(db, target_ip)
+        result['query_mode'] = 'hybrid'
+        if not result['found']:
+            return result
+
+        reason = self._verification_reason(result)
+        if reason is None:
+            result['verification'] = {'status': 'not_needed'}
+            return result
+        if reason == 'switch_offline':
+            result['verification'] = {'status': 'skipped', 'reason': reason}
+            return result
+
+        budget = settings.IP_LOOKUP_HYBRID_BUDGET_SECONDS - (time.time() - start_time)
+        if budget <= 0:
+            result['verification'] = {'status': 'timeout', 'reason': reason, 'message': 'No time budget left'}
+            return result
+
+        try:
+            verification = await self._verify_port_live(db, result, budget)
+        except Exception as e:
+            logger.error(f"Live verification of {target_ip} failed: {str(e)}")
+            verification = {'status': 'error', 'message': str(e)}
+        verification['reason'] = reason
+        result['verification'] = verification
+
+        if verification['status'] in ('confirmed', 'moved'):
+            result['data_age_seconds'] = 0
+            if result.get('freshness'):
+                result['freshness'].update({
+                    'status': 'fresh', 'reason': 'live_verified', 'warning': None, 'data_age_seconds': 0
+                })
+            result['message'] = (
+                f"Device located and verified live on {result['switch_name']}"
+                if verification['status'] == 'confirmed'
+                else f"Device moved to port {result['port_name']} (verified live on {result['switch_name']})"
+            )
+        elif verification['status'] == 'not_found':
+            if result.get('freshness'):
+                result['freshness'].update({
+                    'status': 'stale',
+                    'reason': 'live_not_found',
+                    'warning': '实时校验未在该交换机的可定位端口上找到该 MAC，缓存的端口位置可能已经失效。',
+                })
+            result['message'] = (
+                f"MAC no longer seen on a lookup-eligible port of {result['switch_name']}; "
+                f"cached port {result['port_name']} is likely outdated"
+            )
+        result['query_time_ms'] = int((time.time() - start_time) * 1000)
+        logger.info(
+            f"Hybrid lookup for {target_ip}: verification {verification['status']} "
+            f"({reason}) in {result['query_time_ms']}ms"
+        )
+        return result
+
+    async def lookup(self, db: AsyncSession, target_ip: str, mode: str = 'cache') -> Dict[str, any]:
+        """
+        Look up an IP in the given mode ('cache', 'hybrid' or 'realtime').
+
+        Concurrent identical lookups (same IP and mode) share one computation, see
+        lookup_single_flight; callers joining an in-flight lookup get a copy of its result.
+        """
+        handlers = {
+            'cache': self.lookup_ip,
+            'hybrid': self.lookup_ip_hybrid,
+            'realtime': self.lookup_ip_live,
+        }
+        handler = handlers[mode]
+        return await lookup_single_flight.do(flight_key(mode, target_ip), lambda: handler(db, target_ip))
+
+    @staticmethod
+    def parse_batch_targets(targets: List[str]) -> Tuple[List[str], List[str], int]:
+        """
+        Split batch lookup targets into unique IPs and CIDR networks.
+
+        Returns:
+            (ips, networks, address_count)
+
+        Raises:
+            ValueError: when a target is neither an IP address nor a network
+        """
+        ips: Dict[str, None] = {}
+        networks: Dict[str, None] = {}
+        for target in targets:
+            value = str(target).strip()
+            try:
+                if '/' not in value:
+                    ips[ipaddress.ip_address(value).compressed] = None
+                    continue
+                network = ipaddress.ip_network(value, strict=False)
+            except ValueError:
+                raise ValueError(f"Invalid IP address or network: {value}")
+            if network.num_addresses == 1:
+                ips[network.network_address.compressed] = None
+            else:
+                networks[network.with_prefixlen] = None
+
+        address_count = len(ips) + sum(ipaddress.ip_network(n).num_addresses for n in networks)
+        return list(ips), list(networks), address_count
+
+    async def _load_batch_snapshot(
+        self,
+        db: AsyncSession,
+        cutoff: datetime,
+        ips: Optional[List[str]] = None,
+        network: Optional[str] = None
+    ) -> TopologySnapshot:
+        """
+        Set-based cache lookup for many IPs (or every IP of a network) in four queries:
+        newest ARP binding per IP, newest lookup-eligible MAC port per MAC (port
+        policy join), same-switch MAC ports for the rest, and the switches involved.
+        """
+        arp_stmt = (
+            select(
+                ARPTable.ip_address, ARPTable.mac_address, ARPTable.switch_id,
+                ARPTable.interface, ARPTable.vlan_id, ARPTable.last_seen,
+            )
+            .where(ARPTable.last_seen > cutoff)
+            .distinct(ARPTable.ip_address)
+            .order_by(ARPTable.ip_address, desc(ARPTable.last_seen))
+        )
+        if ips is not None:
+            arp_stmt = arp_stmt.where(ARPTable.ip_address.in_(ips))
+        if network is not None:
+            arp_stmt = arp_stmt.where(ARPTable.ip_address.op('<<=')(cast(network, INET)))
+
+        arp_by_ip = {
+            str(ip): (str(mac), switch_id, interface, vlan_id, last_seen)
+            for ip, mac, switch_id, interface, vlan_id, last_seen in (await db.execute(arp_stmt)).all()
+        }
+        if not arp_by_ip:
+            return TopologySnapshot({}, {}, {}, {}, None, None)
+
+        macs = list({arp[0] for arp in arp_by_ip.values()})
+        eligible_rows = await db.execute(
+            select(MACTable.mac_address, MACTable.switch_id, MACTable.port_name, MACTable.vlan_id, MACTable.last_seen)
+            .outerjoin(
+                PortAnalysis,
+                and_(
+                    PortAnalysis.switch_id == MACTable.switch_id,
+                    PortAnalysis.port_name == MACTable.port_name
+                )
+            )
+            .where(build_lookup_eligible_clause(PortAnalysis))
+            .where(MACTable.last_seen > cutoff)
+            .where(MACTable.mac_address.in_(macs))
+            .distinct(MACTable.mac_address)
+            .order_by(MACTable.mac_address, desc(MACTable.last_seen))
+        )
+        eligible_port_by_mac = {
+            str(mac): (switch_id, port_name, vlan_id, last_seen)
+            for mac, switch_id, port_name, vlan_id, last_seen in eligible_rows.all()
+        }
+
+        fallback_pairs = list({
+            (arp[0], arp[1]) for arp in arp_by_ip.values() if arp[0] not in eligible_port_by_mac
+        })
+        port_by_mac_switch = {}
+        if fallback_pairs:
+            same_switch_rows = await db.execute(
+                select(MACTable.mac_address, MACTable.switch_id, MACTable.port_name, MACTable.vlan_id, MACTable.last_seen)
+                .where(MACTable.last_seen > cutoff)
+                .where(tuple_(MACTable.mac_address, MACTable.switch_id).in_(fallback_pairs))
+                .distinct(MACTable.mac_address, MACTable.switch_id)
+                .order_by(MACTable.mac_address, MACTable.switch_id, desc(MACTable.last_seen))
+            )
+            port_by_mac_switch = {
+                (str(mac), switch_id): (port_name, vlan_id, last_seen)
+                for mac, switch_id, port_name, vlan_id, last_seen in same_switch_rows.all()
+            }
+
+        switch_ids = {arp[1] for arp in arp_by_ip.values()} | {port[0] for port in eligible_port_by_mac.values()}
+        switches = {
+            switch.id: switch
+            for switch in (await db.execute(select(Switch).where(Switch.id.in_(switch_ids)))).scalars().all()
+        }
+        return TopologySnapshot(arp_by_ip, eligible_port_by_mac, port_by_mac_switch, switches, None, None)
+
+    async def lookup_ips_batch(
+        self,
+        db: AsyncSession,
+        ips: List[str],
+        networks: List[str],
+        record_history: bool = True
+    ) -> AsyncIterator[Dict]:
+        """
+        Cache mode lookup of many IPs, yielding one result per IP as it is resolved.
+
+        Single IPs always yield a result (found or not); networks yield results for
+        the addresses that have an ARP entry. IPs are resolved in chunks of
+        IP_LOOKUP_BATCH_CHUNK_SIZE with set-based queries. With record_history,
+        query history and MAC cache rows are written in bulk after the last result.
+        """
+        start_time = time.time()
+        from services.settings_service import settings_service
+        cache_hours = await settings_service.get_setting(
+            db, 'ip_lookup_cache_hours', settings.IP_LOOKUP_CACHE_HOURS
+        )
+        cutoff = datetime.now(timezone.utc) - timedelta(hours=cache_hours)
+        chunk_size = settings.IP_LOOKUP_BATCH_CHUNK_SIZE
+
+        scopes = [(ips[i:i + chunk_size], None) for i in range(0, len(ips), chunk_size)]
+        scopes += [(None, network) for network in networks]
+
+        history_rows: List[Dict] = []
+        cache_rows: Dict[Tuple, Dict] = {}
+        total = found = 0
+        for chunk, network in scopes:
+            snapshot = await self._load_batch_snapshot(db, cutoff, ips=chunk, network=network)
+            targets = chunk if chunk is not None else sorted(snapshot.arp_by_ip, key=ipaddress.ip_address)
+            query_time_ms = int((time.time() - start_time) * 1000)
+
+            for target_ip in targets:
+                result, history, cache_entry = self._build_lookup_result(
+                    target_ip,
+                    resolve_from_snapshot(snapshot, target_ip, cache_hours),
+                    cache_hours,
+                    'database'
+                )
+                result['query_time_ms'] = query_time_ms
+                total += 1
+                found += result['found']
+                if record_history:
+                    history_rows.append({**history, 'query_time_ms': query_time_ms})
+                    if cache_entry:
+                        key = (cache_entry['mac_address'], cache_entry['switch_id'], cache_entry['port_name'])
+                        cache_rows[key] = {**cache_entry, 'ip_address': target_ip}
+                yield result
+
+        if record_history and history_rows:
+            await self._record_batch_history(db, history_rows, list(cache_rows.values()))
+
+        logger.info(
+            f"Batch IP lookup: {found}/{total} located "
+            f"({len(ips)} IPs, {len(networks)} networks) in {int((time.time() - start_time) * 1000)}ms"
+        )
+
+    async def _record_batch_history(self, db: AsyncSession, history_rows: List[Dict], cache_rows: List[Dict]):
+        """Bulk insert query history and upsert MAC cache entries for a batch lookup."""
+        try:
+            now = datetime.now(timezone.utc)
+            await write_lookup_rows(db, history_rows, [{**row, 'last_seen': now} for row in cache_rows])
+            await db.commit()
+        except Exception as e:
+            logger.error(f"Failed to record batch lookup history: {str(e)}")
+            await db.rollback()
+
     async def _log_query(
         self, db: AsyncSession, target_ip: str, mac: Optional[str],
         switch_id: Optional[int], switch_name: Optional[str], port: Optional[str], vlan: Optional[int],
         status: str, error_msg: Optional[str], query_time_ms: int
     ):
-        """Log query to history table"""
+        """Log query to history table (queued on the write buffer when it is running)"""
+        row = {
+            'target_ip': target_ip,
+            'found_mac': mac,
+            'switch_id': switch_id,
+            'switch_name': switch_name,
+            'port_name': port,
+            'vlan_id': vlan,
+            'query_status': status,
+            'error_message': error_msg,
+            'query_time_ms': query_time_ms,
+        }
+        if lookup_write_buffer.add_query(row):
+            return
         try:
-            history = QueryHistory(
-                target_ip=target_ip,
-                found_mac=mac,
-                switch_id=switch_id,
-                switch_name=switch_name,
-                port_name=port,
-                vlan_id=vlan,
-                query_status=status,
-                error_message=error_msg,
-                query_time_ms=query_time_ms
-            )
-            db.add(history)
+            db.add(QueryHistory(**row))
             await db.commit()
         except Exception as e:
             logger.error(f"Failed to log query history: {str(e)}")
@@ -362,34 +1078,33 @@ class IPLookupService:
         self, db: AsyncSession, mac: str, ip: str,
         switch_id: int, port: str, vlan: int
     ):
-        """Update or create MAC address cache entry"""
+        """Update or create MAC address cache entry (single upsert on uq_mac_switch_port)"""
+        if lookup_write_buffer.add_mac_cache({
+            'mac_address': mac,
+            'ip_address': ip,
+            'switch_id': switch_id,
+            'port_name': port,
+            'vlan_id': vlan,
+        }):
+            return
         try:
-            # Check if entry exists - cast string to MACADDR for comparison
-            result = await db.execute(
-                select(MACAddressCache).where(
-                    cast(MACAddressCache.mac_address, MACADDR) == cast(mac, MACADDR),
-                    MACAddressCache.switch_id == switch_id,
-                    MACAddressCache.port_name == port
-                )
+            stmt = insert(MACAddressCache).values(
+                mac_address=mac,
+                ip_address=ip,
+                switch_id=switch_id,
+                port_name=port,
+                vlan_id=vlan
             )
-            cache_entry = result.scalar_one_or_none()
-
-            if cache_entry:
-                # Update existing entry
-                cache_entry.ip_address = ip
-                cache_entry.vlan_id = vlan
-                cache_entry.last_seen = datetime.now(timezone.utc)
-            else:
-                # Create new entry
-                cache_entry = MACAddressCache(
-                    mac_address=mac,
-                    ip_address=ip,
-                    switch_id=switch_id,
-                    port_name=port,
-                    vlan_id=vlan
+            await db.execute(
+                stmt.on_conflict_do_update(
+                    constraint='uq_mac_switch_port',
+                    set_={
+                        'ip_address': stmt.excluded.ip_address,
+                        'vlan_id': stmt.excluded.vlan_id,
+                        'last_seen': datetime.now(timezone.utc),
+                    }
                 )
-                db.add(cache_entry)
-
+            )
             await db.commit()
             logger.debug(f"Updated MAC cache for {mac}")
 
@@ -1,6 +1,7 @@
 from typing import Optional, Dict, List, Tuple, Callable, Awaitable, Any
 import asyncio
 import inspect
+import ipaddress
 import subprocess
 import socket
 import re
@@ -10,6 +11,9 @@ import struct
 import random
 from concurrent.futures import ThreadPoolExecutor
 from core.config import settings
+from services.icmp_engine import icmp_echo_engine
+from services.ping_sweep import ping_sweep
+from services.neighbor_table import neighbor_table
 from utils.logger import logger
 
 # Try to import dnspython, but make it optional
@@ -27,9 +31,9 @@ class IPScanService:
 
     def __init__(self):
         self.executor = ThreadPoolExecutor(max_workers=settings.IPAM_SCAN_WORKERS)
-        # Semaphore to limit concurrent scan operations (prevent resource exhaustion)
-        # Limit to 20 concurrent scans to prevent ping failures due to network congestion
-        self.semaphore = asyncio.Semaphore(20)
+        # Semaphore to limit concurrent thread pool scans (subprocess ping fallback and enrichment).
+        # Pings through the ICMP echo engine are paced by the ping sweep (IPAM_SWEEP_PPS) instead
+        self.semaphore = asyncio.Semaphore(settings.IPAM_SCAN_WORKERS)
         # Find ping command path at initialization
         # Always use absolute paths to avoid PATH issues
         import os
@@ -37,7 +41,7 @@ class IPScanService:
         self.arp_cmd = '/usr/sbin/arp' if os.path.exists('/usr/sbin/arp') else '/sbin/arp'
         self.nmap_cmd = shutil.which('nmap')
 
-        logger.info(f"IP scan service initialized: ping={self.ping_cmd}, arp={self.arp_cmd}, nmap={self.nmap_cmd}, concurrency_limit=20")
+        logger.info(f"IP scan service initialized: ping={self.ping_cmd}, arp={self.arp_cmd}, nmap={self.nmap_cmd}, concurrency_limit={settings.IPAM_SCAN_WORKERS}, icmp_engine={settings.IPAM_SCAN_ICMP_ENGINE}")
 
     @staticmethod
     def _build_result(ip: str) -> Dict[str, Any]:
@@ -313,8 +317,14 @@ class IPScanService:
     def _get_mac_address(self, ip: str) -> Optional[str]:
         """
         Get MAC address using ARP table
+
+        Reads the in-memory neighbour table (see neighbor_table); the arp command
+        is only run where the table cannot be read.
         """
         try:
+            if neighbor_table.available(ipaddress.ip_address(ip).version):
+                return neighbor_table.lookup(ip)
+
             # Create environment without proxy settings
             import os
             env = {k: v for k, v in os.environ.items()
@@ -573,7 +583,8 @@ class IPScanService:
         ip: str,
         scan_type: str = "full",
         snmp_profile: Optional[Dict] = None,
-        dns_servers: Optional[List[str]] = None
+        dns_servers: Optional[List[str]] = None,
+        ping_result: Optional[Tuple[bool, Optional[int]]] = None
     ) -> Dict:
         """
         Scan a single IP address with integrated Ping+DNS+SNMP workflow
@@ -585,6 +596,8 @@ class IPScanService:
                           Dict with keys: username, auth_protocol, auth_password_encrypted,
                           priv_protocol, priv_password_encrypted, port, timeout
             dns_servers: Optional list of DNS server IPs for PTR lookups
+            ping_result: (is_reachable, response_time_ms) when the ICMP echo engine
+                         already pinged the IP; the ping command is skipped
 
         Returns:
             Dict with scan results including:
@@ -609,8 +622,10 @@ class IPScanService:
             )
 
         # Step 1: Ping check
-        ping_timeout = max(1, settings.STATUS_CHECK_PING_TIMEOUT_SECONDS)
-        is_reachable, response_time = self._ping_ip(ip, timeout=ping_timeout)
+        if ping_result is None:
+            ping_timeout = max(1, settings.STATUS_CHECK_PING_TIMEOUT_SECONDS)
+            ping_result = self._ping_ip(ip, timeout=ping_timeout)
+        is_reachable, response_time = ping_result
         result['is_reachable'] = is_reachable
         result['response_time'] = response_time
 
@@ -746,12 +761,18 @@ class IPScanService:
 
         return result
 
+    def _ping_only_result(self, ip: str, ping_result: Tuple[bool, Optional[int]]) -> Dict[str, Any]:
+        result = self._build_result(ip)
+        result['is_reachable'], result['response_time'] = ping_result
+        return result
+
     async def scan_ip_async(
         self,
         ip: str,
         scan_type: str = "full",
         snmp_profile: Optional[Dict] = None,
-        dns_servers: Optional[List[str]] = None
+        dns_servers: Optional[List[str]] = None,
+        ping_result: Optional[Tuple[bool, Optional[int]]] = None
     ) -> Dict:
         """
         Async wrapper for scanning a single IP with optional SNMP profile
@@ -761,9 +782,18 @@ class IPScanService:
             scan_type: 'quick' or 'full'
             snmp_profile: Optional SNMP profile for device identification
             dns_servers: Optional list of DNS server IPs for PTR lookups
+            ping_result: (is_reachable, response_time_ms) when a ping sweep already probed the IP
 
-        Note: Uses semaphore to limit concurrency and prevent resource exhaustion
+        Note: Uses semaphore to limit concurrency and prevent resource exhaustion.
+        When the ICMP echo engine is available the ping runs on the event loop
+        first, and only reachable IPs of a full scan take a thread pool slot.
         """
+        if ping_result is None and scan_type != "enrich" and icmp_echo_engine.available(ip):
+            ping_timeout = max(1, settings.STATUS_CHECK_PING_TIMEOUT_SECONDS)
+            ping_result = await icmp_echo_engine.ping(ip, ping_timeout)
+        if ping_result is not None and (scan_type == "quick" or not ping_result[0]):
+            return self._ping_only_result(ip, ping_result)
+
         # Acquire semaphore to limit concurrent scans
         async with self.semaphore:
             loop = asyncio.get_event_loop()
@@ -773,7 +803,8 @@ class IPScanService:
                 ip=ip,
                 scan_type=scan_type,
                 snmp_profile=snmp_profile,
-                dns_servers=dns_servers
+                dns_servers=dns_servers,
+                ping_result=ping_result
             )
             return await loop.run_in_executor(self.executor, scan_func)
 
@@ -783,7 +814,8 @@ class IPScanService:
         scan_type: str = "full",
         snmp_profile: Optional[Dict] = None,
         dns_servers: Optional[List[str]] = None,
-        progress_callback: Optional[Callable[[Dict, int, int], Awaitable[None] | None]] = None
+        progress_callback: Optional[Callable[[Dict, int, int], Awaitable[None] | None]] = None,
+        sweep_group: Optional[str] = None
     ) -> List[Dict]:
         """
         Scan multiple IPs concurrently with optional SNMP profile
@@ -793,6 +825,11 @@ class IPScanService:
             scan_type: 'quick' or 'full'
             snmp_profile: Optional SNMP profile for all IPs
             dns_servers: Optional list of DNS server IPs for PTR lookups
+            sweep_group: Gateway (or network) all IPs sit behind; paces them under one
+                IPAM_SWEEP_SUBNET_PPS budget instead of one per /24
+
+        When the ICMP echo engine is available the pings run as one paced ping sweep
+        (see ping_sweep); only reachable IPs of a full scan go on to the thread pool.
         """
         logger.info(f"Starting scan of {len(ip_list)} IPs (type: {scan_type}, SNMP: {'enabled' if snmp_profile else 'disabled'})")
         start_time = time.time()
@@ -803,24 +840,13 @@ class IPScanService:
         if total == 0:
             return valid_results
 
-        tasks = [
-            asyncio.create_task(
-                self.scan_ip_async(ip, scan_type, snmp_profile, dns_servers)
-            )
-            for ip in ip_list
-        ]
-
         completed = 0
-        for task in asyncio.as_completed(tasks):
-            try:
-                result = await task
-            except Exception as exc:
-                logger.error(f"Scan error: {exc}")
-                continue
 
+        async def collect(result: Any):
+            nonlocal completed
             if not isinstance(result, dict):
                 logger.error(f"Unexpected scan result: {result}")
-                continue
+                return
 
             valid_results.append(result)
             completed += 1
@@ -830,6 +856,36 @@ class IPScanService:
                 if inspect.isawaitable(callback_result):
                     await callback_result
 
+        if scan_type != "quick":
+            # One neighbour table read for the enrichment MAC lookups of this sweep
+            await asyncio.get_event_loop().run_in_executor(self.executor, neighbor_table.refresh)
+
+        tasks = []
+        if scan_type != "enrich" and all(icmp_echo_engine.available(ip) for ip in ip_list):
+            ping_timeout = max(1, settings.STATUS_CHECK_PING_TIMEOUT_SECONDS)
+            async for ip, ping_result in ping_sweep.sweep(ip_list, ping_timeout, group_key=sweep_group):
+                if scan_type == "quick" or not ping_result[0]:
+                    await collect(self._ping_only_result(ip, ping_result))
+                else:
+                    tasks.append(asyncio.create_task(
+                        self.scan_ip_async(ip, scan_type, snmp_profile, dns_servers, ping_result=ping_result)
+                    ))
+        else:
+            tasks = [
+                asyncio.create_task(
+                    self.scan_ip_async(ip, scan_type, snmp_profile, dns_servers)
+                )
+                for ip in ip_list
+            ]
+
+        for task in asyncio.as_completed(tasks):
+            try:
+                result = await task
+            except Exception as exc:
+                logger.error(f"Scan error: {exc}")
+                continue
+            await collect(result)
+
         elapsed = time.time() - start_time
         logger.info(f"Scan completed in {elapsed:.2f}s: {len(valid_results)} results")
 
@@ -673,7 +673,8 @@ class IPAMService:
                 "quick",
                 None,
                 None,
-                progress_callback=on_quick_progress
+                progress_callback=on_quick_progress,
+                sweep_group=str(subnet.gateway or subnet.network)
             )
             quick_results_by_ip = {
                 scan_result['ip_address']: scan_result
@@ -1396,7 +1397,20 @@ class IPAMService:
         days_to_keep: int = settings.IP_SCAN_HISTORY_RETENTION_DAYS,
         batch_size: int = settings.IP_SCAN_HISTORY_CLEANUP_BATCH_SIZE
     ) -> int:
-        """Delete stale IP scan history in batches to keep memory and lock time bounded."""
+        """
+        Delete stale IP scan history.
+
+        Drops expired daily partitions when the table is partitioned (returns an
+        estimated row count), otherwise deletes in batches to keep memory and
+        lock time bounded.
+        """
+        from services.partition_manager import partition_manager
+
+        removed = await partition_manager.maintain(db, IPScanHistory.__tablename__, days_to_keep)
+        if removed is not None:
+            await db.commit()
+            return removed
+
         cutoff = datetime.now(timezone.utc) - timedelta(days=days_to_keep)
         total_deleted = 0
 
@@ -0,0 +1,166 @@
+"""
+Lookup Candidate Selection
+
+Chooses which switches a live (SSH/CLI) lookup asks first, from data the
+collector already has, so a live lookup touches a handful of devices instead
+of the whole fleet:
+
+ARP stage (who routes the IP):
+* switches holding an ARP entry for the IP
+* gateways of its subnet: switches with the most ARP entries inside the IPAM
+  subnet containing the IP (or its /24, /64 when no subnet is defined)
+
+MAC stage (where the MAC is plugged in):
+* last known MACAddressCache locations of the MAC
+* switches whose MAC table currently has the MAC
+* switches carrying the VLAN (MAC table entries in that VLAN)
+* the switch that answered ARP (same-switch fallback)
+
+Candidates are ordered by how specific the evidence is and capped at
+IP_LOOKUP_LIVE_MAX_CANDIDATES. IPLookupService only falls back to the rest of
+the fleet when the candidates miss.
+"""
+
+import ipaddress
+from typing import Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import select, and_, or_, cast, desc, func
+from sqlalchemy.dialects.postgresql import INET
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.config import settings
+from models.arp_table import ARPTable
+from models.ipam import IPSubnet
+from models.mac_cache import MACAddressCache
+from models.mac_table import MACTable
+from models.port_analysis import PortAnalysis
+from services.port_lookup_policy_service import LOOKUP_POLICY_EXCLUDE
+
+
+def _ordered_unique(*groups: Iterable[Optional[int]], limit: int) -> List[int]:
+    seen = {}
+    for group in groups:
+        for switch_id in group:
+            if switch_id is not None and switch_id not in seen:
+                seen[switch_id] = None
+                if len(seen) >= limit:
+                    return list(seen)
+    return list(seen)
+
+
+def _fallback_network(target_ip: str) -> str:
+    address = ipaddress.ip_address(target_ip)
+    prefix = 24 if address.version == 4 else 64
+    return ipaddress.ip_network(f"{address}/{prefix}", strict=False).with_prefixlen
+
+
+class LookupCandidateSelector:
+    """Ranks the switches most likely to answer a live ARP or MAC query"""
+
+    async def _subnet_network(self, db: AsyncSession, target_ip: str) -> str:
+        result = await db.execute(
+            select(IPSubnet.network)
+            .where(IPSubnet.network.op('>>=')(cast(target_ip, INET)))
+            .order_by(desc(func.masklen(IPSubnet.network)))
+            .limit(1)
+        )
+        network = result.scalar_one_or_none()
+        return str(network) if network else _fallback_network(target_ip)
+
+    async def arp_candidates(self, db: AsyncSession, target_ip: str) -> List[int]:
+        """Switch ids to ask for the IP's ARP entry, most likely first."""
+        limit = settings.IP_LOOKUP_LIVE_MAX_CANDIDATES
+
+        holders = await db.execute(
+            select(ARPTable.switch_id)
+            .where(ARPTable.ip_address == cast(target_ip, INET))
+            .group_by(ARPTable.switch_id)
+            .order_by(desc(func.max(ARPTable.last_seen)))
+        )
+        network = await self._subnet_network(db, target_ip)
+        gateways = await db.execute(
+            select(ARPTable.switch_id)
+            .where(ARPTable.ip_address.op('<<=')(cast(network, INET)))
+            .group_by(ARPTable.switch_id)
+            .order_by(desc(func.count()))
+            .limit(limit)
+        )
+        return _ordered_unique(holders.scalars().all(), gateways.scalars().all(), limit=limit)
+
+    async def mac_candidates(
+        self,
+        db: AsyncSession,
+        mac_address: str,
+        vlan_id: Optional[int] = None,
+        arp_switch_id: Optional[int] = None
+    ) -> List[int]:
+        """Switch ids to ask for the MAC's port, most likely first."""
+        limit = settings.IP_LOOKUP_LIVE_MAX_CANDIDATES
+
+        last_known = await db.execute(
+            select(MACAddressCache.switch_id)
+            .where(MACAddressCache.mac_address == mac_address)
+            .order_by(desc(MACAddressCache.last_seen))
+            .limit(limit)
+        )
+        learned = await db.execute(
+            select(MACTable.switch_id)
+            .where(MACTable.mac_address == mac_address)
+            .group_by(MACTable.switch_id)
+            .order_by(desc(func.max(MACTable.last_seen)))
+        )
+        vlan_switches = []
+        if vlan_id is not None:
+            vlan_result = await db.execute(
+                select(MACTable.switch_id)
+                .where(MACTable.vlan_id == vlan_id)
+                .group_by(MACTable.switch_id)
+                .order_by(desc(func.count()))
+                .limit(limit)
+            )
+            vlan_switches = vlan_result.scalars().all()
+
+        return _ordered_unique(
+            last_known.scalars().all(),
+            learned.scalars().all(),
+            vlan_switches,
+            [arp_switch_id],
+            limit=limit
+        )
+
+    async def excluded_ports(
+        self,
+        db: AsyncSession,
+        switch_id: Optional[int] = None,
+        switch_ids: Optional[Iterable[int]] = None
+    ) -> Set[Tuple[int, str]]:
+        """
+        (switch_id, port_name) of ports the lookup policy excludes (manual exclude or non-access).
+
+        Limited to switch_id or switch_ids when given, otherwise the whole fleet.
+        """
+        query = (
+            select(PortAnalysis.switch_id, PortAnalysis.port_name)
+            .where(
+                or_(
+                    PortAnalysis.lookup_policy_override == LOOKUP_POLICY_EXCLUDE,
+                    and_(
+                        PortAnalysis.lookup_policy_override.is_(None),
+                        PortAnalysis.port_type != "access"
+                    )
+                )
+            )
+        )
+        if switch_id is not None:
+            query = query.where(PortAnalysis.switch_id == switch_id)
+        if switch_ids is not None:
+            switch_ids = list(switch_ids)
+            if not switch_ids:
+                return set()
+            query = query.where(PortAnalysis.switch_id.in_(switch_ids))
+        result = await db.execute(query)
+        return {(switch_id, port_name) for switch_id, port_name in result.all()}
+
+
+# Global instance
+lookup_candidate_selector = LookupCandidateSelector()
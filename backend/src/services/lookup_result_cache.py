@@ -0,0 +1,300 @@
+"""
+Lookup Result Cache
+
+Redis read-through cache for cache mode IP lookup results, shared by every API
+process (REDIS_ENABLED, entries expire after REDIS_CACHE_TTL seconds).
+
+Each cached result is registered in reverse index sets for the switches it
+depends on (the ARP switch and the switch of the located port) and for its MAC
+address. Invalidation is precise:
+
+* storing ARP data for a switch drops results that used that switch plus the
+  results of every IP in the new ARP entries (covers cached "not found" IPs);
+* storing MAC data for a switch drops results that used that switch plus the
+  results of every MAC in the new MAC entries;
+* a port lookup policy change drops results that used the switch plus the
+  results of the MACs learned on that port.
+
+Stores queue their invalidations on the database session and they are sent
+after the session commits. A lookup may still have read the old rows just
+before that commit, so every invalidation takes a new generation number and
+marks the keys it drops with it. A lookup takes the generation before reading
+and its set() is discarded when any key the result depends on was marked with
+a newer one, checked again after the write so an invalidation running
+concurrently cannot be missed. Redis errors never fail a lookup: the cache is
+bypassed for REDIS_RETRY_SECONDS and lookups go to the database.
+"""
+
+import asyncio
+import ipaddress
+import json
+import time
+from typing import Dict, Iterable, Optional
+
+import redis.asyncio as redis_asyncio
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from core.config import settings
+from services.mac_utils import normalize_mac_address
+from utils.logger import logger
+
+
+KEY_PREFIX = "iptrack:lookup"
+GENERATION_KEY = f"{KEY_PREFIX}:generation"
+_PENDING_INFO_KEY = "lookup_cache_invalidations"
+_invalidation_tasks = set()
+
+
+def _result_key(ip: str) -> str:
+    try:
+        ip = ipaddress.ip_address(str(ip).strip()).compressed
+    except ValueError:
+        pass
+    return f"{KEY_PREFIX}:ip:{ip}"
+
+
+def _switch_key(switch_id: int) -> str:
+    return f"{KEY_PREFIX}:switch:{switch_id}"
+
+
+def _mac_key(mac: str) -> str:
+    try:
+        mac = normalize_mac_address(str(mac))
+    except ValueError:
+        pass
+    return f"{KEY_PREFIX}:mac:{mac}"
+
+
+def _generation_key(key: str) -> str:
+    return f"{key}:gen"
+
+
+class LookupResultCache:
+    """Redis-backed IP lookup results with switch/MAC scoped invalidation"""
+
+    def __init__(self):
+        self._client = None
+        self._retry_at = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.invalidated = 0
+        self.stale_skipped = 0
+        self.errors = 0
+
+    @property
+    def enabled(self) -> bool:
+        return settings.REDIS_ENABLED
+
+    def _get_client(self):
+        if not self.enabled or time.monotonic() < self._retry_at:
+            return None
+        if self._client is None:
+            self._client = redis_asyncio.Redis.from_url(
+                settings.REDIS_URL,
+                decode_responses=True,
+                socket_timeout=settings.REDIS_SOCKET_TIMEOUT_SECONDS,
+                socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT_SECONDS,
+            )
+        return self._client
+
+    def client(self):
+        """Shared Redis client, or None while Redis is disabled or bypassed after an error."""
+        return self._get_client()
+
+    def on_error(self, action: str, error: Exception):
+        self.errors += 1
+        self._retry_at = time.monotonic() + settings.REDIS_RETRY_SECONDS
+        logger.warning(
+            f"Lookup result cache {action} failed, bypassing Redis for "
+            f"{settings.REDIS_RETRY_SECONDS}s: {str(error)}"
+        )
+
+    async def generation(self) -> Optional[int]:
+        """Current invalidation generation; take it before reading the rows a result is built from."""
+        client = self._get_client()
+        if client is None:
+            return None
+        try:
+            return int(await client.get(GENERATION_KEY) or 0)
+        except Exception as e:
+            self.on_error('generation read', e)
+            return None
+
+    async def _invalidated_since(self, client, keys, generation: int) -> bool:
+        async with client.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.get(_generation_key(key))
+            marks = await pipe.execute()
+        return any(mark is not None and int(mark) > generation for mark in marks)
+
+    async def get(self, ip: str) -> Optional[Dict]:
+        """Cached lookup result for an IP, or None on a miss."""
+        client = self._get_client()
+        if client is None:
+            return None
+        try:
+            raw = await client.get(_result_key(ip))
+            hit = raw is not None
+            await client.hincrby(f"{KEY_PREFIX}:stats", 'hits' if hit else 'misses', 1)
+        except Exception as e:
+            self.on_error('read', e)
+            return None
+
+        if not hit:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(raw)
+
+    async def set(
+        self,
+        ip: str,
+        result: Dict,
+        switch_ids: Iterable[int] = (),
+        mac_address: Optional[str] = None,
+        generation: Optional[int] = None
+    ):
+        """
+        Cache a lookup result and register it under the switches and MAC it depends on.
+
+        With the generation taken before the lookup read its rows, the result is
+        not cached (or removed again) when one of those keys was invalidated since.
+        """
+        client = self._get_client()
+        if client is None:
+            return
+        ttl = settings.REDIS_CACHE_TTL
+        result_key = _result_key(ip)
+        index_keys = [_switch_key(switch_id) for switch_id in set(switch_ids) if switch_id is not None]
+        if mac_address:
+            index_keys.append(_mac_key(mac_address))
+        try:
+            if generation is not None and await self._invalidated_since(client, [result_key] + index_keys, generation):
+                self.stale_skipped += 1
+                return
+            async with client.pipeline(transaction=False) as pipe:
+                pipe.set(result_key, json.dumps(result, default=str), ex=ttl)
+                for index_key in index_keys:
+                    pipe.sadd(index_key, ip)
+                    pipe.expire(index_key, ttl)
+                await pipe.execute()
+            if generation is not None and await self._invalidated_since(client, [result_key] + index_keys, generation):
+                # An invalidation marked the keys while we wrote and may have missed our entry
+                await client.unlink(result_key)
+                self.stale_skipped += 1
+        except Exception as e:
+            self.on_error('write', e)
+
+    async def invalidate(
+        self,
+        switch_ids: Iterable[int] = (),
+        ips: Iterable[str] = (),
+        macs: Iterable[str] = ()
+    ) -> int:
+        """Drop cached results depending on the given switches, IPs or MACs."""
+        client = self._get_client()
+        if client is None:
+            return 0
+        index_keys = [_switch_key(switch_id) for switch_id in set(switch_ids)]
+        index_keys += [_mac_key(mac) for mac in set(macs)]
+        result_keys = {_result_key(ip) for ip in ips}
+        try:
+            # Mark before collecting index members: a set() racing with us either
+            # sees the mark or has registered itself in time to be dropped
+            generation = await client.incr(GENERATION_KEY)
+            async with client.pipeline(transaction=False) as pipe:
+                for key in index_keys + list(result_keys):
+                    pipe.set(_generation_key(key), generation, ex=settings.REDIS_CACHE_TTL)
+                await pipe.execute()
+            if index_keys:
+                async with client.pipeline(transaction=False) as pipe:
+                    for index_key in index_keys:
+                        pipe.smembers(index_key)
+                    for members in await pipe.execute():
+                        result_keys.update(_result_key(ip) for ip in members)
+            keys = list(result_keys) + index_keys
+            deleted = 0
+            for i in range(0, len(keys), 1000):
+                deleted += await client.unlink(*keys[i:i + 1000])
+        except Exception as e:
+            self.on_error('invalidation', e)
+            return 0
+
+        self.invalidated += deleted
+        return deleted
+
+    async def get_status(self) -> Dict:
+        status = {
+            'enabled': self.enabled,
+            'ttl_seconds': settings.REDIS_CACHE_TTL,
+            'process': {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / (self.hits + self.misses), 4) if self.hits + self.misses else None,
+                'invalidated_keys': self.invalidated,
+                'stale_skipped': self.stale_skipped,
+                'errors': self.errors,
+            },
+            'cluster': None,
+        }
+        client = self._get_client()
+        if client is None:
+            return status
+        try:
+            stats = await client.hgetall(f"{KEY_PREFIX}:stats")
+        except Exception as e:
+            self.on_error('status read', e)
+            return status
+        hits, misses = int(stats.get('hits', 0)), int(stats.get('misses', 0))
+        status['cluster'] = {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / (hits + misses), 4) if hits + misses else None,
+        }
+        return status
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+def queue_invalidation(db, switch_ids: Iterable[int] = (), ips: Iterable[str] = (), macs: Iterable[str] = ()):
+    """
+    Invalidate cached lookup results once the session's transaction commits.
+
+    Queued invalidations are dropped on rollback.
+    """
+    if not settings.REDIS_ENABLED:
+        return
+    info = getattr(db, 'info', None)
+    if info is None:
+        return
+    pending = info.setdefault(_PENDING_INFO_KEY, {'switch_ids': set(), 'ips': set(), 'macs': set()})
+    pending['switch_ids'].update(switch_ids)
+    pending['ips'].update(str(ip) for ip in ips)
+    pending['macs'].update(str(mac) for mac in macs)
+
+
+@event.listens_for(Session, 'after_commit')
+def _send_invalidations(session):
+    pending = session.info.pop(_PENDING_INFO_KEY, None)
+    if not pending:
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    task = loop.create_task(lookup_result_cache.invalidate(**pending))
+    _invalidation_tasks.add(task)
+    task.add_done_callback(_invalidation_tasks.discard)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_invalidations(session):
+    session.info.pop(_PENDING_INFO_KEY, None)
+
+
+# Global instance
+lookup_result_cache = LookupResultCache()
@@ -0,0 +1,182 @@
+"""
+Lookup Single Flight
+
+Coalesces concurrent identical IP lookups (same IP and mode) into one
+computation. During an incident many engineers and scripts look up the same
+few IPs at once; without coalescing each request repeats the database work and,
+in realtime/hybrid mode, the same SSH queries.
+
+Within a process the first caller (the leader) runs the lookup and every caller
+arriving while it is in flight awaits the same future and gets a copy of its
+result. Leader errors are shared too; if the leader is cancelled (client went
+away) the waiting callers run the lookup themselves.
+
+With LOOKUP_SINGLE_FLIGHT_REDIS the leader also takes a Redis lock
+(SET NX, expires after LOOKUP_SINGLE_FLIGHT_LOCK_SECONDS) and publishes its
+result for a few seconds, so a leader in another API process waits for that
+result instead of computing it again. It stops waiting and computes itself when
+the lock disappears without a result or after LOOKUP_SINGLE_FLIGHT_WAIT_SECONDS.
+Redis errors fall back to per-process coalescing.
+"""
+
+import asyncio
+import copy
+import ipaddress
+import json
+import uuid
+from typing import Awaitable, Callable, Dict, Optional
+
+from core.config import settings
+from services.lookup_result_cache import KEY_PREFIX, lookup_result_cache
+from utils.logger import logger
+
+
+RESULT_TTL_SECONDS = 5
+POLL_SECONDS = 0.05
+
+# Delete the lock only if this process still owns it
+_RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+def flight_key(mode: str, target_ip: str) -> str:
+    try:
+        target_ip = ipaddress.ip_address(str(target_ip).strip()).compressed
+    except ValueError:
+        pass
+    return f"{mode}:{target_ip}"
+
+
+class LookupSingleFlight:
+    """Shares one in-flight lookup between concurrent identical requests"""
+
+    def __init__(self):
+        self._flights: Dict[str, asyncio.Future] = {}
+        self.leaders = 0
+        self.coalesced = 0
+        self.coalesced_remote = 0
+        self.remote_wait_timeouts = 0
+
+    @property
+    def enabled(self) -> bool:
+        return settings.LOOKUP_SINGLE_FLIGHT_ENABLED
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._flights)
+
+    async def do(self, key: str, compute: Callable[[], Awaitable[Dict]]) -> Dict:
+        """Run compute() for key, or share the result of an identical in-flight call."""
+        if not self.enabled:
+            return await compute()
+
+        while True:
+            flight = self._flights.get(key)
+            if flight is None:
+                break
+            self.coalesced += 1
+            try:
+                return copy.deepcopy(await asyncio.shield(flight))
+            except asyncio.CancelledError:
+                if not flight.cancelled() or asyncio.current_task().cancelling():
+                    raise
+                # The leader was cancelled, not us: start over (possibly as the new leader)
+                self.coalesced -= 1
+
+        flight = asyncio.get_running_loop().create_future()
+        self._flights[key] = flight
+        self.leaders += 1
+        try:
+            result = await self._lead(key, compute)
+        except asyncio.CancelledError:
+            flight.cancel()
+            raise
+        except Exception as e:
+            flight.set_exception(e)
+            # Retrieve it so a flight nobody joined does not log "exception was never retrieved"
+            flight.exception()
+            raise
+        else:
+            flight.set_result(result)
+            return result
+        finally:
+            self._flights.pop(key, None)
+
+    async def _lead(self, key: str, compute: Callable[[], Awaitable[Dict]]) -> Dict:
+        client = lookup_result_cache.client() if settings.LOOKUP_SINGLE_FLIGHT_REDIS else None
+        if client is None:
+            return await compute()
+
+        lock_key = f"{KEY_PREFIX}:flight:{key}:lock"
+        result_key = f"{KEY_PREFIX}:flight:{key}:result"
+        token = uuid.uuid4().hex
+        try:
+            locked = await client.set(lock_key, token, nx=True, ex=settings.LOOKUP_SINGLE_FLIGHT_LOCK_SECONDS)
+            if not locked:
+                remote = await self._wait_for_remote(client, lock_key, result_key)
+                if remote is not None:
+                    self.coalesced_remote += 1
+                    return remote
+                locked = await client.set(lock_key, token, nx=True, ex=settings.LOOKUP_SINGLE_FLIGHT_LOCK_SECONDS)
+        except Exception as e:
+            lookup_result_cache.on_error('single flight lock', e)
+            return await compute()
+
+        try:
+            result = await compute()
+        except BaseException:
+            if locked:
+                await self._release(client, lock_key, token)
+            raise
+
+        if locked:
+            try:
+                async with client.pipeline(transaction=False) as pipe:
+                    pipe.set(result_key, json.dumps(result, default=str), ex=RESULT_TTL_SECONDS)
+                    pipe.eval(_RELEASE_SCRIPT, 1, lock_key, token)
+                    await pipe.execute()
+            except Exception as e:
+                lookup_result_cache.on_error('single flight publish', e)
+        return result
+
+    async def _wait_for_remote(self, client, lock_key: str, result_key: str) -> Optional[Dict]:
+        """Result published by another process's leader, or None when it should be computed here."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.LOOKUP_SINGLE_FLIGHT_WAIT_SECONDS
+        while loop.time() < deadline:
+            await asyncio.sleep(POLL_SECONDS)
+            raw = await client.get(result_key)
+            if raw is not None:
+                return json.loads(raw)
+            if not await client.exists(lock_key):
+                # Leader released without publishing (it failed); its result may have landed meanwhile
+                raw = await client.get(result_key)
+                return json.loads(raw) if raw is not None else None
+        self.remote_wait_timeouts += 1
+        logger.warning(f"Gave up waiting for the in-flight lookup {lock_key} in another process")
+        return None
+
+    async def _release(self, client, lock_key: str, token: str):
+        try:
+            await client.eval(_RELEASE_SCRIPT, 1, lock_key, token)
+        except Exception as e:
+            lookup_result_cache.on_error('single flight unlock', e)
+
+    def get_status(self) -> Dict:
+        return {
+            'enabled': self.enabled,
+            'redis': settings.LOOKUP_SINGLE_FLIGHT_REDIS,
+            'in_flight': self.in_flight,
+            'leaders': self.leaders,
+            'coalesced': self.coalesced,
+            'coalesced_remote': self.coalesced_remote,
+            'remote_wait_timeouts': self.remote_wait_timeouts,
+        }
+
+
+# Global instance
+lookup_single_flight = LookupSingleFlight()
@@ -0,0 +1,355 @@
+"""
+Lookup Topology Index
+
+Optional in-process snapshot of what cache-mode IP lookup reads from the
+database: the newest ARP binding per IP, the newest lookup-eligible MAC port
+per MAC, the newest MAC port per (MAC, switch) for the same-switch fallback,
+and the switch metadata used in results and freshness. With the index loaded,
+IPLookupService.lookup_ip resolves an IP with dict lookups and no DB reads.
+
+A background task polls two markers on the switches table every
+LOOKUP_TOPOLOGY_INDEX_REFRESH_SECONDS. Any ARP/MAC collection or port policy
+change rebuilds the whole snapshot, other switch updates (reachability,
+status) only reload switch metadata. New snapshots are built aside and swapped
+in with a single reference assignment, so readers never see a partial index.
+Until the first build completes, or when the index is disabled, lookups use
+the database.
+"""
+
+import asyncio
+import ipaddress
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import select, func, and_, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.config import settings
+from core.database import AsyncSessionLocal
+from models.arp_table import ARPTable
+from models.mac_table import MACTable
+from models.port_analysis import PortAnalysis
+from models.switch import Switch
+from services.lookup_result_cache import lookup_result_cache
+from services.port_lookup_policy_service import build_lookup_eligible_clause
+from utils.logger import logger
+
+
+class SwitchSnapshot:
+    """Detached copy of the Switch fields lookup results and freshness use"""
+
+    __slots__ = (
+        'id', 'name', 'ip_address', 'is_reachable', 'last_collection_status',
+        'last_collection_message', 'last_arp_collection_at', 'last_mac_collection_at',
+    )
+
+    def __init__(self, row):
+        for field in self.__slots__:
+            setattr(self, field, getattr(row, field))
+
+
+class TopologySnapshot:
+    """Immutable lookup tables built in one pass"""
+
+    def __init__(
+        self,
+        arp_by_ip: Dict[str, Tuple],
+        eligible_port_by_mac: Dict[str, Tuple],
+        port_by_mac_switch: Dict[Tuple[str, int], Tuple],
+        switches: Dict[int, SwitchSnapshot],
+        l2_marker,
+        switch_marker,
+        cache_generation: Optional[int] = None,
+    ):
+        # ip -> (mac, switch_id, interface, vlan_id, last_seen)
+        self.arp_by_ip = arp_by_ip
+        # mac -> (switch_id, port_name, vlan_id, last_seen)
+        self.eligible_port_by_mac = eligible_port_by_mac
+        # (mac, switch_id) -> (port_name, vlan_id, last_seen)
+        self.port_by_mac_switch = port_by_mac_switch
+        self.switches = switches
+        self.l2_marker = l2_marker
+        self.switch_marker = switch_marker
+        # Lookup result cache generation taken before the tables were read
+        self.cache_generation = cache_generation
+        self.built_at = datetime.now(timezone.utc)
+
+
+def resolve_from_snapshot(snapshot: TopologySnapshot, ip_key: str, cache_hours: float) -> Dict:
+    """
+    Resolve a normalised IP against snapshot tables.
+
+    Returns:
+        A resolution dict with 'status' in ('found', 'arp_only', 'no_arp');
+        'arp_only' carries the ARP binding but no MAC table port.
+    """
+    now = datetime.now(timezone.utc)
+    cutoff = now - timedelta(hours=cache_hours)
+
+    arp = snapshot.arp_by_ip.get(ip_key)
+    if arp is None or arp[4] <= cutoff:
+        return {'status': 'no_arp'}
+
+    mac_address, arp_switch_id, arp_interface, vlan_id, arp_last_seen = arp
+    switch = snapshot.switches.get(arp_switch_id)
+    if switch is None:
+        return {'status': 'no_arp'}
+    data_age_seconds = int((now - arp_last_seen).total_seconds())
+    resolution = {
+        'mac_address': mac_address,
+        'switch': switch,
+        'arp_interface': arp_interface,
+        'vlan_id': vlan_id,
+        'last_seen': arp_last_seen,
+        'data_age_seconds': data_age_seconds,
+        'port_source': None,
+        'arp_switch_id': arp_switch_id,
+    }
+
+    eligible = snapshot.eligible_port_by_mac.get(mac_address)
+    if eligible is not None and eligible[3] > cutoff:
+        switch_id, port_name, mac_vlan_id, mac_last_seen = eligible
+        resolution['switch'] = snapshot.switches.get(switch_id, switch)
+        resolution['port_source'] = 'mac_table'
+    else:
+        same_switch = snapshot.port_by_mac_switch.get((mac_address, arp_switch_id))
+        if same_switch is None or same_switch[2] <= cutoff:
+            resolution['status'] = 'arp_only'
+            return resolution
+        port_name, mac_vlan_id, mac_last_seen = same_switch
+        resolution['port_source'] = 'same_switch_mac'
+
+    resolution.update({
+        'status': 'found',
+        'port_name': port_name,
+        'vlan_id': mac_vlan_id or vlan_id,
+        'data_age_seconds': max(data_age_seconds, int((now - mac_last_seen).total_seconds())),
+    })
+    return resolution
+
+
+class LookupTopologyIndex:
+    """Builds, refreshes and answers from the in-process topology snapshot"""
+
+    def __init__(self):
+        self._snapshot: Optional[TopologySnapshot] = None
+        self._refresh_lock = asyncio.Lock()
+        self.task: Optional[asyncio.Task] = None
+        self.running = False
+        self.last_build_seconds: Optional[float] = None
+        self.builds = 0
+        self.hits = 0
+        self.fallbacks = 0
+
+    @property
+    def enabled(self) -> bool:
+        return settings.LOOKUP_TOPOLOGY_INDEX_ENABLED
+
+    @property
+    def ready(self) -> bool:
+        return self.enabled and self._snapshot is not None
+
+    @property
+    def cache_generation(self) -> int:
+        """
+        Lookup result cache generation the installed snapshot was read under.
+
+        Read it before resolve(): a snapshot swapped in meanwhile is only newer.
+        -1 when unknown, so results built from it are checked against every mark.
+        """
+        snapshot = self._snapshot
+        if snapshot is None or snapshot.cache_generation is None:
+            return -1
+        return snapshot.cache_generation
+
+    async def _read_markers(self, db: AsyncSession) -> Tuple:
+        """(l2_marker, switch_marker): newest ARP/MAC change and newest switch update."""
+        row = (await db.execute(
+            select(
+                func.max(func.greatest(
+                    Switch.l2_changed_at, Switch.last_arp_collection_at, Switch.last_mac_collection_at
+                )),
+                func.max(Switch.updated_at),
+                func.count(Switch.id),
+            )
+        )).one()
+        return (row[0],), (row[1], row[2])
+
+    async def _load_switches(self, db: AsyncSession) -> Dict[int, SwitchSnapshot]:
+        result = await db.execute(select(*[getattr(Switch, field) for field in SwitchSnapshot.__slots__]))
+        return {row.id: SwitchSnapshot(row) for row in result.all()}
+
+    async def build(self, db: AsyncSession) -> TopologySnapshot:
+        """Read everything lookup needs into a new snapshot (does not install it)."""
+        cache_generation = await lookup_result_cache.generation()
+        l2_marker, switch_marker = await self._read_markers(db)
+
+        arp_rows = await db.execute(
+            select(
+                ARPTable.ip_address, ARPTable.mac_address, ARPTable.switch_id,
+                ARPTable.interface, ARPTable.vlan_id, ARPTable.last_seen,
+            )
+            .distinct(ARPTable.ip_address)
+            .order_by(ARPTable.ip_address, ARPTable.last_seen.desc())
+        )
+        arp_by_ip = {
+            str(ip): (str(mac), switch_id, interface, vlan_id, last_seen)
+            for ip, mac, switch_id, interface, vlan_id, last_seen in arp_rows.all()
+        }
+
+        resolved_macs = select(ARPTable.mac_address)
+        eligible_rows = await db.execute(
+            select(MACTable.mac_address, MACTable.switch_id, MACTable.port_name, MACTable.vlan_id, MACTable.last_seen)
+            .outerjoin(
+                PortAnalysis,
+                and_(
+                    PortAnalysis.switch_id == MACTable.switch_id,
+                    PortAnalysis.port_name == MACTable.port_name
+                )
+            )
+            .where(build_lookup_eligible_clause(PortAnalysis))
+            .where(MACTable.mac_address.in_(resolved_macs))
+            .distinct(MACTable.mac_address)
+            .order_by(MACTable.mac_address, MACTable.last_seen.desc())
+        )
+        eligible_port_by_mac = {
+            str(mac): (switch_id, port_name, vlan_id, last_seen)
+            for mac, switch_id, port_name, vlan_id, last_seen in eligible_rows.all()
+        }
+
+        same_switch_rows = await db.execute(
+            select(MACTable.mac_address, MACTable.switch_id, MACTable.port_name, MACTable.vlan_id, MACTable.last_seen)
+            .where(
+                tuple_(MACTable.mac_address, MACTable.switch_id).in_(
+                    select(ARPTable.mac_address, ARPTable.switch_id)
+                )
+            )
+            .distinct(MACTable.mac_address, MACTable.switch_id)
+            .order_by(MACTable.mac_address, MACTable.switch_id, MACTable.last_seen.desc())
+        )
+        port_by_mac_switch = {
+            (str(mac), switch_id): (port_name, vlan_id, last_seen)
+            for mac, switch_id, port_name, vlan_id, last_seen in same_switch_rows.all()
+        }
+
+        return TopologySnapshot(
+            arp_by_ip,
+            eligible_port_by_mac,
+            port_by_mac_switch,
+            await self._load_switches(db),
+            l2_marker,
+            switch_marker,
+            cache_generation,
+        )
+
+    async def refresh(self, db: AsyncSession, force: bool = False) -> str:
+        """
+        Rebuild what changed since the installed snapshot.
+
+        Returns:
+            'full', 'switches' or 'unchanged'
+        """
+        async with self._refresh_lock:
+            current = self._snapshot
+            l2_marker, switch_marker = await self._read_markers(db)
+
+            if force or current is None or l2_marker != current.l2_marker:
+                started = time.perf_counter()
+                snapshot = await self.build(db)
+                self.last_build_seconds = round(time.perf_counter() - started, 3)
+                self.builds += 1
+                self._snapshot = snapshot
+                logger.info(
+                    f"🗺️ Lookup topology index rebuilt in {self.last_build_seconds}s: "
+                    f"{len(snapshot.arp_by_ip)} IPs, {len(snapshot.eligible_port_by_mac)} eligible MACs, "
+                    f"{len(snapshot.switches)} switches"
+                )
+                return 'full'
+
+            if switch_marker != current.switch_marker:
+                self._snapshot = TopologySnapshot(
+                    current.arp_by_ip,
+                    current.eligible_port_by_mac,
+                    current.port_by_mac_switch,
+                    await self._load_switches(db),
+                    current.l2_marker,
+                    switch_marker,
+                    current.cache_generation,
+                )
+                return 'switches'
+
+            return 'unchanged'
+
+    def resolve(self, target_ip: str, cache_hours: float) -> Optional[Dict]:
+        """
+        Resolve an IP like the database path of lookup_ip does.
+
+        Returns:
+            None when the index cannot answer (disabled or not built yet),
+            otherwise the resolve_from_snapshot() result.
+        """
+        snapshot = self._snapshot
+        if not self.enabled or snapshot is None:
+            self.fallbacks += 1
+            return None
+        try:
+            ip_key = str(ipaddress.ip_address(target_ip))
+        except ValueError:
+            self.fallbacks += 1
+            return None
+
+        self.hits += 1
+        return resolve_from_snapshot(snapshot, ip_key, cache_hours)
+
+    async def run(self):
+        """Refresh loop for the background task."""
+        self.running = True
+        interval = settings.LOOKUP_TOPOLOGY_INDEX_REFRESH_SECONDS
+        logger.info(f"Starting lookup topology index refresher (interval={interval}s)")
+
+        while self.running:
+            try:
+                async with AsyncSessionLocal() as db:
+                    await self.refresh(db)
+                await asyncio.sleep(interval)
+            except asyncio.CancelledError:
+                logger.info("Lookup topology index refresher cancelled")
+                break
+            except Exception as e:
+                logger.error(f"Lookup topology index refresh failed: {str(e)}")
+                await asyncio.sleep(interval)
+
+    def start(self):
+        """Start the background refresh task when the index is enabled."""
+        if not self.enabled:
+            return
+        if not self.task or self.task.done():
+            self.task = asyncio.create_task(self.run())
+            logger.info("Lookup topology index refresher started")
+
+    def stop(self):
+        """Stop the background refresh task."""
+        self.running = False
+        if self.task and not self.task.done():
+            self.task.cancel()
+            logger.info("Lookup topology index refresher stopped")
+
+    def get_status(self) -> Dict:
+        snapshot = self._snapshot
+        return {
+            'enabled': self.enabled,
+            'ready': snapshot is not None,
+            'built_at': snapshot.built_at.isoformat() if snapshot else None,
+            'ips': len(snapshot.arp_by_ip) if snapshot else 0,
+            'eligible_macs': len(snapshot.eligible_port_by_mac) if snapshot else 0,
+            'switches': len(snapshot.switches) if snapshot else 0,
+            'builds': self.builds,
+            'last_build_seconds': self.last_build_seconds,
+            'hits': self.hits,
+            'fallbacks': self.fallbacks,
+        }
+
+
+# Global instance
+lookup_topology_index = LookupTopologyIndex()
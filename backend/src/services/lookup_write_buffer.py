@@ -0,0 +1,251 @@
+"""
+Lookup Write Buffer
+
+Write-behind queue for the rows a cache mode lookup writes: one QueryHistory
+row and, when a port was located, one MACAddressCache upsert. Instead of two
+extra commits per lookup, rows are buffered in memory and flushed by a
+background task every LOOKUP_WRITE_BUFFER_FLUSH_SECONDS (or as soon as
+LOOKUP_WRITE_BUFFER_BATCH_SIZE rows are pending) with one bulk insert and one
+bulk upsert in a single transaction.
+
+MAC cache updates are coalesced per (mac, switch, port), so repeated lookups of
+the same device cost one row. The buffer holds at most LOOKUP_WRITE_BUFFER_MAX_ROWS
+rows; when full, LOOKUP_WRITE_BUFFER_OVERFLOW decides what happens:
+
+* drop_oldest: discard the oldest pending row to make room
+* drop_newest: discard the new row
+* write_through: reject the row so the caller writes it directly
+
+stop() drains the buffer, so pending rows are written on shutdown. When the
+buffer is not running (disabled, or scripts without the API lifespan) callers
+write directly as before.
+"""
+
+import asyncio
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Deque, Dict, List, Optional, Tuple
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.config import settings
+from core.database import AsyncSessionLocal
+from models.mac_cache import MACAddressCache
+from models.query_history import QueryHistory
+from utils.logger import logger
+
+
+OVERFLOW_POLICIES = ('drop_oldest', 'drop_newest', 'write_through')
+
+
+async def write_lookup_rows(db: AsyncSession, history_rows: List[Dict], cache_rows: List[Dict]):
+    """
+    Bulk insert query history rows and upsert MAC cache rows (no commit).
+
+    MAC cache rows need mac_address, ip_address, switch_id, port_name, vlan_id and last_seen.
+    """
+    chunk_size = settings.IP_LOOKUP_BATCH_CHUNK_SIZE
+    if history_rows:
+        await db.execute(insert(QueryHistory), history_rows)
+    for i in range(0, len(cache_rows), chunk_size):
+        stmt = insert(MACAddressCache).values(cache_rows[i:i + chunk_size])
+        await db.execute(
+            stmt.on_conflict_do_update(
+                constraint='uq_mac_switch_port',
+                set_={
+                    'ip_address': stmt.excluded.ip_address,
+                    'vlan_id': stmt.excluded.vlan_id,
+                    'last_seen': stmt.excluded.last_seen,
+                }
+            )
+        )
+
+
+class LookupWriteBuffer:
+    """Buffers lookup history and MAC cache writes and flushes them in bulk"""
+
+    def __init__(self):
+        self._history: Deque[Dict] = deque()
+        self._mac_cache: Dict[Tuple[str, int, str], Dict] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self.task = None
+        self.running = False
+        self.flushed_history = 0
+        self.flushed_mac_cache = 0
+        self.dropped = 0
+        self.rejected = 0
+        self.failed = 0
+        self.flushes = 0
+        self.last_flush_at: Optional[datetime] = None
+        self.last_flush_seconds: Optional[float] = None
+
+    @property
+    def enabled(self) -> bool:
+        return settings.LOOKUP_WRITE_BUFFER_ENABLED
+
+    @property
+    def active(self) -> bool:
+        return self.running and self.task is not None and not self.task.done()
+
+    @property
+    def pending(self) -> int:
+        return len(self._history) + len(self._mac_cache)
+
+    def _make_room(self) -> bool:
+        if self.pending < settings.LOOKUP_WRITE_BUFFER_MAX_ROWS:
+            return True
+
+        policy = settings.LOOKUP_WRITE_BUFFER_OVERFLOW
+        if policy == 'write_through':
+            self.rejected += 1
+            return False
+        if policy == 'drop_newest':
+            self.dropped += 1
+            return False
+
+        # drop_oldest: history rows go first, MAC cache refreshes are re-learned on the next lookup
+        if self._history:
+            self._history.popleft()
+        else:
+            self._mac_cache.pop(next(iter(self._mac_cache)))
+        self.dropped += 1
+        return True
+
+    def _wake_if_due(self):
+        if self._wakeup is not None and self.pending >= settings.LOOKUP_WRITE_BUFFER_BATCH_SIZE:
+            self._wakeup.set()
+
+    def add_query(self, row: Dict) -> bool:
+        """
+        Queue a QueryHistory row.
+
+        Returns:
+            False when the caller should write the row itself (buffer inactive or
+            full under the write_through policy), True otherwise
+        """
+        if not self.active:
+            return False
+        if self._make_room():
+            row.setdefault('queried_at', datetime.now(timezone.utc))
+            self._history.append(row)
+            self._wake_if_due()
+            return True
+        return settings.LOOKUP_WRITE_BUFFER_OVERFLOW != 'write_through'
+
+    def add_mac_cache(self, row: Dict) -> bool:
+        """Queue a MAC cache upsert, replacing a pending one for the same (mac, switch, port)."""
+        if not self.active:
+            return False
+        key = (row['mac_address'], row['switch_id'], row['port_name'])
+        row.setdefault('last_seen', datetime.now(timezone.utc))
+        if key in self._mac_cache:
+            self._mac_cache[key] = row
+            return True
+        if self._make_room():
+            self._mac_cache[key] = row
+            self._wake_if_due()
+            return True
+        return settings.LOOKUP_WRITE_BUFFER_OVERFLOW != 'write_through'
+
+    async def flush(self) -> int:
+        """Write all pending rows in one transaction. Returns the number of rows written."""
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+
+        async with self._flush_lock:
+            if not self.pending:
+                return 0
+            history_rows = list(self._history)
+            cache_rows = list(self._mac_cache.values())
+            self._history.clear()
+            self._mac_cache.clear()
+
+            started = time.monotonic()
+            try:
+                async with AsyncSessionLocal() as db:
+                    await write_lookup_rows(db, history_rows, cache_rows)
+                    await db.commit()
+            except Exception as e:
+                self.failed += len(history_rows) + len(cache_rows)
+                logger.error(
+                    f"Lookup write buffer flush failed, discarded {len(history_rows)} history and "
+                    f"{len(cache_rows)} MAC cache rows: {str(e)}"
+                )
+                return 0
+
+            self.flushes += 1
+            self.flushed_history += len(history_rows)
+            self.flushed_mac_cache += len(cache_rows)
+            self.last_flush_at = datetime.now(timezone.utc)
+            self.last_flush_seconds = round(time.monotonic() - started, 3)
+            logger.debug(
+                f"Lookup write buffer flushed {len(history_rows)} history and {len(cache_rows)} "
+                f"MAC cache rows in {self.last_flush_seconds}s"
+            )
+            return len(history_rows) + len(cache_rows)
+
+    async def run(self):
+        """Flush loop for the background task."""
+        interval = settings.LOOKUP_WRITE_BUFFER_FLUSH_SECONDS
+        logger.info(f"Starting lookup write buffer (flush every {interval}s)")
+
+        while self.running:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=interval)
+            except asyncio.TimeoutError:
+                pass
+            except asyncio.CancelledError:
+                logger.info("Lookup write buffer cancelled")
+                break
+            self._wakeup.clear()
+            await self.flush()
+
+    def start(self):
+        """Start the background flush task when the buffer is enabled."""
+        if not self.enabled:
+            return
+        if settings.LOOKUP_WRITE_BUFFER_OVERFLOW not in OVERFLOW_POLICIES:
+            logger.warning(
+                f"⚠️ Unknown LOOKUP_WRITE_BUFFER_OVERFLOW '{settings.LOOKUP_WRITE_BUFFER_OVERFLOW}', "
+                f"using drop_oldest"
+            )
+        if not self.task or self.task.done():
+            self._wakeup = asyncio.Event()
+            self.running = True
+            self.task = asyncio.create_task(self.run())
+            logger.info("Lookup write buffer started")
+
+    async def stop(self):
+        """Stop the flush task and write everything still pending."""
+        self.running = False
+        if self.task and not self.task.done():
+            self._wakeup.set()
+            await self.task
+        remaining = self.pending
+        await self.flush()
+        logger.info(f"Lookup write buffer stopped ({remaining} pending rows flushed)")
+
+    def get_status(self) -> Dict:
+        return {
+            'enabled': self.enabled,
+            'running': self.active,
+            'pending_history': len(self._history),
+            'pending_mac_cache': len(self._mac_cache),
+            'max_rows': settings.LOOKUP_WRITE_BUFFER_MAX_ROWS,
+            'overflow_policy': settings.LOOKUP_WRITE_BUFFER_OVERFLOW,
+            'flushes': self.flushes,
+            'flushed_history': self.flushed_history,
+            'flushed_mac_cache': self.flushed_mac_cache,
+            'dropped': self.dropped,
+            'rejected': self.rejected,
+            'failed': self.failed,
+            'last_flush_at': self.last_flush_at.isoformat() if self.last_flush_at else None,
+            'last_flush_seconds': self.last_flush_seconds,
+        }
+
+
+# Global instance
+lookup_write_buffer = LookupWriteBuffer()
@@ -0,0 +1,164 @@
+"""
+Neighbor Table
+
+In-memory copy of the scanner host's neighbour (ARP / NDP) cache, used to find
+the MAC address of scanned hosts. Instead of running `arp -n <ip>` per host,
+the whole table is read at once:
+
+* IPv4: /proc/net/arp (a file read, no process)
+* IPv6: one `ip -6 neigh show` dump
+
+IPScanService refreshes the table once when an enrichment phase starts; after
+that MACs are resolved from the map. A host missing from the map (its entry
+appeared after the last read, e.g. it just answered the sweep) triggers a
+re-read. Re-reads happen at most once per IPAM_NEIGHBOR_REFRESH_SECONDS: a
+miss inside that window waits for it to end and then reads again, unless a read
+started after the lookup meanwhile, so a subnet full of hosts shares a few
+reads and a host is never reported without a MAC only because of the throttle.
+
+Where the table cannot be read (no /proc, e.g. macOS) the reader reports
+itself unavailable and IPScanService keeps using the arp command.
+"""
+
+import ipaddress
+import os
+import shutil
+import subprocess
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from core.config import settings
+from services.mac_utils import normalize_mac_address
+from utils.logger import logger
+
+
+PROC_NET_ARP = '/proc/net/arp'
+ATF_COM = 0x2  # Entry complete (resolved)
+INCOMPLETE_MAC = '00:00:00:00:00:00'
+
+
+def parse_proc_net_arp(text: str) -> Dict[str, str]:
+    """IP -> MAC of the complete entries of /proc/net/arp."""
+    entries = {}
+    for line in text.splitlines()[1:]:
+        fields = line.split()
+        if len(fields) < 4:
+            continue
+        ip, _, flags, mac = fields[:4]
+        try:
+            if not int(flags, 16) & ATF_COM or mac == INCOMPLETE_MAC:
+                continue
+            entries[ip] = normalize_mac_address(mac)
+        except ValueError:
+            continue
+    return entries
+
+
+def parse_ip_neigh(text: str) -> Dict[str, str]:
+    """IP -> MAC of `ip neigh show` lines that carry a link-layer address."""
+    entries = {}
+    for line in text.splitlines():
+        fields = line.split()
+        if 'lladdr' not in fields or fields[-1] in ('FAILED', 'INCOMPLETE'):
+            continue
+        try:
+            ip = ipaddress.ip_address(fields[0]).compressed
+            entries[ip] = normalize_mac_address(fields[fields.index('lladdr') + 1])
+        except (ValueError, IndexError):
+            continue
+    return entries
+
+
+def _read_ipv4() -> Optional[Dict[str, str]]:
+    try:
+        with open(PROC_NET_ARP) as f:
+            return parse_proc_net_arp(f.read())
+    except OSError:
+        return None
+
+
+def _read_ipv6() -> Optional[Dict[str, str]]:
+    ip_cmd = shutil.which('ip')
+    if ip_cmd is None:
+        return None
+    env = {k: v for k, v in os.environ.items() if not k.lower().endswith('_proxy')}
+    try:
+        result = subprocess.run(
+            [ip_cmd, '-6', 'neigh', 'show'],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            timeout=5,
+            env=env
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    if result.returncode != 0:
+        return None
+    return parse_ip_neigh(result.stdout.decode())
+
+
+class NeighborTable:
+    """Snapshot of the local neighbour cache, re-read on demand (thread safe)"""
+
+    def __init__(self, readers: Optional[Dict[int, Callable[[], Optional[Dict[str, str]]]]] = None):
+        self._readers = readers or {4: _read_ipv4, 6: _read_ipv6}
+        self._entries: Dict[int, Optional[Dict[str, str]]] = {}
+        self._read_at: Dict[int, float] = {}
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self.reads = 0
+
+    def refresh(self, version: int = 4) -> bool:
+        """Re-read the table of an address family. Returns False when it cannot be read here."""
+        # Stamped with the start of the read: entries present by then are in it
+        started = time.monotonic()
+        entries = self._readers[version]()
+        with self._lock:
+            self.reads += 1
+            self._entries[version] = entries
+            self._read_at[version] = started
+        if entries is None:
+            logger.debug(f"IPv{version} neighbour table unavailable, falling back to the arp command")
+        return entries is not None
+
+    def available(self, version: int = 4) -> bool:
+        if version not in self._entries:
+            self.refresh(version)
+        return self._entries[version] is not None
+
+    def lookup(self, ip: str) -> Optional[str]:
+        """
+        MAC address of ip from the neighbour table.
+
+        Re-reads the table when the IP is missing and no read started since this
+        call, waiting out IPAM_NEIGHBOR_REFRESH_SECONDS after the last read first
+        (blocks; run from a worker thread). Call available() first; returns None
+        when the table cannot be read.
+        """
+        requested_at = time.monotonic()
+        address = ipaddress.ip_address(ip)
+        version, key = address.version, address.compressed
+        if not self.available(version):
+            return None
+
+        with self._lock:
+            mac = self._entries[version].get(key)
+        if mac is not None:
+            return mac
+
+        # One thread re-reads; the others waiting here use its copy when it started after they asked
+        with self._refresh_lock:
+            read_at = self._read_at[version]
+            if read_at < requested_at:
+                wait = read_at + settings.IPAM_NEIGHBOR_REFRESH_SECONDS - time.monotonic()
+                if wait > 0:
+                    time.sleep(wait)
+                self.refresh(version)
+        with self._lock:
+            entries = self._entries[version]
+            return entries.get(key) if entries is not None else None
+
+
+# Global instance
+neighbor_table = NeighborTable()
@@ -11,8 +11,9 @@ from typing import List, Dict, Tuple, Optional
 from datetime import datetime, timedelta
 import asyncio
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, func, cast, Text, delete, not_
+from sqlalchemy import select, and_, or_, func, cast, Text, delete, not_, update, tuple_, literal_column, union
 from sqlalchemy.dialects.postgresql import insert
+from core.config import settings
 from utils.logger import logger
 
 from models.switch import Switch
@@ -29,6 +30,8 @@ from services.cli_service import cli_service
 from services.port_analysis_service import port_analysis_service
 from services.ip_location_engine import ip_location_engine
 from services.alarm_service import alarm_service
+from services.raw_output_archive import raw_output_archive
+from services.lookup_result_cache import queue_invalidation
 
 
 class NetworkDataCollector:
@@ -38,6 +41,8 @@ class NetworkDataCollector:
         self.collection_running = False
         self._command_templates_cache: Optional[List[Dict]] = None
         self._command_templates_cache_expires_at: Optional[datetime] = None
+        # Start of the last refresh_ip_locations run; None forces a full recompute
+        self._ip_location_watermark: Optional[datetime] = None
 
     async def _clear_port_analysis_for_switch(self, db: AsyncSession, switch_id: int) -> int:
         """Remove stale port analysis rows for a switch."""
@@ -68,6 +73,127 @@ class NetworkDataCollector:
             )
         return deleted_count
 
+    # Rows per INSERT ... ON CONFLICT statement (9 bind parameters each)
+    PORT_ANALYSIS_UPSERT_CHUNK = 2000
+
+    async def _aggregate_port_statistics(
+        self,
+        db: AsyncSession,
+        switch_ids: Optional[List[int]] = None
+    ) -> Dict[int, Dict[str, Dict[str, int]]]:
+        """
+        Count distinct MACs and VLANs per switch and normalised port in SQL.
+
+        Raw port names that normalise to the same port (e.g. 'Gi1/0/1' and
+        'GigabitEthernet1/0/1') are re-counted exactly from their rows.
+
+        Returns:
+            switch_id -> normalised port name -> {'mac_count', 'unique_vlans'}
+        """
+        stmt = (
+            select(
+                MACTable.switch_id,
+                MACTable.port_name,
+                func.count(func.distinct(MACTable.mac_address)),
+                func.count(func.distinct(MACTable.vlan_id)).filter(
+                    and_(MACTable.vlan_id.is_not(None), MACTable.vlan_id != 0)
+                ),
+            )
+            .group_by(MACTable.switch_id, MACTable.port_name)
+        )
+        if switch_ids is not None:
+            stmt = stmt.where(MACTable.switch_id.in_(switch_ids))
+
+        normalized_names: Dict[str, str] = {}
+        raw_names: Dict[Tuple[int, str], List[str]] = {}
+        stats: Dict[int, Dict[str, Dict[str, int]]] = {}
+        for switch_id, raw_port, mac_count, vlan_count in (await db.execute(stmt)).all():
+            port = normalized_names.get(raw_port)
+            if port is None:
+                port = normalized_names[raw_port] = port_analysis_service.normalize_port_name(raw_port)
+            if not port:
+                continue
+            raw_names.setdefault((switch_id, port), []).append(raw_port)
+            stats.setdefault(switch_id, {})[port] = {'mac_count': mac_count, 'unique_vlans': vlan_count}
+
+        merged = {
+            (switch_id, raw_port): port
+            for (switch_id, port), raws in raw_names.items() if len(raws) > 1
+            for raw_port in raws
+        }
+        if merged:
+            rows = await db.execute(
+                select(MACTable.switch_id, MACTable.port_name, MACTable.mac_address, MACTable.vlan_id)
+                .where(tuple_(MACTable.switch_id, MACTable.port_name).in_(list(merged)))
+            )
+            merged_sets: Dict[Tuple[int, str], Tuple[set, set]] = {}
+            for switch_id, raw_port, mac_address, vlan_id in rows.all():
+                key = (switch_id, merged[(switch_id, raw_port)])
+                macs, vlans = merged_sets.setdefault(key, (set(), set()))
+                macs.add(str(mac_address).lower())
+                if vlan_id:
+                    vlans.add(vlan_id)
+            for (switch_id, port), (macs, vlans) in merged_sets.items():
+                stats[switch_id][port] = {'mac_count': len(macs), 'unique_vlans': len(vlans)}
+
+        return stats
+
+    def _port_analysis_rows(
+        self,
+        switch_id: int,
+        port_stats: Dict[str, Dict[str, int]],
+        analyzed_at: datetime
+    ) -> List[Dict]:
+        """Classify aggregated ports into port_analysis rows ready for upsert."""
+        rows = []
+        for port_name, counts in port_stats.items():
+            analysis = port_analysis_service.classify_port(
+                port_name, counts['mac_count'], counts['unique_vlans']
+            )
+            rows.append({
+                'switch_id': switch_id,
+                'port_name': port_name,
+                'mac_count': analysis['mac_count'],
+                'unique_vlans': analysis['unique_vlans'],
+                'port_type': analysis['port_type'],
+                'confidence_score': analysis['confidence_score'],
+                'is_trunk_by_name': analysis['is_trunk_by_name'],
+                'is_access_by_name': analysis['is_access_by_name'],
+                'analyzed_at': analyzed_at,
+            })
+        return rows
+
+    async def _upsert_port_analysis(self, db: AsyncSession, rows: List[Dict]) -> Tuple[int, int]:
+        """
+        Insert or update port_analysis rows set-wise, keyed by (switch_id, port_name).
+
+        Manual lookup policy columns are never part of the update, so admin
+        overrides survive every refresh.
+
+        Returns:
+            (ports_created, ports_updated)
+        """
+        created = 0
+        updated = 0
+        for start in range(0, len(rows), self.PORT_ANALYSIS_UPSERT_CHUNK):
+            stmt = insert(PortAnalysis).values(rows[start:start + self.PORT_ANALYSIS_UPSERT_CHUNK])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[PortAnalysis.switch_id, PortAnalysis.port_name],
+                set_={
+                    column: stmt.excluded[column]
+                    for column in (
+                        'mac_count', 'unique_vlans', 'port_type', 'confidence_score',
+                        'is_trunk_by_name', 'is_access_by_name', 'analyzed_at',
+                    )
+                }
+            ).returning(literal_column('xmax = 0'))
+            for inserted in (await db.execute(stmt)).scalars():
+                if inserted:
+                    created += 1
+                else:
+                    updated += 1
+        return created, updated
+
     async def refresh_port_analysis_for_switch(
         self,
         db: AsyncSession,
@@ -77,14 +203,12 @@ class NetworkDataCollector:
         Refresh port-analysis rows for a single switch from the latest stored MAC table.
 
         This keeps the switch detail "port policy" view aligned with the most recent
-        MAC snapshot collected by the worker pool.
+        MAC snapshot collected by the worker pool. Counting happens in SQL and all
+        ports are written with one upsert.
         """
-        result = await db.execute(
-            select(MACTable).where(MACTable.switch_id == switch.id)
-        )
-        mac_entries = result.scalars().all()
+        port_stats = (await self._aggregate_port_statistics(db, [switch.id])).get(switch.id)
 
-        if not mac_entries:
+        if not port_stats:
             logger.warning(
                 f"Skipping port analysis refresh for {switch.name} (ID: {switch.id}) "
                 f"because no MAC entries are currently stored"
@@ -96,56 +220,10 @@ class NetworkDataCollector:
                 'ports_deleted': 0,
             }
 
-        mac_dicts = [
-            {
-                'mac_address': m.mac_address,
-                'port_name': m.port_name,
-                'vlan_id': m.vlan_id
-            }
-            for m in mac_entries
-        ]
-
-        port_results = port_analysis_service.analyze_port_statistics(mac_dicts)
-        current_port_names = set(port_results.keys())
-        deleted_count = await self._prune_port_analysis_for_switch(db, switch.id, current_port_names)
-
-        analyzed_at = datetime.utcnow()
-        ports_created = 0
-        ports_updated = 0
-
-        for port_name, analysis in port_results.items():
-            result = await db.execute(
-                select(PortAnalysis).where(
-                    and_(
-                        PortAnalysis.switch_id == switch.id,
-                        PortAnalysis.port_name == port_name
-                    )
-                )
-            )
-            existing = result.scalar_one_or_none()
-
-            if existing:
-                existing.mac_count = analysis['mac_count']
-                existing.unique_vlans = analysis['unique_vlans']
-                existing.port_type = analysis['port_type']
-                existing.confidence_score = analysis['confidence_score']
-                existing.is_trunk_by_name = analysis['is_trunk_by_name']
-                existing.is_access_by_name = analysis['is_access_by_name']
-                existing.analyzed_at = analyzed_at
-                ports_updated += 1
-            else:
-                db.add(PortAnalysis(
-                    switch_id=switch.id,
-                    port_name=port_name,
-                    mac_count=analysis['mac_count'],
-                    unique_vlans=analysis['unique_vlans'],
-                    port_type=analysis['port_type'],
-                    confidence_score=analysis['confidence_score'],
-                    is_trunk_by_name=analysis['is_trunk_by_name'],
-                    is_access_by_name=analysis['is_access_by_name'],
-                    analyzed_at=analyzed_at
-                ))
-                ports_created += 1
+        deleted_count = await self._prune_port_analysis_for_switch(db, switch.id, set(port_stats))
+        ports_created, ports_updated = await self._upsert_port_analysis(
+            db, self._port_analysis_rows(switch.id, port_stats, datetime.utcnow())
+        )
 
         logger.info(
             f"Refreshed port analysis for {switch.name}: "
@@ -153,7 +231,7 @@ class NetworkDataCollector:
         )
 
         return {
-            'ports_analyzed': len(port_results),
+            'ports_analyzed': len(port_stats),
             'ports_created': ports_created,
             'ports_updated': ports_updated,
             'ports_deleted': deleted_count,
@@ -347,8 +425,10 @@ class NetworkDataCollector:
 
         template_dicts = [
             {
+                'id': t.id,
                 'vendor': t.vendor,
                 'model_pattern': t.model_pattern,
+                'name_pattern': t.name_pattern,
                 'device_type': t.device_type,
                 'arp_command': t.arp_command,
                 'arp_parser_type': t.arp_parser_type,
@@ -366,6 +446,12 @@ class NetworkDataCollector:
         self._command_templates_cache_expires_at = now + timedelta(minutes=5)
         return [dict(template) for template in template_dicts]
 
+    def invalidate_command_templates_cache(self) -> None:
+        """Forget cached templates and compiled match indexes after an edit."""
+        self._command_templates_cache = None
+        self._command_templates_cache_expires_at = None
+        cli_service.invalidate_template_index()
+
     def _create_batches(self, switches: List[Switch], batch_size: int = 10) -> List[List[Switch]]:
         """
         Split switches into batches of specified size.
@@ -606,6 +692,86 @@ class NetworkDataCollector:
         # Batch succeeds if all switches succeeded
         return batch_failed == 0
 
+    async def _archive_raw_output(
+        self,
+        db: AsyncSession,
+        switch_id: int,
+        command_type: str,
+        output_capture: Optional[Dict],
+        entries_parsed: int,
+        collected_at: datetime
+    ) -> None:
+        """Archive captured raw output; failures never affect the collection itself."""
+        if not output_capture:
+            return
+        try:
+            async with db.begin_nested():
+                await raw_output_archive.archive_output(
+                    db, switch_id, command_type, output_capture, entries_parsed, collected_at
+                )
+        except Exception as e:
+            logger.warning(f"Failed to archive raw {command_type} output for switch {switch_id}: {str(e)}")
+
+    def _new_output_capture(
+        self,
+        switch: Switch,
+        command_type: str,
+        skip_unchanged: bool = False
+    ) -> Optional[Dict]:
+        """
+        Build the output_capture dict handed to cli_service, or None when nobody needs it.
+
+        With skip_unchanged the switch's last stored output hash is passed along,
+        so cli_service can skip parsing an identical output.
+        """
+        skip_unchanged = skip_unchanged and settings.COLLECTION_SKIP_UNCHANGED_OUTPUT
+        if not skip_unchanged and not raw_output_archive.enabled:
+            return None
+        output_capture = {}
+        if skip_unchanged:
+            output_capture['previous_hash'] = getattr(switch, f'last_{command_type}_output_hash', None)
+        return output_capture
+
+    def _remember_output_hash(self, switch: Switch, command_type: str, output_capture: Optional[Dict]) -> None:
+        """Record the hash of the output just stored; without one the next run must parse."""
+        content_hash = output_capture.get('content_hash') if output_capture else None
+        setattr(switch, f'last_{command_type}_output_hash', content_hash)
+
+    async def _refresh_unchanged_entries(
+        self,
+        db: AsyncSession,
+        switch: Switch,
+        command_type: str,
+        collected_at: datetime
+    ) -> int:
+        """
+        Mark a switch's stored ARP/MAC rows as seen again without rewriting them.
+
+        last_seen is the partition key, so only rows whose last_seen is older than
+        COLLECTION_UNCHANGED_RESTAMP_MINUTES are re-stamped: a row changes partition
+        at most once a day instead of on every collection, and stays inside the
+        lookup freshness window (at least one hour).
+
+        Returns:
+            Number of rows stored for the switch. Zero means nothing is stored to
+            refresh, so the hash is cleared and the next collection parses again.
+        """
+        model = ARPTable if command_type == 'arp' else MACTable
+        refreshed = (await db.execute(
+            select(func.count()).select_from(model).where(model.switch_id == switch.id)
+        )).scalar() or 0
+        if refreshed:
+            restamp_before = collected_at - timedelta(minutes=settings.COLLECTION_UNCHANGED_RESTAMP_MINUTES)
+            await db.execute(
+                update(model)
+                .where(and_(model.switch_id == switch.id, model.last_seen < restamp_before))
+                .values(collected_at=collected_at, last_seen=collected_at)
+                .execution_options(synchronize_session=False)
+            )
+        else:
+            setattr(switch, f'last_{command_type}_output_hash', None)
+        return refreshed
+
     async def _store_arp_entries_bulk(
         self,
         db: AsyncSession,
@@ -649,6 +815,8 @@ class NetworkDataCollector:
                 to_insert
             )
 
+        queue_invalidation(db, switch_ids=[switch_id], ips=[entry['ip_address'] for entry in entries])
+
         logger.debug(
             f"  ARP REPLACE: deleted {deleted_count} old entries, inserted {len(entries)} new entries"
         )
@@ -695,6 +863,8 @@ class NetworkDataCollector:
                 to_insert
             )
 
+        queue_invalidation(db, switch_ids=[switch_id], macs=[entry['mac_address'] for entry in entries])
+
         logger.debug(
             f"  MAC REPLACE: deleted {deleted_count} old entries, inserted {len(entries)} new entries"
         )
@@ -764,6 +934,11 @@ class NetworkDataCollector:
             )
             switches = result.scalars().all()
 
+            # In collector cluster mode each node only collects the switches it leases
+            from services.collector_cluster import collector_cluster
+            if collector_cluster.enabled:
+                switches = [switch for switch in switches if collector_cluster.owns_switch(switch.id)]
+
             if not switches:
                 logger.warning("No switches with CLI or SNMP configured found")
                 return {
@@ -887,10 +1062,10 @@ class NetworkDataCollector:
                 ip_count = 0
                 # Continue with cleanup even if IP matching fails
 
-            # Step 5: Cleanup old data (keep last 7 days)
+            # Step 5: Cleanup old data (keep ARP_MAC_RETENTION_DAYS)
             logger.info("Cleaning up old data...")
             try:
-                await self._cleanup_old_data(db, days_to_keep=7)
+                await self._cleanup_old_data(db, days_to_keep=settings.ARP_MAC_RETENTION_DAYS)
                 await db.commit()
                 logger.info("  ✅ Cleanup completed")
             except Exception as e:
@@ -1028,17 +1203,23 @@ class NetworkDataCollector:
 
         # Collect ARP table using the global L2 CLI-only policy
         arp_entries = []
+        arp_capture = None
         arp_result_detail = "No ARP method attempted"
 
         logger.info(f"  Using global ARP/MAC collection strategy for {switch.name}: {global_l2_method}")
         if switch.cli_enabled and switch.password_encrypted:
             logger.info(f"  Collecting ARP via CLI (global policy) for {switch.name}")
             try:
+                arp_capture = self._new_output_capture(switch, 'arp')
                 arp_entries = await asyncio.to_thread(
                     cli_service.collect_arp_table_cli,
                     str(switch.ip_address),
                     cli_config,
-                    templates
+                    templates,
+                    arp_capture
+                )
+                await self._archive_raw_output(
+                    db, switch.id, 'arp', arp_capture, len(arp_entries), collected_at
                 )
                 if len(arp_entries) > 0:
                     logger.info(f"  ✅ CLI ARP collection successful: {len(arp_entries)} entries")
@@ -1055,19 +1236,26 @@ class NetworkDataCollector:
 
         # Store ARP entries using bulk operations
         await self._store_arp_entries_bulk(db, switch.id, arp_entries, collected_at)
+        self._remember_output_hash(switch, 'arp', arp_capture if arp_entries else None)
 
         # Collect MAC table using the same global L2 CLI-only policy
         mac_entries = []
+        mac_capture = None
         mac_result_detail = "No MAC method attempted"
 
         if switch.cli_enabled and switch.password_encrypted:
             logger.info(f"  Collecting MAC via CLI (global policy) for {switch.name}")
             try:
+                mac_capture = self._new_output_capture(switch, 'mac')
                 mac_entries = await asyncio.to_thread(
                     cli_service.collect_mac_table_cli,
                     str(switch.ip_address),
                     cli_config,
-                    templates
+                    templates,
+                    mac_capture
+                )
+                await self._archive_raw_output(
+                    db, switch.id, 'mac', mac_capture, len(mac_entries), collected_at
                 )
                 if len(mac_entries) > 0:
                     logger.info(f"  ✅ CLI MAC collection successful: {len(mac_entries)} entries")
@@ -1085,6 +1273,8 @@ class NetworkDataCollector:
 
         # Store MAC entries using bulk operations
         await self._store_mac_entries_bulk(db, switch.id, mac_entries, collected_at)
+        self._remember_output_hash(switch, 'mac', mac_capture if mac_entries else None)
+        switch.l2_changed_at = collected_at
 
         logger.info(f"  Collected {len(arp_entries)} ARP, {len(mac_entries)} MAC entries from {switch.name}")
 
@@ -1124,45 +1314,142 @@ class NetworkDataCollector:
         """
         Analyze all ports based on MAC table data
 
+        One GROUP BY over mac_table counts every switch's ports, the results are
+        classified in memory and written with set-wise upserts. Switches without
+        stored MAC entries keep their previous analysis, as in the per-switch refresh.
+
         Returns:
             Number of ports analyzed
         """
-        # Get all switches
-        result = await db.execute(select(Switch))
-        switches = result.scalars().all()
+        started = datetime.utcnow()
+        all_stats = await self._aggregate_port_statistics(db)
 
-        total_ports = 0
+        analyzed_at = datetime.utcnow()
+        rows = []
+        for switch_id, port_stats in all_stats.items():
+            rows.extend(self._port_analysis_rows(switch_id, port_stats, analyzed_at))
+
+        ports_created, ports_updated = await self._upsert_port_analysis(db, rows)
+
+        # Every current port was just stamped with analyzed_at; older rows of
+        # switches that still have MAC entries are ports that disappeared.
+        pruned = await db.execute(
+            delete(PortAnalysis)
+            .where(
+                PortAnalysis.analyzed_at < analyzed_at,
+                select(MACTable.id).where(MACTable.switch_id == PortAnalysis.switch_id).exists()
+            )
+            .execution_options(synchronize_session=False)
+        )
 
-        for switch in switches:
-            summary = await self.refresh_port_analysis_for_switch(db, switch)
-            total_ports += summary['ports_analyzed']
+        logger.info(
+            f"Analyzed {len(rows)} ports on {len(all_stats)} switches in "
+            f"{(datetime.utcnow() - started).total_seconds():.1f}s: "
+            f"{ports_created} created, {ports_updated} updated, {pruned.rowcount or 0} deleted"
+        )
+        return len(rows)
 
-        return total_ports
+    async def refresh_ip_locations(self, db: AsyncSession) -> Dict:
+        """
+        Re-score IP locations affected by switches whose L2 data changed since the last run.
+
+        Switches are picked by switches.l2_changed_at, stamped whenever ARP/MAC
+        rows are rewritten or a port lookup policy changes. The first run of a
+        process (or IP_LOCATION_INCREMENTAL=false) recomputes everything. The
+        change window overlaps the previous run by COLLECTION_JOB_TIMEOUT so jobs
+        that committed late are not missed.
 
-    async def _match_ip_locations(self, db: AsyncSession) -> int:
+        Returns:
+            Summary dict with mode, changed_switches and ips_located
+        """
+        run_started_at = datetime.utcnow()
+
+        if not settings.IP_LOCATION_INCREMENTAL or self._ip_location_watermark is None:
+            located = await self._match_ip_locations(db)
+            summary = {'mode': 'full', 'changed_switches': None, 'ips_located': located}
+        else:
+            since = self._ip_location_watermark - timedelta(seconds=settings.COLLECTION_JOB_TIMEOUT)
+            result = await db.execute(select(Switch.id).where(Switch.l2_changed_at >= since))
+            changed_switch_ids = list(result.scalars().all())
+            located = (
+                await self._match_ip_locations(db, switch_ids=changed_switch_ids)
+                if changed_switch_ids else 0
+            )
+            summary = {
+                'mode': 'incremental',
+                'changed_switches': len(changed_switch_ids),
+                'ips_located': located,
+            }
+
+        await db.commit()
+        self._ip_location_watermark = run_started_at
+        logger.info(f"📍 IP location refresh: {summary}")
+        return summary
+
+    async def _match_ip_locations(
+        self,
+        db: AsyncSession,
+        switch_ids: Optional[List[int]] = None
+    ) -> int:
         """
         Match all IPs to switch ports
 
+        Args:
+            switch_ids: Only re-score IPs whose ARP binding, MAC location or port
+                classification can depend on these switches (default: all IPs)
+
         Returns:
             Number of IPs located
         """
         # Get recent ARP and MAC data
         cutoff_time = datetime.now() - timedelta(hours=24)
 
+        arp_stmt = select(ARPTable).where(ARPTable.last_seen >= cutoff_time)
+        mac_stmt = select(MACTable).where(MACTable.last_seen >= cutoff_time)
+
+        if switch_ids is not None:
+            # MACs seen on, resolved by, or previously located on a changed switch
+            affected_macs = union(
+                select(MACTable.mac_address).where(MACTable.switch_id.in_(switch_ids)),
+                select(ARPTable.mac_address).where(ARPTable.switch_id.in_(switch_ids)),
+                select(IPLocation.mac_address).where(IPLocation.switch_id.in_(switch_ids)),
+            ).subquery()
+            affected_ips = select(ARPTable.ip_address).where(
+                ARPTable.last_seen >= cutoff_time,
+                or_(
+                    ARPTable.switch_id.in_(switch_ids),
+                    ARPTable.mac_address.in_(select(affected_macs.c.mac_address))
+                )
+            )
+            # Every ARP row of an affected IP and every MAC row of their MACs,
+            # on all switches, so scoring sees the same inputs as a full run.
+            arp_stmt = arp_stmt.where(ARPTable.ip_address.in_(affected_ips))
+            mac_stmt = mac_stmt.where(
+                MACTable.mac_address.in_(
+                    select(ARPTable.mac_address).where(
+                        ARPTable.last_seen >= cutoff_time,
+                        ARPTable.ip_address.in_(affected_ips)
+                    )
+                )
+            )
+
         # Get ARP records
-        result = await db.execute(
-            select(ARPTable).where(ARPTable.last_seen >= cutoff_time)
-        )
+        result = await db.execute(arp_stmt)
         arp_records = result.scalars().all()
 
         # Get MAC records
-        result = await db.execute(
-            select(MACTable).where(MACTable.last_seen >= cutoff_time)
-        )
+        result = await db.execute(mac_stmt)
         mac_records = result.scalars().all()
 
         # Get port analysis
-        result = await db.execute(select(PortAnalysis))
+        port_stmt = select(PortAnalysis)
+        if switch_ids is not None:
+            port_stmt = port_stmt.where(PortAnalysis.switch_id.in_({m.switch_id for m in mac_records}))
+            logger.info(
+                f"  Incremental IP location matching for {len(switch_ids)} changed switches: "
+                f"{len(arp_records)} ARP rows, {len(mac_records)} MAC rows in scope"
+            )
+        result = await db.execute(port_stmt)
         port_analysis_records = result.scalars().all()
 
         # Convert to dict formats
@@ -1264,18 +1551,17 @@ class NetworkDataCollector:
         return stored_count
 
     async def _cleanup_old_data(self, db: AsyncSession, days_to_keep: int = 7):
-        """Remove old ARP and MAC table entries"""
-        cutoff = datetime.now() - timedelta(days=days_to_keep)
+        """Remove old ARP and MAC table entries (drops expired partitions when partitioned)"""
+        from services.partition_manager import partition_manager
 
-        # Delete old ARP entries
-        await db.execute(
-            ARPTable.__table__.delete().where(ARPTable.last_seen < cutoff)
-        )
+        cutoff = datetime.now() - timedelta(days=days_to_keep)
 
-        # Delete old MAC entries
-        await db.execute(
-            MACTable.__table__.delete().where(MACTable.last_seen < cutoff)
-        )
+        for model in (ARPTable, MACTable):
+            removed = await partition_manager.maintain(db, model.__tablename__, days_to_keep)
+            if removed is None:
+                await db.execute(
+                    model.__table__.delete().where(model.last_seen < cutoff)
+                )
 
         logger.info(f"Cleaned up data older than {days_to_keep} days")
 
@@ -1411,9 +1697,19 @@ class NetworkDataCollector:
             logger.error(f"Error collecting optical modules from {switch.name}: {str(e)}")
             return None
 
-    async def collect_mac_single_switch(self, db: AsyncSession, switch: Switch) -> List[Dict]:
+    async def collect_mac_single_switch(
+        self,
+        db: AsyncSession,
+        switch: Switch,
+        job_stats: Optional[Dict[str, int]] = None
+    ) -> List[Dict]:
         """
         Collect MAC table from a single switch using the global CLI-only policy.
+
+        When job_stats is given (worker jobs), an output identical to the last
+        stored one skips parse, store and port analysis: the stored rows only get
+        fresh timestamps, an empty list is returned and job_stats receives
+        'unchanged_outputs' and 'unchanged_entries'.
         """
         from services.cli_service import cli_service
 
@@ -1431,11 +1727,34 @@ class NetworkDataCollector:
                 await db.commit()
                 cli_config = self._build_cli_config(switch)
 
+                output_capture = self._new_output_capture(switch, 'mac', skip_unchanged=job_stats is not None)
                 mac_entries = await asyncio.to_thread(
                     cli_service.collect_mac_table_cli,
                     str(switch.ip_address),
                     cli_config,
-                    templates
+                    templates,
+                    output_capture
+                )
+
+                if output_capture and output_capture.get('unchanged'):
+                    refreshed = await self._refresh_unchanged_entries(db, switch, 'mac', collected_at)
+                    if refreshed:
+                        await self._archive_raw_output(
+                            db, switch.id, 'mac', output_capture, refreshed, collected_at
+                        )
+                        job_stats['unchanged_outputs'] = job_stats.get('unchanged_outputs', 0) + 1
+                        job_stats['unchanged_entries'] = job_stats.get('unchanged_entries', 0) + refreshed
+                        switch.mac_collection_success_count += 1
+                        switch.last_mac_collection_at = collected_at
+                        switch.last_collection_status = 'success'
+                        switch.last_collection_message = f"MAC: output unchanged, {refreshed} entries kept"
+                        logger.info(f"♻️ MAC output unchanged for {switch.name}, kept {refreshed} stored entries")
+                        return []
+                    # Nothing stored to keep (rows purged or aged out): parse the output we already have
+                    mac_entries = cli_service.parse_captured_output(output_capture, 'mac')
+
+                await self._archive_raw_output(
+                    db, switch.id, 'mac', output_capture, len(mac_entries), collected_at
                 )
 
                 if len(mac_entries) > 0:
@@ -1456,6 +1775,8 @@ class NetworkDataCollector:
         else:
             # Store collected data
             await self._store_mac_entries_bulk(db, switch.id, mac_entries, collected_at)
+            self._remember_output_hash(switch, 'mac', output_capture)
+            switch.l2_changed_at = collected_at
             analysis_summary = await self.refresh_port_analysis_for_switch(db, switch)
             switch.last_mac_collection_at = collected_at
             switch.last_collection_status = 'success'
@@ -1472,9 +1793,19 @@ class NetworkDataCollector:
         switch.last_collection_message = "MAC: 0 entries after trying all available methods"
         return mac_entries
 
-    async def collect_arp_single_switch(self, db: AsyncSession, switch: Switch) -> List[Dict]:
+    async def collect_arp_single_switch(
+        self,
+        db: AsyncSession,
+        switch: Switch,
+        job_stats: Optional[Dict[str, int]] = None
+    ) -> List[Dict]:
         """
         Collect ARP table from a single switch using the global CLI-only policy.
+
+        When job_stats is given (worker jobs), an output identical to the last
+        stored one skips parse, store: the stored rows only get
+        fresh timestamps, an empty list is returned and job_stats receives
+        'unchanged_outputs' and 'unchanged_entries'.
         """
         from services.cli_service import cli_service
 
@@ -1492,11 +1823,34 @@ class NetworkDataCollector:
                 await db.commit()
                 cli_config = self._build_cli_config(switch)
 
+                output_capture = self._new_output_capture(switch, 'arp', skip_unchanged=job_stats is not None)
                 arp_entries = await asyncio.to_thread(
                     cli_service.collect_arp_table_cli,
                     str(switch.ip_address),
                     cli_config,
-                    templates
+                    templates,
+                    output_capture
+                )
+
+                if output_capture and output_capture.get('unchanged'):
+                    refreshed = await self._refresh_unchanged_entries(db, switch, 'arp', collected_at)
+                    if refreshed:
+                        await self._archive_raw_output(
+                            db, switch.id, 'arp', output_capture, refreshed, collected_at
+                        )
+                        job_stats['unchanged_outputs'] = job_stats.get('unchanged_outputs', 0) + 1
+                        job_stats['unchanged_entries'] = job_stats.get('unchanged_entries', 0) + refreshed
+                        switch.arp_collection_success_count += 1
+                        switch.last_arp_collection_at = collected_at
+                        switch.last_collection_status = 'success'
+                        switch.last_collection_message = f"ARP: output unchanged, {refreshed} entries kept"
+                        logger.info(f"♻️ ARP output unchanged for {switch.name}, kept {refreshed} stored entries")
+                        return []
+                    # Nothing stored to keep (rows purged or aged out): parse the output we already have
+                    arp_entries = cli_service.parse_captured_output(output_capture, 'arp')
+
+                await self._archive_raw_output(
+                    db, switch.id, 'arp', output_capture, len(arp_entries), collected_at
                 )
 
                 if len(arp_entries) > 0:
@@ -1517,6 +1871,8 @@ class NetworkDataCollector:
         else:
             # Store collected data
             await self._store_arp_entries_bulk(db, switch.id, arp_entries, collected_at)
+            self._remember_output_hash(switch, 'arp', output_capture)
+            switch.l2_changed_at = collected_at
             switch.last_arp_collection_at = collected_at
             switch.last_collection_status = 'success'
             switch.last_collection_message = f"ARP: {len(arp_entries)} entries via {method_used}"
@@ -17,6 +17,7 @@ from core.database import AsyncSessionLocal
 from core.config import settings
 from services.network_data_collector import network_data_collector
 from services.alarm_service import alarm_service
+from services.raw_output_archive import raw_output_archive
 from services.ipam_scan_status import ipam_scan_status_service
 
 
@@ -121,6 +122,15 @@ class NetworkCollectionScheduler:
                 max_instances=1
             )
 
+            self.scheduler.add_job(
+                self._run_ip_location_refresh,
+                trigger=IntervalTrigger(minutes=settings.IP_LOCATION_REFRESH_INTERVAL_MINUTES),
+                id='ip_location_refresh',
+                name='IP Location Refresh',
+                replace_existing=True,
+                max_instances=1
+            )
+
             # Add optical module collection job (runs every 12 hours)
             self.scheduler.add_job(
                 self._run_optical_module_collection,
@@ -142,6 +152,7 @@ class NetworkCollectionScheduler:
             logger.info(f"IPAM history cleanup scheduled (daily at {settings.ALARM_CLEANUP_HOUR:02d}:20)")
             logger.info(f"IPAM auto-scan job scheduled (interval: {self.ipam_scan_interval_minutes} min)")
             logger.info(f"Optical module collection job scheduled (interval: {self.optical_module_interval_minutes} min)")
+            logger.info(f"IP location refresh scheduled (interval: {settings.IP_LOCATION_REFRESH_INTERVAL_MINUTES} min)")
             asyncio.create_task(
                 self.trigger_startup_catchup(
                     include_collection=True,
@@ -162,6 +173,18 @@ class NetworkCollectionScheduler:
             self.is_running = False
             logger.info("Network collection scheduler stopped")
 
+    def _is_cluster_leader(self, job_name: str) -> bool:
+        """In collector cluster mode only the leader node runs fleet-wide scheduled jobs."""
+        from services.collector_cluster import collector_cluster
+
+        if collector_cluster.is_leader():
+            return True
+        logger.info(
+            f"Skipping scheduled {job_name} on {collector_cluster.node_id}: "
+            f"leader is {collector_cluster.leader_node_id}"
+        )
+        return False
+
     async def _get_active_job_counts(self, db, job_type: str) -> tuple[int, int]:
         """Return pending/running queue depth for a given job type."""
         from models.collection_job import CollectionJob, JobStatus
@@ -361,6 +384,9 @@ class NetworkCollectionScheduler:
 
     async def _run_collection(self):
         """Run a single collection cycle by creating jobs for worker pool"""
+        if not self._is_cluster_leader("full collection"):
+            return
+
         logger.info("Scheduled collection started - creating jobs for worker pool")
         start_time = datetime.now()
 
@@ -420,8 +446,34 @@ class NetworkCollectionScheduler:
         elapsed = (datetime.now() - start_time).total_seconds()
         logger.info(f"Job creation finished in {elapsed:.1f}s (workers will execute asynchronously)")
 
+    async def _run_ip_location_refresh(self):
+        """Re-score IP locations for switches whose L2 data changed since the last run."""
+        if not self._is_cluster_leader("IP location refresh"):
+            return
+
+        start_time = datetime.now()
+
+        try:
+            async for db in get_db():
+                try:
+                    await network_data_collector.refresh_ip_locations(db)
+                except Exception as e:
+                    await db.rollback()
+                    logger.error(f"IP location refresh failed: {str(e)}", exc_info=True)
+                finally:
+                    break  # Only need one iteration
+
+        except Exception as e:
+            logger.error(f"IP location refresh error: {str(e)}", exc_info=True)
+
+        elapsed = (datetime.now() - start_time).total_seconds()
+        logger.info(f"IP location refresh finished in {elapsed:.1f}s")
+
     async def _run_alarm_cleanup(self):
         """Run alarm cleanup job - delete resolved alarms older than 30 days"""
+        if not self._is_cluster_leader("alarm cleanup"):
+            return
+
         logger.info("Scheduled alarm cleanup started")
         start_time = datetime.now()
 
@@ -447,6 +499,9 @@ class NetworkCollectionScheduler:
 
     async def _run_collection_job_cleanup(self):
         """Run collection job retention cleanup."""
+        if not self._is_cluster_leader("collection job cleanup"):
+            return
+
         logger.info("Scheduled collection job cleanup started")
         start_time = datetime.now()
 
@@ -462,8 +517,26 @@ class NetworkCollectionScheduler:
                     logger.info(f"Collection job cleanup completed: deleted {deleted_count} old jobs")
                 except Exception as e:
                     logger.error(f"Collection job cleanup failed: {str(e)}", exc_info=True)
-                finally:
-                    break
+
+                try:
+                    from services.network_data_collector import network_data_collector
+
+                    await network_data_collector._cleanup_old_data(
+                        db,
+                        days_to_keep=settings.ARP_MAC_RETENTION_DAYS
+                    )
+                    await db.commit()
+                except Exception as e:
+                    await db.rollback()
+                    logger.error(f"ARP/MAC retention cleanup failed: {str(e)}", exc_info=True)
+
+                if raw_output_archive.enabled:
+                    try:
+                        await raw_output_archive.enforce_retention(db)
+                    except Exception as e:
+                        await db.rollback()
+                        logger.error(f"Raw output archive retention failed: {str(e)}", exc_info=True)
+                break
 
         except Exception as e:
             logger.error(f"Collection job cleanup error: {str(e)}", exc_info=True)
@@ -473,6 +546,9 @@ class NetworkCollectionScheduler:
 
     async def _run_ipam_history_cleanup(self):
         """Run IP scan history retention cleanup."""
+        if not self._is_cluster_leader("IP scan history cleanup"):
+            return
+
         logger.info("Scheduled IP scan history cleanup started")
         start_time = datetime.now()
 
@@ -499,6 +575,9 @@ class NetworkCollectionScheduler:
 
     async def _run_ipam_scan(self, *, startup_catchup: bool = False, max_subnets: int | None = None):
         """Run IPAM automatic subnet scan"""
+        if not self._is_cluster_leader("IPAM auto-scan"):
+            return
+
         if self._ipam_scan_lock.locked():
             logger.warning("Skipping IPAM auto-scan because another IPAM scan is already running")
             return
@@ -591,6 +670,9 @@ class NetworkCollectionScheduler:
 
     async def _run_optical_module_collection(self):
         """Run optical module collection from all switches via worker pool"""
+        if not self._is_cluster_leader("optical collection"):
+            return
+
         logger.info("Scheduled optical module collection started - creating jobs for worker pool")
         start_time = datetime.now()
 
@@ -715,6 +797,15 @@ async def start_collection_scheduler():
                 max_instances=1
             )
 
+            scheduler.add_job(
+                network_scheduler._run_ip_location_refresh,
+                trigger=IntervalTrigger(minutes=settings.IP_LOCATION_REFRESH_INTERVAL_MINUTES),
+                id='ip_location_refresh',
+                name='IP Location Refresh',
+                replace_existing=True,
+                max_instances=1
+            )
+
             # Add alarm cleanup job
             scheduler.add_job(
                 network_scheduler._run_alarm_cleanup,
@@ -0,0 +1,193 @@
+"""
+Time Partition Manager
+
+arp_table, mac_table and ip_scan_history are daily range partitions on their
+time column once migration 021 has run. This service keeps PARTITION_PREMAKE_DAYS
+of future partitions in place and enforces retention by dropping (or, with
+PARTITION_RETENTION_DETACH_ONLY, detaching) partitions that lie entirely before
+the cutoff, so cleanup no longer deletes rows or leaves index bloat behind.
+
+Partitions are named <table>_pYYYYMMDD and cover [day, day + 1) in UTC. A
+partition is only removed when its upper bound is at or before the cutoff, so
+rows may outlive the retention window by up to one day. On databases where the
+migration has not run, maintain() returns None and callers keep deleting rows.
+"""
+
+import re
+from datetime import datetime, time as dt_time, timedelta, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.config import settings
+from utils.logger import logger
+
+
+# Partitioned table -> range partition column
+PARTITIONED_TABLES = {
+    'arp_table': 'last_seen',
+    'mac_table': 'last_seen',
+    'ip_scan_history': 'scanned_at',
+}
+
+_UPPER_BOUND_PATTERN = re.compile(r"TO \('([^']+)'\)")
+
+
+def partition_name(table: str, day) -> str:
+    return f"{table}_p{day:%Y%m%d}"
+
+
+def parse_upper_bound(bound_expr: str) -> Optional[datetime]:
+    """Upper bound of a range partition from pg_get_expr(relpartbound); None for DEFAULT/MAXVALUE."""
+    match = _UPPER_BOUND_PATTERN.search(bound_expr or '')
+    if not match:
+        return None
+    upper = datetime.fromisoformat(match.group(1))
+    if upper.tzinfo is None:
+        upper = upper.replace(tzinfo=timezone.utc)
+    return upper
+
+
+class PartitionManager:
+    """Creates future daily partitions and drops expired ones"""
+
+    async def is_partitioned(self, db: AsyncSession, table: str) -> bool:
+        result = await db.execute(
+            text("SELECT relkind = 'p' FROM pg_class WHERE oid = to_regclass(:table)"),
+            {'table': table}
+        )
+        return bool(result.scalar())
+
+    async def list_partitions(self, db: AsyncSession, table: str) -> List[Dict]:
+        result = await db.execute(
+            text("""
+                SELECT c.relname, pg_get_expr(c.relpartbound, c.oid), c.reltuples
+                FROM pg_inherits i
+                JOIN pg_class c ON c.oid = i.inhrelid
+                WHERE i.inhparent = to_regclass(:table)
+                ORDER BY c.relname
+            """),
+            {'table': table}
+        )
+        return [
+            {
+                'name': name,
+                'upper_bound': parse_upper_bound(bound_expr),
+                'is_default': bound_expr == 'DEFAULT',
+                'estimated_rows': max(int(reltuples or 0), 0),
+            }
+            for name, bound_expr, reltuples in result.all()
+        ]
+
+    async def ensure_future_partitions(
+        self,
+        db: AsyncSession,
+        table: str,
+        partitions: List[Dict],
+        days_ahead: int
+    ) -> int:
+        """
+        Create daily partitions from the last existing bound through today + days_ahead (no commit).
+
+        A day whose rows already landed in the default partition (premake fell
+        behind) cannot be created with PARTITION OF: the default would violate the
+        new bound. Such a day is built as a standalone table, its rows are moved
+        out of the default and the table is then attached.
+        """
+        now = datetime.now(timezone.utc)
+        bounds = [p['upper_bound'] for p in partitions if p['upper_bound'] is not None]
+        day_start = max(bounds) if bounds else datetime.combine(now.date(), dt_time.min, tzinfo=timezone.utc)
+        last_day = datetime.combine(now.date() + timedelta(days=days_ahead), dt_time.min, tzinfo=timezone.utc)
+        default = next((p['name'] for p in partitions if p['is_default']), None)
+        column = PARTITIONED_TABLES.get(table)
+
+        created = 0
+        while day_start <= last_day:
+            day_end = day_start + timedelta(days=1)
+            name = partition_name(table, day_start)
+            bound = f"FOR VALUES FROM ('{day_start.isoformat()}') TO ('{day_end.isoformat()}')"
+            in_range = f"{column} >= :day_start AND {column} < :day_end"
+            day_params = {'day_start': day_start, 'day_end': day_end}
+            has_default_rows = default is not None and bool((await db.execute(
+                text(f"SELECT EXISTS (SELECT 1 FROM {default} WHERE {in_range})"), day_params
+            )).scalar())
+
+            if has_default_rows:
+                await db.execute(text(
+                    f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+                ))
+                moved = await db.execute(text(
+                    f"WITH moved AS (DELETE FROM {default} WHERE {in_range} RETURNING *) "
+                    f"INSERT INTO {name} SELECT * FROM moved"
+                ), day_params)
+                await db.execute(text(f"ALTER TABLE {table} ATTACH PARTITION {name} {bound}"))
+                logger.info(f"🗂️ Moved {moved.rowcount} rows of {table} from {default} into {name}")
+            else:
+                await db.execute(text(f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {table} {bound}"))
+            created += 1
+            day_start = day_end
+        return created
+
+    async def drop_expired_partitions(
+        self,
+        db: AsyncSession,
+        table: str,
+        partitions: List[Dict],
+        days_to_keep: int
+    ) -> Dict[str, int]:
+        """Drop or detach partitions whose whole range is older than the cutoff (no commit)."""
+        cutoff = datetime.now(timezone.utc) - timedelta(days=days_to_keep)
+        removed = {'partitions': 0, 'estimated_rows': 0}
+
+        for partition in partitions:
+            upper = partition['upper_bound']
+            if partition['is_default'] or upper is None or upper > cutoff:
+                continue
+            if settings.PARTITION_RETENTION_DETACH_ONLY:
+                await db.execute(text(f"ALTER TABLE {table} DETACH PARTITION {partition['name']}"))
+            else:
+                await db.execute(text(f"DROP TABLE {partition['name']}"))
+            removed['partitions'] += 1
+            removed['estimated_rows'] += partition['estimated_rows']
+        return removed
+
+    async def maintain(self, db: AsyncSession, table: str, days_to_keep: int) -> Optional[int]:
+        """
+        Premake future partitions and apply retention to one table (no commit).
+
+        Returns:
+            Estimated number of rows removed, or None when the table is not partitioned
+        """
+        if not await self.is_partitioned(db, table):
+            return None
+
+        partitions = await self.list_partitions(db, table)
+        try:
+            # Savepoint: a failed premake must not abort the transaction and block retention
+            async with db.begin_nested():
+                created = await self.ensure_future_partitions(
+                    db, table, partitions, settings.PARTITION_PREMAKE_DAYS
+                )
+        except Exception as e:
+            logger.error(f"❌ {table} partition premake failed, still applying retention: {str(e)}")
+            created = 0
+        removed = await self.drop_expired_partitions(db, table, partitions, days_to_keep)
+
+        default = next((p for p in partitions if p['is_default']), None)
+        if default and default['estimated_rows'] > 0:
+            logger.warning(
+                f"⚠️ {table} default partition holds ~{default['estimated_rows']} rows; "
+                f"partition premake may have fallen behind"
+            )
+
+        action = 'detached' if settings.PARTITION_RETENTION_DETACH_ONLY else 'dropped'
+        logger.info(
+            f"🗂️ {table} partitions: ensured {created} ahead, {action} {removed['partitions']} "
+            f"(~{removed['estimated_rows']} rows older than {days_to_keep} days)"
+        )
+        return removed['estimated_rows']
+
+
+# Global instance
+partition_manager = PartitionManager()
@@ -0,0 +1,170 @@
+"""
+Ping Sweep Scheduler
+
+Paces the ICMP echo requests of an IPAM sweep instead of capping how many scans
+run at once. Every address is probed through the ICMP echo engine under two
+packets-per-second budgets:
+
+* IPAM_SWEEP_PPS for the whole sweep
+* IPAM_SWEEP_SUBNET_PPS per destination gateway, so no single gateway or
+  access segment receives a burst. IPAM sweeps one subnet at a time and passes
+  its gateway (or network) as the group, so the whole subnet shares one budget
+  however large it is; ad-hoc IP lists are grouped by /24 (or /64 for IPv6).
+
+Subnets are interleaved round-robin: each send goes to the subnet whose budget
+frees up first, so a large sweep runs at the global rate while every segment
+only sees its own rate. Addresses that do not answer are probed again once the
+whole pass is done (IPAM_SWEEP_RETRIES passes), which clears drops caused by a
+momentarily busy host or gateway without marking it offline. Results are
+streamed as soon as they are final: reachable hosts right away, non-responders
+after their last retry.
+"""
+
+import asyncio
+import heapq
+import ipaddress
+from collections import OrderedDict, deque
+from typing import AsyncIterator, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+from core.config import settings
+from services.icmp_engine import icmp_echo_engine
+from utils.logger import logger
+
+
+PingResult = Tuple[bool, Optional[int]]
+
+# Lag the scheduler may catch up on in one burst after a late wakeup
+CATCH_UP_SECONDS = 0.01
+
+
+def destination_group(ip: str) -> str:
+    """Fallback group of an address without a known subnet: its /24 (IPv4) or /64 (IPv6)."""
+    address = ipaddress.ip_address(ip)
+    prefix = 24 if address.version == 4 else 64
+    return ipaddress.ip_network(f"{address}/{prefix}", strict=False).with_prefixlen
+
+
+def interval(pps: int) -> float:
+    return 1.0 / pps if pps > 0 else 0.0
+
+
+class PingSweep:
+    """Rate-paced, subnet-interleaved ping sweep with a retry pass for non-responders"""
+
+    def __init__(self, ping: Optional[Callable[[str, float], Awaitable[PingResult]]] = None):
+        self._ping = ping
+
+    async def _run_pass(
+        self,
+        ips: List[str],
+        timeout: float,
+        emit: Callable[[str, PingResult], None],
+        final: bool,
+        group_key: Optional[str] = None
+    ) -> List[str]:
+        """
+        Probe ips once at the configured rates.
+
+        Reachable results (and every result when final) go to emit as they arrive;
+        returns the addresses that did not answer.
+        """
+        loop = asyncio.get_running_loop()
+        global_interval = interval(settings.IPAM_SWEEP_PPS)
+        group_interval = interval(settings.IPAM_SWEEP_SUBNET_PPS)
+        outstanding = asyncio.Semaphore(settings.IPAM_SCAN_ICMP_MAX_OUTSTANDING)
+        ping = self._ping or icmp_echo_engine.ping
+
+        groups: Dict[str, Deque[str]] = OrderedDict()
+        for ip in ips:
+            groups.setdefault(group_key or destination_group(ip), deque()).append(ip)
+
+        now = loop.time()
+        # (time the group's budget allows its next send, tie breaker for round-robin, group)
+        ready = [(now, order, group) for order, group in enumerate(groups)]
+        heapq.heapify(ready)
+        tie_breaker = len(ready)
+        global_next = now
+        silent: List[str] = []
+        probes = set()
+
+        async def probe(ip: str):
+            try:
+                result = await ping(ip, timeout)
+            finally:
+                outstanding.release()
+            if result[0] or final:
+                emit(ip, result)
+            else:
+                silent.append(ip)
+
+        try:
+            while ready:
+                group_ready, _, group = heapq.heappop(ready)
+                now = loop.time()
+                send_at = max(group_ready, global_next, now - CATCH_UP_SECONDS)
+                if send_at > now:
+                    await asyncio.sleep(send_at - now)
+                global_next = send_at + global_interval
+
+                await outstanding.acquire()
+                task = asyncio.create_task(probe(groups[group].popleft()))
+                probes.add(task)
+                task.add_done_callback(probes.discard)
+
+                if groups[group]:
+                    heapq.heappush(ready, (send_at + group_interval, tie_breaker, group))
+                    tie_breaker += 1
+
+            if probes:
+                await asyncio.gather(*probes)
+        finally:
+            for task in probes:
+                task.cancel()
+        return silent
+
+    async def sweep(
+        self,
+        ips: List[str],
+        timeout: float,
+        group_key: Optional[str] = None
+    ) -> AsyncIterator[Tuple[str, PingResult]]:
+        """
+        Yield (ip, (is_reachable, response_time_ms)) for every address once its result is final.
+
+        group_key puts every address under one per-gateway budget (e.g. the IPAM
+        subnet's gateway); without it addresses are grouped by destination_group().
+        """
+        results: asyncio.Queue = asyncio.Queue()
+        done = object()
+
+        async def run():
+            try:
+                pending = list(ips)
+                retries = max(0, settings.IPAM_SWEEP_RETRIES)
+                for attempt in range(retries + 1):
+                    if not pending:
+                        break
+                    if attempt:
+                        logger.debug(f"Ping sweep retrying {len(pending)} non-responding addresses")
+                    pending = await self._run_pass(
+                        pending, timeout, lambda ip, result: results.put_nowait((ip, result)),
+                        final=attempt == retries, group_key=group_key
+                    )
+            finally:
+                results.put_nowait(done)
+
+        runner = asyncio.create_task(run())
+        try:
+            while True:
+                item = await results.get()
+                if item is done:
+                    break
+                yield item
+            await runner
+        finally:
+            if not runner.done():
+                runner.cancel()
+
+
+# Global instance
+ping_sweep = PingSweep()
@@ -0,0 +1,248 @@
+"""
+Raw Output Archive Service
+
+Keeps the raw ARP/MAC command output of each collection (opt-in via
+RAW_OUTPUT_ARCHIVE_ENABLED). Output is compressed with zstd when the optional
+zstandard package is installed and configured, gzip otherwise, and stored once
+per distinct sha256 content hash; each collection only adds a small capture
+row. After a parser fix, reparse() rebuilds the ARP/MAC tables from the latest
+archived output without touching the network.
+"""
+
+import gzip
+import hashlib
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select, delete, text, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.config import settings
+from models.raw_output_archive import RawOutputBlob, RawOutputCapture
+from models.switch import Switch
+from utils.logger import logger
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+
+COMMAND_TYPES = ('arp', 'mac')
+
+
+class RawOutputArchiveService:
+    """Compressed, deduplicated storage of raw CLI output with offline re-parse"""
+
+    def __init__(self):
+        self._zstd_warning_logged = False
+
+    @property
+    def enabled(self) -> bool:
+        return settings.RAW_OUTPUT_ARCHIVE_ENABLED
+
+    def _compress(self, raw: bytes) -> Tuple[str, bytes]:
+        if settings.RAW_OUTPUT_ARCHIVE_COMPRESSION.lower() == 'zstd':
+            if ZSTD_AVAILABLE:
+                return 'zstd', zstandard.ZstdCompressor(level=10).compress(raw)
+            if not self._zstd_warning_logged:
+                logger.warning("zstandard not available - raw output archive falls back to gzip")
+                self._zstd_warning_logged = True
+        return 'gzip', gzip.compress(raw, compresslevel=6)
+
+    def decompress(self, encoding: str, data: bytes) -> str:
+        if encoding == 'zstd':
+            if not ZSTD_AVAILABLE:
+                raise RuntimeError("Archived output is zstd-compressed but zstandard is not installed")
+            raw = zstandard.ZstdDecompressor().decompress(data)
+        else:
+            raw = gzip.decompress(data)
+        return raw.decode('utf-8', errors='replace')
+
+    async def archive_output(
+        self,
+        db: AsyncSession,
+        switch_id: int,
+        command_type: str,
+        capture: Dict,
+        entries_parsed: int,
+        collected_at: datetime
+    ) -> Optional[str]:
+        """
+        Archive one captured command output (no commit).
+
+        Args:
+            capture: Dict filled by cli_service (command, parser_type, device_type, output)
+
+        Returns:
+            Content hash of the archived output, or None when nothing was archived
+        """
+        output = capture.get('output')
+        if not self.enabled or not output or not capture.get('command'):
+            return None
+
+        raw = output.encode('utf-8', errors='replace')
+        digest = hashlib.sha256(raw).hexdigest()
+        encoding, data = self._compress(raw)
+
+        await db.execute(
+            insert(RawOutputBlob).values(
+                content_hash=digest,
+                encoding=encoding,
+                data=data,
+                size_bytes=len(raw),
+                compressed_bytes=len(data),
+            ).on_conflict_do_nothing(index_elements=[RawOutputBlob.content_hash])
+        )
+        db.add(RawOutputCapture(
+            switch_id=switch_id,
+            command_type=command_type,
+            command=capture['command'][:255],
+            parser_type=capture.get('parser_type'),
+            device_type=capture.get('device_type'),
+            content_hash=digest,
+            entries_parsed=entries_parsed,
+            collected_at=collected_at,
+        ))
+        return digest
+
+    async def enforce_retention(self, db: AsyncSession) -> Dict[str, int]:
+        """Drop captures past the age/count limits, then blobs no capture references."""
+        cutoff = datetime.now(timezone.utc) - timedelta(days=settings.RAW_OUTPUT_ARCHIVE_RETENTION_DAYS)
+
+        expired = await db.execute(
+            delete(RawOutputCapture).where(RawOutputCapture.collected_at < cutoff)
+        )
+        over_limit = await db.execute(
+            text("""
+                DELETE FROM raw_output_captures
+                WHERE id IN (
+                    SELECT id FROM (
+                        SELECT id, row_number() OVER (
+                            PARTITION BY switch_id, command_type ORDER BY collected_at DESC
+                        ) AS rn
+                        FROM raw_output_captures
+                    ) ranked
+                    WHERE rn > :keep
+                )
+            """),
+            {"keep": settings.RAW_OUTPUT_ARCHIVE_MAX_PER_SWITCH}
+        )
+        orphans = await db.execute(
+            text("""
+                DELETE FROM raw_output_blobs b
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM raw_output_captures c WHERE c.content_hash = b.content_hash
+                )
+            """)
+        )
+        await db.commit()
+
+        summary = {
+            'captures_expired': expired.rowcount or 0,
+            'captures_over_limit': over_limit.rowcount or 0,
+            'blobs_deleted': orphans.rowcount or 0,
+        }
+        logger.info(f"🗄️ Raw output archive retention: {summary}")
+        return summary
+
+    async def reparse(
+        self,
+        db: AsyncSession,
+        switch_ids: Optional[Iterable[int]] = None,
+        command_types: Iterable[str] = COMMAND_TYPES,
+        parser_override: Optional[str] = None,
+        dry_run: bool = False
+    ) -> List[Dict]:
+        """
+        Rebuild ARP/MAC tables from the latest archived output of each switch.
+
+        Args:
+            switch_ids: Limit to these switches (default: every archived switch)
+            command_types: 'arp' and/or 'mac'
+            parser_override: Parse with this parser type instead of the archived one
+            dry_run: Parse and report only, leave the tables untouched
+
+        Returns:
+            One result dict per (switch, command type)
+        """
+        from services.cli_service import cli_service
+        from services.network_data_collector import network_data_collector
+
+        stmt = (
+            select(RawOutputCapture, RawOutputBlob.encoding, RawOutputBlob.data)
+            .join(RawOutputBlob, RawOutputBlob.content_hash == RawOutputCapture.content_hash)
+            .where(RawOutputCapture.command_type.in_(list(command_types)))
+            .distinct(RawOutputCapture.switch_id, RawOutputCapture.command_type)
+            .order_by(
+                RawOutputCapture.switch_id,
+                RawOutputCapture.command_type,
+                RawOutputCapture.collected_at.desc()
+            )
+        )
+        if switch_ids is not None:
+            stmt = stmt.where(RawOutputCapture.switch_id.in_(list(switch_ids)))
+        rows = (await db.execute(stmt)).all()
+
+        results = []
+        for capture, encoding, data in rows:
+            parser_type = parser_override or capture.parser_type
+            result = {
+                'switch_id': capture.switch_id,
+                'command_type': capture.command_type,
+                'command': capture.command,
+                'parser_type': parser_type,
+                'collected_at': capture.collected_at.isoformat(),
+                'entries_before': capture.entries_parsed,
+                'entries_after': 0,
+                'stored': False,
+            }
+            results.append(result)
+
+            parser = cli_service._get_parser(parser_type, capture.command_type)
+            if not parser:
+                result['error'] = f"No {capture.command_type} parser for type '{parser_type}'"
+                continue
+
+            try:
+                entries = parser(self.decompress(encoding, data))
+            except Exception as e:
+                result['error'] = f"Parse failed: {str(e)}"
+                continue
+            result['entries_after'] = len(entries)
+
+            # Never wipe a switch's table because the archived output parses to nothing.
+            if dry_run or not entries:
+                continue
+
+            if capture.command_type == 'arp':
+                await network_data_collector._store_arp_entries_bulk(
+                    db, capture.switch_id, entries, capture.collected_at
+                )
+            else:
+                await network_data_collector._store_mac_entries_bulk(
+                    db, capture.switch_id, entries, capture.collected_at
+                )
+                switch = await db.get(Switch, capture.switch_id)
+                if switch:
+                    await network_data_collector.refresh_port_analysis_for_switch(db, switch)
+
+            capture.entries_parsed = len(entries)
+            await db.execute(
+                update(Switch)
+                .where(Switch.id == capture.switch_id)
+                .values(l2_changed_at=datetime.now(timezone.utc))
+            )
+            await db.commit()
+            result['stored'] = True
+
+        logger.info(
+            f"🗄️ Re-parsed {len(results)} archived outputs "
+            f"({sum(1 for r in results if r['stored'])} stored, dry_run={dry_run})"
+        )
+        return results
+
+
+raw_output_archive = RawOutputArchiveService()
@@ -0,0 +1,312 @@
+"""
+Reverse Lookup Service
+
+Answers the questions IP lookup cannot, each in one API call:
+
+* port -> MACs -> IPs -> IPAM hostnames
+* MAC -> IPs (ARP, IPAM, past lookups) and located ports
+* hostname -> IPs -> located port
+* VLAN -> endpoints on lookup-eligible ports
+
+VLAN and hostname lookups are single statements, port lookup first expands the
+canonical port name to the spellings stored for the switch (mac_table keeps the
+raw CLI names), and MAC lookup reads four small sets, each driven by a composite index (mac_table (switch_id, port_name)
+and, from migration 022, mac_table (vlan_id, switch_id, port_name), arp_table
+(mac_address, ip_address, last_seen) and lower(...) text_pattern_ops indexes on
+the ip_addresses hostname columns). ARP/MAC rows older than the IP lookup cache window are ignored,
+as in cache mode IP lookup.
+"""
+
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy import select, and_, or_, func, desc
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.arp_table import ARPTable
+from models.ip_location import IPLocation
+from models.ipam import IPAddress
+from models.mac_cache import MACAddressCache
+from models.mac_table import MACTable
+from models.port_analysis import PortAnalysis
+from models.switch import Switch
+from services.port_analysis_service import port_analysis_service
+from services.port_lookup_policy_service import build_lookup_eligible_clause
+from core.config import settings
+
+
+HOSTNAME_COLUMNS = (IPAddress.hostname, IPAddress.dns_name, IPAddress.system_name)
+
+
+def _isoformat(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value else None
+
+
+def _escape_like(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def _ipam_fields(ipam: Optional[IPAddress]) -> Optional[Dict]:
+    if ipam is None:
+        return None
+    return {
+        'hostname': ipam.hostname,
+        'dns_name': ipam.dns_name,
+        'system_name': ipam.system_name,
+        'status': ipam.status.value if hasattr(ipam.status, 'value') else ipam.status,
+        'vendor': ipam.vendor,
+        'subnet_id': ipam.subnet_id,
+    }
+
+
+class ReverseLookupService:
+    """Port, MAC, hostname and VLAN reverse lookups over cached L2 data and IPAM"""
+
+    async def _cutoff(self, db: AsyncSession) -> datetime:
+        from services.settings_service import settings_service
+        cache_hours = await settings_service.get_setting(
+            db, 'ip_lookup_cache_hours', settings.IP_LOOKUP_CACHE_HOURS
+        )
+        return datetime.now(timezone.utc) - timedelta(hours=cache_hours)
+
+    @staticmethod
+    def _endpoint_rows_query(cutoff: datetime):
+        """MAC rows with the IPs ARP maps to them and the IPAM record of each IP."""
+        return (
+            select(MACTable, ARPTable.ip_address, ARPTable.last_seen.label('arp_last_seen'), IPAddress)
+            .outerjoin(
+                ARPTable,
+                and_(ARPTable.mac_address == MACTable.mac_address, ARPTable.last_seen >= cutoff)
+            )
+            .outerjoin(IPAddress, IPAddress.ip_address == ARPTable.ip_address)
+            .where(MACTable.last_seen >= cutoff)
+        )
+
+    @staticmethod
+    def _group_endpoints(rows) -> List[Dict]:
+        """Collapse (mac row, ip, ipam) rows into one entry per MAC/port with its IPs."""
+        endpoints: Dict[tuple, Dict] = {}
+        for mac, ip_address, arp_last_seen, ipam in rows:
+            key = (mac.switch_id, mac.port_name, str(mac.mac_address))
+            endpoint = endpoints.get(key)
+            if endpoint is None:
+                endpoint = endpoints[key] = {
+                    'mac_address': str(mac.mac_address),
+                    'switch_id': mac.switch_id,
+                    'port_name': mac.port_name,
+                    'vlan_id': mac.vlan_id,
+                    'last_seen': _isoformat(mac.last_seen),
+                    'ips': [],
+                }
+            if ip_address is not None and all(ip['ip_address'] != str(ip_address) for ip in endpoint['ips']):
+                endpoint['ips'].append({
+                    'ip_address': str(ip_address),
+                    'arp_last_seen': _isoformat(arp_last_seen),
+                    'ipam': _ipam_fields(ipam),
+                })
+        return list(endpoints.values())
+
+    async def lookup_port(self, db: AsyncSession, switch_id: int, port_name: str) -> Dict:
+        """
+        Everything learned on one switch port: MACs, their IPs and IPAM hostnames.
+
+        port_name may be any spelling ('Gi1/0/17', 'GigabitEthernet1/0/17'); rows
+        stored under every spelling that normalises to the same port match.
+        """
+        port_name = port_analysis_service.normalize_port_name(port_name)
+        cutoff = await self._cutoff(db)
+        stored_names = await db.execute(
+            select(MACTable.port_name)
+            .where(and_(MACTable.switch_id == switch_id, MACTable.last_seen >= cutoff))
+            .distinct()
+        )
+        raw_names = [
+            raw for raw in stored_names.scalars().all()
+            if port_analysis_service.normalize_port_name(raw) == port_name
+        ]
+
+        endpoints = []
+        if raw_names:
+            result = await db.execute(
+                self._endpoint_rows_query(cutoff)
+                .where(and_(MACTable.switch_id == switch_id, MACTable.port_name.in_(raw_names)))
+                .order_by(MACTable.mac_address, ARPTable.ip_address)
+            )
+            endpoints = self._group_endpoints(result.all())
+        return {
+            'switch_id': switch_id,
+            'port_name': port_name,
+            'mac_count': len(endpoints),
+            'endpoints': endpoints,
+        }
+
+    async def lookup_vlan(
+        self,
+        db: AsyncSession,
+        vlan_id: int,
+        switch_id: Optional[int] = None,
+        limit: int = 1000
+    ) -> Dict:
+        """Endpoints seen in a VLAN on lookup-eligible (access or included) ports."""
+        cutoff = await self._cutoff(db)
+
+        # Limit whole MACs rather than joined rows: select the MAC row ids first
+        mac_ids = (
+            select(MACTable.id)
+            .outerjoin(
+                PortAnalysis,
+                and_(
+                    PortAnalysis.switch_id == MACTable.switch_id,
+                    PortAnalysis.port_name == MACTable.port_name
+                )
+            )
+            .where(and_(MACTable.vlan_id == vlan_id, MACTable.last_seen >= cutoff))
+            .where(build_lookup_eligible_clause(PortAnalysis))
+            .order_by(MACTable.switch_id, MACTable.port_name, MACTable.mac_address)
+            .limit(limit + 1)
+        )
+        if switch_id is not None:
+            mac_ids = mac_ids.where(MACTable.switch_id == switch_id)
+
+        result = await db.execute(
+            self._endpoint_rows_query(cutoff)
+            .where(MACTable.id.in_(mac_ids.scalar_subquery()))
+            .order_by(MACTable.switch_id, MACTable.port_name, MACTable.mac_address, ARPTable.ip_address)
+        )
+        endpoints = self._group_endpoints(result.all())
+        return {
+            'vlan_id': vlan_id,
+            'switch_id': switch_id,
+            'endpoint_count': min(len(endpoints), limit),
+            'truncated': len(endpoints) > limit,
+            'endpoints': endpoints[:limit],
+        }
+
+    async def lookup_mac(self, db: AsyncSession, mac_address: str) -> Dict:
+        """IPs a MAC maps to (ARP now, IPAM, past lookups) and where it was located."""
+        cutoff = await self._cutoff(db)
+
+        arp_rows = await db.execute(
+            select(ARPTable.ip_address, ARPTable.vlan_id, ARPTable.last_seen, Switch.id, Switch.name)
+            .join(Switch, Switch.id == ARPTable.switch_id)
+            .where(and_(ARPTable.mac_address == mac_address, ARPTable.last_seen >= cutoff))
+            .order_by(ARPTable.ip_address, desc(ARPTable.last_seen))
+        )
+        location_rows = await db.execute(
+            select(IPLocation, Switch.name)
+            .join(Switch, Switch.id == IPLocation.switch_id)
+            .where(IPLocation.mac_address == mac_address)
+            .order_by(desc(IPLocation.last_confirmed))
+        )
+        ipam_rows = await db.execute(
+            select(IPAddress)
+            .where(IPAddress.mac_address == mac_address)
+            .order_by(IPAddress.ip_address)
+        )
+        history_rows = await db.execute(
+            select(MACAddressCache, Switch.name)
+            .join(Switch, Switch.id == MACAddressCache.switch_id)
+            .where(MACAddressCache.mac_address == mac_address)
+            .order_by(desc(MACAddressCache.last_seen))
+        )
+
+        return {
+            'mac_address': mac_address,
+            'arp': [
+                {
+                    'ip_address': str(ip),
+                    'vlan_id': vlan,
+                    'switch_id': sw_id,
+                    'switch_name': sw_name,
+                    'last_seen': _isoformat(last_seen),
+                }
+                for ip, vlan, last_seen, sw_id, sw_name in arp_rows.all()
+            ],
+            'locations': [
+                {
+                    'ip_address': str(loc.ip_address),
+                    'switch_id': loc.switch_id,
+                    'switch_name': sw_name,
+                    'port_name': loc.port_name,
+                    'vlan_id': loc.vlan_id,
+                    'confidence_score': loc.confidence_score,
+                    'last_confirmed': _isoformat(loc.last_confirmed),
+                }
+                for loc, sw_name in location_rows.all()
+            ],
+            'ipam': [
+                {'ip_address': str(ipam.ip_address), **_ipam_fields(ipam)}
+                for ipam in ipam_rows.scalars().all()
+            ],
+            'lookup_history': [
+                {
+                    'ip_address': str(entry.ip_address) if entry.ip_address else None,
+                    'switch_id': entry.switch_id,
+                    'switch_name': sw_name,
+                    'port_name': entry.port_name,
+                    'vlan_id': entry.vlan_id,
+                    'first_seen': _isoformat(entry.first_seen),
+                    'last_seen': _isoformat(entry.last_seen),
+                }
+                for entry, sw_name in history_rows.all()
+            ],
+        }
+
+    async def lookup_hostname(self, db: AsyncSession, hostname: str, prefix: bool = False, limit: int = 100) -> Dict:
+        """IPAM addresses whose hostname, DNS name or sysName matches (case-insensitive), with their port."""
+        value = hostname.strip().lower()
+        if prefix:
+            pattern = f"{_escape_like(value)}%"
+            conditions = [func.lower(column).like(pattern) for column in HOSTNAME_COLUMNS]
+        else:
+            conditions = [func.lower(column) == value for column in HOSTNAME_COLUMNS]
+
+        result = await db.execute(
+            select(IPAddress, IPLocation, Switch.name)
+            .outerjoin(IPLocation, IPLocation.ip_address == IPAddress.ip_address)
+            .outerjoin(Switch, Switch.id == func.coalesce(IPLocation.switch_id, IPAddress.switch_id))
+            .where(or_(*conditions))
+            .order_by(IPAddress.ip_address)
+            .limit(limit + 1)
+        )
+        rows = result.all()
+
+        matches = []
+        for ipam, location, switch_name in rows[:limit]:
+            if location is not None:
+                port = {
+                    'source': 'ip_location',
+                    'switch_id': location.switch_id,
+                    'switch_name': switch_name,
+                    'port_name': location.port_name,
+                    'vlan_id': location.vlan_id,
+                    'confidence_score': location.confidence_score,
+                }
+            elif ipam.switch_id is not None:
+                port = {
+                    'source': 'ipam',
+                    'switch_id': ipam.switch_id,
+                    'switch_name': switch_name,
+                    'port_name': ipam.switch_port,
+                    'vlan_id': ipam.vlan_id,
+                    'confidence_score': None,
+                }
+            else:
+                port = None
+            matches.append({
+                'ip_address': str(ipam.ip_address),
+                'mac_address': str(ipam.mac_address) if ipam.mac_address else None,
+                **_ipam_fields(ipam),
+                'port': port,
+            })
+
+        return {
+            'hostname': hostname,
+            'match': 'prefix' if prefix else 'exact',
+            'truncated': len(rows) > limit,
+            'matches': matches,
+        }
+
+
+# Global instance
+reverse_lookup_service = ReverseLookupService()
@@ -0,0 +1,81 @@
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from services.ip_lookup import IPLookupService
+from services.lookup_topology_index import TopologySnapshot
+
+
+def test_parse_batch_targets_dedupes_and_counts_network_sizes():
+    ips, networks, address_count = IPLookupService.parse_batch_targets(
+        ["10.0.0.1", " 10.0.0.1", "10.0.0.2/32", "10.0.1.7/24", "2001:db8::1"]
+    )
+
+    assert ips == ["10.0.0.1", "10.0.0.2", "2001:db8::1"]
+    assert networks == ["10.0.1.0/24"]
+    assert address_count == 3 + 256
+
+    with pytest.raises(ValueError):
+        IPLookupService.parse_batch_targets(["10.0.0.300"])
+
+
+@pytest.mark.asyncio
+async def test_batch_lookup_streams_every_ip_and_records_history_once(monkeypatch):
+    now = datetime.now(timezone.utc)
+    switch = SimpleNamespace(
+        id=3, name="access-3", ip_address="10.255.0.3", is_reachable=True,
+        last_collection_status="success", last_collection_message=None,
+        last_arp_collection_at=None, last_mac_collection_at=None,
+    )
+    snapshot = TopologySnapshot(
+        arp_by_ip={"10.0.0.1": ("aa:bb:cc:00:00:01", 3, "vlan5", 5, now - timedelta(minutes=3))},
+        eligible_port_by_mac={"aa:bb:cc:00:00:01": (3, "Gi1/0/1", 5, now - timedelta(minutes=3))},
+        port_by_mac_switch={},
+        switches={3: switch},
+        l2_marker=None,
+        switch_marker=None,
+    )
+    monkeypatch.setattr(
+        "services.settings_service.settings_service.get_setting", AsyncMock(return_value=24)
+    )
+    service = IPLookupService()
+    monkeypatch.setattr(service, "_load_batch_snapshot", AsyncMock(return_value=snapshot))
+    record = AsyncMock()
+    monkeypatch.setattr(service, "_record_batch_history", record)
+
+    results = [r async for r in service.lookup_ips_batch(SimpleNamespace(), ["10.0.0.1", "10.0.0.9"], [])]
+
+    assert [(r["target_ip"], r["found"]) for r in results] == [("10.0.0.1", True), ("10.0.0.9", False)]
+    assert results[0]["port_name"] == "Gi1/0/1"
+    record.assert_awaited_once()
+    history_rows, cache_rows = record.await_args.args[1:]
+    assert [row["query_status"] for row in history_rows] == ["success", "not_found"]
+    assert cache_rows == [{
+        "mac_address": "aa:bb:cc:00:00:01", "switch_id": 3, "port_name": "Gi1/0/1",
+        "vlan_id": 5, "ip_address": "10.0.0.1",
+    }]
+
+    record.reset_mock()
+    [r async for r in service.lookup_ips_batch(SimpleNamespace(), ["10.0.0.1"], [], record_history=False)]
+    record.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_batch_snapshot_selects_newest_arp_per_ip_inside_network():
+    statements = []
+
+    async def execute(stmt):
+        statements.append(str(stmt.compile(dialect=postgresql.dialect())))
+        return SimpleNamespace(all=lambda: [])
+
+    snapshot = await IPLookupService()._load_batch_snapshot(
+        SimpleNamespace(execute=execute), datetime.now(timezone.utc), network="10.0.1.0/24"
+    )
+
+    assert snapshot.arp_by_ip == {}
+    assert len(statements) == 1
+    assert "DISTINCT ON (arp_table.ip_address)" in statements[0]
+    assert "arp_table.ip_address <<= CAST(" in statements[0]
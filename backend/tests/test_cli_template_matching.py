@@ -90,3 +90,19 @@ def test_preview_template_match_supports_substring_model_patterns():
     assert result is not None
     assert result["source"] == "database"
     assert result["template"]["id"] == 21
+
+
+def test_template_index_rebuilds_when_template_list_changes():
+    cli_service = CLIService()
+    templates = [
+        {"id": 31, "vendor": "dell", "model_pattern": "s*", "device_type": "dell_force10", "priority": 100, "enabled": True},
+        {"id": 32, "vendor": "dell", "model_pattern": "s4048*", "device_type": "dell_os10", "priority": 50, "enabled": True},
+    ]
+
+    first = cli_service.preview_template_match("dell", "S4048-ON", "core-1", templates)
+    assert first["template"]["id"] == 31
+
+    edited = [dict(templates[0], enabled=False), templates[1]]
+    second = cli_service.preview_template_match("dell", "S4048-ON", "core-1", edited)
+    assert second["source"] == "database"
+    assert second["template"]["id"] == 32
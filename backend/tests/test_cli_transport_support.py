@@ -101,3 +101,45 @@ def test_execute_command_falls_back_to_timing_when_prompt_detection_fails():
 
     assert output == "ok"
     connection.send_command.assert_called_once_with("show version", read_timeout=90)
+
+
+def test_execute_command_reads_until_learned_prompt_for_telnet():
+    cli_service = CLIService()
+    connection = Mock()
+    connection.RETURN = "\n"
+    connection.find_prompt.return_value = "sw1#"
+    connection.read_until_pattern.return_value = "show arp\nline-1\nline-2\nsw1#"
+    connection.normalize_linefeeds.side_effect = lambda text: text
+
+    assert cli_service._learn_session_prompt(connection, "10.0.0.1") == "sw1#"
+    output = cli_service._execute_command(
+        connection,
+        "show arp",
+        device_type="dell_force10",
+        transport="telnet",
+    )
+
+    assert output == "line-1\nline-2"
+    connection.write_channel.assert_called_once_with("show arp\n")
+    connection.send_command_timing.assert_not_called()
+
+
+def test_execute_command_drops_to_timing_after_prompt_read_failure():
+    cli_service = CLIService()
+    connection = Mock()
+    connection.RETURN = "\n"
+    connection.find_prompt.return_value = "sw1#"
+    connection.read_until_pattern.side_effect = RuntimeError("ReadTimeout")
+    connection.send_command_timing.return_value = "ok"
+
+    cli_service._learn_session_prompt(connection, "10.0.0.1")
+    for _ in range(2):
+        assert cli_service._execute_command(
+            connection,
+            "show arp",
+            device_type="cisco_ios",
+            transport="telnet",
+        ) == "ok"
+
+    assert connection.read_until_pattern.call_count == 1
+    assert connection.send_command_timing.call_count == 2
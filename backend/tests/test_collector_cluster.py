@@ -0,0 +1,55 @@
+from services.collector_cluster import CollectorClusterService
+
+
+def _switches(count, site=None):
+    return [(switch_id, site) for switch_id in range(1, count + 1)]
+
+
+def test_assignment_is_stable_when_a_node_joins():
+    before = CollectorClusterService.assign_switches(
+        _switches(500), [("node-a", None), ("node-b", None)]
+    )
+    after = CollectorClusterService.assign_switches(
+        _switches(500), [("node-a", None), ("node-b", None), ("node-c", None)]
+    )
+
+    moved = [switch_id for switch_id in before if before[switch_id] != after[switch_id]]
+
+    assert set(before.values()) == {"node-a", "node-b"}
+    # Only switches that now hash to the new node change owner.
+    assert all(after[switch_id] == "node-c" for switch_id in moved)
+    assert 100 < len(moved) < 250
+
+
+def test_orphaned_switches_move_to_surviving_nodes():
+    nodes = [("node-a", None), ("node-b", None), ("node-c", None)]
+    before = CollectorClusterService.assign_switches(_switches(300), nodes)
+    after = CollectorClusterService.assign_switches(_switches(300), nodes[:2])
+
+    for switch_id, node_id in before.items():
+        if node_id != "node-c":
+            assert after[switch_id] == node_id
+        else:
+            assert after[switch_id] in {"node-a", "node-b"}
+
+
+def test_site_affinity_prefers_same_site_nodes_and_falls_back():
+    nodes = [("dc1-a", "DC1"), ("dc1-b", "dc1"), ("dc2-a", "dc2")]
+    switches = [(1, "dc1"), (2, "dc2"), (3, "branch"), (4, None)]
+
+    assignment = CollectorClusterService.assign_switches(switches, nodes)
+
+    assert assignment[1] in {"dc1-a", "dc1-b"}
+    assert assignment[2] == "dc2-a"
+    assert assignment[3] in {"dc1-a", "dc1-b", "dc2-a"}
+    assert assignment[4] in {"dc1-a", "dc1-b", "dc2-a"}
+
+
+def test_single_instance_mode_owns_everything_and_leads():
+    service = CollectorClusterService()
+    service.enabled = False
+
+    assert service.is_leader()
+    assert service.owns_switch(12345)
+    assert service.owned_job_clause() is None
+    assert service.worker_id_for(3) == "worker-3"
@@ -0,0 +1,144 @@
+import time
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from services.ip_lookup import IPLookupService
+from services.switch_manager import SwitchConnectionError
+
+
+SWITCH = SimpleNamespace(id=3, name="access-3")
+
+
+def cached_result(data_age_seconds, freshness_status="fresh", reason="fresh"):
+    return {
+        "target_ip": "10.0.0.1", "found": True, "mac_address": "aa:bb:cc:00:00:01",
+        "switch_id": 3, "switch_name": "access-3", "port_name": "Gi 1/0/1",
+        "vlan_id": 5, "query_mode": "cache", "data_age_seconds": data_age_seconds,
+        "freshness": {"status": freshness_status, "reason": reason, "warning": None},
+    }
+
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setattr("services.ip_lookup.settings.IP_LOOKUP_HYBRID_MAX_AGE_SECONDS", 900)
+    monkeypatch.setattr("services.ip_lookup.settings.IP_LOOKUP_HYBRID_BUDGET_SECONDS", 0.5)
+    monkeypatch.setattr(
+        "services.ip_lookup.lookup_candidate_selector.excluded_ports",
+        AsyncMock(return_value={(3, "Gi 1/0/48")}),
+    )
+    monkeypatch.setattr("services.ip_lookup.lookup_result_cache.invalidate", AsyncMock(return_value=0))
+    service = IPLookupService()
+    service._update_mac_cache = AsyncMock()
+    return service
+
+
+@pytest.fixture
+def query_mac_table(monkeypatch):
+    query = MagicMock(return_value=[])
+    monkeypatch.setattr("services.ip_lookup.switch_manager.query_mac_table", query)
+    return query
+
+
+def db():
+    return SimpleNamespace(get=AsyncMock(return_value=SWITCH))
+
+
+@pytest.mark.asyncio
+async def test_fresh_cached_answer_is_served_without_asking_the_switch(service, query_mac_table):
+    service.lookup_ip = AsyncMock(return_value=cached_result(60))
+    query_mac_table.side_effect = AssertionError("switch should not be queried")
+
+    result = await service.lookup_ip_hybrid(db(), "10.0.0.1")
+
+    assert result["query_mode"] == "hybrid"
+    assert result["verification"] == {"status": "not_needed"}
+
+
+@pytest.mark.asyncio
+async def test_old_answer_confirmed_live_is_returned_fresh(service, query_mac_table):
+    service.lookup_ip = AsyncMock(return_value=cached_result(3600))
+    query_mac_table.return_value = [{"port": "Gi1/0/1", "vlan": 5}]
+
+    result = await service.lookup_ip_hybrid(db(), "10.0.0.1")
+
+    assert result["verification"]["status"] == "confirmed"
+    assert result["verification"]["reason"] == "data_age"
+    assert result["data_age_seconds"] == 0
+    assert result["freshness"]["reason"] == "live_verified"
+    service._update_mac_cache.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_stale_answer_follows_a_moved_mac_to_an_eligible_port(service, query_mac_table):
+    service.lookup_ip = AsyncMock(return_value=cached_result(60, "stale", "latest_collection_failed"))
+    query_mac_table.return_value = [{"port": "Gi1/0/48", "vlan": 5}, {"port": "Gi1/0/7", "vlan": 12}]
+
+    result = await service.lookup_ip_hybrid(db(), "10.0.0.1")
+
+    assert result["verification"]["status"] == "moved"
+    assert result["port_name"] == "Gi 1/0/7"
+    assert result["vlan_id"] == 12
+    service._update_mac_cache.assert_awaited_once()
+    assert service._update_mac_cache.await_args.args[-1] == 12
+
+
+@pytest.mark.asyncio
+async def test_mac_gone_from_eligible_ports_marks_cached_answer_stale(service, query_mac_table, monkeypatch):
+    invalidate = AsyncMock(return_value=1)
+    monkeypatch.setattr("services.ip_lookup.lookup_result_cache.invalidate", invalidate)
+    service.lookup_ip = AsyncMock(return_value=cached_result(3600))
+    query_mac_table.return_value = [{"port": "Gi1/0/48", "vlan": 5}]
+
+    result = await service.lookup_ip_hybrid(db(), "10.0.0.1")
+
+    assert result["verification"]["status"] == "not_found"
+    assert result["freshness"]["status"] == "stale"
+    assert result["freshness"]["reason"] == "live_not_found"
+    assert result["freshness"]["warning"]
+    assert "no longer seen" in result["message"]
+    invalidate.assert_awaited_once_with(ips=["10.0.0.1"])
+    service._update_mac_cache.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_slow_switch_serves_cached_answer_within_budget(service, query_mac_table):
+    service.lookup_ip = AsyncMock(return_value=cached_result(3600))
+
+    def slow_query(switch, mac):
+        time.sleep(1.0)
+        return []
+
+    query_mac_table.side_effect = slow_query
+    started = time.monotonic()
+    result = await service.lookup_ip_hybrid(db(), "10.0.0.1")
+
+    assert time.monotonic() - started < 0.9
+    assert result["verification"]["status"] == "timeout"
+    assert result["port_name"] == "Gi 1/0/1"
+    assert result["data_age_seconds"] == 3600
+
+
+@pytest.mark.asyncio
+async def test_offline_switch_is_not_queried(service, query_mac_table):
+    service.lookup_ip = AsyncMock(return_value=cached_result(60, "stale", "switch_offline"))
+    query_mac_table.side_effect = AssertionError("switch should not be queried")
+
+    result = await service.lookup_ip_hybrid(db(), "10.0.0.1")
+
+    assert result["verification"] == {"status": "skipped", "reason": "switch_offline"}
+
+
+@pytest.mark.asyncio
+async def test_failed_switch_query_reports_error_and_serves_cached_answer(service, query_mac_table):
+    service.lookup_ip = AsyncMock(return_value=cached_result(3600))
+    query_mac_table.side_effect = SwitchConnectionError("Authentication failed")
+
+    result = await service.lookup_ip_hybrid(db(), "10.0.0.1")
+
+    assert result["verification"]["status"] == "error"
+    assert "Authentication failed" in result["verification"]["message"]
+    assert result["port_name"] == "Gi 1/0/1"
+    assert result["data_age_seconds"] == 3600
+    service._update_mac_cache.assert_not_awaited()
@@ -0,0 +1,82 @@
+import asyncio
+import socket
+
+import pytest
+
+from services.icmp_engine import (
+    IcmpEchoEngine,
+    build_echo_request,
+    icmp_checksum,
+    parse_echo_reply,
+)
+from services.ip_scan import IPScanService
+
+
+def test_echo_request_checksums_to_zero_and_replies_parse():
+    packet = build_echo_request(0x1234, 7)
+
+    assert packet[0] == 8
+    assert icmp_checksum(packet) == 0
+
+    reply = b'\x00' + packet[1:]
+    ip_header = bytes([0x45]) + bytes(19)
+    assert parse_echo_reply(reply) == (0x1234, 7)
+    assert parse_echo_reply(ip_header + reply, raw=True) == (0x1234, 7)
+    assert parse_echo_reply(packet) is None  # our own echo request looped back
+    assert parse_echo_reply(b'\x81\x00\x00\x00\x00\x01\x00\x02', version=6) == (1, 2)
+
+
+def _icmp_sockets_permitted():
+    for kind in (socket.SOCK_DGRAM, socket.SOCK_RAW):
+        try:
+            socket.socket(socket.AF_INET, kind, socket.IPPROTO_ICMP).close()
+            return True
+        except OSError:
+            continue
+    return False
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(not _icmp_sockets_permitted(), reason="ICMP sockets not permitted here")
+async def test_engine_multiplexes_many_probes_on_one_socket(monkeypatch):
+    monkeypatch.setattr("services.icmp_engine.settings.IPAM_SCAN_ICMP_ENGINE", "auto")
+    engine = IcmpEchoEngine()
+    try:
+        assert engine.available("127.0.0.1")
+        results = await asyncio.gather(*(engine.ping("127.0.0.1", 2) for _ in range(200)))
+        assert all(reachable for reachable, _ in results)
+        assert len(engine._sockets) == 1
+        assert engine._sockets[4].pending == {}
+    finally:
+        engine.close()
+
+
+@pytest.mark.asyncio
+async def test_scan_uses_engine_ping_and_skips_the_thread_pool_for_unreachable_ips(monkeypatch):
+    service = IPScanService()
+
+    async def ping(ip, timeout):
+        return (ip == "10.0.0.1", 3 if ip == "10.0.0.1" else None)
+
+    monkeypatch.setattr("services.ip_scan.icmp_echo_engine.available", lambda ip: True)
+    monkeypatch.setattr("services.ip_scan.icmp_echo_engine.ping", ping)
+    monkeypatch.setattr(service, "_ping_ip", lambda *a, **kw: pytest.fail("ping command should not run"))
+    monkeypatch.setattr(service, "_scan_single_ip", lambda **kw: pytest.fail("quick scan needs no thread"))
+
+    results = await service.scan_multiple_ips(["10.0.0.1", "10.0.0.2"], scan_type="quick")
+
+    assert sorted((r["ip_address"], r["is_reachable"], r["response_time"]) for r in results) == [
+        ("10.0.0.1", True, 3), ("10.0.0.2", False, None)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_scan_falls_back_to_ping_command_without_icmp_sockets(monkeypatch):
+    service = IPScanService()
+    monkeypatch.setattr("services.ip_scan.icmp_echo_engine.available", lambda ip: False)
+    monkeypatch.setattr(service, "_ping_ip", lambda ip, timeout: (True, 5))
+
+    results = await service.scan_multiple_ips(["10.0.0.1"], scan_type="quick")
+
+    assert results[0]["is_reachable"] is True
+    assert results[0]["response_time"] == 5
@@ -0,0 +1,74 @@
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from services import ip_location_engine as engine_module
+from services.ip_location_engine import IPLocationEngine
+
+
+def _topology(seed: int = 7):
+    rng = random.Random(seed)
+    base = datetime(2026, 1, 1)
+    macs = [f"aa:bb:cc:00:{i // 256:02x}:{i % 256:02x}" for i in range(300)]
+    arp_records = []
+    for i in range(400):
+        arp_records.append({
+            'ip_address': f"10.0.{i % 250 // 50}.{i % 50}",
+            'mac_address': rng.choice(macs),
+            'switch_id': rng.randint(1, 3),
+            'vlan_id': 10,
+            'age_seconds': rng.choice([None, 60, 900, 3600, 9000]),
+            'collected_at': base + timedelta(minutes=rng.randint(0, 5)),
+        })
+    mac_records = []
+    for _ in range(1200):
+        mac_records.append({
+            'mac_address': rng.choice(macs),
+            'port_name': f"Gi 1/0/{rng.randint(1, 24)}",
+            'switch_id': rng.randint(1, 6),
+            'vlan_id': rng.choice([None, 10, 20]),
+        })
+    port_analysis = {}
+    for switch_id in range(1, 7):
+        for port in range(1, 21):
+            port_analysis[(switch_id, f"Gi 1/0/{port}")] = {
+                'port_type': rng.choice(['access', 'access', 'trunk', 'uplink', 'unknown']),
+                'mac_count': rng.choice([1, 2, 4, 8, 12, 60]),
+                'lookup_policy_override': rng.choice([None, None, None, 'include', 'exclude']),
+            }
+    return arp_records, mac_records, port_analysis
+
+
+def _by_ip(matches):
+    return {m['ip_address']: m for m in matches}
+
+
+def test_indexed_match_all_ips_agrees_with_per_ip_matching(monkeypatch):
+    monkeypatch.setattr(engine_module.settings, "IP_LOCATION_VECTORIZED", False)
+    engine = IPLocationEngine()
+    arp_records, mac_records, port_analysis = _topology()
+
+    matches = _by_ip(engine.match_all_ips(arp_records, mac_records, port_analysis))
+
+    expected = {}
+    for ip in {r['ip_address'] for r in arp_records}:
+        match = engine.match_ip_to_location(ip, arp_records, mac_records, port_analysis)
+        if match:
+            expected[ip] = match
+    assert matches == expected
+    assert matches
+
+
+def test_vectorized_engine_matches_pure_python_engine(monkeypatch):
+    pytest.importorskip("numpy")
+    from services.ip_location_vector_engine import vectorized_ip_location_engine
+
+    monkeypatch.setattr(engine_module.settings, "IP_LOCATION_VECTORIZED", False)
+    arp_records, mac_records, port_analysis = _topology(seed=11)
+
+    expected = _by_ip(IPLocationEngine().match_all_ips(arp_records, mac_records, port_analysis))
+    vectorized = _by_ip(vectorized_ip_location_engine.match_all_ips(arp_records, mac_records, port_analysis))
+
+    assert vectorized == expected
+    assert expected
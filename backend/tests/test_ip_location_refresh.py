@@ -0,0 +1,60 @@
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from services.network_data_collector import NetworkDataCollector
+
+
+class FakeScalars:
+    def __init__(self, values):
+        self._values = values
+
+    def all(self):
+        return self._values
+
+
+@pytest.mark.asyncio
+async def test_refresh_ip_locations_runs_full_first_then_scoped_to_changed_switches(monkeypatch):
+    collector = NetworkDataCollector()
+    match_mock = AsyncMock(return_value=5)
+    monkeypatch.setattr(collector, "_match_ip_locations", match_mock)
+    statements = []
+
+    async def execute(stmt):
+        statements.append(stmt)
+        return SimpleNamespace(scalars=lambda: FakeScalars([4, 9]))
+
+    db = SimpleNamespace(execute=execute, commit=AsyncMock())
+
+    first = await collector.refresh_ip_locations(db)
+    second = await collector.refresh_ip_locations(db)
+
+    assert first == {"mode": "full", "changed_switches": None, "ips_located": 5}
+    assert second == {"mode": "incremental", "changed_switches": 2, "ips_located": 5}
+    assert match_mock.await_args_list[0].kwargs == {}
+    assert match_mock.await_args_list[1].kwargs == {"switch_ids": [4, 9]}
+    assert "switches.l2_changed_at >=" in str(statements[0].compile(dialect=postgresql.dialect()))
+
+
+@pytest.mark.asyncio
+async def test_incremental_match_only_loads_rows_reachable_from_changed_switches(monkeypatch):
+    collector = NetworkDataCollector()
+    statements = []
+
+    async def execute(stmt):
+        statements.append(str(stmt.compile(dialect=postgresql.dialect())))
+        return SimpleNamespace(scalars=lambda: FakeScalars([]))
+
+    monkeypatch.setattr(
+        "services.network_data_collector.ip_location_engine.match_all_ips", lambda *args: []
+    )
+
+    located = await collector._match_ip_locations(SimpleNamespace(execute=execute), switch_ids=[4])
+
+    assert located == 0
+    arp_sql, mac_sql, port_sql = statements
+    assert "UNION" in arp_sql and "ip_location.switch_id IN" in arp_sql
+    assert "mac_table.mac_address IN (SELECT arp_table.mac_address" in mac_sql
+    assert "port_analysis.switch_id IN" in port_sql
@@ -0,0 +1,108 @@
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+
+from services import ip_lookup as ip_lookup_module
+from services.ip_lookup import IPLookupService
+from services.lookup_candidates import _ordered_unique
+
+
+class SwitchListDB:
+    def __init__(self, switches):
+        self.switches = switches
+
+    async def execute(self, stmt):
+        return SimpleNamespace(scalars=lambda: SimpleNamespace(all=lambda: self.switches))
+
+
+def make_switches(count):
+    return [SimpleNamespace(id=i, name=f"sw{i}", ip_address=f"10.255.0.{i}") for i in range(1, count + 1)]
+
+
+@pytest.fixture
+def service(monkeypatch):
+    service = IPLookupService()
+    monkeypatch.setattr(service, "_log_query", AsyncMock())
+    monkeypatch.setattr(service, "_update_mac_cache", AsyncMock())
+    yield service
+    service.executor.shutdown(wait=False)
+
+
+def patch_candidates(monkeypatch, arp, mac, excluded=frozenset()):
+    selector = SimpleNamespace(
+        arp_candidates=AsyncMock(return_value=arp),
+        mac_candidates=AsyncMock(return_value=mac),
+        excluded_ports=AsyncMock(return_value=set(excluded)),
+    )
+    monkeypatch.setattr(ip_lookup_module, "lookup_candidate_selector", selector)
+    return selector
+
+
+def test_candidates_keep_evidence_order_without_duplicates():
+    assert _ordered_unique([3, 1], [1, 7, None], [9], limit=3) == [3, 1, 7]
+
+
+@pytest.mark.asyncio
+async def test_live_lookup_queries_only_candidates_when_they_answer(service, monkeypatch):
+    switches = make_switches(50)
+    selector = patch_candidates(monkeypatch, arp=[2], mac=[17, 2])
+    asked = {"arp": [], "mac": []}
+
+    def arp_single(switch, ip):
+        asked["arp"].append(switch.id)
+        return ({"mac": "aabb.cc00.0001", "vlan": "30"}, switch) if switch.id == 2 else (None, None)
+
+    def mac_single(switch, mac):
+        asked["mac"].append(switch.id)
+        return ([{"port": "GigabitEthernet1/0/9", "vlan": 30}], switch) if switch.id == 17 else ([], None)
+
+    service._query_arp_single = arp_single
+    service._query_mac_single = mac_single
+
+    result = await service.lookup_ip_live(SwitchListDB(switches), "10.30.0.9")
+
+    assert result["found"] is True
+    assert (result["switch_name"], result["port_name"], result["vlan_id"]) == ("sw17", "Gi 1/0/9", 30)
+    assert result["mac_address"] == "aa:bb:cc:00:00:01"
+    assert (result["switches_queried"], result["lookup_stage"]) == (3, "targeted")
+    assert asked["arp"] == [2] and sorted(asked["mac"]) == [2, 17]
+    selector.mac_candidates.assert_awaited_once_with(
+        selector.mac_candidates.await_args.args[0], "aa:bb:cc:00:00:01", 30, 2
+    )
+
+
+@pytest.mark.asyncio
+async def test_live_lookup_falls_back_to_fleet_when_candidate_port_is_excluded(service, monkeypatch):
+    switches = make_switches(4)
+    patch_candidates(monkeypatch, arp=[1], mac=[1], excluded={(1, "Te 1/1/1")})
+    service._query_arp_single = lambda switch, ip: (
+        ({"mac": "aa:bb:cc:00:00:02"}, switch) if switch.id == 1 else (None, None)
+    )
+    service._query_mac_single = lambda switch, mac: {
+        1: ([{"port": "Te1/1/1"}], switch),
+        4: ([{"port": "Gi1/0/2"}], switch),
+    }.get(switch.id, ([], None))
+
+    result = await service.lookup_ip_live(SwitchListDB(switches), "10.30.0.10")
+
+    assert (result["switch_id"], result["port_name"]) == (4, "Gi 1/0/2")
+    assert (result["switches_queried"], result["lookup_stage"]) == (1 + 1 + 3, "fleet")
+
+
+@pytest.mark.asyncio
+async def test_live_lookup_loads_exclusions_only_for_the_switches_asked(service, monkeypatch):
+    switches = make_switches(40)
+    selector = patch_candidates(monkeypatch, arp=[1], mac=[5, 1])
+    service._query_arp_single = lambda switch, ip: (
+        ({"mac": "aa:bb:cc:00:00:03"}, switch) if switch.id == 1 else (None, None)
+    )
+    service._query_mac_single = lambda switch, mac: (
+        ([{"port": "Gi1/0/4"}], switch) if switch.id == 5 else ([], None)
+    )
+
+    result = await service.lookup_ip_live(SwitchListDB(switches), "10.30.0.11")
+
+    assert (result["switch_id"], result["lookup_stage"]) == (5, "targeted")
+    calls = [call.kwargs for call in selector.excluded_ports.await_args_list]
+    assert calls == [{"switch_id": 1}, {"switch_ids": [5]}]
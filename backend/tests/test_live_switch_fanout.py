@@ -0,0 +1,70 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from services.ip_lookup import IPLookupService
+
+
+def make_switches(*names):
+    return [SimpleNamespace(id=i, name=name) for i, name in enumerate(names, start=1)]
+
+
+@pytest.fixture
+def service():
+    service = IPLookupService()
+    yield service
+    service.executor.shutdown(wait=False, cancel_futures=True)
+
+
+@pytest.mark.asyncio
+async def test_arp_fanout_returns_first_answer_without_waiting_for_dead_switch(service):
+    release = threading.Event()
+
+    def query(switch, target_ip):
+        if switch.name == "dead":
+            release.wait(5)
+            return (None, None)
+        return ({"mac": "aa:bb:cc:00:00:01"}, switch)
+
+    service._query_arp_single = query
+    started = time.monotonic()
+    arp_data, switch = await service._query_arp_concurrent(make_switches("dead", "core"), "10.0.0.1", deadline_seconds=5)
+    release.set()
+
+    assert switch.name == "core" and arp_data["mac"] == "aa:bb:cc:00:00:01"
+    assert time.monotonic() - started < 1
+
+
+@pytest.mark.asyncio
+async def test_mac_fanout_waits_for_authoritative_port_until_deadline(service):
+    release = threading.Event()
+
+    def query(switch, mac):
+        if switch.name == "slow-access":
+            release.wait(5)
+            return ([{"port": "Gi1/0/5"}], switch)
+        if switch.name == "distribution":
+            return ([{"port": "Te1/1/1"}], switch)
+        return ([], None)
+
+    service._query_mac_single = query
+    on_access_port = lambda entries, switch: entries[0]["port"].startswith("Gi")
+
+    started = time.monotonic()
+    entries, switch = await service._query_mac_concurrent(
+        make_switches("slow-access", "distribution", "empty"), "aa:bb:cc:00:00:01",
+        deadline_seconds=0.2, is_authoritative=on_access_port
+    )
+    release.set()
+
+    # Deadline passed before the access switch answered: partial (uplink) hit is returned
+    assert switch.name == "distribution" and entries == [{"port": "Te1/1/1"}]
+    assert time.monotonic() - started < 1
+
+    entries, switch = await service._query_mac_concurrent(
+        make_switches("slow-access", "distribution"), "aa:bb:cc:00:00:01",
+        deadline_seconds=5, is_authoritative=on_access_port
+    )
+    assert switch.name == "slow-access"
@@ -0,0 +1,73 @@
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from services.ip_lookup import IPLookupService, _RESOLVE_STATEMENT
+
+
+class OneRowDB:
+    def __init__(self, row):
+        self.row = row
+        self.calls = []
+
+    async def execute(self, stmt, params=None):
+        self.calls.append((stmt, params))
+        return SimpleNamespace(first=lambda: self.row)
+
+
+def make_row(**overrides):
+    now = datetime.now(timezone.utc)
+    row = dict(
+        mac_address="aa:bb:cc:00:00:01", arp_interface="vlan20", arp_vlan_id=20,
+        arp_last_seen=now - timedelta(minutes=2),
+        arp_switch=SimpleNamespace(id=1, name="core"), mac_switch=None,
+        eligible_port_name=None, eligible_vlan_id=None, eligible_last_seen=None,
+        same_switch_port_name=None, same_switch_vlan_id=None, same_switch_last_seen=None,
+    )
+    row.update(overrides)
+    return SimpleNamespace(**row)
+
+
+def test_resolve_statement_is_one_query_with_lateral_fallbacks():
+    sql = str(_RESOLVE_STATEMENT.compile(dialect=postgresql.dialect()))
+
+    assert sql.count("LEFT OUTER JOIN LATERAL") == 2
+    assert "AS same_switch_mac ON eligible_mac.switch_id IS NULL" in sql
+    assert "arp_table.ip_address = CAST(%(target_ip)s AS INET)" in sql
+
+
+@pytest.mark.asyncio
+async def test_resolve_prefers_eligible_port_on_physical_switch():
+    now = datetime.now(timezone.utc)
+    db = OneRowDB(make_row(
+        mac_switch=SimpleNamespace(id=7, name="access-7"),
+        eligible_port_name="Gi1/0/3", eligible_vlan_id=None, eligible_last_seen=now - timedelta(minutes=9),
+    ))
+
+    resolution = await IPLookupService()._resolve_from_db(db, "10.0.0.5", 24)
+
+    assert len(db.calls) == 1 and db.calls[0][1]["target_ip"] == "10.0.0.5"
+    assert resolution["status"] == "found"
+    assert resolution["port_source"] == "mac_table"
+    assert (resolution["switch"].name, resolution["arp_switch_id"]) == ("access-7", 1)
+    assert (resolution["port_name"], resolution["vlan_id"]) == ("Gi1/0/3", 20)
+    assert resolution["data_age_seconds"] >= 9 * 60
+
+
+@pytest.mark.asyncio
+async def test_resolve_falls_back_to_same_switch_then_arp_only():
+    now = datetime.now(timezone.utc)
+    service = IPLookupService()
+
+    same_switch = await service._resolve_from_db(OneRowDB(make_row(
+        same_switch_port_name="Gi1/0/48", same_switch_vlan_id=30, same_switch_last_seen=now,
+    )), "10.0.0.5", 24)
+    arp_only = await service._resolve_from_db(OneRowDB(make_row()), "10.0.0.5", 24)
+    missing = await service._resolve_from_db(OneRowDB(None), "10.0.0.5", 24)
+
+    assert (same_switch["status"], same_switch["port_source"], same_switch["vlan_id"]) == ("found", "same_switch_mac", 30)
+    assert same_switch["switch"].name == "core"
+    assert (arp_only["status"], arp_only["mac_address"]) == ("arp_only", "aa:bb:cc:00:00:01")
+    assert missing == {"status": "no_arp"}
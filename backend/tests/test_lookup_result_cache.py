@@ -0,0 +1,195 @@
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+
+from services import lookup_result_cache as cache_module
+from services.ip_lookup import IPLookupService
+from services.lookup_result_cache import LookupResultCache, queue_invalidation
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.calls = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self.calls.append((name, args, kwargs))
+
+    async def execute(self):
+        return [await getattr(self.redis, name)(*args, **kwargs) for name, args, kwargs in self.calls]
+
+
+class FakeRedis:
+    def __init__(self):
+        self.values = {}
+        self.sets = {}
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    async def get(self, key):
+        return self.values.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.values[key] = value
+
+    async def incr(self, key):
+        self.values[key] = int(self.values.get(key, 0)) + 1
+        return self.values[key]
+
+    async def hincrby(self, key, field, amount):
+        return amount
+
+    async def sadd(self, key, *members):
+        self.sets.setdefault(key, set()).update(members)
+
+    async def expire(self, key, ttl):
+        return True
+
+    async def smembers(self, key):
+        return set(self.sets.get(key, ()))
+
+    async def unlink(self, *keys):
+        deleted = 0
+        for key in keys:
+            deleted += int(self.values.pop(key, None) is not None or self.sets.pop(key, None) is not None)
+        return deleted
+
+
+def make_cache(monkeypatch):
+    monkeypatch.setattr("services.lookup_result_cache.settings.REDIS_ENABLED", True)
+    cache = LookupResultCache()
+    cache._client = FakeRedis()
+    return cache
+
+
+@pytest.mark.asyncio
+async def test_invalidation_drops_results_indexed_by_switch_and_mac(monkeypatch):
+    cache = make_cache(monkeypatch)
+    await cache.set("10.0.0.1", {"found": True}, switch_ids=(1, 2), mac_address="AA-BB-CC-00-00-01")
+    await cache.set("10.0.0.2", {"found": True}, switch_ids=(3,), mac_address="aa:bb:cc:00:00:02")
+    await cache.set("10.0.0.3", {"found": False}, switch_ids=())
+
+    await cache.invalidate(switch_ids=[2])
+    await cache.invalidate(macs=["aabb.cc00.0002"])
+    await cache.invalidate(ips=["10.0.0.3"])
+
+    assert await cache.get("10.0.0.1") is None
+    assert await cache.get("10.0.0.2") is None
+    assert await cache.get("10.0.0.3") is None
+
+
+@pytest.mark.asyncio
+async def test_result_read_before_an_invalidation_is_not_cached(monkeypatch):
+    cache = make_cache(monkeypatch)
+    await cache.set("10.0.0.4", {"found": True}, switch_ids=(5,), generation=await cache.generation())
+    assert await cache.get("10.0.0.4") == {"found": True}
+
+    # Lookup reads the old rows, then the store commits and invalidates switch 5
+    generation = await cache.generation()
+    await cache.invalidate(switch_ids=[5])
+    await cache.set("10.0.0.4", {"found": True, "stale": True}, switch_ids=(5,), generation=generation)
+
+    assert await cache.get("10.0.0.4") is None
+    assert cache.stale_skipped == 1
+    # Unrelated keys still cache under the old generation
+    await cache.set("10.0.0.5", {"found": True}, switch_ids=(6,), generation=generation)
+    assert await cache.get("10.0.0.5") == {"found": True}
+
+
+@pytest.mark.asyncio
+async def test_result_written_while_an_invalidation_marks_keys_is_removed(monkeypatch):
+    cache = make_cache(monkeypatch)
+    generation = await cache.generation()
+    client = cache._client
+    checks = []
+    original_pipeline = client.pipeline
+
+    def pipeline(transaction=True):
+        pipe = original_pipeline(transaction)
+        original_execute = pipe.execute
+
+        async def execute():
+            results = await original_execute()
+            if pipe.calls and pipe.calls[0][0] == "get" and pipe.calls[0][1][0].endswith(":gen"):
+                checks.append(results)
+                if len(checks) == 1:
+                    # The invalidation runs between the first check and the write
+                    client.values["iptrack:lookup:switch:7:gen"] = generation + 1
+            return results
+
+        pipe.execute = execute
+        return pipe
+
+    client.pipeline = pipeline
+    await cache.set("10.0.0.6", {"found": True}, switch_ids=(7,), generation=generation)
+
+    assert len(checks) == 2
+    assert await cache.get("10.0.0.6") is None
+    assert cache.stale_skipped == 1
+
+
+@pytest.mark.asyncio
+async def test_queued_invalidations_are_sent_after_commit_only(monkeypatch):
+    monkeypatch.setattr("services.lookup_result_cache.settings.REDIS_ENABLED", True)
+    invalidate = AsyncMock()
+    monkeypatch.setattr(cache_module.lookup_result_cache, "invalidate", invalidate)
+
+    session = SimpleNamespace(info={})
+    queue_invalidation(session, switch_ids=[4], ips=["10.0.0.9"])
+    cache_module._discard_invalidations(session)
+    cache_module._send_invalidations(session)
+    await asyncio.sleep(0)
+    invalidate.assert_not_awaited()
+
+    queue_invalidation(session, switch_ids=[4], ips=["10.0.0.9"])
+    queue_invalidation(session, switch_ids=[4], macs=["aa:bb:cc:00:00:09"])
+    cache_module._send_invalidations(session)
+    await asyncio.sleep(0)
+    invalidate.assert_awaited_once_with(
+        switch_ids={4}, ips={"10.0.0.9"}, macs={"aa:bb:cc:00:00:09"}
+    )
+    assert session.info == {}
+
+
+@pytest.mark.asyncio
+async def test_lookup_ip_serves_cached_result_without_resolving(monkeypatch):
+    cache = make_cache(monkeypatch)
+    result = {
+        "target_ip": "10.0.0.1", "found": True, "mac_address": "aa:bb:cc:00:00:01",
+        "switch_id": 3, "switch_name": "access-3", "port_name": "Gi1/0/1", "vlan_id": 5,
+        "message": "Device located from cached data (data age: 60s)", "data_age_seconds": 60,
+        "freshness": {"data_age_seconds": 60}, "data_source": "index",
+    }
+    history = {
+        "found_mac": "aa:bb:cc:00:00:01", "switch_id": 3, "switch_name": "access-3",
+        "port_name": "Gi1/0/1", "vlan_id": 5, "query_status": "success", "error_message": None,
+    }
+    await cache.set("10.0.0.1", {"result": result, "history": history, "cached_at": time.time() - 30})
+    monkeypatch.setattr("services.ip_lookup.lookup_result_cache", cache)
+    monkeypatch.setattr(
+        "services.settings_service.settings_service.get_setting", AsyncMock(return_value=24)
+    )
+    service = IPLookupService()
+    monkeypatch.setattr(service, "_resolve_from_db", AsyncMock(side_effect=AssertionError("DB path used")))
+    log_query = AsyncMock()
+    monkeypatch.setattr(service, "_log_query", log_query)
+
+    served = await service.lookup_ip(SimpleNamespace(), "10.0.0.1")
+
+    assert served["data_source"] == "redis"
+    assert served["port_name"] == "Gi1/0/1"
+    assert 90 <= served["data_age_seconds"] <= 92
+    assert served["freshness"]["data_age_seconds"] == served["data_age_seconds"]
+    log_query.assert_awaited_once()
+    assert json.loads(cache._client.values["iptrack:lookup:ip:10.0.0.1"])["result"]["data_source"] == "index"
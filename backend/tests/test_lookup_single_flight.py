@@ -0,0 +1,92 @@
+import asyncio
+
+import pytest
+
+from services.lookup_single_flight import LookupSingleFlight, flight_key
+
+
+@pytest.fixture(autouse=True)
+def local_only(monkeypatch):
+    monkeypatch.setattr("services.lookup_single_flight.settings.LOOKUP_SINGLE_FLIGHT_ENABLED", True)
+    monkeypatch.setattr("services.lookup_single_flight.settings.LOOKUP_SINGLE_FLIGHT_REDIS", False)
+
+
+def test_flight_key_normalizes_the_ip_per_mode():
+    assert flight_key("cache", " 2001:DB8:0::1") == "cache:2001:db8::1"
+    assert flight_key("cache", "10.0.0.1") != flight_key("hybrid", "10.0.0.1")
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_lookups_share_one_computation():
+    flights = LookupSingleFlight()
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {"found": True, "freshness": {"status": "fresh"}}
+
+    results = await asyncio.gather(*(flights.do("cache:10.0.0.1", compute) for _ in range(20)))
+    other = await flights.do("cache:10.0.0.2", compute)
+
+    assert len(calls) == 2
+    assert all(result == {"found": True, "freshness": {"status": "fresh"}} for result in results)
+    results[1]["freshness"]["status"] = "stale"
+    assert results[0]["freshness"]["status"] == "fresh"
+    assert other["found"] is True
+    assert flights.get_status()["coalesced"] == 19
+    assert flights.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_leader_error_is_shared_with_waiting_callers():
+    flights = LookupSingleFlight()
+
+    async def compute():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("switch unreachable")
+
+    results = await asyncio.gather(
+        *(flights.do("realtime:10.0.0.1", compute) for _ in range(3)), return_exceptions=True
+    )
+
+    assert [str(result) for result in results] == ["switch unreachable"] * 3
+    assert flights.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_waiting_caller_takes_over_when_leader_is_cancelled():
+    flights = LookupSingleFlight()
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {"found": True}
+
+    leader = asyncio.create_task(flights.do("cache:10.0.0.1", compute))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(flights.do("cache:10.0.0.1", compute))
+    await asyncio.sleep(0.01)
+    leader.cancel()
+
+    assert await follower == {"found": True}
+    assert len(calls) == 2
+    with pytest.raises(asyncio.CancelledError):
+        await leader
+
+
+@pytest.mark.asyncio
+async def test_disabled_single_flight_runs_every_lookup(monkeypatch):
+    monkeypatch.setattr("services.lookup_single_flight.settings.LOOKUP_SINGLE_FLIGHT_ENABLED", False)
+    flights = LookupSingleFlight()
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"found": False}
+
+    await asyncio.gather(*(flights.do("cache:10.0.0.1", compute) for _ in range(3)))
+
+    assert len(calls) == 3
@@ -0,0 +1,93 @@
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+
+from services import ip_lookup as ip_lookup_module
+from services.ip_lookup import IPLookupService
+from services.lookup_topology_index import LookupTopologyIndex, SwitchSnapshot, TopologySnapshot
+
+
+def make_switch(switch_id, name):
+    return SwitchSnapshot(SimpleNamespace(
+        id=switch_id,
+        name=name,
+        ip_address=f"10.0.0.{switch_id}",
+        is_reachable=True,
+        last_collection_status="success",
+        last_collection_message=None,
+        last_arp_collection_at=None,
+        last_mac_collection_at=None,
+    ))
+
+
+def make_index(monkeypatch):
+    monkeypatch.setattr("services.lookup_topology_index.settings.LOOKUP_TOPOLOGY_INDEX_ENABLED", True)
+    now = datetime.now(timezone.utc)
+    index = LookupTopologyIndex()
+    index._snapshot = TopologySnapshot(
+        arp_by_ip={
+            "10.1.1.10": ("aa:aa:aa:aa:aa:01", 1, "vlan10", 10, now - timedelta(minutes=5)),
+            "10.1.1.11": ("aa:aa:aa:aa:aa:02", 1, "vlan10", 10, now - timedelta(minutes=5)),
+            "10.1.1.12": ("aa:aa:aa:aa:aa:03", 1, "irb10", 10, now - timedelta(minutes=5)),
+            "10.1.1.13": ("aa:aa:aa:aa:aa:04", 1, "vlan10", 10, now - timedelta(hours=30)),
+        },
+        eligible_port_by_mac={
+            "aa:aa:aa:aa:aa:01": (2, "Gi1/0/7", 20, now - timedelta(minutes=20)),
+            "aa:aa:aa:aa:aa:02": (2, "Gi1/0/8", 20, now - timedelta(hours=30)),
+        },
+        port_by_mac_switch={
+            ("aa:aa:aa:aa:aa:02", 1): ("Te1/1/1", None, now - timedelta(minutes=1)),
+        },
+        switches={1: make_switch(1, "core"), 2: make_switch(2, "access")},
+        l2_marker=(now,),
+        switch_marker=(now, 2),
+    )
+    return index
+
+
+def test_resolve_matches_database_lookup_rules(monkeypatch):
+    index = make_index(monkeypatch)
+
+    physical = index.resolve("10.1.1.10", 24)
+    assert physical["status"] == "found"
+    assert physical["switch"].name == "access"
+    assert (physical["port_name"], physical["vlan_id"], physical["port_source"]) == ("Gi1/0/7", 20, "mac_table")
+    assert physical["data_age_seconds"] >= 20 * 60 - 1
+
+    # Eligible port outside the window: fall back to the ARP switch's own MAC row
+    same_switch = index.resolve("10.1.1.11", 24)
+    assert (same_switch["switch"].name, same_switch["port_name"], same_switch["vlan_id"]) == ("core", "Te1/1/1", 10)
+
+    assert index.resolve("10.1.1.12", 24)["status"] == "arp_only"
+    assert index.resolve("10.1.1.13", 24) == {"status": "no_arp"}
+    assert index.resolve("10.9.9.9", 24) == {"status": "no_arp"}
+
+    monkeypatch.setattr("services.lookup_topology_index.settings.LOOKUP_TOPOLOGY_INDEX_ENABLED", False)
+    assert index.resolve("10.1.1.10", 24) is None
+
+
+@pytest.mark.asyncio
+async def test_lookup_ip_answers_from_index_without_table_reads(monkeypatch):
+    index = make_index(monkeypatch)
+    monkeypatch.setattr(ip_lookup_module, "lookup_topology_index", index)
+    monkeypatch.setattr("services.lookup_result_cache.settings.REDIS_ENABLED", False)
+    monkeypatch.setattr(
+        "services.settings_service.settings_service.get_setting", AsyncMock(return_value=24)
+    )
+    service = IPLookupService()
+    monkeypatch.setattr(service, "_resolve_from_db", AsyncMock(side_effect=AssertionError("DB path used")))
+    update_cache = AsyncMock()
+    monkeypatch.setattr(service, "_update_mac_cache", update_cache)
+    monkeypatch.setattr(service, "_log_query", AsyncMock())
+
+    result = await service.lookup_ip(SimpleNamespace(), "10.1.1.10")
+
+    assert result["found"] is True
+    assert result["data_source"] == "index"
+    assert (result["switch_name"], result["port_name"], result["vlan_id"]) == ("access", "Gi1/0/7", 20)
+    assert result["freshness"]["status"] == "fresh"
+    update_cache.assert_awaited_once_with(
+        update_cache.await_args.args[0], "aa:aa:aa:aa:aa:01", "10.1.1.10", 2, "Gi1/0/7", 20
+    )
@@ -0,0 +1,100 @@
+import asyncio
+
+import pytest
+
+from services import lookup_write_buffer as buffer_module
+from services.lookup_write_buffer import LookupWriteBuffer
+
+
+class FakeSession:
+    def __init__(self, written):
+        self.written = written
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def commit(self):
+        pass
+
+
+def make_buffer(monkeypatch, max_rows=100, overflow="drop_oldest"):
+    monkeypatch.setattr("services.lookup_write_buffer.settings.LOOKUP_WRITE_BUFFER_ENABLED", True)
+    monkeypatch.setattr("services.lookup_write_buffer.settings.LOOKUP_WRITE_BUFFER_FLUSH_SECONDS", 60)
+    monkeypatch.setattr("services.lookup_write_buffer.settings.LOOKUP_WRITE_BUFFER_BATCH_SIZE", 1000)
+    monkeypatch.setattr("services.lookup_write_buffer.settings.LOOKUP_WRITE_BUFFER_MAX_ROWS", max_rows)
+    monkeypatch.setattr("services.lookup_write_buffer.settings.LOOKUP_WRITE_BUFFER_OVERFLOW", overflow)
+    written = []
+
+    async def write_lookup_rows(db, history_rows, cache_rows):
+        written.append((history_rows, cache_rows))
+
+    monkeypatch.setattr(buffer_module, "write_lookup_rows", write_lookup_rows)
+    monkeypatch.setattr(buffer_module, "AsyncSessionLocal", lambda: FakeSession(written))
+    return LookupWriteBuffer(), written
+
+
+def cache_row(mac, ip):
+    return {"mac_address": mac, "ip_address": ip, "switch_id": 1, "port_name": "Gi1/0/1", "vlan_id": 10}
+
+
+@pytest.mark.asyncio
+async def test_rows_are_coalesced_and_flushed_once_on_stop(monkeypatch):
+    buffer, written = make_buffer(monkeypatch)
+    assert buffer.add_query({"target_ip": "10.0.0.1"}) is False  # not running: caller writes directly
+
+    buffer.start()
+    assert buffer.add_query({"target_ip": "10.0.0.1"})
+    assert buffer.add_query({"target_ip": "10.0.0.2"})
+    assert buffer.add_mac_cache(cache_row("aa:aa:aa:aa:aa:01", "10.0.0.1"))
+    assert buffer.add_mac_cache(cache_row("aa:aa:aa:aa:aa:01", "10.0.0.2"))
+    await asyncio.sleep(0)
+    assert written == []
+
+    await buffer.stop()
+
+    assert len(written) == 1
+    history_rows, cache_rows = written[0]
+    assert [row["target_ip"] for row in history_rows] == ["10.0.0.1", "10.0.0.2"]
+    assert all(row["queried_at"] for row in history_rows)
+    assert [row["ip_address"] for row in cache_rows] == ["10.0.0.2"]
+    assert buffer.pending == 0 and not buffer.active
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("overflow, accepted, kept, dropped, rejected", [
+    ("drop_oldest", True, ["10.0.0.2", "10.0.0.3"], 1, 0),
+    ("drop_newest", True, ["10.0.0.1", "10.0.0.2"], 1, 0),
+    ("write_through", False, ["10.0.0.1", "10.0.0.2"], 0, 1),
+])
+async def test_overflow_policy_bounds_pending_rows(monkeypatch, overflow, accepted, kept, dropped, rejected):
+    buffer, written = make_buffer(monkeypatch, max_rows=2, overflow=overflow)
+    buffer.start()
+    buffer.add_query({"target_ip": "10.0.0.1"})
+    buffer.add_query({"target_ip": "10.0.0.2"})
+
+    assert buffer.add_query({"target_ip": "10.0.0.3"}) is accepted
+    assert buffer.pending == 2
+    assert (buffer.dropped, buffer.rejected) == (dropped, rejected)
+
+    await buffer.stop()
+    assert [row["target_ip"] for row in written[0][0]] == kept
+
+
+@pytest.mark.asyncio
+async def test_batch_size_wakes_flusher_early(monkeypatch):
+    buffer, written = make_buffer(monkeypatch)
+    monkeypatch.setattr("services.lookup_write_buffer.settings.LOOKUP_WRITE_BUFFER_BATCH_SIZE", 2)
+    buffer.start()
+    await asyncio.sleep(0)
+
+    buffer.add_query({"target_ip": "10.0.0.1"})
+    buffer.add_mac_cache(cache_row("aa:aa:aa:aa:aa:01", "10.0.0.1"))
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+    assert len(written) == 1 and buffer.pending == 0
+    await buffer.stop()
+    assert len(written) == 1
@@ -0,0 +1,105 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from services.ip_scan import IPScanService
+from services.neighbor_table import NeighborTable, parse_ip_neigh, parse_proc_net_arp
+
+
+PROC_NET_ARP = """IP address       HW type     Flags       HW address            Mask     Device
+10.0.0.1         0x1         0x2         00:11:22:AA:BB:CC     *        eth0
+10.0.0.2         0x1         0x0         00:00:00:00:00:00     *        eth0
+10.0.0.3         0x1         0x6         00:11:22:aa:bb:cd     *        eth0
+"""
+
+
+def test_parsers_keep_only_resolved_entries():
+    assert parse_proc_net_arp(PROC_NET_ARP) == {
+        "10.0.0.1": "00:11:22:aa:bb:cc",
+        "10.0.0.3": "00:11:22:aa:bb:cd",
+    }
+    assert parse_ip_neigh(
+        "2001:db8::1 dev eth0 lladdr 00:11:22:aa:bb:cc REACHABLE\n"
+        "2001:db8::2 dev eth0  FAILED\n"
+        "fe80::1 dev eth0 lladdr 00:11:22:aa:bb:ce router STALE\n"
+    ) == {"2001:db8::1": "00:11:22:aa:bb:cc", "fe80::1": "00:11:22:aa:bb:ce"}
+
+
+def test_missing_entry_rereads_the_table_at_most_once_per_interval(monkeypatch):
+    monkeypatch.setattr("services.neighbor_table.settings.IPAM_NEIGHBOR_REFRESH_SECONDS", 0)
+    reads = []
+
+    def read():
+        reads.append(1)
+        return {"10.0.0.1": "00:11:22:aa:bb:cc"} if len(reads) == 1 else {
+            "10.0.0.1": "00:11:22:aa:bb:cc", "10.0.0.9": "00:11:22:aa:bb:c9"
+        }
+
+    table = NeighborTable({4: read})
+    table.refresh()
+
+    assert table.lookup("10.0.0.1") == "00:11:22:aa:bb:cc"
+    assert len(reads) == 1
+    assert table.lookup("10.0.0.9") == "00:11:22:aa:bb:c9"
+    assert len(reads) == 2
+
+
+
+def test_entry_appearing_right_after_a_read_is_found_once_the_throttle_window_ends(monkeypatch):
+    monkeypatch.setattr("services.neighbor_table.settings.IPAM_NEIGHBOR_REFRESH_SECONDS", 0.2)
+    kernel = {"10.0.0.1": "00:11:22:aa:bb:cc"}
+    reads = []
+
+    def read():
+        reads.append(time.monotonic())
+        return dict(kernel)
+
+    table = NeighborTable({4: read})
+    table.refresh()
+    # The host answers the sweep just after the sweep-start read
+    kernel["10.0.0.9"] = "00:11:22:aa:bb:c9"
+
+    assert table.lookup("10.0.0.9") == "00:11:22:aa:bb:c9"
+    assert len(reads) == 2
+    assert reads[1] - reads[0] >= 0.2
+
+
+def test_concurrent_misses_share_one_reread(monkeypatch):
+    monkeypatch.setattr("services.neighbor_table.settings.IPAM_NEIGHBOR_REFRESH_SECONDS", 0.1)
+    kernel = {}
+    reads = []
+
+    def read():
+        reads.append(1)
+        return dict(kernel)
+
+    table = NeighborTable({4: read})
+    table.refresh()
+    kernel.update({f"10.0.1.{i}": f"00:11:22:aa:bb:{i:02x}" for i in range(50)})
+
+    with ThreadPoolExecutor(max_workers=50) as pool:
+        macs = list(pool.map(table.lookup, [f"10.0.1.{i}" for i in range(50)]))
+
+    assert macs == [f"00:11:22:aa:bb:{i:02x}" for i in range(50)]
+    assert len(reads) == 2
+
+
+def test_scan_mac_lookup_uses_the_table_instead_of_arp_command(monkeypatch):
+    table = NeighborTable({4: lambda: {"10.0.0.1": "00:11:22:aa:bb:cc"}, 6: lambda: None})
+    monkeypatch.setattr("services.ip_scan.neighbor_table", table)
+    monkeypatch.setattr(
+        "services.ip_scan.subprocess.run",
+        lambda *a, **kw: pytest.fail("arp should not run while the table is readable"),
+    )
+    service = IPScanService()
+
+    assert service._get_mac_address("10.0.0.1") == "00:11:22:aa:bb:cc"
+
+    calls = []
+    monkeypatch.setattr(
+        "services.ip_scan.subprocess.run",
+        lambda cmd, **kw: calls.append(cmd) or type("R", (), {"returncode": 1, "stdout": b""})(),
+    )
+    assert service._get_mac_address("2001:db8::1") is None
+    assert calls and calls[0][-1] == "2001:db8::1"
@@ -185,3 +185,20 @@ def test_schedule_ipam_startup_catchup_creates_single_task(monkeypatch):
     scheduler.schedule_ipam_startup_catchup()
 
     assert len(created_tasks) == 1
+
+
+@pytest.mark.asyncio
+async def test_ipam_jobs_run_only_on_the_cluster_leader(monkeypatch):
+    scheduler = NetworkCollectionScheduler()
+    monkeypatch.setattr(scheduler, "_is_cluster_leader", lambda job_name: False)
+    start_scan = AsyncMock()
+    cleanup = AsyncMock()
+    monkeypatch.setattr("services.network_scheduler.ipam_scan_status_service.start_scan", start_scan)
+    monkeypatch.setattr("services.ipam_service.ipam_service.cleanup_old_scan_history", cleanup)
+
+    await scheduler._run_ipam_scan()
+    await scheduler._run_ipam_scan(startup_catchup=True, max_subnets=5)
+    await scheduler._run_ipam_history_cleanup()
+
+    start_scan.assert_not_awaited()
+    cleanup.assert_not_awaited()
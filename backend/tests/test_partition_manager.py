@@ -0,0 +1,124 @@
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from services.partition_manager import PartitionManager, parse_upper_bound, partition_name
+
+
+def day(offset):
+    today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    return today + timedelta(days=offset)
+
+
+def bound_expr(lower, upper):
+    return f"FOR VALUES FROM ('{lower:%Y-%m-%d %H:%M:%S}+00') TO ('{upper:%Y-%m-%d %H:%M:%S}+00')"
+
+
+class FakeDB:
+    def __init__(self, partitions, partitioned=True, default_rows_days=(), fail_on=None):
+        self.partitions = partitions
+        self.partitioned = partitioned
+        self.default_rows_days = set(default_rows_days)
+        self.fail_on = fail_on
+        self.ddl = []
+        self.rolled_back = False
+
+    async def execute(self, stmt, params=None):
+        sql = str(stmt)
+        if "relkind = 'p'" in sql:
+            return SimpleNamespace(scalar=lambda: self.partitioned)
+        if "pg_inherits" in sql:
+            return SimpleNamespace(all=lambda: self.partitions)
+        if sql.startswith("SELECT EXISTS"):
+            return SimpleNamespace(scalar=lambda: params["day_start"] in self.default_rows_days)
+        if self.fail_on and sql.startswith(self.fail_on):
+            raise RuntimeError("updated partition constraint for default partition would be violated")
+        self.ddl.append(sql.strip())
+        return SimpleNamespace(rowcount=3)
+
+    @asynccontextmanager
+    async def begin_nested(self):
+        try:
+            yield
+        except Exception:
+            self.rolled_back = True
+            raise
+
+
+def test_parse_upper_bound_handles_minvalue_and_default():
+    assert parse_upper_bound("FOR VALUES FROM (MINVALUE) TO ('2026-10-21 00:00:00+00')") == datetime(
+        2026, 10, 21, tzinfo=timezone.utc
+    )
+    assert parse_upper_bound("DEFAULT") is None
+
+
+@pytest.mark.asyncio
+async def test_maintain_premakes_missing_days_and_drops_only_fully_expired(monkeypatch):
+    monkeypatch.setattr("services.partition_manager.settings.PARTITION_PREMAKE_DAYS", 3)
+    monkeypatch.setattr("services.partition_manager.settings.PARTITION_RETENTION_DETACH_ONLY", False)
+    db = FakeDB([
+        ("arp_table_legacy", f"FOR VALUES FROM (MINVALUE) TO ('{day(-9):%Y-%m-%d} 00:00:00+00')", 5000.0),
+        (partition_name("arp_table", day(-8)), bound_expr(day(-8), day(-7)), 120.0),
+        # Straddles the 7 day cutoff: kept
+        (partition_name("arp_table", day(-7)), bound_expr(day(-7), day(-6)), 80.0),
+        (partition_name("arp_table", day(0)), bound_expr(day(0), day(1)), 10.0),
+        ("arp_table_default", "DEFAULT", 0.0),
+    ])
+
+    removed = await PartitionManager().maintain(db, "arp_table", days_to_keep=7)
+
+    created = [sql for sql in db.ddl if sql.startswith("CREATE TABLE")]
+    assert [sql.split()[5] for sql in created] == [
+        partition_name("arp_table", day(offset)) for offset in (1, 2, 3)
+    ]
+    assert "PARTITION OF arp_table" in created[0]
+    assert [sql for sql in db.ddl if sql.startswith("DROP")] == [
+        "DROP TABLE arp_table_legacy",
+        f"DROP TABLE {partition_name('arp_table', day(-8))}",
+    ]
+    assert removed == 5120
+
+
+@pytest.mark.asyncio
+async def test_maintain_returns_none_for_unpartitioned_table():
+    db = FakeDB([], partitioned=False)
+
+    assert await PartitionManager().maintain(db, "ip_scan_history", days_to_keep=30) is None
+    assert db.ddl == []
+
+
+@pytest.mark.asyncio
+async def test_premake_moves_rows_out_of_the_default_partition(monkeypatch):
+    monkeypatch.setattr("services.partition_manager.settings.PARTITION_PREMAKE_DAYS", 1)
+    db = FakeDB([
+        (partition_name("mac_table", day(-1)), bound_expr(day(-1), day(0)), 10.0),
+        ("mac_table_default", "DEFAULT", 40.0),
+    ], default_rows_days={day(0)})
+
+    await PartitionManager().maintain(db, "mac_table", days_to_keep=7)
+
+    today = partition_name("mac_table", day(0))
+    assert db.ddl[0] == f"CREATE TABLE {today} (LIKE mac_table INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+    assert db.ddl[1].startswith("WITH moved AS (DELETE FROM mac_table_default WHERE last_seen >= :day_start")
+    assert db.ddl[1].endswith(f"INSERT INTO {today} SELECT * FROM moved")
+    assert db.ddl[2].startswith(f"ALTER TABLE mac_table ATTACH PARTITION {today} FOR VALUES FROM")
+    assert db.ddl[3].startswith(f"CREATE TABLE IF NOT EXISTS {partition_name('mac_table', day(1))} PARTITION OF")
+
+
+@pytest.mark.asyncio
+async def test_failed_premake_still_drops_expired_partitions(monkeypatch):
+    monkeypatch.setattr("services.partition_manager.settings.PARTITION_PREMAKE_DAYS", 1)
+    monkeypatch.setattr("services.partition_manager.settings.PARTITION_RETENTION_DETACH_ONLY", False)
+    expired = partition_name("arp_table", day(-9))
+    db = FakeDB([
+        (expired, bound_expr(day(-9), day(-8)), 50.0),
+        ("arp_table_default", "DEFAULT", 0.0),
+    ], fail_on="CREATE TABLE")
+
+    removed = await PartitionManager().maintain(db, "arp_table", days_to_keep=7)
+
+    assert db.rolled_back
+    assert db.ddl == [f"DROP TABLE {expired}"]
+    assert removed == 50
@@ -0,0 +1,91 @@
+import asyncio
+
+import pytest
+
+from services.ping_sweep import PingSweep, destination_group
+
+
+def test_destination_group_is_the_slash_24_or_slash_64():
+    assert destination_group("10.1.2.77") == "10.1.2.0/24"
+    assert destination_group("2001:db8::1") == "2001:db8::/64"
+
+
+async def collect(sweep, ips, timeout=1):
+    return [item async for item in sweep.sweep(ips, timeout)]
+
+
+@pytest.mark.asyncio
+async def test_sweep_interleaves_subnets_and_paces_each_subnet(monkeypatch):
+    monkeypatch.setattr("services.ping_sweep.settings.IPAM_SWEEP_PPS", 0)
+    monkeypatch.setattr("services.ping_sweep.settings.IPAM_SWEEP_SUBNET_PPS", 50)
+    loop = asyncio.get_running_loop()
+    sent = []
+
+    async def ping(ip, timeout):
+        sent.append((ip, loop.time()))
+        return (True, 1)
+
+    ips = [f"10.0.0.{i}" for i in range(1, 6)] + [f"10.0.1.{i}" for i in range(1, 6)]
+    results = await collect(PingSweep(ping), ips)
+
+    assert len(results) == 10
+    assert [ip for ip, _ in sent[:4]] == ["10.0.0.1", "10.0.1.1", "10.0.0.2", "10.0.1.2"]
+    subnet_times = [t for ip, t in sent if ip.startswith("10.0.0.")]
+    # 5 sends at 50 pps take at least 4 intervals of 20ms (minus the catch-up allowance)
+    assert subnet_times[-1] - subnet_times[0] >= 4 * 0.02 - 0.015
+
+
+@pytest.mark.asyncio
+async def test_group_key_paces_a_large_subnet_under_one_gateway_budget(monkeypatch):
+    monkeypatch.setattr("services.ping_sweep.settings.IPAM_SWEEP_PPS", 0)
+    monkeypatch.setattr("services.ping_sweep.settings.IPAM_SWEEP_SUBNET_PPS", 100)
+    loop = asyncio.get_running_loop()
+    sent = []
+
+    async def ping(ip, timeout):
+        sent.append(loop.time())
+        return (True, 1)
+
+    # One address in each of 11 different /24s of a /16 behind one gateway
+    ips = [f"10.20.{i}.1" for i in range(11)]
+    results = [item async for item in PingSweep(ping).sweep(ips, 1, group_key="10.20.0.1")]
+
+    assert len(results) == 11
+    assert sent[-1] - sent[0] >= 10 * 0.01 - 0.015
+
+
+@pytest.mark.asyncio
+async def test_global_budget_caps_the_aggregate_rate(monkeypatch):
+    monkeypatch.setattr("services.ping_sweep.settings.IPAM_SWEEP_PPS", 100)
+    monkeypatch.setattr("services.ping_sweep.settings.IPAM_SWEEP_SUBNET_PPS", 0)
+    loop = asyncio.get_running_loop()
+    sent = []
+
+    async def ping(ip, timeout):
+        sent.append(loop.time())
+        return (True, 1)
+
+    await collect(PingSweep(ping), [f"10.0.{i}.1" for i in range(11)])
+
+    assert sent[-1] - sent[0] >= 10 * 0.01 - 0.015
+
+
+@pytest.mark.asyncio
+async def test_non_responders_are_retried_once_at_the_end(monkeypatch):
+    monkeypatch.setattr("services.ping_sweep.settings.IPAM_SWEEP_PPS", 0)
+    monkeypatch.setattr("services.ping_sweep.settings.IPAM_SWEEP_SUBNET_PPS", 0)
+    monkeypatch.setattr("services.ping_sweep.settings.IPAM_SWEEP_RETRIES", 1)
+    attempts = {}
+
+    async def ping(ip, timeout):
+        attempts[ip] = attempts.get(ip, 0) + 1
+        # .2 drops its first echo, .3 is down
+        return (ip == "10.0.0.1" or (ip == "10.0.0.2" and attempts[ip] == 2), None)
+
+    results = await collect(PingSweep(ping), ["10.0.0.1", "10.0.0.2", "10.0.0.3"])
+
+    assert results[0] == ("10.0.0.1", (True, None))
+    assert sorted((ip, reachable) for ip, (reachable, _) in results) == [
+        ("10.0.0.1", True), ("10.0.0.2", True), ("10.0.0.3", False)
+    ]
+    assert attempts == {"10.0.0.1": 1, "10.0.0.2": 2, "10.0.0.3": 2}
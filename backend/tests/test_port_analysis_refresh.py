@@ -0,0 +1,85 @@
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+
+from services.network_data_collector import NetworkDataCollector
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def all(self):
+        return self._rows
+
+
+@pytest.mark.asyncio
+async def test_aggregate_port_statistics_recounts_merged_port_names():
+    collector = NetworkDataCollector()
+    db = SimpleNamespace(execute=AsyncMock(side_effect=[
+        FakeResult([
+            (1, "Gi1/0/1", 1, 1),
+            (1, "GigabitEthernet1/0/1", 2, 1),
+            (1, "Te1/1/1", 60, 3),
+            (1, "   ", 4, 0),
+        ]),
+        FakeResult([
+            (1, "Gi1/0/1", "AA:BB:CC:00:00:01", 10),
+            (1, "GigabitEthernet1/0/1", "aa:bb:cc:00:00:01", 10),
+            (1, "GigabitEthernet1/0/1", "aa:bb:cc:00:00:02", 20),
+        ]),
+    ]))
+
+    stats = await collector._aggregate_port_statistics(db, [1])
+
+    assert stats == {1: {
+        "Gi 1/0/1": {"mac_count": 2, "unique_vlans": 2},
+        "Te 1/1/1": {"mac_count": 60, "unique_vlans": 3},
+    }}
+    assert db.execute.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_refresh_port_analysis_upserts_classified_rows(monkeypatch):
+    collector = NetworkDataCollector()
+    switch = SimpleNamespace(id=3, name="edge-3")
+    monkeypatch.setattr(collector, "_aggregate_port_statistics", AsyncMock(return_value={
+        3: {"Gi 1/0/1": {"mac_count": 1, "unique_vlans": 1}, "Te 1/1/1": {"mac_count": 60, "unique_vlans": 2}}
+    }))
+    prune_mock = AsyncMock(return_value=1)
+    upsert_mock = AsyncMock(return_value=(1, 1))
+    monkeypatch.setattr(collector, "_prune_port_analysis_for_switch", prune_mock)
+    monkeypatch.setattr(collector, "_upsert_port_analysis", upsert_mock)
+
+    summary = await collector.refresh_port_analysis_for_switch(SimpleNamespace(), switch)
+
+    assert summary == {"ports_analyzed": 2, "ports_created": 1, "ports_updated": 1, "ports_deleted": 1}
+    assert prune_mock.await_args.args[2] == {"Gi 1/0/1", "Te 1/1/1"}
+    rows = {row["port_name"]: row for row in upsert_mock.await_args.args[1]}
+    assert rows["Gi 1/0/1"]["port_type"] == "access"
+    assert rows["Te 1/1/1"]["port_type"] == "uplink"
+    assert all("lookup_policy_override" not in row for row in rows.values())
+
+
+@pytest.mark.asyncio
+async def test_analyze_all_ports_upserts_every_switch_in_one_pass(monkeypatch):
+    collector = NetworkDataCollector()
+    aggregate_mock = AsyncMock(return_value={
+        1: {"Gi 1/0/1": {"mac_count": 1, "unique_vlans": 1}},
+        2: {"Gi 1/0/1": {"mac_count": 3, "unique_vlans": 1}, "Gi 1/0/2": {"mac_count": 1, "unique_vlans": 0}},
+    })
+    upsert_mock = AsyncMock(return_value=(3, 0))
+    monkeypatch.setattr(collector, "_aggregate_port_statistics", aggregate_mock)
+    monkeypatch.setattr(collector, "_upsert_port_analysis", upsert_mock)
+    db = SimpleNamespace(execute=AsyncMock(return_value=SimpleNamespace(rowcount=2)))
+
+    analyzed = await collector._analyze_all_ports(db)
+
+    assert analyzed == 3
+    aggregate_mock.assert_awaited_once_with(db)
+    upsert_mock.assert_awaited_once()
+    rows = upsert_mock.await_args.args[1]
+    assert {(row["switch_id"], row["port_name"]) for row in rows} == {(1, "Gi 1/0/1"), (2, "Gi 1/0/1"), (2, "Gi 1/0/2")}
+    assert len({row["analyzed_at"] for row in rows}) == 1
+    db.execute.assert_awaited_once()
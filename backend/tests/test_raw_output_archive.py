@@ -0,0 +1,50 @@
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+
+from services import raw_output_archive as archive_module
+from services.network_data_collector import NetworkDataCollector
+from services.raw_output_archive import RawOutputArchiveService
+
+
+def test_archive_compression_round_trips_and_falls_back_to_gzip(monkeypatch):
+    service = RawOutputArchiveService()
+    monkeypatch.setattr(archive_module.settings, "RAW_OUTPUT_ARCHIVE_COMPRESSION", "zstd")
+    monkeypatch.setattr(archive_module, "ZSTD_AVAILABLE", False)
+    output = "Vlan  Mac Address       Type     Ports\n10    aabb.ccdd.eeff    DYNAMIC  Gi1/0/1\n" * 50
+
+    encoding, data = service._compress(output.encode())
+
+    assert encoding == "gzip"
+    assert len(data) < len(output)
+    assert service.decompress(encoding, data) == output
+
+
+@pytest.mark.asyncio
+async def test_collect_mac_single_switch_archives_captured_output(monkeypatch):
+    collector = NetworkDataCollector()
+    switch = SimpleNamespace(
+        id=7, name="edge-7", ip_address="10.0.0.7", cli_enabled=True, password_encrypted="x",
+        mac_collection_success_count=0, mac_collection_fail_count=0,
+    )
+    monkeypatch.setattr(archive_module.settings, "RAW_OUTPUT_ARCHIVE_ENABLED", True)
+    monkeypatch.setattr(collector, "_load_command_templates", AsyncMock(return_value=[]))
+    monkeypatch.setattr(collector, "_build_cli_config", lambda _switch: {})
+    monkeypatch.setattr(collector, "_store_mac_entries_bulk", AsyncMock())
+    monkeypatch.setattr(collector, "refresh_port_analysis_for_switch", AsyncMock(return_value={"ports_analyzed": 1}))
+    archive_mock = AsyncMock()
+    monkeypatch.setattr(collector, "_archive_raw_output", archive_mock)
+
+    async def fake_to_thread(func, ip, config, templates, output_capture):
+        output_capture.update({"command": "show mac address-table", "parser_type": "cisco_ios", "output": "raw"})
+        return [{"mac_address": "aa:bb:cc:dd:ee:ff", "port_name": "Gi1/0/1", "vlan_id": 10}]
+
+    monkeypatch.setattr("services.network_data_collector.asyncio.to_thread", fake_to_thread)
+
+    entries = await collector.collect_mac_single_switch(SimpleNamespace(commit=AsyncMock()), switch)
+
+    assert len(entries) == 1
+    _, switch_id, command_type, capture, entries_parsed, _ = archive_mock.await_args.args
+    assert (switch_id, command_type, entries_parsed) == (7, "mac", 1)
+    assert capture["output"] == "raw"
@@ -0,0 +1,117 @@
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from services.reverse_lookup import ReverseLookupService
+
+
+class CapturingDB:
+    def __init__(self, rows=(), port_names=()):
+        self.rows = list(rows)
+        self.port_names = list(port_names)
+        self.statements = []
+        self.params = []
+
+    async def execute(self, stmt):
+        compiled = stmt.compile(dialect=postgresql.dialect())
+        self.statements.append(str(compiled))
+        self.params.append(compiled.params)
+        return SimpleNamespace(
+            all=lambda: self.rows,
+            scalars=lambda: SimpleNamespace(all=lambda: self.port_names),
+        )
+
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setattr(
+        "services.settings_service.settings_service.get_setting", AsyncMock(return_value=24)
+    )
+    return ReverseLookupService()
+
+
+def mac_row(mac, port="Gi1/0/17"):
+    return SimpleNamespace(
+        mac_address=mac, switch_id=2, port_name=port, vlan_id=20,
+        last_seen=datetime(2026, 10, 19, tzinfo=timezone.utc),
+    )
+
+
+@pytest.mark.asyncio
+async def test_port_lookup_groups_ips_and_hostnames_per_mac(service):
+    seen = datetime(2026, 10, 19, 1, tzinfo=timezone.utc)
+    ipam = SimpleNamespace(
+        hostname="printer-3", dns_name="printer-3.corp", system_name=None,
+        status=SimpleNamespace(value="used"), vendor="HP", subnet_id=4,
+    )
+    db = CapturingDB([
+        (mac_row("aa:aa:aa:aa:aa:01"), "10.0.0.5", seen, ipam),
+        (mac_row("aa:aa:aa:aa:aa:01"), "10.0.0.6", seen, None),
+        (mac_row("aa:aa:aa:aa:aa:02"), None, None, None),
+    ], port_names=["Gi1/0/17", "Gi1/0/18"])
+
+    result = await service.lookup_port(db, 2, "Gi1/0/17")
+
+    assert result["mac_count"] == 2
+    first, second = result["endpoints"]
+    assert [ip["ip_address"] for ip in first["ips"]] == ["10.0.0.5", "10.0.0.6"]
+    assert first["ips"][0]["ipam"]["hostname"] == "printer-3"
+    assert second["ips"] == []
+    assert len(db.statements) == 2
+    assert "mac_table.port_name IN (__[POSTCOMPILE_port_name_1])" in db.statements[1]
+    assert "LEFT OUTER JOIN arp_table ON arp_table.mac_address = mac_table.mac_address" in db.statements[1]
+
+
+@pytest.mark.asyncio
+async def test_port_lookup_by_short_name_matches_rows_stored_under_the_long_name(service):
+    db = CapturingDB(
+        [(mac_row("aa:aa:aa:aa:aa:03", port="GigabitEthernet1/0/17"), None, None, None)],
+        port_names=["GigabitEthernet1/0/17", "GigabitEthernet1/0/18", "Gi1/0/17"],
+    )
+
+    result = await service.lookup_port(db, 2, "Gi 1/0/17")
+
+    assert result["port_name"] == "Gi 1/0/17"
+    assert result["mac_count"] == 1
+    assert result["endpoints"][0]["port_name"] == "GigabitEthernet1/0/17"
+    assert "mac_table.port_name IN" in db.statements[1]
+    assert db.params[1]["port_name_1"] == ["GigabitEthernet1/0/17", "Gi1/0/17"]
+
+
+@pytest.mark.asyncio
+async def test_port_lookup_without_stored_spelling_skips_endpoint_query(service):
+    db = CapturingDB(port_names=["Gi1/0/18"])
+
+    result = await service.lookup_port(db, 2, "Gi1/0/17")
+
+    assert result["mac_count"] == 0
+    assert len(db.statements) == 1
+
+
+@pytest.mark.asyncio
+async def test_vlan_lookup_limits_whole_macs_on_eligible_ports(service):
+    db = CapturingDB([(mac_row("aa:aa:aa:aa:aa:0%d" % i, port=f"Gi1/0/{i}"), None, None, None) for i in range(3)])
+
+    result = await service.lookup_vlan(db, 20, limit=2)
+
+    assert result["truncated"] is True
+    assert result["endpoint_count"] == 2 and len(result["endpoints"]) == 2
+    sql = db.statements[0]
+    assert "mac_table.id IN (SELECT mac_table.id" in sql
+    assert "port_analysis.port_type = %(port_type_1)s" in sql
+    assert "LIMIT %(param_1)s" in sql
+
+
+@pytest.mark.asyncio
+async def test_hostname_prefix_lookup_escapes_like_wildcards(service):
+    db = CapturingDB()
+
+    result = await service.lookup_hostname(db, "Web_01%", prefix=True)
+
+    assert result == {"hostname": "Web_01%", "match": "prefix", "truncated": False, "matches": []}
+    sql = db.statements[0]
+    assert "lower(ip_addresses.hostname) LIKE %(lower_1)s" in sql
+    assert "lower(ip_addresses.system_name) LIKE" in sql
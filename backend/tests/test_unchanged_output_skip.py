@@ -0,0 +1,121 @@
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+
+from services import network_data_collector as collector_module
+from services.cli_service import CLIService
+from services.network_data_collector import NetworkDataCollector
+
+
+def test_output_hash_ignores_line_endings_and_blank_lines():
+    service = CLIService()
+    output = "Vlan  Mac Address       Ports\n10    aabb.ccdd.eeff    Gi1/0/1\n"
+    previous_hash = service.output_content_hash("show mac address-table", "cisco_ios", output)
+
+    capture = {"previous_hash": previous_hash}
+    unchanged = service._record_output_capture(
+        capture, "show mac address-table", "cisco_ios", "cisco_ios",
+        "Vlan  Mac Address       Ports   \r\n\r\n10    aabb.ccdd.eeff    Gi1/0/1\r\n",
+    )
+
+    assert unchanged is True
+    assert capture["unchanged"] is True
+    assert service.output_content_hash("show mac address-table", "dell_force10", output) != previous_hash
+
+
+@pytest.mark.asyncio
+async def test_unchanged_mac_output_skips_store_and_port_analysis(monkeypatch):
+    collector = NetworkDataCollector()
+    switch = SimpleNamespace(
+        id=7, name="edge-7", ip_address="10.0.0.7", cli_enabled=True, password_encrypted="x",
+        mac_collection_success_count=0, mac_collection_fail_count=0, last_mac_output_hash="abc",
+    )
+    monkeypatch.setattr(collector_module.settings, "COLLECTION_SKIP_UNCHANGED_OUTPUT", True)
+    monkeypatch.setattr(collector, "_load_command_templates", AsyncMock(return_value=[]))
+    monkeypatch.setattr(collector, "_build_cli_config", lambda _switch: {})
+    store_mock = AsyncMock()
+    analysis_mock = AsyncMock()
+    monkeypatch.setattr(collector, "_store_mac_entries_bulk", store_mock)
+    monkeypatch.setattr(collector, "refresh_port_analysis_for_switch", analysis_mock)
+    monkeypatch.setattr(collector, "_refresh_unchanged_entries", AsyncMock(return_value=42))
+
+    async def fake_to_thread(func, ip, config, templates, output_capture):
+        assert output_capture["previous_hash"] == "abc"
+        output_capture.update({"content_hash": "abc", "unchanged": True})
+        return []
+
+    monkeypatch.setattr("services.network_data_collector.asyncio.to_thread", fake_to_thread)
+
+    job_stats = {}
+    entries = await collector.collect_mac_single_switch(SimpleNamespace(commit=AsyncMock()), switch, job_stats=job_stats)
+
+    assert entries == []
+    assert job_stats == {"unchanged_outputs": 1, "unchanged_entries": 42}
+    store_mock.assert_not_awaited()
+    analysis_mock.assert_not_awaited()
+    assert switch.last_collection_status == "success"
+    assert switch.mac_collection_fail_count == 0
+
+
+@pytest.mark.asyncio
+async def test_unchanged_output_without_stored_rows_is_parsed_and_stored(monkeypatch):
+    collector = NetworkDataCollector()
+    switch = SimpleNamespace(
+        id=7, name="edge-7", ip_address="10.0.0.7", cli_enabled=True, password_encrypted="x",
+        mac_collection_success_count=0, mac_collection_fail_count=0, last_mac_output_hash="abc",
+    )
+    entries = [{"mac_address": "aa:bb:cc:dd:ee:ff", "port_name": "Gi1/0/1", "vlan_id": 10}]
+    monkeypatch.setattr(collector_module.settings, "COLLECTION_SKIP_UNCHANGED_OUTPUT", True)
+    monkeypatch.setattr(collector, "_load_command_templates", AsyncMock(return_value=[]))
+    monkeypatch.setattr(collector, "_build_cli_config", lambda _switch: {})
+    store_mock = AsyncMock()
+    monkeypatch.setattr(collector, "_store_mac_entries_bulk", store_mock)
+    monkeypatch.setattr(
+        collector, "refresh_port_analysis_for_switch", AsyncMock(return_value={"ports_analyzed": 1})
+    )
+    monkeypatch.setattr(collector, "_refresh_unchanged_entries", AsyncMock(return_value=0))
+    monkeypatch.setattr(
+        "services.cli_service.cli_service.parse_captured_output",
+        lambda capture, data_type: entries if capture["output"] == "raw table" and data_type == "mac" else [],
+    )
+
+    async def fake_to_thread(func, ip, config, templates, output_capture):
+        output_capture.update({"content_hash": "abc", "unchanged": True, "output": "raw table"})
+        return []
+
+    monkeypatch.setattr("services.network_data_collector.asyncio.to_thread", fake_to_thread)
+
+    job_stats = {}
+    result = await collector.collect_mac_single_switch(SimpleNamespace(commit=AsyncMock()), switch, job_stats=job_stats)
+
+    assert result == entries
+    store_mock.assert_awaited_once()
+    assert job_stats == {}
+    assert switch.last_collection_status == "success"
+    assert switch.mac_collection_fail_count == 0
+    assert switch.last_mac_output_hash == "abc"
+
+
+@pytest.mark.asyncio
+async def test_refresh_unchanged_only_restamps_rows_older_than_the_restamp_window(monkeypatch):
+    collector = NetworkDataCollector()
+    switch = SimpleNamespace(id=7, last_mac_output_hash="abc")
+    statements = []
+
+    async def execute(statement):
+        statements.append(statement)
+        return SimpleNamespace(scalar=lambda: 12)
+
+    monkeypatch.setattr(collector_module.settings, "COLLECTION_UNCHANGED_RESTAMP_MINUTES", 30)
+    collected_at = datetime(2026, 10, 19, 12, 0)
+
+    refreshed = await collector._refresh_unchanged_entries(SimpleNamespace(execute=execute), switch, "mac", collected_at)
+
+    assert refreshed == 12
+    assert switch.last_mac_output_hash == "abc"
+    update_statement = statements[1]
+    params = update_statement.compile().params
+    assert "last_seen" in str(update_statement.whereclause)
+    assert datetime(2026, 10, 19, 11, 30) in params.values()
@@ -0,0 +1,36 @@
+-- Collector cluster mode: node heartbeats, switch leases and optional site affinity.
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS collector_nodes (
+    node_id VARCHAR(40) PRIMARY KEY,
+    hostname VARCHAR(255),
+    site VARCHAR(50),
+    worker_count INTEGER NOT NULL DEFAULT 0,
+    status VARCHAR(20) NOT NULL DEFAULT 'active',
+    started_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+    last_heartbeat_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS ix_collector_nodes_site ON collector_nodes(site);
+CREATE INDEX IF NOT EXISTS ix_collector_nodes_last_heartbeat_at ON collector_nodes(last_heartbeat_at);
+
+CREATE TABLE IF NOT EXISTS switch_leases (
+    switch_id INTEGER PRIMARY KEY REFERENCES switches(id) ON DELETE CASCADE,
+    node_id VARCHAR(40) NOT NULL,
+    acquired_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+    lease_expires_at TIMESTAMP WITH TIME ZONE NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_switch_leases_node_expires ON switch_leases(node_id, lease_expires_at);
+
+ALTER TABLE switches
+ADD COLUMN IF NOT EXISTS collector_site VARCHAR(50);
+
+CREATE INDEX IF NOT EXISTS ix_switches_collector_site ON switches(collector_site);
+
+COMMENT ON TABLE collector_nodes IS 'Collector service instances registered for cluster mode (heartbeat registry)';
+COMMENT ON TABLE switch_leases IS 'Time-bounded assignment of switches to collector nodes';
+COMMENT ON COLUMN switches.collector_site IS 'Optional site label; switches prefer collector nodes with the same site';
+
+COMMIT;
@@ -0,0 +1,34 @@
+-- Opt-in archive of raw ARP/MAC command output for offline re-parsing.
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS raw_output_blobs (
+    content_hash VARCHAR(64) PRIMARY KEY,
+    encoding VARCHAR(10) NOT NULL,
+    data BYTEA NOT NULL,
+    size_bytes INTEGER NOT NULL,
+    compressed_bytes INTEGER NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS raw_output_captures (
+    id SERIAL PRIMARY KEY,
+    switch_id INTEGER NOT NULL REFERENCES switches(id) ON DELETE CASCADE,
+    command_type VARCHAR(10) NOT NULL,
+    command VARCHAR(255) NOT NULL,
+    parser_type VARCHAR(50),
+    device_type VARCHAR(50),
+    content_hash VARCHAR(64) NOT NULL REFERENCES raw_output_blobs(content_hash),
+    entries_parsed INTEGER NOT NULL DEFAULT 0,
+    collected_at TIMESTAMP WITH TIME ZONE NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS ix_raw_output_captures_content_hash ON raw_output_captures(content_hash);
+CREATE INDEX IF NOT EXISTS ix_raw_output_captures_collected_at ON raw_output_captures(collected_at);
+CREATE INDEX IF NOT EXISTS idx_raw_output_captures_switch_type_time
+    ON raw_output_captures(switch_id, command_type, collected_at);
+
+COMMENT ON TABLE raw_output_blobs IS 'Compressed raw CLI output deduplicated by sha256 content hash';
+COMMENT ON TABLE raw_output_captures IS 'Archived ARP/MAC command runs per switch, used for offline re-parse';
+
+COMMIT;
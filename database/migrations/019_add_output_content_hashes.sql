@@ -0,0 +1,17 @@
+-- Unchanged-output short-circuit: hash of the last stored ARP/MAC output per switch
+-- and the number of unchanged outputs seen by each collection job.
+
+BEGIN;
+
+ALTER TABLE switches
+ADD COLUMN IF NOT EXISTS last_arp_output_hash VARCHAR(64),
+ADD COLUMN IF NOT EXISTS last_mac_output_hash VARCHAR(64);
+
+ALTER TABLE collection_jobs
+ADD COLUMN IF NOT EXISTS unchanged_outputs INTEGER DEFAULT 0;
+
+COMMENT ON COLUMN switches.last_arp_output_hash IS 'sha256 of the normalised ARP output last parsed and stored';
+COMMENT ON COLUMN switches.last_mac_output_hash IS 'sha256 of the normalised MAC output last parsed and stored';
+COMMENT ON COLUMN collection_jobs.unchanged_outputs IS 'ARP/MAC outputs identical to the stored ones (parse and store skipped)';
+
+COMMIT;
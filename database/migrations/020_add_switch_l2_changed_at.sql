@@ -0,0 +1,12 @@
+-- Incremental IP location matching: when a switch's ARP/MAC data or port lookup policy last changed.
+
+BEGIN;
+
+ALTER TABLE switches
+ADD COLUMN IF NOT EXISTS l2_changed_at TIMESTAMP WITH TIME ZONE;
+
+CREATE INDEX IF NOT EXISTS ix_switches_l2_changed_at ON switches(l2_changed_at);
+
+COMMENT ON COLUMN switches.l2_changed_at IS 'Last ARP/MAC rewrite or port lookup policy change; drives incremental IP location refresh';
+
+COMMIT;
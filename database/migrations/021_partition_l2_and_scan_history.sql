@@ -0,0 +1,133 @@
+-- Daily range partitions for arp_table / mac_table (last_seen) and
+-- ip_scan_history (scanned_at), so retention drops whole partitions instead of
+-- deleting rows in batches.
+--
+-- Existing rows are not copied. Each table is renamed to <table>_legacy and
+-- attached to the new partitioned parent as the partition (MINVALUE, bound).
+-- A validated CHECK constraint and a (id, time) unique index built
+-- CONCURRENTLY beforehand let ATTACH skip the table scan and reuse the
+-- existing indexes, so every step below only holds short locks. The legacy
+-- partition is dropped by normal retention once its bound is past the window.
+-- The application (services/partition_manager.py) creates future daily
+-- partitions; the default partition only catches rows if that falls behind.
+--
+-- Run with psql as a script (not inside an outer transaction): the
+-- CONCURRENTLY statements cannot run in a transaction block. Run it once.
+
+-- Bound of the legacy partitions: start of the day after tomorrow (UTC), far
+-- enough ahead that no write reaches it before step 3 completes.
+SELECT set_config(
+    'iptrack.partition_bound',
+    ((date_trunc('day', now() AT TIME ZONE 'UTC') + interval '2 days') AT TIME ZONE 'UTC')::text,
+    false
+);
+
+-- Step 1: unique (id, time) indexes that become the partition primary keys
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS arp_table_partition_key ON arp_table (id, last_seen);
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS mac_table_partition_key ON mac_table (id, last_seen);
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS ip_scan_history_partition_key ON ip_scan_history (id, scanned_at);
+
+-- Step 2: CHECK constraints matching the legacy partition bounds
+-- (NOT VALID + VALIDATE does not block reads or writes while validating)
+DO $$
+DECLARE
+    bound text := current_setting('iptrack.partition_bound');
+BEGIN
+    EXECUTE format(
+        'ALTER TABLE arp_table ADD CONSTRAINT arp_table_legacy_bound CHECK (last_seen < %L::timestamptz) NOT VALID', bound);
+    EXECUTE format(
+        'ALTER TABLE mac_table ADD CONSTRAINT mac_table_legacy_bound CHECK (last_seen < %L::timestamptz) NOT VALID', bound);
+    EXECUTE format(
+        'ALTER TABLE ip_scan_history ADD CONSTRAINT ip_scan_history_legacy_bound CHECK (scanned_at < %L::timestamptz) NOT VALID', bound);
+END $$;
+
+ALTER TABLE arp_table VALIDATE CONSTRAINT arp_table_legacy_bound;
+ALTER TABLE mac_table VALIDATE CONSTRAINT mac_table_legacy_bound;
+ALTER TABLE ip_scan_history VALIDATE CONSTRAINT ip_scan_history_legacy_bound;
+
+-- Step 3: swap in partitioned parents (metadata only)
+BEGIN;
+
+CREATE OR REPLACE FUNCTION pg_temp.convert_to_time_partitions(tbl text, col text, premake_days integer)
+RETURNS void AS $$
+DECLARE
+    legacy text := tbl || '_legacy';
+    bound timestamptz := current_setting('iptrack.partition_bound')::timestamptz;
+    seq text := pg_get_serial_sequence(tbl, 'id');
+    index_defs text[];
+    rec record;
+    day_start timestamptz;
+BEGIN
+    IF (SELECT relkind FROM pg_class WHERE oid = to_regclass(tbl)) = 'p' THEN
+        RAISE NOTICE '% is already partitioned, skipping', tbl;
+        RETURN;
+    END IF;
+
+    -- Secondary index definitions, read while they still name the original table
+    SELECT array_agg(pg_get_indexdef(i.indexrelid))
+    INTO index_defs
+    FROM pg_index i
+    JOIN pg_class c ON c.oid = i.indexrelid
+    WHERE i.indrelid = to_regclass(tbl)
+      AND NOT i.indisprimary
+      AND c.relname <> tbl || '_partition_key';
+
+    EXECUTE format('ALTER TABLE %I RENAME TO %I', tbl, legacy);
+    FOR rec IN
+        SELECT conname FROM pg_constraint WHERE conrelid = to_regclass(legacy) AND contype = 'p'
+    LOOP
+        EXECUTE format('ALTER TABLE %I RENAME CONSTRAINT %I TO %I', legacy, rec.conname, legacy || '_pkey');
+    END LOOP;
+    FOR rec IN
+        SELECT c.relname
+        FROM pg_index i
+        JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE i.indrelid = to_regclass(legacy)
+          AND NOT i.indisprimary
+    LOOP
+        EXECUTE format('ALTER INDEX %I RENAME TO %I', rec.relname, left(rec.relname, 56) || '_legacy');
+    END LOOP;
+
+    EXECUTE format('CREATE TABLE %I (LIKE %I INCLUDING DEFAULTS) PARTITION BY RANGE (%I)', tbl, legacy, col);
+    EXECUTE format('ALTER TABLE %I ADD CONSTRAINT %I PRIMARY KEY (id, %I)', tbl, tbl || '_pkey', col);
+    IF seq IS NOT NULL THEN
+        EXECUTE format('ALTER SEQUENCE %s OWNED BY %I.id', seq, tbl);
+    END IF;
+    FOR rec IN
+        SELECT conname, pg_get_constraintdef(oid) AS def
+        FROM pg_constraint
+        WHERE conrelid = to_regclass(legacy) AND contype = 'f'
+    LOOP
+        EXECUTE format('ALTER TABLE %I ADD CONSTRAINT %I %s', tbl, rec.conname, rec.def);
+    END LOOP;
+    IF index_defs IS NOT NULL THEN
+        FOR i IN 1 .. array_length(index_defs, 1) LOOP
+            EXECUTE index_defs[i];
+        END LOOP;
+    END IF;
+
+    -- Matching indexes and foreign keys of the legacy table are attached, not rebuilt;
+    -- the validated CHECK constraint proves the bound without a scan.
+    EXECUTE format('ALTER TABLE %I ATTACH PARTITION %I FOR VALUES FROM (MINVALUE) TO (%L)', tbl, legacy, bound);
+
+    FOR d IN 0 .. premake_days LOOP
+        day_start := bound + make_interval(days => d);
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+            tbl || '_p' || to_char(day_start AT TIME ZONE 'UTC', 'YYYYMMDD'),
+            tbl, day_start, day_start + interval '1 day'
+        );
+    END LOOP;
+    EXECUTE format('CREATE TABLE %I PARTITION OF %I DEFAULT', tbl || '_default', tbl);
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT pg_temp.convert_to_time_partitions('arp_table', 'last_seen', 7);
+SELECT pg_temp.convert_to_time_partitions('mac_table', 'last_seen', 7);
+SELECT pg_temp.convert_to_time_partitions('ip_scan_history', 'scanned_at', 7);
+
+COMMENT ON TABLE arp_table IS 'ARP entries, daily range partitions on last_seen (see partition_manager)';
+COMMENT ON TABLE mac_table IS 'MAC entries, daily range partitions on last_seen (see partition_manager)';
+COMMENT ON TABLE ip_scan_history IS 'IP scan history, daily range partitions on scanned_at (see partition_manager)';
+
+COMMIT;
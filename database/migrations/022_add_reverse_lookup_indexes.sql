@@ -0,0 +1,23 @@
+-- Composite indexes for the reverse lookup APIs (services/reverse_lookup.py):
+-- MAC -> IPs on arp_table, VLAN -> endpoints on mac_table, and case-insensitive
+-- exact/prefix hostname search on ip_addresses. Port -> MACs already uses
+-- idx_mac_switch_port (switch_id, port_name).
+--
+-- Run with psql as a script (not inside an outer transaction): the
+-- ip_addresses indexes are built CONCURRENTLY. arp_table and mac_table are
+-- partitioned (migration 021) and hold only current collection data, so their
+-- indexes are created on the parent, which builds them on every partition.
+
+CREATE INDEX IF NOT EXISTS idx_arp_mac_ip ON arp_table (mac_address, ip_address, last_seen);
+CREATE INDEX IF NOT EXISTS idx_mac_vlan_switch_port ON mac_table (vlan_id, switch_id, port_name);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_ip_addresses_hostname_lower
+    ON ip_addresses (lower(hostname) text_pattern_ops);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_ip_addresses_dns_name_lower
+    ON ip_addresses (lower(dns_name) text_pattern_ops);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_ip_addresses_system_name_lower
+    ON ip_addresses (lower(system_name) text_pattern_ops);
+
+ANALYZE arp_table;
+ANALYZE mac_table;
+ANALYZE ip_addresses;
@@ -14,7 +14,7 @@ export interface IPLookupResult {
   port_name?: string
   vlan_id?: number
   query_time_ms: number
-  query_mode?: string  // 'cache', 'realtime', 'auto_fallback'
+  query_mode?: string  // 'cache', 'hybrid', 'realtime'
   data_age_seconds?: number  // How old is the cached data
   last_seen?: string  // When was the data last collected
   message?: string
@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+Benchmark switch collection throughput against the local fake-switch fleet.
+
+Two modes:
+  cli  - drive cli_service.collect_mac_table_cli / collect_arp_table_cli
+         directly from a thread pool (no database required)
+  pool - register the fleet as switches, enqueue collection jobs and let a
+         CollectionWorkerPool run full cycles against PostgreSQL
+
+Both report switches/min plus job duration percentiles and failure counts.
+
+Usage examples:
+  PYTHONPATH=backend/src python scripts/benchmark_collection.py --mode cli --switches 100 --workers 20
+  PYTHONPATH=backend/src python scripts/benchmark_collection.py --mode pool --switches 300 \\
+      --workers 10 --cycles 2 --transport telnet --command-latency-ms 200
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+BACKEND_SRC = REPO_ROOT / "backend" / "src"
+
+if str(BACKEND_SRC) not in sys.path:
+    sys.path.insert(0, str(BACKEND_SRC))
+
+# Some operator environments override DEBUG with non-boolean values such as
+# "release", which breaks pydantic settings parsing. Force a safe default here.
+os.environ["DEBUG"] = os.environ.get("DEBUG", "false").lower() if os.environ.get("DEBUG", "").lower() in {"true", "false", "1", "0"} else "false"
+
+from fake_switch_simulator import (  # noqa: E402
+    FakeSwitchFleet,
+    add_simulator_arguments,
+    build_simulator_config,
+)
+from core.security import encrypt_password  # noqa: E402
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100.0 * (len(ordered) - 1))))
+    return round(ordered[index], 3)
+
+
+def _summarize(label: str, elapsed: float, durations: list[float], succeeded: int, failed: int, extra: dict) -> dict:
+    total = succeeded + failed
+    return {
+        "mode": label,
+        "switches_attempted": total,
+        "succeeded": succeeded,
+        "failed": failed,
+        "elapsed_seconds": round(elapsed, 2),
+        "switches_per_min": round(total / elapsed * 60, 1) if elapsed else 0.0,
+        "successful_switches_per_min": round(succeeded / elapsed * 60, 1) if elapsed else 0.0,
+        "duration_p50_seconds": _percentile(durations, 50),
+        "duration_p95_seconds": _percentile(durations, 95),
+        "duration_mean_seconds": round(statistics.fmean(durations), 3) if durations else 0.0,
+        **extra,
+    }
+
+
+# ======================================================================
+# cli mode
+# ======================================================================
+
+def _collect_one(entry: dict, password_encrypted: str, enable_encrypted: str) -> tuple[bool, float, int, int]:
+    from services.cli_service import cli_service
+
+    switch_config = {
+        "username": entry["username"],
+        "password_encrypted": password_encrypted,
+        "vendor": entry["vendor"],
+        "model": entry["model"],
+        "name": entry["name"],
+        "cli_transport": entry["cli_transport"],
+        "ssh_port": entry["ssh_port"],
+        "connection_timeout": 20,
+        "enable_password_encrypted": enable_encrypted,
+    }
+    started = time.perf_counter()
+    mac_entries = arp_entries = []
+    try:
+        mac_entries = cli_service.collect_mac_table_cli(entry["ip_address"], switch_config, []) or []
+        arp_entries = cli_service.collect_arp_table_cli(entry["ip_address"], switch_config, []) or []
+    except Exception:
+        pass
+    duration = time.perf_counter() - started
+    ok = bool(mac_entries) or bool(arp_entries)
+    return ok, duration, len(mac_entries), len(arp_entries)
+
+
+def run_cli_mode(fleet: FakeSwitchFleet, workers: int, cycles: int) -> dict:
+    inventory = fleet.inventory()
+    password_encrypted = encrypt_password(fleet.config.password)
+    enable_encrypted = encrypt_password(fleet.config.enable_password)
+
+    durations: list[float] = []
+    succeeded = failed = mac_total = arp_total = 0
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for _ in range(cycles):
+            futures = [
+                executor.submit(_collect_one, entry, password_encrypted, enable_encrypted)
+                for entry in inventory
+            ]
+            for future in futures:
+                ok, duration, mac_count, arp_count = future.result()
+                durations.append(duration)
+                mac_total += mac_count
+                arp_total += arp_count
+                if ok:
+                    succeeded += 1
+                else:
+                    failed += 1
+    elapsed = time.perf_counter() - started
+
+    return _summarize(
+        "cli", elapsed, durations, succeeded, failed,
+        {"workers": workers, "cycles": cycles, "mac_entries": mac_total, "arp_entries": arp_total},
+    )
+
+
+# ======================================================================
+# pool mode
+# ======================================================================
+
+async def _register_switches(db, fleet: FakeSwitchFleet) -> list:
+    from sqlalchemy import delete, select
+    from models.collection_job import CollectionJob
+    from models.switch import Switch
+
+    prefix = f"{fleet.config.name_prefix}-%"
+    stale_ids = select(Switch.id).where(Switch.name.like(prefix))
+    await db.execute(delete(CollectionJob).where(CollectionJob.switch_id.in_(stale_ids)))
+    await db.execute(delete(Switch).where(Switch.name.like(prefix)))
+    await db.commit()
+
+    password_encrypted = encrypt_password(fleet.config.password)
+    enable_encrypted = encrypt_password(fleet.config.enable_password)
+    switches = []
+    for entry in fleet.inventory():
+        switch = Switch(
+            name=entry["name"],
+            ip_address=entry["ip_address"],
+            vendor=entry["vendor"],
+            model=entry["model"],
+            cli_enabled=True,
+            cli_transport=entry["cli_transport"],
+            ssh_port=entry["ssh_port"],
+            username=entry["username"],
+            password_encrypted=password_encrypted,
+            enable_password_encrypted=enable_encrypted,
+            connection_timeout=20,
+            snmp_enabled=False,
+            enabled=True,
+        )
+        db.add(switch)
+        switches.append(switch)
+    await db.commit()
+    return switches
+
+
+async def _remove_switches(db, fleet: FakeSwitchFleet) -> None:
+    from sqlalchemy import delete, select
+    from models.collection_job import CollectionJob
+    from models.switch import Switch
+
+    prefix = f"{fleet.config.name_prefix}-%"
+    sim_ids = select(Switch.id).where(Switch.name.like(prefix))
+    await db.execute(delete(CollectionJob).where(CollectionJob.switch_id.in_(sim_ids)))
+    await db.execute(delete(Switch).where(Switch.name.like(prefix)))
+    await db.commit()
+
+
+async def run_pool_mode(fleet: FakeSwitchFleet, workers: int, cycles: int, job_type_name: str,
+                        timeout: float, keep_switches: bool) -> dict:
+    from sqlalchemy import func, select
+    from core.database import AsyncSessionLocal
+    from models.collection_job import CollectionJob, JobType, JobStatus
+    from services.collection_worker import CollectionWorkerPool
+
+    job_type = JobType(job_type_name)
+    pool = CollectionWorkerPool(max_workers=workers)
+
+    async with AsyncSessionLocal() as db:
+        switches = await _register_switches(db, fleet)
+
+    await pool.start()
+    batch_ids = []
+    started = time.perf_counter()
+    timed_out = False
+    try:
+        for cycle in range(cycles):
+            batch_id = f"bench-{int(time.time())}-{cycle}"
+            batch_ids.append(batch_id)
+            async with AsyncSessionLocal() as db:
+                await pool.create_jobs(db, switches, job_type, batch_id=batch_id, priority=20)
+
+            while True:
+                async with AsyncSessionLocal() as db:
+                    active = await db.scalar(
+                        select(func.count(CollectionJob.id)).where(
+                            CollectionJob.batch_id == batch_id,
+                            CollectionJob.status.in_([JobStatus.PENDING.value, JobStatus.RUNNING.value])
+                        )
+                    )
+                if not active:
+                    break
+                if time.perf_counter() - started > timeout:
+                    timed_out = True
+                    break
+                await asyncio.sleep(0.5)
+            if timed_out:
+                break
+    finally:
+        elapsed = time.perf_counter() - started
+        await pool.stop()
+
+    async with AsyncSessionLocal() as db:
+        rows = (await db.execute(
+            select(CollectionJob.status, CollectionJob.duration_seconds, CollectionJob.entries_collected)
+            .where(CollectionJob.batch_id.in_(batch_ids))
+        )).all()
+        if not keep_switches:
+            await _remove_switches(db, fleet)
+
+    durations = [row.duration_seconds for row in rows if row.duration_seconds is not None]
+    status_counts: dict[str, int] = {}
+    for row in rows:
+        status_counts[row.status] = status_counts.get(row.status, 0) + 1
+    succeeded = status_counts.get(JobStatus.SUCCESS.value, 0)
+    finished = sum(count for status, count in status_counts.items()
+                   if status not in (JobStatus.PENDING.value, JobStatus.RUNNING.value))
+
+    return _summarize(
+        "pool", elapsed, durations, succeeded, finished - succeeded,
+        {
+            "workers": workers,
+            "cycles": cycles,
+            "job_type": job_type.value,
+            "status_counts": status_counts,
+            "entries_collected": sum(row.entries_collected or 0 for row in rows),
+            "timed_out": timed_out,
+        },
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_simulator_arguments(parser)
+    parser.add_argument("--mode", choices=["cli", "pool"], default="cli")
+    parser.add_argument("--workers", type=int, default=10, help="Concurrent collectors")
+    parser.add_argument("--cycles", type=int, default=1, help="Full collection cycles to run")
+    parser.add_argument("--job-type", choices=["all", "mac", "arp"], default="all",
+                        help="Collection job type for pool mode")
+    parser.add_argument("--timeout", type=float, default=3600, help="Abort pool mode after this many seconds")
+    parser.add_argument("--keep-switches", action="store_true",
+                        help="Keep the registered fake switches after a pool run")
+    args = parser.parse_args()
+
+    fleet = FakeSwitchFleet(build_simulator_config(args))
+    fleet.start()
+    try:
+        if args.mode == "cli":
+            summary = run_cli_mode(fleet, args.workers, args.cycles)
+        else:
+            summary = asyncio.run(run_pool_mode(
+                fleet, args.workers, args.cycles, args.job_type, args.timeout, args.keep_switches
+            ))
+    finally:
+        fleet.stop()
+
+    summary["simulator"] = fleet.stats
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Benchmark the database-heavy service paths and their API endpoints.
+
+Meant to run against a database filled by generate_synthetic_dataset.py so
+results are comparable between branches. Each case is warmed up, then timed
+--repeat times; the report holds min/p50/p95/mean/max in milliseconds plus
+row counts and the git commit it was produced from.
+
+Cases:
+  match_ip_locations   network_data_collector._match_ip_locations
+  analyze_all_ports    network_data_collector._analyze_all_ports (rolled back)
+  dashboard_stats      ipam_service.get_dashboard_stats
+  list_ip_*            ipam_service.list_ip_addresses (first page, search,
+                       subnet filter, deep offset)
+  lookup_ip            ip_lookup_service.lookup_ip over sampled known IPs
+  api_*                the same paths through the FastAPI app (in-process
+                       ASGI transport, no network)
+
+Usage examples:
+  PYTHONPATH=backend/src python scripts/benchmark_db.py --output before.json
+  PYTHONPATH=backend/src python scripts/benchmark_db.py --compare before.json --output after.json
+  PYTHONPATH=backend/src python scripts/benchmark_db.py --only lookup_ip,api_lookup_ip --repeat 50
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Awaitable, Callable
+
+from sqlalchemy import text
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+BACKEND_SRC = REPO_ROOT / "backend" / "src"
+
+if str(BACKEND_SRC) not in sys.path:
+    sys.path.insert(0, str(BACKEND_SRC))
+
+# Some operator environments override DEBUG with non-boolean values such as
+# "release", which breaks pydantic settings parsing. Force a safe default here.
+os.environ["DEBUG"] = os.environ.get("DEBUG", "false").lower() if os.environ.get("DEBUG", "").lower() in {"true", "false", "1", "0"} else "false"
+
+from core.config import settings  # noqa: E402
+from core.database import AsyncSessionLocal  # noqa: E402
+
+
+COUNTED_TABLES = (
+    "switches", "arp_table", "mac_table", "port_analysis", "ip_location",
+    "ip_subnets", "ip_addresses", "ip_scan_history", "query_history",
+)
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100.0 * (len(ordered) - 1))))
+    return round(ordered[index], 2)
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+async def _table_counts(db) -> dict:
+    counts = {}
+    for table in COUNTED_TABLES:
+        try:
+            counts[table] = await db.scalar(text(f"SELECT count(*) FROM {table}"))
+        except Exception:
+            await db.rollback()
+            counts[table] = None
+    return counts
+
+
+async def _sample_ips(db, sample_size: int) -> list[str]:
+    rows = (await db.execute(
+        text("SELECT host(ip_address) FROM arp_table TABLESAMPLE SYSTEM (5) LIMIT :n"),
+        {"n": sample_size},
+    )).scalars().all()
+    if not rows:
+        rows = (await db.execute(
+            text("SELECT host(ip_address) FROM arp_table LIMIT :n"), {"n": sample_size}
+        )).scalars().all()
+    return list(rows)
+
+
+async def _sample_subnet_id(db) -> int | None:
+    return await db.scalar(text(
+        "SELECT subnet_id FROM ip_addresses GROUP BY subnet_id ORDER BY count(*) DESC LIMIT 1"
+    ))
+
+
+async def _time_case(
+    name: str,
+    run_once: Callable[[int], Awaitable[None]],
+    repeat: int,
+    warmup: int,
+) -> dict:
+    timings: list[float] = []
+    error = None
+    for i in range(warmup):
+        try:
+            await run_once(i)
+        except Exception as exc:
+            error = f"{type(exc).__name__}: {exc}"
+            break
+    for i in range(repeat if error is None else 0):
+        started = time.perf_counter()
+        try:
+            await run_once(i)
+        except Exception as exc:
+            error = f"{type(exc).__name__}: {exc}"
+            break
+        timings.append((time.perf_counter() - started) * 1000)
+
+    result = {
+        "runs": len(timings),
+        "min_ms": round(min(timings), 2) if timings else None,
+        "p50_ms": _percentile(timings, 50),
+        "p95_ms": _percentile(timings, 95),
+        "mean_ms": round(statistics.fmean(timings), 2) if timings else None,
+        "max_ms": round(max(timings), 2) if timings else None,
+    }
+    if error:
+        result["error"] = error
+    print(f"  {name:<28} p50={result['p50_ms']:>9} ms  p95={result['p95_ms']:>9} ms  runs={result['runs']}", flush=True)
+    return result
+
+
+def _build_cases(sample_ips: list[str], subnet_id: int | None, deep_offset: int) -> dict:
+    """Return name -> coroutine factory taking the iteration index."""
+    import httpx
+    from main import app
+    from services.ip_lookup import ip_lookup_service
+    from services.ipam_service import ipam_service
+    from services.network_data_collector import network_data_collector
+
+    api = settings.API_V1_PREFIX
+    transport = httpx.ASGITransport(app=app)
+
+    def _ip(i: int) -> str:
+        return sample_ips[i % len(sample_ips)] if sample_ips else "10.0.0.1"
+
+    async def with_db(fn):
+        async with AsyncSessionLocal() as db:
+            await fn(db)
+
+    async def rolled_back(fn):
+        async with AsyncSessionLocal() as db:
+            try:
+                await fn(db)
+            finally:
+                await db.rollback()
+
+    async def api_call(method: str, path: str, **kwargs):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=300) as client:
+            response = await client.request(method, path, **kwargs)
+            response.raise_for_status()
+
+    cases = {
+        "match_ip_locations": lambda i: with_db(lambda db: network_data_collector._match_ip_locations(db)),
+        "analyze_all_ports": lambda i: rolled_back(lambda db: network_data_collector._analyze_all_ports(db)),
+        "dashboard_stats": lambda i: with_db(lambda db: ipam_service.get_dashboard_stats(db)),
+        "list_ip_first_page": lambda i: with_db(lambda db: ipam_service.list_ip_addresses(db, limit=100)),
+        "list_ip_search": lambda i: with_db(lambda db: ipam_service.list_ip_addresses(db, search="host-1", limit=100)),
+        "list_ip_deep_offset": lambda i: with_db(
+            lambda db: ipam_service.list_ip_addresses(db, skip=deep_offset, limit=100)
+        ),
+        "lookup_ip": lambda i: with_db(lambda db: ip_lookup_service.lookup_ip(db, _ip(i))),
+        "api_dashboard": lambda i: api_call("GET", f"{api}/ipam/dashboard"),
+        "api_list_ip_addresses": lambda i: api_call("GET", f"{api}/ipam/ip-addresses", params={"limit": 100}),
+        "api_list_ip_search": lambda i: api_call(
+            "GET", f"{api}/ipam/ip-addresses", params={"search": "host-1", "limit": 100}
+        ),
+        "api_lookup_ip": lambda i: api_call("POST", f"{api}/lookup/ip", json={"ip_address": _ip(i)}),
+    }
+    if subnet_id is not None:
+        cases["list_ip_subnet"] = lambda i: with_db(
+            lambda db: ipam_service.list_ip_addresses(db, subnet_id=subnet_id, limit=1000)
+        )
+        cases["api_list_ip_subnet"] = lambda i: api_call(
+            "GET", f"{api}/ipam/ip-addresses", params={"subnet_id": subnet_id, "limit": 1000}
+        )
+    return cases
+
+
+def _compare(current: dict, baseline: dict) -> dict:
+    deltas = {}
+    for name, result in current["results"].items():
+        before = baseline.get("results", {}).get(name)
+        if not before or not before.get("p50_ms") or result.get("p50_ms") is None:
+            continue
+        deltas[name] = {
+            "p50_before_ms": before["p50_ms"],
+            "p50_after_ms": result["p50_ms"],
+            "p50_change_pct": round((result["p50_ms"] - before["p50_ms"]) / before["p50_ms"] * 100, 1),
+            "p95_before_ms": before.get("p95_ms"),
+            "p95_after_ms": result.get("p95_ms"),
+        }
+    return deltas
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=10, help="Timed runs per case")
+    parser.add_argument("--warmup", type=int, default=1, help="Untimed runs per case")
+    parser.add_argument("--match-repeat", type=int, default=3,
+                        help="Timed runs for match_ip_locations/analyze_all_ports (slow on large datasets)")
+    parser.add_argument("--sample-ips", type=int, default=200, help="Known IPs sampled for lookup cases")
+    parser.add_argument("--deep-offset", type=int, default=150_000, help="Offset for the deep pagination case")
+    parser.add_argument("--only", default="", help="Comma-separated case names to run")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    parser.add_argument("--compare", help="Baseline report to compute p50/p95 deltas against")
+    args = parser.parse_args()
+
+    async with AsyncSessionLocal() as db:
+        counts = await _table_counts(db)
+        sample_ips = await _sample_ips(db, args.sample_ips)
+        subnet_id = await _sample_subnet_id(db)
+
+    cases = _build_cases(sample_ips, subnet_id, args.deep_offset)
+    selected = [name.strip() for name in args.only.split(",") if name.strip()] or list(cases)
+    unknown = [name for name in selected if name not in cases]
+    if unknown:
+        parser.error(f"unknown case(s): {', '.join(unknown)}; available: {', '.join(cases)}")
+
+    report = {
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "git_commit": _git_commit(),
+        "database": f"{settings.DATABASE_HOST}:{settings.DATABASE_PORT}/{settings.DATABASE_NAME}",
+        "row_counts": counts,
+        "sampled_ips": len(sample_ips),
+        "repeat": args.repeat,
+        "results": {},
+    }
+
+    for name in selected:
+        repeat = args.match_repeat if name in ("match_ip_locations", "analyze_all_ports") else args.repeat
+        report["results"][name] = await _time_case(name, cases[name], repeat, args.warmup)
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())
+        report["baseline_commit"] = baseline.get("git_commit")
+        report["comparison"] = _compare(report, baseline)
+
+    rendered = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        Path(args.output).write_text(rendered + "\n")
+    print(rendered)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
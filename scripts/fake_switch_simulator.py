@@ -0,0 +1,951 @@
+#!/usr/bin/env python3
+"""
+Local fake-switch fleet for end-to-end collection load tests.
+
+Starts many SSH and/or Telnet endpoints on loopback addresses (127.x.y.z) that
+emulate the login, enable, paging and ARP/MAC command output of every CLI
+parser_type supported by the collector (cisco_ios, cisco_nxos, dell_os10,
+dell_force10, juniper, nokia_7220, nokia_7250). Latency, output size and
+failure injection are configurable so the worker pool can be stressed
+without real hardware.
+
+Usage examples:
+  python scripts/fake_switch_simulator.py --switches 200 --transport ssh
+  python scripts/fake_switch_simulator.py --switches 50 --transport telnet \\
+      --profiles dell_force10,cisco_ios --command-latency-ms 300 --mac-entries 2000
+  python scripts/fake_switch_simulator.py --switches 500 --inventory /tmp/fleet.json \\
+      --fail-connect-rate 0.02 --hang-rate 0.01
+
+The fleet runs until interrupted. Use scripts/benchmark_collection.py to drive
+full collection cycles against it and report switches/min.
+"""
+
+from __future__ import annotations
+
+import argparse
+import ipaddress
+import json
+import random
+import selectors
+import socket
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+try:
+    import paramiko
+except ImportError:  # pragma: no cover - paramiko ships with netmiko
+    paramiko = None
+
+
+# ======================================================================
+# Device profiles
+# ======================================================================
+
+@dataclass(frozen=True)
+class DeviceProfile:
+    """CLI behaviour of one parser_type family."""
+
+    parser_type: str
+    vendor: str
+    model: str
+    user_prompt: str
+    enable_prompt: str
+    requires_enable: bool
+    paging_commands: tuple
+    commands: Dict[str, str]
+    login_prompt: str = "Username: "
+    prompt_prefix: str = ""
+
+
+PROFILES: Dict[str, DeviceProfile] = {
+    'cisco_ios': DeviceProfile(
+        parser_type='cisco_ios',
+        vendor='cisco',
+        model='C2960X-48TS-L',
+        user_prompt='{name}>',
+        enable_prompt='{name}#',
+        requires_enable=True,
+        paging_commands=('terminal length 0',),
+        commands={
+            'show ip arp': 'arp',
+            'show mac address-table': 'mac',
+            'show version': 'version',
+        },
+    ),
+    'cisco_nxos': DeviceProfile(
+        parser_type='cisco_nxos',
+        vendor='cisco',
+        model='N9K-C93180YC-EX',
+        user_prompt='{name}#',
+        enable_prompt='{name}#',
+        requires_enable=False,
+        paging_commands=('terminal length 0',),
+        commands={
+            'show ip arp': 'arp',
+            'show mac address-table': 'mac',
+            'show version': 'version',
+        },
+    ),
+    'dell_os10': DeviceProfile(
+        parser_type='dell_os10',
+        vendor='dell',
+        model='S5248F-ON',
+        user_prompt='{name}#',
+        enable_prompt='{name}#',
+        requires_enable=False,
+        paging_commands=('terminal length 0',),
+        commands={
+            'show arp': 'arp',
+            'show mac-address-table': 'mac',
+            'show mac address-table': 'mac',
+            'show version': 'version',
+        },
+    ),
+    'dell_force10': DeviceProfile(
+        parser_type='dell_force10',
+        vendor='dell',
+        model='S4048-ON',
+        user_prompt='{name}>',
+        enable_prompt='{name}#',
+        requires_enable=True,
+        paging_commands=('terminal length 0',),
+        commands={
+            'show arp': 'arp',
+            'show mac-address-table': 'mac',
+            'show version': 'version',
+        },
+    ),
+    'juniper': DeviceProfile(
+        parser_type='juniper',
+        vendor='juniper',
+        model='EX4300-48T',
+        user_prompt='{username}@{name}>',
+        enable_prompt='{username}@{name}>',
+        requires_enable=False,
+        paging_commands=('set cli screen-length 0',),
+        commands={
+            'show arp': 'arp',
+            'show arp no-resolve': 'arp',
+            'show ethernet-switching table': 'mac',
+            'show version': 'version',
+        },
+        login_prompt='login: ',
+    ),
+    'nokia_7220': DeviceProfile(
+        parser_type='nokia_7220',
+        vendor='alcatel',
+        model='7220 IXR-D2',
+        user_prompt='A:{name}# ',
+        enable_prompt='A:{name}# ',
+        requires_enable=False,
+        paging_commands=('environment more false', 'environment no more'),
+        commands={
+            'show arpnd arp-entries': 'arp',
+            'show network-instance bridge-table mac-table all': 'mac',
+            'show version': 'version',
+        },
+        prompt_prefix='--{ running }--[  ]--\r\n',
+    ),
+    'nokia_7250': DeviceProfile(
+        parser_type='nokia_7250',
+        vendor='alcatel',
+        model='7250 IXR-e2',
+        user_prompt='A:{name}# ',
+        enable_prompt='A:{name}# ',
+        requires_enable=False,
+        paging_commands=('environment more false', 'environment no more', '//environment more false'),
+        commands={
+            'show router arp': 'arp',
+            'show service fdb-mac': 'mac',
+            'show version': 'version',
+            'show system information': 'version',
+        },
+    ),
+}
+
+
+# ======================================================================
+# Synthetic table content
+# ======================================================================
+
+@dataclass
+class SimulatorConfig:
+    """Knobs shared by every endpoint of a fleet."""
+
+    switches: int = 10
+    transport: str = 'ssh'  # ssh, telnet or both
+    profiles: List[str] = field(default_factory=lambda: list(PROFILES))
+    base_ip: str = '127.20.0.1'
+    ssh_port: int = 2222
+    telnet_port: int = 2323
+    username: str = 'admin'
+    password: str = 'admin'
+    enable_password: str = 'enable'
+    name_prefix: str = 'sim'
+    mac_entries: int = 200
+    arp_entries: int = 100
+    access_ports: int = 48
+    page_lines: int = 24
+    login_latency_ms: int = 0
+    command_latency_ms: int = 50
+    jitter_ms: int = 0
+    throughput_kbps: int = 0  # 0 = unlimited
+    fail_connect_rate: float = 0.0
+    auth_fail_rate: float = 0.0
+    hang_rate: float = 0.0
+    truncate_rate: float = 0.0
+    seed: int = 42
+
+
+@dataclass(frozen=True)
+class FakeSwitch:
+    """One simulated device and the address it listens on."""
+
+    index: int
+    name: str
+    ip: str
+    profile: DeviceProfile
+
+    def inventory_entry(self, config: SimulatorConfig) -> Dict:
+        transports = ['ssh', 'telnet'] if config.transport == 'both' else [config.transport]
+        return {
+            'name': self.name,
+            'ip_address': self.ip,
+            'vendor': self.profile.vendor,
+            'model': self.profile.model,
+            'parser_type': self.profile.parser_type,
+            'cli_transport': transports[0],
+            'ssh_port': config.telnet_port if transports[0] == 'telnet' else config.ssh_port,
+            'transports': transports,
+            'username': config.username,
+            'password': config.password,
+            'enable_password': config.enable_password,
+        }
+
+
+def _dot_mac(mac: str) -> str:
+    raw = mac.replace(':', '')
+    return f"{raw[0:4]}.{raw[4:8]}.{raw[8:12]}"
+
+
+class TableGenerator:
+    """
+    Deterministic ARP/MAC content for a switch.
+
+    Entry n of the ARP table and entry n of the MAC table describe the same
+    host, so end-to-end runs exercise IP location matching as well. The first
+    ``access_ports`` MACs sit alone on access ports, the rest are learned on
+    a single uplink.
+    """
+
+    def __init__(self, switch: FakeSwitch, config: SimulatorConfig):
+        self.switch = switch
+        self.config = config
+        stride = max(256, 1 << (max(config.arp_entries, config.mac_entries, 1) - 1).bit_length())
+        self._ip_base = int(ipaddress.IPv4Address('10.0.0.0')) + switch.index * stride
+
+    def mac(self, n: int) -> str:
+        idx = self.switch.index
+        return f"02:{(idx >> 8) & 0xff:02x}:{idx & 0xff:02x}:{(n >> 16) & 0xff:02x}:{(n >> 8) & 0xff:02x}:{n & 0xff:02x}"
+
+    def ip(self, n: int) -> str:
+        return str(ipaddress.IPv4Address(self._ip_base + n + 1))
+
+    @staticmethod
+    def vlan(n: int) -> int:
+        return 100 + (n % 8)
+
+    def port_number(self, n: int) -> Optional[int]:
+        """Access port for entry n, or None when the MAC is on the uplink."""
+        if n < self.config.access_ports:
+            return n + 1
+        return None
+
+    def port_name(self, n: int) -> str:
+        parser_type = self.switch.profile.parser_type
+        port = self.port_number(n)
+        if parser_type == 'cisco_ios':
+            return f"Gi1/0/{port}" if port else "Te1/1/1"
+        if parser_type == 'cisco_nxos':
+            return f"Eth1/{port}" if port else "Eth1/49"
+        if parser_type == 'dell_os10':
+            return f"ethernet1/1/{port}" if port else "ethernet1/1/49"
+        if parser_type == 'dell_force10':
+            return f"Te 1/{port}" if port else "Fo 1/49"
+        if parser_type == 'juniper':
+            return f"ge-0/0/{port}.0" if port else "xe-0/2/0.0"
+        if parser_type == 'nokia_7220':
+            return f"ethernet-1/{port}.0" if port else "ethernet-1/49.0"
+        return f"1/1/c{port}/1" if port else "1/1/c49/1"
+
+    def arp_output(self) -> str:
+        parser_type = self.switch.profile.parser_type
+        count = self.config.arp_entries
+        lines: List[str] = []
+
+        if parser_type == 'cisco_ios':
+            lines.append("Protocol  Address          Age (min)  Hardware Addr   Type   Interface")
+            for n in range(count):
+                lines.append(
+                    f"Internet  {self.ip(n):<15}  {n % 240:>9}   {_dot_mac(self.mac(n))}  ARPA   Vlan{self.vlan(n)}"
+                )
+        elif parser_type == 'cisco_nxos':
+            lines.append("IP ARP Table for context default")
+            lines.append(f"Total number of entries: {count}")
+            lines.append("Address         Age       MAC Address     Interface       Flags")
+            for n in range(count):
+                lines.append(f"{self.ip(n):<15} 00:05:44  {_dot_mac(self.mac(n))}  Vlan{self.vlan(n)}")
+        elif parser_type == 'dell_os10':
+            lines.append("Address         Hardware address    Interface       Egress Interface")
+            lines.append("-" * 69)
+            for n in range(count):
+                lines.append(
+                    f"{self.ip(n):<15} {self.mac(n):<19} vlan{self.vlan(n):<11} {self.port_name(n)}"
+                )
+        elif parser_type == 'dell_force10':
+            lines.append(
+                "Protocol    Address         Age(min)  Hardware Address    Interface      VLAN             CPU"
+            )
+            lines.append("-" * 93)
+            for n in range(count):
+                lines.append(
+                    f"Internet    {self.ip(n):<15} {n % 240:>6}   {self.mac(n):<19} "
+                    f"{self.port_name(n):<14} Vl {self.vlan(n):<13} CP"
+                )
+        elif parser_type == 'juniper':
+            lines.append("MAC Address       Address         Name                      Interface           Flags")
+            for n in range(count):
+                ip = self.ip(n)
+                lines.append(f"{self.mac(n)} {ip:<15} {ip:<25} vlan.{self.vlan(n):<15} none")
+            lines.append(f"Total entries: {count}")
+        elif parser_type == 'nokia_7220':
+            border = "+-------------------+---------------+----------------+--------+---------------------+"
+            lines.append(border)
+            lines.append("| Interface         | Subinterface  | Neighbor       | Origin | Link layer address  |")
+            lines.append(border.replace('-', '='))
+            for n in range(count):
+                lines.append(
+                    f"| irb{self.vlan(n):<15}| 0             | {self.ip(n):<15}| dynamic| {self.mac(n).upper():<20}|"
+                )
+            lines.append(border)
+            lines.append(f"  Total entries : {count}")
+        else:  # nokia_7250
+            lines.append("=" * 79)
+            lines.append("ARP Table (Router: Base)")
+            lines.append("=" * 79)
+            lines.append("IP Address      HW Address        Type   Interface         Age")
+            lines.append("-" * 79)
+            for n in range(count):
+                lines.append(
+                    f"{self.ip(n):<15} {self.mac(n)} Dynamic  ies-vlan{self.vlan(n):<9} 0d 00:00:23"
+                )
+            lines.append("-" * 79)
+            lines.append(f"No. of ARP Entries: {count}")
+
+        return "\r\n".join(lines)
+
+    def mac_output(self) -> str:
+        parser_type = self.switch.profile.parser_type
+        count = self.config.mac_entries
+        lines: List[str] = []
+
+        if parser_type == 'cisco_ios':
+            lines.append("          Mac Address Table")
+            lines.append("-------------------------------------------")
+            lines.append("")
+            lines.append("Vlan    Mac Address       Type        Ports")
+            lines.append("----    -----------       --------    -----")
+            for n in range(count):
+                lines.append(
+                    f"{self.vlan(n):>4}    {_dot_mac(self.mac(n))}    DYNAMIC     {self.port_name(n)}"
+                )
+            lines.append(f"Total Mac Addresses for this criterion: {count}")
+        elif parser_type == 'cisco_nxos':
+            lines.append("Legend: ")
+            lines.append("        * - primary entry, G - Gateway MAC, (R) - Routed MAC, O - Overlay MAC")
+            lines.append("   VLAN     MAC Address      Type      age     Secure NTFY Ports")
+            lines.append("---------+-----------------+--------+---------+------+----+------------------")
+            for n in range(count):
+                lines.append(
+                    f"*  {self.vlan(n):<7} {_dot_mac(self.mac(n))}   dynamic  0         F      F    {self.port_name(n)}"
+                )
+        elif parser_type == 'dell_os10':
+            lines.append("VlanId Mac Address            Type          Interface")
+            lines.append("-" * 81)
+            for n in range(count):
+                lines.append(f"{self.vlan(n):<6} {self.mac(n):<22} dynamic       {self.port_name(n)}")
+        elif parser_type == 'dell_force10':
+            lines.append("Codes: *N - VLT Peer Synced MAC")
+            lines.append("VlanId  Mac Address         Type      Interface")
+            lines.append("------  -----------------   -------   -----------------------")
+            for n in range(count):
+                lines.append(f"{self.vlan(n):<7} {self.mac(n):<19} Dynamic   {self.port_name(n)}")
+        elif parser_type == 'juniper':
+            lines.append("MAC flags (S - static MAC, D - dynamic MAC, L - locally learned, P - Persistent static")
+            lines.append("           SE - statistics enabled, NM - non configured MAC, R - remote PE MAC, O - ovsdb MAC)")
+            lines.append("")
+            lines.append(f"Ethernet switching table : {count} entries, {count} learned")
+            lines.append("Routing instance : default-switch")
+            lines.append("    Vlan                MAC                 MAC      Logical                NH        RTR")
+            lines.append("    name                address             flags    interface              Index     ID")
+            for n in range(count):
+                lines.append(
+                    f"    vlan{self.vlan(n):<16} {self.mac(n):<19} D        {self.port_name(n):<22} 0         0"
+                )
+        elif parser_type == 'nokia_7220':
+            by_vlan: Dict[int, List[int]] = {}
+            for n in range(count):
+                by_vlan.setdefault(self.vlan(n), []).append(n)
+            for vlan_id, entries in sorted(by_vlan.items()):
+                lines.append("-" * 97)
+                lines.append(f"Mac-table of network instance macvlan{vlan_id}")
+                lines.append("-" * 97)
+                lines.append("+--------------------+------------------+-----+---------+--------+-------+")
+                lines.append("|      Address       |   Destination    | Dest| Type    | Active | Aging |")
+                lines.append("+====================+==================+=====+=========+========+=======+")
+                for n in entries:
+                    port = self.port_number(n) or 49
+                    lines.append(
+                        f"| {self.mac(n).upper():<18} | {self.port_name(n):<16} | {port:<3} | learnt  | true   | 263   |"
+                    )
+                lines.append("+--------------------+------------------+-----+---------+--------+-------+")
+                lines.append(f"Total Learnt Macs               :   {len(entries)} Total   {len(entries)} Active")
+        else:  # nokia_7250
+            lines.append("=" * 79)
+            lines.append("Service Forwarding Database")
+            lines.append("=" * 79)
+            lines.append("ServId     MAC               Source-Identifier       Type     Last Change")
+            lines.append("           Transport:Tnl-Id                         Age")
+            lines.append("-" * 79)
+            for n in range(count):
+                vlan_id = self.vlan(n)
+                sap = f"sap:{self.port_name(n)}:{vlan_id}"
+                lines.append(f"{vlan_id:<10} {self.mac(n)} {sap:<23} L/30     02/28/26 03:25:47")
+            lines.append("-" * 79)
+            lines.append(f"No. of Entries: {count}")
+
+        return "\r\n".join(lines)
+
+    def version_output(self) -> str:
+        profile = self.switch.profile
+        name = self.switch.name
+        if profile.vendor == 'cisco':
+            return (
+                "Cisco IOS Software, Version 15.2(7)E4, RELEASE SOFTWARE (fc2)\r\n"
+                f"{name} uptime is 12 weeks, 3 days, 4 hours\r\n"
+                f"cisco {profile.model} (APM86XXX) processor with 524288K bytes of memory.\r\n"
+                f"Model number : {profile.model}"
+            )
+        if profile.vendor == 'juniper':
+            return f"Hostname: {name}\r\nModel: {profile.model}\r\nJunos: 21.4R3.15"
+        if profile.vendor == 'dell':
+            return (
+                f"Dell EMC Networking OS10 Enterprise\r\nOS Version: 10.5.4.0\r\n"
+                f"System Type: {profile.model}\r\nHostname: {name}"
+            )
+        return f"System Name : {name}\r\nSystem Type : {profile.model}\r\nSystem Version : 23.10.R1"
+
+
+# ======================================================================
+# Session emulation (transport independent)
+# ======================================================================
+
+class _ConnectionClosed(Exception):
+    pass
+
+
+class _ByteReader:
+    """Buffered reader over a recv callable, optionally filtering Telnet IAC sequences."""
+
+    IAC, SB, SE = 255, 250, 240
+
+    def __init__(self, recv: Callable[[int], bytes], telnet: bool = False):
+        self._recv = recv
+        self._telnet = telnet
+        self._buffer = bytearray()
+        self._iac_state = 0  # 0 normal, 1 after IAC, 2 option byte, 3 in subnegotiation
+
+    def _fill(self) -> None:
+        data = self._recv(4096)
+        if not data:
+            raise _ConnectionClosed()
+        if not self._telnet:
+            self._buffer.extend(data)
+            return
+        for byte in data:
+            if self._iac_state == 0:
+                if byte == self.IAC:
+                    self._iac_state = 1
+                else:
+                    self._buffer.append(byte)
+            elif self._iac_state == 1:
+                if byte == self.IAC:
+                    self._buffer.append(byte)
+                    self._iac_state = 0
+                elif byte in (251, 252, 253, 254):
+                    self._iac_state = 2
+                elif byte == self.SB:
+                    self._iac_state = 3
+                else:
+                    self._iac_state = 0
+            elif self._iac_state == 2:
+                self._iac_state = 0
+            elif byte == self.SE:
+                self._iac_state = 0
+
+    def read_byte(self) -> int:
+        while not self._buffer:
+            self._fill()
+        return self._buffer.pop(0)
+
+    def read_line(self) -> str:
+        while True:
+            for terminator in (b'\r', b'\n'):
+                pos = self._buffer.find(terminator)
+                if pos >= 0:
+                    line = bytes(self._buffer[:pos])
+                    del self._buffer[:pos + 1]
+                    # Swallow the second half of CRLF / CR NUL
+                    if terminator == b'\r' and self._buffer[:1] in (b'\n', b'\x00'):
+                        del self._buffer[:1]
+                    return line.decode('utf-8', errors='replace')
+            self._fill()
+
+
+class FakeSwitchSession:
+    """Line-oriented CLI of one fake switch connected to one client."""
+
+    def __init__(
+        self,
+        switch: FakeSwitch,
+        config: SimulatorConfig,
+        send: Callable[[bytes], None],
+        reader: _ByteReader,
+        rng: random.Random,
+        stats: Optional[Dict[str, int]] = None,
+    ):
+        self.switch = switch
+        self.profile = switch.profile
+        self.config = config
+        self._send = send
+        self._reader = reader
+        self._rng = rng
+        self.enabled = not self.profile.requires_enable
+        self.paging = True
+        self.tables = TableGenerator(switch, config)
+        self._stats = stats if stats is not None else {}
+
+    # -- helpers --------------------------------------------------------
+
+    def _write(self, text: str) -> None:
+        self._send(text.encode('utf-8'))
+
+    def _sleep_ms(self, base_ms: int) -> None:
+        delay = base_ms + (self._rng.uniform(0, self.config.jitter_ms) if self.config.jitter_ms else 0)
+        if delay > 0:
+            time.sleep(delay / 1000.0)
+
+    def prompt(self) -> str:
+        template = self.profile.enable_prompt if self.enabled else self.profile.user_prompt
+        prompt = template.format(name=self.switch.name, username=self.config.username)
+        return f"{self.profile.prompt_prefix}{prompt}"
+
+    def _stream(self, text: str) -> None:
+        """Send output honouring the throughput limit."""
+        data = text.encode('utf-8')
+        if not self.config.throughput_kbps:
+            self._send(data)
+            return
+        chunk = 4096
+        seconds_per_chunk = chunk / (self.config.throughput_kbps * 128.0)
+        for offset in range(0, len(data), chunk):
+            self._send(data[offset:offset + chunk])
+            time.sleep(seconds_per_chunk)
+
+    def _emit(self, output: str) -> None:
+        if self._rng.random() < self.config.truncate_rate:
+            output = output[: max(0, len(output) // 3)]
+
+        lines = output.split('\r\n')
+        if not self.paging or len(lines) <= self.config.page_lines:
+            self._stream(output + '\r\n')
+            return
+
+        page = self.config.page_lines
+        for start in range(0, len(lines), page):
+            self._stream('\r\n'.join(lines[start:start + page]) + '\r\n')
+            if start + page >= len(lines):
+                break
+            self._write(' --More-- ')
+            key = self._reader.read_byte()
+            self._write('\r          \r')
+            if key in (ord('q'), ord('Q')):
+                break
+
+    # -- command handling ----------------------------------------------
+
+    def _normalize(self, command: str) -> str:
+        command = command.split('|', 1)[0]
+        return ' '.join(command.strip().split()).lower()
+
+    def handle_command(self, raw: str) -> bool:
+        """Execute one command line. Returns False when the session should end."""
+        command = self._normalize(raw)
+        if not command:
+            return True
+
+        if command in ('exit', 'logout', 'quit'):
+            return False
+
+        self._stats['commands'] = self._stats.get('commands', 0) + 1
+
+        if self._rng.random() < self.config.hang_rate:
+            # Simulate a wedged device: never answer again.
+            while True:
+                self._reader.read_byte()
+
+        self._sleep_ms(self.config.command_latency_ms)
+
+        if command in ('enable', 'en') and self.profile.requires_enable:
+            if self.config.enable_password:
+                self._write('Password: ')
+                secret = self._reader.read_line()
+                if secret.strip() != self.config.enable_password:
+                    self._write('\r\n% Bad secrets\r\n')
+                    return True
+                self._write('\r\n')
+            self.enabled = True
+            return True
+
+        if command in {c.lower() for c in self.profile.paging_commands} or command.startswith('terminal length'):
+            self.paging = False
+            if command.startswith('set cli screen-length'):
+                self._write(f"Screen length set to {command.rsplit(' ', 1)[-1]}\r\n")
+            return True
+
+        if command.startswith('set cli screen-width'):
+            self._write(f"Screen width set to {command.rsplit(' ', 1)[-1]}\r\n")
+            return True
+
+        if command.startswith(('terminal ', 'set cli ', 'environment ', '//environment ')):
+            return True
+
+        kind = self.profile.commands.get(command)
+        if kind is None and command.startswith('show version'):
+            kind = 'version'
+
+        if kind is None:
+            if command.startswith('show'):
+                self._write("% Invalid input detected at '^' marker.\r\n")
+            return True
+
+        if self.profile.requires_enable and not self.enabled and kind != 'version':
+            self._write("% Invalid input detected at '^' marker.\r\n")
+            return True
+
+        if kind == 'arp':
+            self._emit(self.tables.arp_output())
+        elif kind == 'mac':
+            self._emit(self.tables.mac_output())
+        else:
+            self._emit(self.tables.version_output())
+        return True
+
+    def run_shell(self) -> None:
+        self._write(f"\r\n{self.prompt()}")
+        while True:
+            line = self._reader.read_line()
+            # Echo the command the way an interactive terminal does.
+            self._write(f"{line}\r\n")
+            if not self.handle_command(line):
+                return
+            self._write(self.prompt())
+
+
+# ======================================================================
+# Transports
+# ======================================================================
+
+class _SSHServer(paramiko.ServerInterface if paramiko else object):
+    def __init__(self, config: SimulatorConfig, reject: bool):
+        self.config = config
+        self.reject = reject
+        self.shell_ready = threading.Event()
+
+    def get_allowed_auths(self, username):
+        return 'password'
+
+    def check_auth_password(self, username, password):
+        if not self.reject and username == self.config.username and password == self.config.password:
+            return paramiko.AUTH_SUCCESSFUL
+        return paramiko.AUTH_FAILED
+
+    def check_channel_request(self, kind, chanid):
+        if kind == 'session':
+            return paramiko.OPEN_SUCCEEDED
+        return paramiko.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED
+
+    def check_channel_pty_request(self, *args, **kwargs):
+        return True
+
+    def check_channel_shell_request(self, channel):
+        self.shell_ready.set()
+        return True
+
+    def check_channel_window_change_request(self, *args, **kwargs):
+        return True
+
+
+class FakeSwitchFleet:
+    """Owns the listening sockets and connection threads of a simulated fleet."""
+
+    def __init__(self, config: SimulatorConfig):
+        unknown = [p for p in config.profiles if p not in PROFILES]
+        if unknown:
+            raise ValueError(f"Unknown profiles: {', '.join(unknown)}")
+        if config.transport not in ('ssh', 'telnet', 'both'):
+            raise ValueError("transport must be ssh, telnet or both")
+        if config.transport in ('ssh', 'both') and paramiko is None:
+            raise RuntimeError("paramiko is required for the SSH transport")
+
+        self.config = config
+        self.switches = self._build_switches()
+        self._selector = selectors.DefaultSelector()
+        self._sockets: List[socket.socket] = []
+        self._accept_thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+        self._host_key = None
+        self._rng = random.Random(config.seed)
+        self._rng_lock = threading.Lock()
+        self.stats = {'connections': 0, 'refused': 0, 'auth_failed': 0, 'commands': 0}
+
+    def _build_switches(self) -> List[FakeSwitch]:
+        base = int(ipaddress.IPv4Address(self.config.base_ip))
+        switches = []
+        for index in range(self.config.switches):
+            profile = PROFILES[self.config.profiles[index % len(self.config.profiles)]]
+            ip = str(ipaddress.IPv4Address(base + index))
+            name = f"{self.config.name_prefix}-{profile.parser_type.replace('_', '-')}-{index:04d}"
+            switches.append(FakeSwitch(index=index, name=name, ip=ip, profile=profile))
+        return switches
+
+    def inventory(self) -> List[Dict]:
+        return [switch.inventory_entry(self.config) for switch in self.switches]
+
+    def _random(self) -> float:
+        with self._rng_lock:
+            return self._rng.random()
+
+    def start(self) -> None:
+        if self.config.transport in ('ssh', 'both'):
+            self._host_key = paramiko.RSAKey.generate(2048)
+
+        listeners = []
+        if self.config.transport in ('ssh', 'both'):
+            listeners.append(('ssh', self.config.ssh_port))
+        if self.config.transport in ('telnet', 'both'):
+            listeners.append(('telnet', self.config.telnet_port))
+
+        for switch in self.switches:
+            for transport, port in listeners:
+                sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+                sock.bind((switch.ip, port))
+                sock.listen(64)
+                sock.setblocking(False)
+                self._selector.register(sock, selectors.EVENT_READ, (switch, transport))
+                self._sockets.append(sock)
+
+        self._accept_thread = threading.Thread(target=self._accept_loop, name='fake-switch-accept', daemon=True)
+        self._accept_thread.start()
+
+    def stop(self) -> None:
+        self._stopping.set()
+        if self._accept_thread:
+            self._accept_thread.join(timeout=2)
+        for sock in self._sockets:
+            try:
+                self._selector.unregister(sock)
+            except Exception:
+                pass
+            sock.close()
+        self._sockets.clear()
+
+    def _accept_loop(self) -> None:
+        while not self._stopping.is_set():
+            for key, _ in self._selector.select(timeout=0.2):
+                try:
+                    conn, _ = key.fileobj.accept()
+                except (BlockingIOError, OSError):
+                    continue
+                switch, transport = key.data
+                conn.setblocking(True)
+                self.stats['connections'] += 1
+                if self._random() < self.config.fail_connect_rate:
+                    self.stats['refused'] += 1
+                    conn.close()
+                    continue
+                target = self._serve_ssh if transport == 'ssh' else self._serve_telnet
+                threading.Thread(target=target, args=(conn, switch), daemon=True).start()
+
+    def _session_rng(self) -> random.Random:
+        with self._rng_lock:
+            return random.Random(self._rng.getrandbits(32))
+
+    def _sleep_login(self) -> None:
+        if self.config.login_latency_ms:
+            time.sleep(self.config.login_latency_ms / 1000.0)
+
+    def _serve_telnet(self, conn: socket.socket, switch: FakeSwitch) -> None:
+        reader = _ByteReader(conn.recv, telnet=True)
+        send = conn.sendall
+        try:
+            self._sleep_login()
+            reject = self._random() < self.config.auth_fail_rate
+            for _ in range(3):
+                send(f"\r\nUser Access Verification\r\n\r\n{switch.profile.login_prompt}".encode())
+                username = reader.read_line().strip()
+                while not username:
+                    username = reader.read_line().strip()
+                send(b"Password: ")
+                password = reader.read_line().strip()
+                if not reject and username == self.config.username and password == self.config.password:
+                    break
+                self.stats['auth_failed'] += 1
+                send(b"\r\n% Authentication failed\r\n")
+            else:
+                return
+
+            session = FakeSwitchSession(switch, self.config, send, reader, self._session_rng(), self.stats)
+            session.run_shell()
+        except (_ConnectionClosed, OSError):
+            pass
+        finally:
+            conn.close()
+
+    def _serve_ssh(self, conn: socket.socket, switch: FakeSwitch) -> None:
+        transport = paramiko.Transport(conn)
+        transport.add_server_key(self._host_key)
+        server = _SSHServer(self.config, reject=self._random() < self.config.auth_fail_rate)
+        try:
+            self._sleep_login()
+            transport.start_server(server=server)
+            channel = transport.accept(timeout=30)
+            if channel is None:
+                self.stats['auth_failed'] += 1
+                return
+            if not server.shell_ready.wait(timeout=10):
+                return
+
+            reader = _ByteReader(channel.recv)
+            session = FakeSwitchSession(
+                switch, self.config, channel.sendall, reader, self._session_rng(), self.stats
+            )
+            session.run_shell()
+        except (_ConnectionClosed, OSError, EOFError, paramiko.SSHException):
+            pass
+        finally:
+            transport.close()
+
+
+# ======================================================================
+# CLI
+# ======================================================================
+
+def add_simulator_arguments(parser: argparse.ArgumentParser) -> None:
+    """Register fleet options (shared with benchmark_collection.py)."""
+    defaults = SimulatorConfig()
+    group = parser.add_argument_group('fake switch fleet')
+    group.add_argument('--switches', type=int, default=defaults.switches, help='Number of fake switches')
+    group.add_argument('--transport', choices=['ssh', 'telnet', 'both'], default=defaults.transport)
+    group.add_argument('--profiles', default=','.join(defaults.profiles),
+                       help=f"Comma separated parser types ({', '.join(PROFILES)})")
+    group.add_argument('--base-ip', default=defaults.base_ip, help='First loopback address of the fleet')
+    group.add_argument('--ssh-port', type=int, default=defaults.ssh_port)
+    group.add_argument('--telnet-port', type=int, default=defaults.telnet_port)
+    group.add_argument('--username', default=defaults.username)
+    group.add_argument('--password', default=defaults.password)
+    group.add_argument('--enable-password', default=defaults.enable_password)
+    group.add_argument('--name-prefix', default=defaults.name_prefix)
+    group.add_argument('--mac-entries', type=int, default=defaults.mac_entries, help='MAC rows per switch')
+    group.add_argument('--arp-entries', type=int, default=defaults.arp_entries, help='ARP rows per switch')
+    group.add_argument('--access-ports', type=int, default=defaults.access_ports,
+                       help='Single-MAC access ports; remaining MACs are learned on one uplink')
+    group.add_argument('--page-lines', type=int, default=defaults.page_lines,
+                       help='Lines per --More-- page until paging is disabled')
+    group.add_argument('--login-latency-ms', type=int, default=defaults.login_latency_ms)
+    group.add_argument('--command-latency-ms', type=int, default=defaults.command_latency_ms)
+    group.add_argument('--jitter-ms', type=int, default=defaults.jitter_ms)
+    group.add_argument('--throughput-kbps', type=int, default=defaults.throughput_kbps,
+                       help='Output bandwidth per session in KiB/s (0 = unlimited)')
+    group.add_argument('--fail-connect-rate', type=float, default=defaults.fail_connect_rate,
+                       help='Probability that a connection is dropped right after accept')
+    group.add_argument('--auth-fail-rate', type=float, default=defaults.auth_fail_rate,
+                       help='Probability that a login is rejected')
+    group.add_argument('--hang-rate', type=float, default=defaults.hang_rate,
+                       help='Probability that a command never returns')
+    group.add_argument('--truncate-rate', type=float, default=defaults.truncate_rate,
+                       help='Probability that command output is cut short')
+    group.add_argument('--seed', type=int, default=defaults.seed)
+
+
+def build_simulator_config(args: argparse.Namespace) -> SimulatorConfig:
+    return SimulatorConfig(
+        switches=args.switches,
+        transport=args.transport,
+        profiles=[p.strip() for p in args.profiles.split(',') if p.strip()],
+        base_ip=args.base_ip,
+        ssh_port=args.ssh_port,
+        telnet_port=args.telnet_port,
+        username=args.username,
+        password=args.password,
+        enable_password=args.enable_password,
+        name_prefix=args.name_prefix,
+        mac_entries=args.mac_entries,
+        arp_entries=args.arp_entries,
+        access_ports=args.access_ports,
+        page_lines=args.page_lines,
+        login_latency_ms=args.login_latency_ms,
+        command_latency_ms=args.command_latency_ms,
+        jitter_ms=args.jitter_ms,
+        throughput_kbps=args.throughput_kbps,
+        fail_connect_rate=args.fail_connect_rate,
+        auth_fail_rate=args.auth_fail_rate,
+        hang_rate=args.hang_rate,
+        truncate_rate=args.truncate_rate,
+        seed=args.seed,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_simulator_arguments(parser)
+    parser.add_argument('--inventory', help='Write the fleet inventory as JSON to this path')
+    args = parser.parse_args()
+
+    fleet = FakeSwitchFleet(build_simulator_config(args))
+    fleet.start()
+
+    if args.inventory:
+        with open(args.inventory, 'w', encoding='utf-8') as handle:
+            json.dump(fleet.inventory(), handle, indent=2)
+
+    first, last = fleet.switches[0], fleet.switches[-1]
+    print(
+        f"Fake switch fleet running: {len(fleet.switches)} switches "
+        f"({first.ip} .. {last.ip}), transport={args.transport}. Ctrl+C to stop."
+    )
+    try:
+        while True:
+            time.sleep(5)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        fleet.stop()
+        print(json.dumps(fleet.stats, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,406 @@
+#!/usr/bin/env python3
+"""
+Fill a local PostgreSQL database with production-sized synthetic topology data.
+
+Default volume: 2,000 switches, 1M MAC rows, 100k ARP rows, ~200k IPAM
+addresses plus IP scan history, query history and port analysis rows.
+Rows are produced server-side with generate_series, so a full run takes
+seconds to a few minutes rather than hours.
+
+Layout:
+  - the first --core-switches switches are gateways: they hold the ARP table
+    and see every host MAC on a downlink (trunk-like ports)
+  - every host (one per ARP row) sits on an access port of an access switch
+  - the remaining MAC rows are L2-only devices spread over access switches
+  - IPAM subnets are /24s under 10.0.0.0/8; the first --arp-rows addresses are
+    "used" and line up with the ARP/MAC data
+
+All rows are tagged with --prefix (switch, subnet and query-history names) and
+previous synthetic data with the same prefix is purged before generating.
+
+Usage examples:
+  PYTHONPATH=backend/src python scripts/generate_synthetic_dataset.py
+  PYTHONPATH=backend/src python scripts/generate_synthetic_dataset.py --switches 500 --mac-rows 200000
+  PYTHONPATH=backend/src python scripts/generate_synthetic_dataset.py --purge-only
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import sys
+import time
+from pathlib import Path
+
+from sqlalchemy import text
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+BACKEND_SRC = REPO_ROOT / "backend" / "src"
+
+if str(BACKEND_SRC) not in sys.path:
+    sys.path.insert(0, str(BACKEND_SRC))
+
+# Some operator environments override DEBUG with non-boolean values such as
+# "release", which breaks pydantic settings parsing. Force a safe default here.
+os.environ["DEBUG"] = os.environ.get("DEBUG", "false").lower() if os.environ.get("DEBUG", "").lower() in {"true", "false", "1", "0"} else "false"
+
+from core.config import settings  # noqa: E402
+from core.database import AsyncSessionLocal  # noqa: E402
+
+
+# Switch index -> id mapping shared by the row generators.
+SWITCH_MAP_CTE = """
+    sw AS (
+        SELECT id, (row_number() OVER (ORDER BY id) - 1)::int AS idx
+        FROM switches
+        WHERE name LIKE :name_like
+    )
+"""
+
+SUBNET_MAP_CTE = """
+    sn AS (
+        SELECT id, network, vlan_id, (row_number() OVER (ORDER BY network) - 1)::int AS idx
+        FROM ip_subnets
+        WHERE name LIKE :name_like
+    )
+"""
+
+
+# Host h lives in subnet (h % n_subnets) at offset (h / n_subnets + 1).
+def _host_ip_sql(var: str) -> str:
+    return f"('10.0.0.0'::inet + (({var} % :n_subnets) * 256 + ({var} / :n_subnets) + 1))"
+
+
+def _host_vlan_sql(var: str) -> str:
+    return f"(100 + ({var} % :n_subnets) % 900)"
+
+
+def _host_mac_sql(var: str) -> str:
+    return f"lpad(to_hex(x'0a0000000000'::bigint + {var}), 12, '0')::macaddr"
+
+
+def build_statements(args: argparse.Namespace, status_type: str) -> list[tuple[str, str, dict]]:
+    """Return (label, sql, params) tuples in execution order."""
+    n_switches = args.switches
+    n_core = max(1, min(args.core_switches, n_switches - 1))
+    n_access = n_switches - n_core
+    hosts = min(args.arp_rows, args.ipam_addresses)
+    n_subnets = max(1, math.ceil(args.ipam_addresses / 254))
+    filler_macs = max(0, args.mac_rows - 2 * hosts)
+    name_like = f"{args.prefix}-%"
+
+    common = {
+        "name_like": name_like,
+        "prefix": args.prefix,
+        "n_core": n_core,
+        "n_access": n_access,
+        "n_subnets": n_subnets,
+        "hosts": hosts,
+    }
+
+    host_ip, host_vlan, host_mac = _host_ip_sql("h"), _host_vlan_sql("h"), _host_mac_sql("h")
+
+    statements: list[tuple[str, str, dict]] = [
+        (
+            "switches",
+            """
+            INSERT INTO switches (
+                name, ip_address, vendor, model, cli_enabled, cli_transport, ssh_port,
+                username, connection_timeout, enabled, is_reachable, snmp_enabled, snmp_version,
+                snmp_port, auto_collect_arp, auto_collect_mac, last_arp_collection_at,
+                last_mac_collection_at, last_collection_status, last_collection_message,
+                trunk_review_completed, created_at, updated_at
+            )
+            SELECT
+                :prefix || '-sw-' || lpad(g::text, 5, '0'),
+                '172.16.0.0'::inet + g,
+                CASE WHEN g < :n_core THEN 'cisco'
+                     ELSE (ARRAY['cisco', 'dell', 'juniper', 'alcatel'])[1 + g % 4] END,
+                CASE WHEN g < :n_core THEN 'N9K-C93180YC-EX'
+                     ELSE (ARRAY['C2960X-48TS-L', 'S4048-ON', 'EX4300-48T', '7220 IXR-D2'])[1 + g % 4] END,
+                TRUE, 'ssh', 22, 'synthetic', 30, TRUE, TRUE, FALSE, '2c', 161, TRUE, TRUE,
+                now() - (g % 60) * interval '1 minute',
+                now() - (g % 60) * interval '1 minute',
+                'success', 'synthetic dataset', FALSE, now(), now()
+            FROM generate_series(0, :n_switches - 1) AS g
+            """,
+            {**common, "n_switches": n_switches},
+        ),
+        (
+            "ip_subnets",
+            """
+            INSERT INTO ip_subnets (
+                name, network, description, vlan_id, gateway, enabled, auto_scan,
+                scan_interval, last_scan_at, created_at, updated_at
+            )
+            SELECT
+                :prefix || '-subnet-' || lpad(s::text, 5, '0'),
+                set_masklen('10.0.0.0'::inet + s * 256, 24),
+                'synthetic dataset',
+                100 + s % 900,
+                '10.0.0.0'::inet + (s * 256 + 254),
+                TRUE, FALSE, 3600,
+                now() - (s % 120) * interval '1 minute',
+                now(), now()
+            FROM generate_series(0, :n_subnets - 1) AS s
+            """,
+            common,
+        ),
+        (
+            "arp_table",
+            f"""
+            WITH {SWITCH_MAP_CTE}
+            INSERT INTO arp_table (
+                switch_id, ip_address, mac_address, vlan_id, interface, age_seconds,
+                collected_at, first_seen, last_seen
+            )
+            SELECT
+                sw.id, {host_ip}, {host_mac}, {host_vlan}, 'Vlan' || {host_vlan},
+                (h % 14400)::int,
+                now() - (h % 720) * interval '1 minute',
+                now() - interval '3 days',
+                now() - (h % 720) * interval '1 minute'
+            FROM generate_series(0, :hosts - 1) AS h
+            JOIN sw ON sw.idx = (h % :n_subnets) % :n_core
+            """,
+            common,
+        ),
+        (
+            "mac_table (host access ports)",
+            f"""
+            WITH {SWITCH_MAP_CTE}
+            INSERT INTO mac_table (
+                switch_id, mac_address, port_name, vlan_id, is_dynamic, collected_at, first_seen, last_seen
+            )
+            SELECT
+                sw.id, {host_mac}, 'Gi1/0/' || ((h / :n_access) % 48 + 1), {host_vlan}, 1,
+                now() - (h % 720) * interval '1 minute',
+                now() - interval '3 days',
+                now() - (h % 720) * interval '1 minute'
+            FROM generate_series(0, :hosts - 1) AS h
+            JOIN sw ON sw.idx = :n_core + (h % :n_access)
+            """,
+            common,
+        ),
+        (
+            "mac_table (core downlinks)",
+            f"""
+            WITH {SWITCH_MAP_CTE}
+            INSERT INTO mac_table (
+                switch_id, mac_address, port_name, vlan_id, is_dynamic, collected_at, first_seen, last_seen
+            )
+            SELECT
+                sw.id, {host_mac}, 'Eth1/' || ((h % :n_access) % 48 + 1), {host_vlan}, 1,
+                now() - (h % 720) * interval '1 minute',
+                now() - interval '3 days',
+                now() - (h % 720) * interval '1 minute'
+            FROM generate_series(0, :hosts - 1) AS h
+            JOIN sw ON sw.idx = (h % :n_subnets) % :n_core
+            """,
+            common,
+        ),
+        (
+            "mac_table (L2-only devices)",
+            f"""
+            WITH {SWITCH_MAP_CTE}
+            INSERT INTO mac_table (
+                switch_id, mac_address, port_name, vlan_id, is_dynamic, collected_at, first_seen, last_seen
+            )
+            SELECT
+                sw.id,
+                lpad(to_hex(x'0b0000000000'::bigint + k), 12, '0')::macaddr,
+                CASE WHEN k % 10 < 7 THEN 'Gi1/0/' || ((k / :n_access) % 48 + 1) ELSE 'Te1/1/1' END,
+                100 + k % 900,
+                1,
+                now() - (k % 720) * interval '1 minute',
+                now() - interval '3 days',
+                now() - (k % 720) * interval '1 minute'
+            FROM generate_series(0, :filler_macs - 1) AS k
+            JOIN sw ON sw.idx = :n_core + (k % :n_access)
+            """,
+            {**common, "filler_macs": filler_macs},
+        ),
+        (
+            "port_analysis",
+            """
+            WITH stats AS (
+                SELECT m.switch_id, m.port_name,
+                       count(DISTINCT m.mac_address) AS mac_count,
+                       count(DISTINCT m.vlan_id) AS unique_vlans
+                FROM mac_table m
+                JOIN switches s ON s.id = m.switch_id
+                WHERE s.name LIKE :name_like
+                GROUP BY m.switch_id, m.port_name
+            )
+            INSERT INTO port_analysis (
+                switch_id, port_name, mac_count, unique_vlans, port_type, confidence_score,
+                is_trunk_by_name, is_access_by_name, analyzed_at, created_at
+            )
+            SELECT
+                switch_id, port_name, mac_count, unique_vlans,
+                CASE WHEN mac_count >= :uplink_threshold THEN 'uplink'
+                     WHEN mac_count >= :trunk_threshold OR unique_vlans > 1 THEN 'trunk'
+                     ELSE 'access' END,
+                CASE WHEN mac_count = 1 THEN :single_mac_confidence ELSE 70 END,
+                CASE WHEN port_name LIKE 'Te%' OR port_name LIKE 'Eth%' THEN 1 ELSE 0 END,
+                CASE WHEN port_name LIKE 'Gi%' THEN 1 ELSE 0 END,
+                now(), now()
+            FROM stats
+            """,
+            {
+                **common,
+                "uplink_threshold": settings.PORT_UPLINK_THRESHOLD,
+                "trunk_threshold": settings.PORT_TRUNK_THRESHOLD,
+                "single_mac_confidence": settings.PORT_SINGLE_MAC_CONFIDENCE,
+            },
+        ),
+        (
+            "ip_addresses",
+            f"""
+            WITH {SUBNET_MAP_CTE}, {SWITCH_MAP_CTE}
+            INSERT INTO ip_addresses (
+                subnet_id, ip_address, status, hostname, hostname_source, dns_name, mac_address,
+                vendor, is_reachable, response_time, os_type, switch_id, switch_port, vlan_id,
+                last_seen_at, last_scan_at, scan_count, created_at, updated_at
+            )
+            SELECT
+                sn.id,
+                '10.0.0.0'::inet + (sn.idx * 256 + (g / :n_subnets) + 1),
+                (CASE WHEN g < :hosts THEN 'used' WHEN g % 5 = 0 THEN 'offline' ELSE 'available' END)::{status_type},
+                CASE WHEN g < :hosts THEN :prefix || '-host-' || g || '.corp.example' END,
+                CASE WHEN g < :hosts THEN 'DNS' END,
+                CASE WHEN g < :hosts THEN :prefix || '-host-' || g || '.corp.example' END,
+                CASE WHEN g < :hosts THEN {_host_mac_sql('g')} END,
+                CASE WHEN g < :hosts THEN (ARRAY['Dell Inc.', 'HP', 'Lenovo', 'VMware'])[1 + g % 4] END,
+                g < :hosts,
+                CASE WHEN g < :hosts THEN (1 + g % 20)::int END,
+                CASE WHEN g < :hosts THEN (ARRAY['windows', 'linux', 'macos'])[1 + g % 3] END,
+                CASE WHEN g < :hosts THEN sw.id END,
+                CASE WHEN g < :hosts THEN 'Gi1/0/' || ((g / :n_access) % 48 + 1) END,
+                sn.vlan_id,
+                CASE WHEN g < :hosts THEN now() - (g % 720) * interval '1 minute'
+                     WHEN g % 5 = 0 THEN now() - interval '2 days' END,
+                now() - (g % 120) * interval '1 minute',
+                10,
+                now(), now()
+            FROM generate_series(0, :ipam_addresses - 1) AS g
+            JOIN sn ON sn.idx = g % :n_subnets
+            LEFT JOIN sw ON sw.idx = :n_core + (g % :n_access)
+            WHERE (g / :n_subnets) < 254
+            """,
+            {**common, "ipam_addresses": args.ipam_addresses},
+        ),
+        (
+            "ip_scan_history",
+            """
+            INSERT INTO ip_scan_history (
+                ip_address_id, is_reachable, response_time, hostname, mac_address, switch_id,
+                switch_port, vlan_id, status_changed, hostname_changed, os_changed, mac_changed,
+                switch_changed, port_changed, scanned_at
+            )
+            SELECT
+                ip.id, ip.is_reachable, ip.response_time, ip.hostname, ip.mac_address, ip.switch_id,
+                ip.switch_port, ip.vlan_id,
+                (ip.id + r) % 20 = 0, (ip.id + r) % 50 = 0, FALSE, FALSE, FALSE, FALSE,
+                now() - r * interval '12 hours' - (ip.id % 600) * interval '1 minute'
+            FROM ip_addresses ip
+            JOIN ip_subnets s ON s.id = ip.subnet_id AND s.name LIKE :name_like
+            CROSS JOIN generate_series(0, :history_per_ip - 1) AS r
+            WHERE ip.status <> 'available'
+            """,
+            {**common, "history_per_ip": args.history_per_ip},
+        ),
+        (
+            "query_history",
+            f"""
+            WITH {SWITCH_MAP_CTE}
+            INSERT INTO query_history (
+                target_ip, found_mac, switch_id, switch_name, port_name, vlan_id,
+                query_status, query_time_ms, queried_at
+            )
+            SELECT
+                {_host_ip_sql('q')},
+                CASE WHEN q % 10 <> 0 THEN {_host_mac_sql('q')} END,
+                sw.id, (SELECT name FROM switches WHERE id = sw.id),
+                'Gi1/0/' || ((q / :n_access) % 48 + 1),
+                {_host_vlan_sql('q')},
+                CASE WHEN q % 10 <> 0 THEN 'success' ELSE 'not_found' END,
+                (5 + q % 200)::int,
+                now() - (q % 43200) * interval '1 minute'
+            FROM (SELECT (g * 7919) % :hosts AS q FROM generate_series(0, :query_history - 1) AS g) AS qs
+            JOIN sw ON sw.idx = :n_core + (q % :n_access)
+            """,
+            {**common, "query_history": args.query_history},
+        ),
+    ]
+    return statements
+
+
+async def purge(db, prefix: str) -> dict:
+    name_like = f"{prefix}-%"
+    counts = {}
+    for label, sql in (
+        ("collection_jobs", "DELETE FROM collection_jobs WHERE switch_id IN (SELECT id FROM switches WHERE name LIKE :name_like)"),
+        ("query_history", "DELETE FROM query_history WHERE switch_name LIKE :name_like"),
+        ("ip_subnets", "DELETE FROM ip_subnets WHERE name LIKE :name_like"),
+        ("switches", "DELETE FROM switches WHERE name LIKE :name_like"),
+    ):
+        result = await db.execute(text(sql), {"name_like": name_like})
+        counts[label] = result.rowcount or 0
+        await db.commit()
+    return counts
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--prefix", default="synth", help="Name prefix that marks synthetic rows")
+    parser.add_argument("--switches", type=int, default=2000)
+    parser.add_argument("--core-switches", type=int, default=20, help="Gateway switches holding ARP tables")
+    parser.add_argument("--mac-rows", type=int, default=1_000_000)
+    parser.add_argument("--arp-rows", type=int, default=100_000)
+    parser.add_argument("--ipam-addresses", type=int, default=200_000)
+    parser.add_argument("--history-per-ip", type=int, default=2, help="Scan history rows per used/offline IP")
+    parser.add_argument("--query-history", type=int, default=50_000)
+    parser.add_argument("--purge-only", action="store_true", help="Only delete previously generated data")
+    args = parser.parse_args()
+
+    if args.switches < 2:
+        parser.error("--switches must be at least 2")
+
+    report: dict = {"prefix": args.prefix, "steps": []}
+    async with AsyncSessionLocal() as db:
+        started = time.perf_counter()
+        report["purged"] = await purge(db, args.prefix)
+        if args.purge_only:
+            print(json.dumps(report, indent=2))
+            return
+
+        # ip_addresses.status is a native enum when created by SQLAlchemy and
+        # VARCHAR when created by the init scripts.
+        status_type = await db.scalar(text(
+            "SELECT udt_name FROM information_schema.columns "
+            "WHERE table_name = 'ip_addresses' AND column_name = 'status'"
+        )) or "varchar"
+
+        for label, sql, params in build_statements(args, status_type):
+            step_started = time.perf_counter()
+            result = await db.execute(text(sql), params)
+            await db.commit()
+            step = {"table": label, "rows": result.rowcount, "seconds": round(time.perf_counter() - step_started, 2)}
+            report["steps"].append(step)
+            print(f"  {label}: {step['rows']} rows in {step['seconds']}s", flush=True)
+
+        for table in ("switches", "arp_table", "mac_table", "port_analysis", "ip_subnets",
+                      "ip_addresses", "ip_scan_history", "query_history"):
+            await db.execute(text(f"ANALYZE {table}"))
+        await db.commit()
+        report["total_seconds"] = round(time.perf_counter() - started, 2)
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Rebuild ARP/MAC tables from the raw output archive without polling switches.
+
+Needs RAW_OUTPUT_ARCHIVE_ENABLED=true on the collector so captures exist. For
+each selected switch the latest archived ARP and/or MAC output is parsed again
+with the current parsers and replaces that switch's stored rows (MAC re-parse
+also refreshes port analysis). Outputs that now parse to zero entries are
+reported but never stored.
+
+Usage examples:
+  PYTHONPATH=backend/src python scripts/reparse_raw_output.py --dry-run
+  PYTHONPATH=backend/src python scripts/reparse_raw_output.py --switch-id 12 --switch-id 15 --type mac
+  PYTHONPATH=backend/src python scripts/reparse_raw_output.py --vendor dell --parser dell_force10 --match-locations
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+BACKEND_SRC = REPO_ROOT / "backend" / "src"
+
+if str(BACKEND_SRC) not in sys.path:
+    sys.path.insert(0, str(BACKEND_SRC))
+
+# Some operator environments override DEBUG with non-boolean values such as
+# "release", which breaks pydantic settings parsing. Force a safe default here.
+os.environ["DEBUG"] = os.environ.get("DEBUG", "false").lower() if os.environ.get("DEBUG", "").lower() in {"true", "false", "1", "0"} else "false"
+
+from sqlalchemy import select  # noqa: E402
+
+from core.database import AsyncSessionLocal  # noqa: E402
+from models.switch import Switch  # noqa: E402
+from services.raw_output_archive import COMMAND_TYPES, raw_output_archive  # noqa: E402
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--switch-id", type=int, action="append", default=[], help="Limit to this switch (repeatable)")
+    parser.add_argument("--vendor", help="Limit to switches of this vendor")
+    parser.add_argument("--type", choices=COMMAND_TYPES, action="append", default=[],
+                        help="Command type to re-parse (repeatable, default: arp and mac)")
+    parser.add_argument("--parser", help="Override the archived parser type")
+    parser.add_argument("--dry-run", action="store_true", help="Parse and report, do not touch the tables")
+    parser.add_argument("--match-locations", action="store_true",
+                        help="Recompute IP locations after storing re-parsed data")
+    parser.add_argument("--details", action="store_true", help="Print one result per switch and command")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    async with AsyncSessionLocal() as db:
+        switch_ids = list(args.switch_id) or None
+        if args.vendor:
+            stmt = select(Switch.id).where(Switch.vendor == args.vendor)
+            if switch_ids:
+                stmt = stmt.where(Switch.id.in_(switch_ids))
+            switch_ids = list((await db.execute(stmt)).scalars().all())
+
+        results = await raw_output_archive.reparse(
+            db,
+            switch_ids=switch_ids,
+            command_types=args.type or COMMAND_TYPES,
+            parser_override=args.parser,
+            dry_run=args.dry_run,
+        )
+
+        located = None
+        if args.match_locations and not args.dry_run and any(r["stored"] for r in results):
+            from services.network_data_collector import network_data_collector
+            located = await network_data_collector._match_ip_locations(db)
+            await db.commit()
+
+    summary = {
+        "dry_run": args.dry_run,
+        "captures": len(results),
+        "stored": sum(1 for r in results if r["stored"]),
+        "errors": sum(1 for r in results if r.get("error")),
+        "changed_entry_counts": sum(1 for r in results if r["entries_after"] != r["entries_before"]),
+        "entries_before": sum(r["entries_before"] for r in results),
+        "entries_after": sum(r["entries_after"] for r in results),
+        "ips_located": located,
+        "elapsed_seconds": round(time.perf_counter() - started, 2),
+    }
+    if args.details:
+        summary["results"] = results
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())